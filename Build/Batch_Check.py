@@ -0,0 +1,120 @@
+# Copyright (c) 2025 [Grant]
+# Licensed under the MIT License.
+# See LICENSE in the project root for license information.
+"""
+批量函数自检 / Self-check of Microfluid_Batch against the scalar calculator functions
+
+在随机输入上逐个比较 Microfluid_Batch 与 Microfluid_Core 中同名的标量函数。
+整数次幂在标量函数中写作 ** (libm pow)，批量版写成连乘，两者最多相差几个 ULP，
+因此按相对误差 RTOL 比较；RECT_EXACT 的批量版为查表插值，容差为 RTOL_TABLE。
+另外检查 RECT_EXACT 在零尺寸和 NaN 尺寸下与 RECT 一样给出 inf/NaN 或抛出 ZeroDivisionError。
+
+用法 / Usage:
+    python Batch_Check.py
+    python Batch_Check.py --samples 100000 --seed 1
+"""
+import argparse
+import sys
+
+import numpy as np
+
+import Microfluid_Batch as mb
+import Microfluid_Core as core
+
+RTOL = 1e-14
+RTOL_TABLE = 1e-10
+
+# 名称 -> (输入个数, 调用方式, 相对容差)；调用方式对批量模块和标量模块写法相同
+CASES = {
+    "droplet_d_to_v": (1, lambda m, d: m.droplet_d_to_v(d), RTOL),
+    "droplet_v_to_d": (1, lambda m, v: m.droplet_v_to_d(v), RTOL),
+    "mass_to_quantity": (2, lambda m, mass, t: m.mass_to_quantity(mass, t), RTOL),
+    "quantity_to_velocity (rect)": (3, lambda m, Q, w, h: m.quantity_to_velocity(Q, w, h), RTOL),
+    "quantity_to_velocity (cyl)": (2, lambda m, Q, d: m.quantity_to_velocity(Q, None, d=d, shape="cyl"), RTOL),
+    "velocity_to_quantity (rect)": (3, lambda m, v, w, h: m.velocity_to_quantity(v, w, h), RTOL),
+    "velocity_to_quantity (cyl)": (2, lambda m, v, d: m.velocity_to_quantity(v, None, d=d, shape="cyl"), RTOL),
+    "quantity_to_mass": (2, lambda m, Q, t: m.quantity_to_mass(Q, t), RTOL),
+    "resistance_to_pressure": (2, lambda m, Q, r: m.resistance_to_pressure(Q, r), RTOL),
+    "pressure_to_resistance": (2, lambda m, P, Q: m.pressure_to_resistance(P, Q), RTOL),
+    "resistance_factor_cyl": (2, lambda m, d, l: m.resistance_factor_cyl(d, l), RTOL),
+    "resistance_factor_rect": (3, lambda m, w, h, l: m.resistance_factor_rect(w, h, l), RTOL),
+    "resistance_factor_squa": (3, lambda m, w, h, l: m.resistance_factor_squa(w, h, l), RTOL),
+    "resistance_factor_rect_mod": (3, lambda m, w, h, l: m.resistance_factor_rect_mod(w, h, l), RTOL),
+    "resistance_factor_rect_exact": (3, lambda m, w, h, l: m.resistance_factor_rect_exact(w, h, l), RTOL_TABLE),
+    "channel_v_cyl": (2, lambda m, d, l: m.channel_v_cyl(d, l), RTOL),
+    "channel_v_cub": (3, lambda m, w, h, l: m.channel_v_cub(w, h, l), RTOL),
+}
+
+def check_case(name, samples, rng):
+    """返回发现的问题列表 (空表示通过)"""
+    nargs, call, rtol = CASES[name]
+    # 正的尺寸/流量，跨几个数量级
+    args = [np.exp(rng.uniform(np.log(1e-2), np.log(1e4), samples)) for _ in range(nargs)]
+    batch = call(mb, *args)
+    scalar = [call(core, *row) for row in zip(*(a.tolist() for a in args))]
+    if isinstance(batch, tuple):
+        pairs = [(np.asarray(b), np.array([s[k] for s in scalar])) for k, b in enumerate(batch)]
+    else:
+        pairs = [(np.asarray(batch), np.array(scalar))]
+    problems = []
+    for got, expected in pairs:
+        err = np.abs(got - expected) / np.abs(expected)
+        worst = int(np.argmax(err))
+        if not err[worst] <= rtol:
+            inputs = ", ".join(f"{a[worst]!r}" for a in args)
+            problems.append(f"({inputs}): 批量 {got[worst]!r} / 标量 {expected[worst]!r} (相对误差 {err[worst]:.2e})")
+    return problems
+
+# 零尺寸与 NaN 尺寸 (w, h, l)
+DEGENERATE = [(0.0, 0.0, 1.0), (0.0, 10.0, 1.0), (np.nan, 10.0, 1.0), (np.nan, np.nan, 1.0), (10.0, 10.0, np.nan)]
+
+def check_degenerate():
+    """RECT_EXACT 在零尺寸、NaN 尺寸下与 RECT 的表现一致：批量版给出相同位置的 inf/NaN，
+    标量版抛出相同的异常或同样返回 NaN (不报 IndexError、不陷入死循环)"""
+    problems = []
+    w, h, l = (np.array(col) for col in zip(*DEGENERATE))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exact = mb.resistance_factor_rect_exact(w, h, l)
+        rect = mb.resistance_factor_rect(w, h, l)
+    for k, dims in enumerate(DEGENERATE):
+        if np.isnan(exact[k]) != np.isnan(rect[k]) or np.isinf(exact[k]) != np.isinf(rect[k]):
+            problems.append(f"批量 / batch {dims}: RECT_EXACT {exact[k]!r}, RECT {rect[k]!r}")
+        results = []
+        for func in (core.resistance_factor_rect_exact, core.resistance_factor_rect):
+            try:
+                results.append(func(*dims))
+            except ZeroDivisionError as e:
+                results.append(type(e))
+        got, expected = results
+        if isinstance(expected, type) or isinstance(got, type):
+            same = got is expected
+        else:
+            same = np.isnan(got) == np.isnan(expected) and np.isinf(got) == np.isinf(expected)
+        if not same:
+            problems.append(f"标量 / scalar {dims}: RECT_EXACT {got!r}, RECT {expected!r}")
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量函数自检 / Batch vs scalar self-check")
+    parser.add_argument("--samples", type=int, default=10000, help="每个函数的随机输入个数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    failed = False
+    for name in CASES:
+        problems = check_case(name, args.samples, rng)
+        print(f"{name:<32}{'ok' if not problems else 'FAILED'}")
+        for msg in problems:
+            print(f"    {msg}")
+        failed |= bool(problems)
+    problems = check_degenerate()
+    print(f"{'RECT_EXACT 零/NaN 尺寸':<28}{'ok' if not problems else 'FAILED'}")
+    for msg in problems:
+        print(f"    {msg}")
+    failed |= bool(problems)
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,11 @@
 # Copyright (c) 2025 [Grant]
 # Licensed under the MIT License.
 # See LICENSE in the project root for license information.
-import numpy as np
 
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 
-import matplotlib.patches as mpatches
-
 import tkinter as tk
 
 from tkinter import ttk, filedialog, messagebox
@@ -17,6 +14,9 @@ import json
 
 from datetime import datetime
 
+from Microfluid_Geometry import IncrementalGeometry, ParamSnapshot
+from Microfluid_Render import draw_primitives, fit_view, export_dxf
+
 class MicrochannelTool:
     def __init__(self, master):
         self.master = master
@@ -41,6 +41,7 @@ class MicrochannelTool:
             "Angle_1": tk.StringVar(value="60"),
             "Width_r2": tk.StringVar(value="0.1"),
             "Length_r3": tk.StringVar(value="0.3"),
+            "Stagger": tk.StringVar(value="0"),
         }
         self.defaults = {k: float(v.get()) if v.get() else 0.0 for k, v in self.params.items()}
         self.descriptions = {
@@ -57,12 +58,16 @@ class MicrochannelTool:
             "Angle_1": "阀体斜边角度 Angle_1 (deg)",
             "Width_r2": "微柱宽度 Width_r2 (mm)",
             "Length_r3": "微柱长度 Length_r3 (mm)",
+            "Stagger": "微柱交错排布 Stagger (0 矩形 / 1 相邻行错开半个列距)",
         }
         self.editable_params = list(self.params)
         self.bigFont = ('Helvetica', 12)
         self.headerFont = ('Helvetica', 12, 'bold')
-        self.fig, self.ax = plt.subplots(figsize=(8, 6))
-        self.geoPatch = {k: [] for k in self.params}
+        self.fig = Figure(figsize=(8, 6))
+        self.ax = self.fig.add_subplot()
+        self.geoArtists = None
+        self.geometry = IncrementalGeometry("BurstValve2")
+        self.snapshot = ParamSnapshot("BurstValve2")
         self.stsVar = tk.StringVar(value="就绪 / Ready")
         self.curHlt = None
 
@@ -134,225 +139,42 @@ class MicrochannelTool:
             self.params[param].set(str(self.defaults[param]))
             messagebox.showerror("错误 / Error", f"无效的数值 / Invalid number: {e}")
 
-    def getParam(self, name):
-        try:
-            if name in self.params:
-                return float(self.params[name].get())
-            elif name == "Angle_1_rad":
-                return np.deg2rad(self.getParam("Angle_1"))
-            elif name == "Distance_1":
-                Radius_1 = self.getParam("Radius_1")
-                Width_r1 = self.getParam("Width_r1")
-                val = Radius_1**2 - (Width_r1**2)/4
-
-                if val < 0:
-                    raise ValueError("Radius_1 必须大于等于 Width_r1/2")
-                return Radius_1 - np.sqrt(val)
-            elif name == "Length_1":
-                Length_3 = self.getParam("Length_3")
-                Angle_1_rad = self.getParam("Angle_1_rad")
-                return Length_3 * np.cos(Angle_1_rad)
-            elif name == "Length_5":
-                Length_3 = self.getParam("Length_3")
-                Angle_1_rad = self.getParam("Angle_1_rad")
-                return 2 * Length_3 * np.sin(Angle_1_rad)
-            elif name == "Mov_x":
-                Distance_v = self.getParam("Distance_v")
-                Length_r3 = self.getParam("Length_r3")
-                return Distance_v + Length_r3
-
-            elif name == "Mov_y":
-                Distance_r = self.getParam("Distance_r")
-                Width_r2 = self.getParam("Width_r2")
-                return Distance_r + Width_r2
-
-            else:
-                return 0.0
-
-        except Exception as e:
-            messagebox.showerror("参数错误 / Parameter Error", f"无法计算或获取参数'{name}': {e}")
-            if name in self.defaults:
-                self.params[name].set(str(self.defaults[name]))
-                return self.defaults[name]
-            else:
-                return 0.0
+    def paramValues(self):
+        """界面参数 -> 数值映射，作为几何内核的输入；无法解析的值恢复为默认值"""
+        values = {}
+        for name, var in self.params.items():
+            try:
+                values[name] = float(var.get())
+            except (ValueError, tk.TclError):
+                messagebox.showerror("参数错误 / Parameter Error", f"无法解析参数'{name}'\n将使用默认值.")
+                var.set(str(self.defaults[name]))
+                values[name] = self.defaults[name]
+        return values
 
     def highlightComponent(self, paramName):
         self.curHlt = paramName
-
-        for patches in self.geoPatch.values():
-            for patch in patches:
-                if hasattr(patch, 'set_edgecolor'): patch.set_edgecolor('blue')
-                elif hasattr(patch, 'set_color'): patch.set_color('blue')
-        if paramName in self.geoPatch:
-            for patch in self.geoPatch[paramName]:
-                if hasattr(patch, 'set_edgecolor'): patch.set_edgecolor('red')
-                elif hasattr(patch, 'set_color'): patch.set_color('red')
-        self.canvas.draw()
+        if self.geoArtists is not None:
+            self.geoArtists.highlight(paramName)
         self.stsVar.set(f"已选择 / Selected: {paramName}")
 
     def calculateGeometry(self):
-        Length_r1 = self.getParam("Length_r1")
-        Width_r1 = self.getParam("Width_r1")
-        Radius_1 = self.getParam("Radius_1")
-        Length_r2 = self.getParam("Length_r2")
-        Number_v = int(round(self.getParam("Number_v")))
-        Number_r = int(round(self.getParam("Number_r")))
-        Distance_v = self.getParam("Distance_v")
-        Distance_r = self.getParam("Distance_r")
-        Length_3 = self.getParam("Length_3")
-        Radius_2 = self.getParam("Radius_2")
-
-        Angle_1 = self.getParam("Angle_1")
-        Angle_1_rad = self.getParam("Angle_1_rad")
-        Distance_1 = self.getParam("Distance_1")
-        Length_1 = self.getParam("Length_1")
-        Length_5 = self.getParam("Length_5")
-        Mov_x = self.getParam("Mov_x")
-        Mov_y = self.getParam("Mov_y")
-        Width_r2 = self.getParam("Width_r2")
-        Length_r3 = self.getParam("Length_r3")
-
-        # 圆1
-
-        circles = []
-        c1 = (-Radius_1, Width_r1/2)
-        circles.append((c1, Radius_1))
-        # 圆2
-
-        c2 = (Length_r1+2*Length_1+Length_r2+Length_r1+Radius_1, Width_r1/2)
-        circles.append((c2, Radius_1))
-
-        # 圆弧
-
-        arcs = []
-        arc1_center = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2), Width_r1+Length_1*np.tan(Angle_1_rad)-Radius_2)
-        arcs.append((arc1_center, Radius_2, 90, 90+Angle_1))
-        arc2_center = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2), -Length_1*np.tan(Angle_1_rad)+Radius_2)
-        arcs.append((arc2_center, Radius_2, -90-Angle_1, -90))
-        arc3_center = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2), Width_r1+Length_1*np.tan(Angle_1_rad)-Radius_2)
-        arcs.append((arc3_center, Radius_2, 90-Angle_1, 90))
-        arc4_center = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2), -Length_1*np.tan(Angle_1_rad)+Radius_2)
-        arcs.append((arc4_center, Radius_2, -90, -90+Angle_1))
-
-        # 线段
-
-        segments = []
-        seg1_p1 = (-Distance_1, Width_r1)
-        seg1_p2 = (Length_r1, Width_r1)
-        segments.append((seg1_p1, seg1_p2))
-        seg2_p1 = (-Distance_1, 0)
-        seg2_p2 = (Length_r1, 0)
-        segments.append((seg2_p1, seg2_p2))
-        seg3_p1 = (Length_r1, Width_r1)
-        seg3_p2 = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2)-Radius_2*np.sin(Angle_1_rad),
-                   Width_r1+Length_1*np.tan(Angle_1_rad)-Radius_2+Radius_2*np.cos(Angle_1_rad))
-        segments.append((seg3_p1, seg3_p2))
-        seg4_p1 = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2), Width_r1+Length_1*np.tan(Angle_1_rad))
-        seg4_p2 = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2), Width_r1+Length_1*np.tan(Angle_1_rad))
-        segments.append((seg4_p1, seg4_p2))
-        seg5_p1 = (Length_r1+2*Length_1+Length_r2, Width_r1)
-        seg5_p2 = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2)+Radius_2*np.sin(Angle_1_rad),
-                   Width_r1+Length_1*np.tan(Angle_1_rad)-Radius_2+Radius_2*np.cos(Angle_1_rad))
-        segments.append((seg5_p1, seg5_p2))
-        seg6_p1 = (Length_r1, 0)
-        seg6_p2 = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2)-Radius_2*np.sin(Angle_1_rad),
-                   -Length_1*np.tan(Angle_1_rad)+Radius_2-Radius_2*np.cos(Angle_1_rad))
-        segments.append((seg6_p1, seg6_p2))
-        seg7_p1 = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2), -Length_1*np.tan(Angle_1_rad))
-        seg7_p2 = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2), -Length_1*np.tan(Angle_1_rad))
-        segments.append((seg7_p1, seg7_p2))
-        seg8_p1 = (Length_r1+2*Length_1+Length_r2, 0)
-        seg8_p2 = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2)+Radius_2*np.sin(Angle_1_rad),
-                   -Length_1*np.tan(Angle_1_rad)+Radius_2-Radius_2*np.cos(Angle_1_rad))
-        segments.append((seg8_p1, seg8_p2))
-        seg9_p1 = (Length_r1+2*Length_1+Length_r2, 0)
-        seg9_p2 = (Length_r1+2*Length_1+Length_r2+Length_r1+Distance_1, 0)
-        segments.append((seg9_p1, seg9_p2))
-        seg10_p1 = (Length_r1+2*Length_1+Length_r2, Width_r1)
-        seg10_p2 = (Length_r1+2*Length_1+Length_r2+Length_r1+Distance_1, Width_r1)
-        segments.append((seg10_p1, seg10_p2))
-
-        # 矩形阵列
-
-        rectangles = []
-        rect_x0 = Length_r1+Length_1+Length_r2/2-Length_r3/2-((Number_v-1)*Mov_x/2)
-        rect_y0 = Width_r1/2-Width_r2/2-((Number_r-1)*Mov_y/2)
-        for i in range(Number_v):
-            for j in range(Number_r):
-                x = rect_x0 + i*Mov_x
-
-                y = rect_y0 + j*Mov_y
-
-                rectangles.append((x, y, Length_r3, Width_r2))  # 左下角x,y,宽,高
-
-        return {"circles": circles, "arcs": arcs, "segments": segments, "rectangles": rectangles}
+        return self.geometry.cache.get(self.paramValues())
 
     def updateModel(self):
         try:
-            self.ax.clear()
-            self.geoPatch = {k: [] for k in self.params}
-            geo = self.calculateGeometry()
-            # 圆
-
-            for center, radius in geo["circles"]:
-                patch = mpatches.Circle(center, radius, fill=False, edgecolor='blue', lw=1.5)
-                self.ax.add_patch(patch)
-                self.geoPatch["Radius_1"].append(patch)
-            # 圆弧
-
-            for center, radius, t1, t2 in geo["arcs"]:
-                patch = mpatches.Arc(center, 2*radius, 2*radius, angle=0, theta1=t1, theta2=t2, edgecolor='blue', lw=1.5)
-                self.ax.add_patch(patch)
-                self.geoPatch["Radius_2"].append(patch)
-            # 线段
-
-            for p0, p1 in geo["segments"]:
-                line = plt.Line2D([p0[0], p1[0]], [p0[1], p1[1]], color='blue', lw=1.5)
-                self.ax.add_line(line)
-                self.geoPatch.setdefault("Length_1", []).append(line)
-                self.geoPatch["Length_r1"].append(line)
-            # 矩形阵列
-
-            for x, y, w, h in geo["rectangles"]:
-                patch = mpatches.Rectangle((x, y), w, h, fill=False, edgecolor='blue', lw=1.5)
-                self.ax.add_patch(patch)
-                self.geoPatch["Length_r3"].append(patch)
-                self.geoPatch["Width_r2"].append(patch)
-            # autoscale
-
-            all_x, all_y = [], []
-            for patch in self.ax.patches:
-                if isinstance(patch, mpatches.Circle):
-                    center, r = patch.center, patch.radius
-
-                    all_x.extend([center[0] - r, center[0] + r])
-                    all_y.extend([center[1] - r, center[1] + r])
-                elif isinstance(patch, mpatches.Arc):
-                    center, w, h = patch.center, patch.width, patch.height
-
-                    all_x.extend([center[0] - w/2, center[0] + w/2])
-                    all_y.extend([center[1] - h/2, center[1] + h/2])
-                elif isinstance(patch, mpatches.Rectangle):
-                    x0, y0 = patch.get_xy()
-                    w, h = patch.get_width(), patch.get_height()
-                    all_x.extend([x0, x0+w])
-                    all_y.extend([y0, y0+h])
-            for line in self.ax.lines:
-                x_data, y_data = line.get_data()
-                all_x.extend(x_data)
-                all_y.extend(y_data)
-            if not all_x or not all_y:
-                all_x, all_y = [-1, 1], [-1, 1]
-            pad = max((max(all_x)-min(all_x))*0.1, (max(all_y)-min(all_y))*0.1, 1)
-            self.ax.set_xlim(min(all_x) - pad, max(all_x) + pad)
-            self.ax.set_ylim(min(all_y) - pad, max(all_y) + pad)
-            self.ax.set_aspect('equal', adjustable='box')
-            self.ax.grid(True, linestyle='--', alpha=0.5)
-            self.ax.set_title("BurstValve2", fontsize=14)
-            self.ax.set_xlabel("X (mm)")
-            self.ax.set_ylabel("Y (mm)")
-            self.canvas.draw()
+            self.snapshot = ParamSnapshot("BurstValve2", self.paramValues())
+            geo = self.geometry.update(self.snapshot)
+            if self.geoArtists is None:
+                self.geoArtists = draw_primitives(self.ax, geo)
+                self.ax.set_aspect('equal', adjustable='box')
+                self.ax.grid(True, linestyle='--', alpha=0.5)
+                self.ax.set_title("BurstValve2", fontsize=14)
+                self.ax.set_xlabel("X (mm)")
+                self.ax.set_ylabel("Y (mm)")
+            else:
+                self.geoArtists.update(geo, self.geometry.changed)
+            fit_view(self.ax, geo)
+            self.canvas.draw_idle()
             if self.curHlt:
                 self.highlightComponent(self.curHlt)
             self.stsVar.set("模型更新成功 / Model updated successfully")
@@ -365,20 +187,7 @@ class MicrochannelTool:
             filename = filedialog.asksaveasfilename(defaultextension=".dxf", filetypes=[("DXF Files", "*.dxf"), ("All Files", "*.*")], title="保存DXF / Save DXF")
             if not filename: return
 
-            import ezdxf
-
-            doc = ezdxf.new('R2010')
-            msp = doc.modelspace()
-            geo = self.calculateGeometry()
-            for center, radius in geo["circles"]:
-                msp.add_circle(center, radius)
-            for center, radius, t1, t2 in geo["arcs"]:
-                msp.add_arc(center, radius, t1, t2)
-            for p0, p1 in geo["segments"]:
-                msp.add_line(p0, p1)
-            for x, y, w, h in geo["rectangles"]:
-                msp.add_lwpolyline([(x, y), (x+w, y), (x+w, y+h), (x, y+h), (x, y)])
-            doc.saveas(filename)
+            export_dxf(filename, self.calculateGeometry())
             self.stsVar.set(f"已导出DXF / DXF Exported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导出到DXF / Exported to DXF:\n{filename}")
         except Exception as e:
@@ -420,7 +229,7 @@ class MicrochannelTool:
             for key, value in imported_params.items():
                 if key in self.params: self.params[key].set(str(value))
             self.updateModel()
-            if "model_name" in data: self.ax.set_title(data["model_name"], fontsize=14); self.canvas.draw()
+            if "model_name" in data: self.ax.set_title(data["model_name"], fontsize=14); self.canvas.draw_idle()
             self.stsVar.set(f"已导入JSON / JSON Imported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导入JSON / Imported from JSON:\n{filename}")
         except Exception as e:
@@ -428,7 +237,6 @@ class MicrochannelTool:
             self.stsVar.set("导入失败 / Import Failed")
 
     def quitApplication(self):
-        plt.close('all')
         self.master.quit()
         self.master.destroy()
 
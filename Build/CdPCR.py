@@ -1,14 +1,11 @@
 # Copyright (c) 2025 [Grant]
 # Licensed under the MIT License.
 # See LICENSE in the project root for license information.
-import numpy as np
 
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 
-import matplotlib.patches as mpatches
-
 import tkinter as tk
 
 from tkinter import ttk, filedialog, messagebox
@@ -17,6 +14,9 @@ import json
 
 from datetime import datetime
 
+from Microfluid_Geometry import IncrementalGeometry, ParamSnapshot
+from Microfluid_Render import draw_primitives, fit_view, export_dxf
+
 class MicrochannelTool:
     # ───────────────────────────── 初始化 ─────────────────────────────
 
@@ -74,8 +74,11 @@ class MicrochannelTool:
         self.editable_params = list(self.params)
 
         self.bigFont = ('Helvetica', 12)
-        self.fig, self.ax = plt.subplots(figsize=(8, 6))
-        self.geoPatch = {k: [] for k in self.params}
+        self.fig = Figure(figsize=(8, 6))
+        self.ax = self.fig.add_subplot()
+        self.geoArtists = None
+        self.geometry = IncrementalGeometry("CdPCR")
+        self.snapshot = ParamSnapshot("CdPCR")
         self.stsVar = tk.StringVar(value="就绪 / Ready")
         self.curHlt = None
 
@@ -149,255 +152,47 @@ class MicrochannelTool:
             self.params[p].set(str(self.defaults[p]))
             messagebox.showerror("错误 / Error", "无效数字 / Invalid number")
 
-    def getParam(self, name):
-        if name in self.params:
-            return float(self.params[name].get())
-        # 计算参数
-
-        if name == "Distance_1":
-            R, W = self.getParam("Radius_1"), self.getParam("Width_r1")
-            return R - np.sqrt(max(R**2 - (W**2)/4, 0))
-        if name == "Distance_2":
-            R, W = self.getParam("Radius_1"), self.getParam("Width_Res")
-            return R - np.sqrt(max(R**2 - (W**2)/4, 0))
-        if name == "Length_v1":
-            return self.getParam("Length_v3")/2 - self.getParam("Width_Res")*2
-
-        if name == "Angle_rad":
-            return np.deg2rad(self.getParam("Angle"))
-        return 0.0
+    def paramValues(self):
+        """界面参数 -> 数值映射，作为几何内核的输入；无法解析的值恢复为默认值"""
+        values = {}
+        for name, var in self.params.items():
+            try:
+                values[name] = float(var.get())
+            except (ValueError, tk.TclError):
+                messagebox.showerror("参数错误 / Parameter Error", f"无法解析参数'{name}'\n将使用默认值.")
+                var.set(str(self.defaults[name]))
+                values[name] = self.defaults[name]
+        return values
 
     # ─────────────────────────── 高亮 ────────────────────────────
 
     def highlightComponent(self, key):
         self.curHlt = key
-
-        for patches in self.geoPatch.values():
-            for p in patches:
-                if hasattr(p, 'set_edgecolor'): p.set_edgecolor('blue')
-                elif hasattr(p, 'set_color'):  p.set_color('blue')
-        if key in self.geoPatch:
-            for p in self.geoPatch[key]:
-                if hasattr(p, 'set_edgecolor'): p.set_edgecolor('red')
-                elif hasattr(p, 'set_color'):  p.set_color('red')
-        self.canvas.draw()
+        if self.geoArtists is not None:
+            self.geoArtists.highlight(key)
         self.stsVar.set(f"已选择 / Selected: {key}")
 
     # ────────────────────── 几何计算（核心） ─────────────────────
 
     def calculateGeometry(self):
-        # 基础参数
-
-        R1   = self.getParam("Radius_1")
-        Dr1  = self.getParam("Distance_r1")
-        Lv2  = self.getParam("Length_v2")
-        Lr1  = self.getParam("Length_r1")
-        Wr1  = self.getParam("Width_r1")
-        WOr  = self.getParam("Width_Or")
-        LOr  = self.getParam("Length_Or")
-        WRes = self.getParam("Width_Res")
-        LOut = self.getParam("Length_Out")
-        Lr2  = self.getParam("Length_r2")
-        Lr3  = self.getParam("Length_r3")
-        Num  = int(round(self.getParam("Number")))
-        D1   = self.getParam("Distance_1")
-        D2   = self.getParam("Distance_2")
-        Lv1  = self.getParam("Length_v1")
-
-        # 辅助基点
-
-        base_x = R1 + Dr1 + Wr1 + LOr + LOut + Lr3
-
-        y_down = -WRes + Lv1
-
-        y_up   =  WRes - Lv1
-
-        # ─── 圆 ───
-
-        circles = [
-            ((0, 0), R1),
-            ((R1 + Dr1 - Lr1 - Wr1/2, 0), R1),
-            ((base_x + 3*WRes + 4*Num*WRes + WRes + Lr3 + R1 , 0), R1),
-        ]
-
-        # ─── 圆弧 ───
-
-        arcs = []
-
-        # (1)(2) 左端第一对圆弧
-
-        c1 = (base_x + 1.5*WRes, y_down)
-        arcs += [(c1, 1.5*WRes,   0, 180),  # 大弧
-
-                 (c1, 0.5*WRes,   0, 180)]  # 小弧
-
-        # (3)(4)(5)(6) 及其阵列
-
-        for i in range(Num):
-            off = i * 4 * WRes
-
-            # 向上弧（-180 → 0）
-            c_up = (base_x + 1.5*WRes + 2*WRes + off, y_up)
-            arcs += [(c_up, 1.5*WRes, -180,   0),
-                     (c_up, 0.5*WRes, -180,   0)]
-            # 向下弧（0 → 180）
-            c_dn = (base_x + 1.5*WRes + 4*WRes + off, y_down)
-            arcs += [(c_dn, 1.5*WRes,   0, 180),
-                     (c_dn, 0.5*WRes,   0, 180)]
-
-        # (7)(8) 左侧最外框
-
-        cL = (base_x - WRes/2, WRes)
-        arcs += [(cL, 1.5*WRes, -90,   0),
-                 (cL, 0.5*WRes, -90,   0)]
-
-        # (9)(10) 右侧最外框
-
-        cR = (base_x + WRes*3 + WRes*4*Num + WRes/2, WRes)
-        arcs += [(cR, 1.5*WRes, 180, 270),
-                 (cR, 0.5*WRes, 180, 270)]
-
-        # ─── 直线 ───
-
-        seg = lambda x1, y1, x2, y2: ((x1, y1), (x2, y2))
-        segments = [
-            seg(R1+Dr1,             -Wr1/2,  R1-D1,               -Wr1/2),   #1
-
-            seg(R1+Dr1,              Wr1/2,  R1-D1,                Wr1/2),   #2
-
-            seg(R1+Dr1,             -Wr1/2,  R1+Dr1,         -Lv2/2+Wr1),    #3
-
-            seg(R1+Dr1,              Wr1/2,  R1+Dr1,          Lv2/2-Wr1),    #4
-
-            seg(R1+Dr1+Wr1,        -WOr/2,   R1+Dr1+Wr1,       -Lv2/2),      #5
-
-            seg(R1+Dr1+Wr1,         WOr/2,   R1+Dr1+Wr1,        Lv2/2),      #6
-
-            seg(R1+Dr1+Wr1,         Lv2/2,   R1+Dr1-Lr1-Wr1,    Lv2/2),      #7
-
-            seg(R1+Dr1+Wr1,        -Lv2/2,   R1+Dr1-Lr1-Wr1,   -Lv2/2),      #8
-
-            seg(R1+Dr1,             Lv2/2-Wr1, R1+Dr1-Lr1,      Lv2/2-Wr1),  #9
-
-            seg(R1+Dr1,            -Lv2/2+Wr1, R1+Dr1-Lr1,    -Lv2/2+Wr1),  #10
-
-            seg(R1+Dr1-Lr1,        -Lv2/2+Wr1, R1+Dr1-Lr1,    -R1+D1),      #11
-
-            seg(R1+Dr1-Lr1-Wr1,    -Lv2/2,   R1+Dr1-Lr1-Wr1,  -R1+D1),      #12
-
-            seg(R1+Dr1-Lr1,         Lv2/2-Wr1, R1+Dr1-Lr1,     R1-D1),      #13
-
-            seg(R1+Dr1-Lr1-Wr1,     Lv2/2,   R1+Dr1-Lr1-Wr1,   R1-D1),      #14
-
-            seg(R1+Dr1+Wr1,        -WOr/2,   R1+Dr1+Wr1+LOr,  -WOr/2),      #15
-
-            seg(R1+Dr1+Wr1,         WOr/2,   R1+Dr1+Wr1+LOr,   WOr/2),      #16
-
-            seg(R1+Dr1+Wr1+LOr,    -WOr/2,   R1+Dr1+Wr1+LOr+LOut, -WRes/2), #17
-
-            seg(R1+Dr1+Wr1+LOr,     WOr/2,   R1+Dr1+Wr1+LOr+LOut,  WRes/2), #18
-
-            seg(R1+Dr1+Wr1+LOr+LOut,  WRes/2,
-                R1+Dr1+Wr1+LOr+LOut+Lr3-WRes/2, WRes/2),                    #19
-
-            seg(R1+Dr1+Wr1+LOr+LOut, -WRes/2,
-                R1+Dr1+Wr1+LOr+LOut+Lr3-WRes/2,-WRes/2),                    #20
-
-            seg(base_x, y_down, base_x, WRes),                              #21
-
-            seg(base_x+WRes, y_down, base_x+WRes, WRes),                    #22
-
-        ]
-
-        # (23)(24)(25)(26) 及其阵列
-
-        for i in range(Num):
-            off = i * 4 * WRes
-
-            segments += [
-                seg(base_x + 3*WRes + off, -WRes+Lv1, base_x + 3*WRes + off,  WRes-Lv1),   #23
-
-                seg(base_x + 2*WRes + off, -WRes+Lv1, base_x + 2*WRes + off,  WRes-Lv1),   #24
-
-                seg(base_x + 5*WRes + off,  WRes-Lv1, base_x + 5*WRes + off, -WRes+Lv1),   #25
-
-                seg(base_x + 4*WRes + off,  WRes-Lv1, base_x + 4*WRes + off, -WRes+Lv1),   #26
-
-            ]
-
-        # (27)(28) 阵列右端竖线
-
-        segments += [
-            seg(base_x + 3*WRes + 4*Num*WRes - WRes,
-                -WRes+Lv1,
-                base_x + 3*WRes + 4*Num*WRes - WRes, WRes),                 #27
-
-            seg(base_x + 3*WRes + 4*Num*WRes,
-                -WRes+Lv1,
-                base_x + 3*WRes + 4*Num*WRes,     WRes),                   #28
-
-        ]
-        # (29)(30) 右端水平
-
-        segments += [
-            seg(base_x + 3*WRes + 4*Num*WRes + WRes/2,  WRes/2,
-                base_x + 3*WRes + 4*Num*WRes + WRes + Lr3 + D2,  WRes/2),  #29
-
-            seg(base_x + 2*WRes + 4*Num*WRes + 1.5*WRes, -WRes/2,
-                base_x + 3*WRes + 4*Num*WRes + WRes + Lr3 + D2, -WRes/2),  #30
-
-        ]
-
-        return {"circles": circles, "arcs": arcs,
-                "segments": segments, "rectangles": []}
+        return self.geometry.cache.get(self.paramValues())
 
     # ─────────────────────────── 更新绘图 ───────────────────────────
 
     def updateModel(self):
         try:
-            self.ax.clear()
-            self.geoPatch = {k: [] for k in self.params}
-            geo = self.calculateGeometry()
-
-            # 圆
-
-            for ctr, r in geo["circles"]:
-                c = mpatches.Circle(ctr, r, fill=False, edgecolor='blue', lw=1.5)
-                self.ax.add_patch(c); self.geoPatch["Radius_1"].append(c)
-
-            # 圆弧
-
-            for ctr, rad, t1, t2 in geo["arcs"]:
-                a = mpatches.Arc(ctr, 2*rad, 2*rad, angle=0,
-                                 theta1=t1, theta2=t2, edgecolor='blue', lw=1.5)
-                self.ax.add_patch(a); self.geoPatch.setdefault("Width_Res", []).append(a)
-
-            # 线段
-
-            for p0, p1 in geo["segments"]:
-                ln = plt.Line2D([p0[0], p1[0]], [p0[1], p1[1]],
-                                color='blue', lw=1.5)
-                self.ax.add_line(ln); self.geoPatch.setdefault("Length_r1", []).append(ln)
-
-            # autoscale
-
-            xs, ys = [], []
-            for p in self.ax.patches:
-                if isinstance(p, mpatches.Circle):
-                    cx, cy = p.center; r = p.radius; xs += [cx-r, cx+r]; ys += [cy-r, cy+r]
-                elif isinstance(p, mpatches.Arc):
-                    cx, cy = p.center; xs += [cx-p.width/2, cx+p.width/2]; ys += [cy-p.height/2, cy+p.height/2]
-            for l in self.ax.lines:
-                x, y = l.get_data(); xs += list(x); ys += list(y)
-            if not xs: xs = ys = [-1, 1]
-            pad = max((max(xs)-min(xs))*0.1, (max(ys)-min(ys))*0.1, 1)
-            self.ax.set_xlim(min(xs)-pad, max(xs)+pad)
-            self.ax.set_ylim(min(ys)-pad, max(ys)+pad)
-            self.ax.set_aspect('equal', adjustable='box')
-            self.ax.grid(True, linestyle='--', alpha=0.4)
-            self.ax.set_title("CdPCR")
-            self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
-            self.canvas.draw()
+            self.snapshot = ParamSnapshot("CdPCR", self.paramValues())
+            geo = self.geometry.update(self.snapshot)
+            if self.geoArtists is None:
+                self.geoArtists = draw_primitives(self.ax, geo)
+                self.ax.set_aspect('equal', adjustable='box')
+                self.ax.grid(True, linestyle='--', alpha=0.4)
+                self.ax.set_title("CdPCR")
+                self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
+            else:
+                self.geoArtists.update(geo, self.geometry.changed)
+            fit_view(self.ax, geo)
+            self.canvas.draw_idle()
             if self.curHlt: self.highlightComponent(self.curHlt)
             self.stsVar.set("模型更新成功 / Model updated successfully")
         except Exception as e:
@@ -413,14 +208,7 @@ class MicrochannelTool:
                                              filetypes=[("DXF", "*.dxf")])
             if not f: return
 
-            import ezdxf
-
-            doc = ezdxf.new('R2010'); msp = doc.modelspace()
-            g = self.calculateGeometry()
-            for ctr, r in g["circles"]: msp.add_circle(ctr, r)
-            for ctr, r, a1, a2 in g["arcs"]: msp.add_arc(ctr, r, a1, a2)
-            for p0, p1 in g["segments"]: msp.add_line(p0, p1)
-            doc.saveas(f); self.stsVar.set(f"已导出DXF {f}")
+            export_dxf(f, self.calculateGeometry()); self.stsVar.set(f"已导出DXF {f}")
         except Exception as e:
             messagebox.showerror("Error", f"导出DXF失败: {e}")
 
@@ -458,13 +246,12 @@ class MicrochannelTool:
             for k, v in data.get("parameters", {}).items():
                 if k in self.params: self.params[k].set(str(v))
             self.updateModel()
-            if "model_name" in data: self.ax.set_title(data["model_name"]); self.canvas.draw()
+            if "model_name" in data: self.ax.set_title(data["model_name"]); self.canvas.draw_idle()
             self.stsVar.set(f"已导入JSON {f}")
         except Exception as e:
             messagebox.showerror("Error", f"导入JSON失败: {e}")
 
     def quitApplication(self):
-        plt.close('all')
         self.master.quit()
         self.master.destroy()
 
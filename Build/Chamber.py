@@ -1,17 +1,16 @@
 # Copyright (c) 2025 [Grant]
 # Licensed under the MIT License.
 # See LICENSE in the project root for license information.
-import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import matplotlib.patches as mpatches
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import ezdxf
-import math
 import json
 from datetime import datetime
 
+from Microfluid_Geometry import IncrementalGeometry, ParamSnapshot
+from Microfluid_Render import draw_primitives, fit_view, export_dxf
+
 class MicrochannelTool:
     def __init__(self, master):
         self.master = master
@@ -55,8 +54,11 @@ class MicrochannelTool:
         # --- Unchanged UI and Plotting Initialization ---
         self.bigFont = ('Helvetica', 12)
         self.headerFont = ('Helvetica', 12, 'bold')
-        self.fig, self.ax = plt.subplots(figsize=(8, 6))
-        self.geoPatch = {k: [] for k in self.params}
+        self.fig = Figure(figsize=(8, 6))
+        self.ax = self.fig.add_subplot()
+        self.geoArtists = None
+        self.geometry = IncrementalGeometry("Chamber")
+        self.snapshot = ParamSnapshot("Chamber")
         self.stsVar = tk.StringVar(value="就绪 / Ready")
         self.curHlt = None
         self.entries = {}
@@ -129,170 +131,44 @@ class MicrochannelTool:
             self.params[param].set(str(self.defaults[param]))
             messagebox.showerror("错误 / Error", f"无效的数值 / Invalid number: {e}")
 
-    def getParam(self, name):
-        # --- Updated for the new calculated parameters ---
-        try:
-            if name == "Angle_1_deg": # Keep degrees for plot
-                return float(self.params["Angle_1"].get())
-            elif name == "Angle_1": # Radians for math
-                return math.radians(float(self.params["Angle_1"].get()))
-            elif name == "Distance_1":
-                radius_1 = float(self.params["Radius_1"].get())
-                width_r1 = float(self.params["Width_r1"].get())
-                v = radius_1**2 - (width_r1 / 2)**2
-                if v < 0: raise ValueError("Radius_1 must be >= Width_r1 / 2")
-                return radius_1 - math.sqrt(v)
-            elif name == "Length_1": # Calculated from Length_3
-                angle_rad = math.radians(float(self.params["Angle_1"].get()))
-                length_3 = float(self.params["Length_3"].get())
-                return length_3 * math.cos(angle_rad)
-            elif name == "Length_5": # Calculated from Length_3
-                angle_rad = math.radians(float(self.params["Angle_1"].get()))
-                length_3 = float(self.params["Length_3"].get())
-                return 2 * length_3 * math.sin(angle_rad)
-            else:
-                return float(self.params[name].get())
-        except (ValueError, tk.TclError) as e:
-            messagebox.showerror("参数错误 / Parameter Error", f"无法计算参数'{name}': {e}\n将使用默认值.")
-            if name in self.defaults:
-                self.params[name].set(str(self.defaults[name]))
-                return self.defaults[name]
-            else: return 0.0
+    def paramValues(self):
+        """界面参数 -> 数值映射，作为几何内核的输入；无法解析的值恢复为默认值"""
+        values = {}
+        for name, var in self.params.items():
+            try:
+                values[name] = float(var.get())
+            except (ValueError, tk.TclError):
+                messagebox.showerror("参数错误 / Parameter Error", f"无法解析参数'{name}'\n将使用默认值.")
+                var.set(str(self.defaults[name]))
+                values[name] = self.defaults[name]
+        return values
 
     def highlightComponent(self, paramName):
         # --- This section remains unchanged ---
         self.curHlt = paramName
-        for patches in self.geoPatch.values():
-            for patch in patches:
-                if hasattr(patch, 'set_edgecolor'): patch.set_edgecolor('blue')
-                elif hasattr(patch, 'set_color'): patch.set_color('blue')
-        if paramName in self.geoPatch:
-            for patch in self.geoPatch[paramName]:
-                if hasattr(patch, 'set_edgecolor'): patch.set_edgecolor('red')
-                elif hasattr(patch, 'set_color'): patch.set_color('red')
-        self.canvas.draw()
+        if self.geoArtists is not None:
+            self.geoArtists.highlight(paramName)
         self.stsVar.set(f"已选择 / Selected: {paramName}")
 
     def calculateGeometry(self):
-        # ----------------- REPLACED GEOMETRY CALCULATION ------------------
-        # This method is entirely replaced with the new single valve logic.
-        Length_r1 = self.getParam("Length_r1")
-        Width_r1 = self.getParam("Width_r1")
-        Radius_1 = self.getParam("Radius_1")
-        Angle_1_rad = self.getParam("Angle_1")
-        Angle_1_deg = self.getParam("Angle_1_deg")
-        Length_r2 = self.getParam("Length_r2")
-        Length_3 = self.getParam("Length_3")
-        Radius_2 = self.getParam("Radius_2")
-        Distance_1 = self.getParam("Distance_1")
-        Length_1 = self.getParam("Length_1")
-        
-        circles, arcs, segments = [], [], []
-
-        # Circles
-        c1_center = (-Radius_1, Width_r1 / 2)
-        c2_x = Length_r1 + 2 * Length_1 + Length_r2 + Length_r1 + Radius_1
-        c2_center = (c2_x, Width_r1 / 2)
-        circles.extend([(c1_center, Radius_1), (c2_center, Radius_1)])
-
-        # Arcs
-        y_valve_top = Width_r1 + Length_3 * math.sin(Angle_1_rad)
-        y_valve_bottom = -Length_3 * math.sin(Angle_1_rad)
-        
-        arc1_center = (Length_r1 + Length_1 + Radius_2 * math.tan(Angle_1_rad/2), y_valve_bottom + Radius_2)
-        arcs.append((arc1_center, Radius_2, -90 - Angle_1_deg, -90))
-        
-        arc2_center = (Length_r1 + Length_1 + Radius_2 * math.tan(Angle_1_rad/2), y_valve_top - Radius_2)
-        arcs.append((arc2_center, Radius_2, 90, 90 + Angle_1_deg)) # Corrected angle direction
-        
-        arc3_center = (Length_r1 + Length_1 + Length_r2 - Radius_2 * math.tan(Angle_1_rad/2), y_valve_top - Radius_2)
-        arcs.append((arc3_center, Radius_2, 90 - Angle_1_deg, 90))
-        
-        arc4_center = (Length_r1 + Length_1 + Length_r2 - Radius_2 * math.tan(Angle_1_rad/2), y_valve_bottom + Radius_2)
-        arcs.append((arc4_center, Radius_2, -90, -90 + Angle_1_deg))
-
-        # Line Segments
-        segments.append(((-Distance_1, Width_r1), (Length_r1, Width_r1))) # seg 1
-        segments.append(((-Distance_1, 0), (Length_r1, 0))) # seg 2
-
-        # Connect inlet to top valve corner
-        p3_end_x = arc2_center[0] - Radius_2 * math.sin(Angle_1_rad)
-        p3_end_y = arc2_center[1] + Radius_2 * math.cos(Angle_1_rad)
-        segments.append(((Length_r1, Width_r1), (p3_end_x, p3_end_y))) # seg 3
-
-        # Top horizontal part of valve
-        segments.append(((arc2_center[0], arc2_center[1] + Radius_2), (arc3_center[0], arc3_center[1] + Radius_2))) # seg 4
-
-        # Connect top valve corner to outlet
-        p5_start_x = arc3_center[0] + Radius_2 * math.sin(Angle_1_rad)
-        p5_start_y = arc3_center[1] + Radius_2 * math.cos(Angle_1_rad)
-        segments.append(((p5_start_x, p5_start_y), (Length_r1 + 2 * Length_1 + Length_r2, Width_r1))) # seg 5
-
-        # Connect inlet to bottom valve corner
-        p6_end_x = arc1_center[0] - Radius_2 * math.sin(Angle_1_rad)
-        p6_end_y = arc1_center[1] - Radius_2 * math.cos(Angle_1_rad)
-        segments.append(((Length_r1, 0), (p6_end_x, p6_end_y))) # seg 6
-
-        # Bottom horizontal part of valve
-        segments.append(((arc1_center[0], arc1_center[1] - Radius_2), (arc4_center[0], arc4_center[1] - Radius_2))) # seg 7
-        
-        # Connect bottom valve corner to outlet
-        p9_start_x = arc4_center[0] + Radius_2 * math.sin(Angle_1_rad)
-        p9_start_y = arc4_center[1] - Radius_2 * math.cos(Angle_1_rad)
-        segments.append(((p9_start_x, p9_start_y), (Length_r1 + 2 * Length_1 + Length_r2, 0))) # seg 9
-        
-        # Outlet channels
-        segments.append(((Length_r1 + 2 * Length_1 + Length_r2, 0), (c2_center[0] - Radius_1 + Distance_1, 0))) # seg 8
-        segments.append(((Length_r1 + 2 * Length_1 + Length_r2, Width_r1), (c2_center[0] - Radius_1 + Distance_1, Width_r1))) # seg 10
-
-        return {"circles": circles, "arcs": arcs, "segments": segments}
+        return self.geometry.cache.get(self.paramValues())
         # ----------------- END OF GEOMETRY REPLACEMENT ------------------
 
     def updateModel(self):
         # --- Updated to draw the new geometry ---
         try:
-            self.ax.clear()
-            self.geoPatch = {k: [] for k in self.params}
-            geo = self.calculateGeometry()
-
-            for center, radius in geo["circles"]:
-                patch = mpatches.Circle(center, radius, fill=False, edgecolor='blue', lw=1.5)
-                self.ax.add_patch(patch); self.geoPatch["Radius_1"].append(patch)
-
-            for center, radius, t1, t2 in geo["arcs"]:
-                patch = mpatches.Arc(center, 2*radius, 2*radius, angle=0, theta1=t1, theta2=t2, edgecolor='blue', lw=1.5)
-                self.ax.add_patch(patch); self.geoPatch["Radius_2"].append(patch)
-
-            for p0, p1 in geo["segments"]:
-                line = plt.Line2D([p0[0], p1[0]], [p0[1], p1[1]], color='blue', lw=1.5)
-                self.ax.add_line(line)
-                # Simple heuristic for highlighting
-                if p0[1] == p1[1]: self.geoPatch["Length_r1"].append(line); self.geoPatch["Length_r2"].append(line)
-                else: self.geoPatch["Length_3"].append(line); self.geoPatch["Angle_1"].append(line)
-                self.geoPatch["Width_r1"].append(line)
-
-            # Auto-scaling and plot finalization
-            all_x, all_y = [], []
-            for patch in self.ax.patches:
-                if isinstance(patch, mpatches.Circle):
-                    center, r = patch.center, patch.radius
-                    all_x.extend([center[0] - r, center[0] + r]); all_y.extend([center[1] - r, center[1] + r])
-                elif isinstance(patch, mpatches.Arc):
-                    center, w, h = patch.center, patch.width, patch.height
-                    all_x.extend([center[0] - w/2, center[0] + w/2]); all_y.extend([center[1] - h/2, center[1] + h/2])
-            for line in self.ax.lines:
-                x_data, y_data = line.get_data()
-                all_x.extend(x_data); all_y.extend(y_data)
-            if not all_x or not all_y: all_x, all_y = [-1, 1], [-1, 1]
-            pad = max((max(all_x)-min(all_x))*0.1, (max(all_y)-min(all_y))*0.1, 1)
-            self.ax.set_xlim(min(all_x) - pad, max(all_x) + pad)
-
-            self.ax.set_ylim(min(all_y) - pad, max(all_y) + pad)
-            self.ax.set_aspect('equal', adjustable='box')
-            self.ax.grid(True, linestyle='--', alpha=0.5)
-            self.ax.set_title("Chamber", fontsize=14)
-            self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
-            self.canvas.draw()
+            self.snapshot = ParamSnapshot("Chamber", self.paramValues())
+            geo = self.geometry.update(self.snapshot)
+            if self.geoArtists is None:
+                self.geoArtists = draw_primitives(self.ax, geo)
+                self.ax.set_aspect('equal', adjustable='box')
+                self.ax.grid(True, linestyle='--', alpha=0.5)
+                self.ax.set_title("Chamber", fontsize=14)
+                self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
+            else:
+                self.geoArtists.update(geo, self.geometry.changed)
+            fit_view(self.ax, geo)
+            self.canvas.draw_idle()
             if self.curHlt: self.highlightComponent(self.curHlt)
             self.stsVar.set("模型更新成功 / Model updated successfully")
         except Exception as e:
@@ -304,14 +180,7 @@ class MicrochannelTool:
         try:
             filename = filedialog.asksaveasfilename(defaultextension=".dxf", filetypes=[("DXF Files", "*.dxf"), ("All Files", "*.*")], title="保存DXF / Save DXF")
             if not filename: return
-            doc = ezdxf.new('R2010'); msp = doc.modelspace()
-            geo = self.calculateGeometry()
-
-            for center, radius in geo["circles"]: msp.add_circle(center, radius)
-            for center, radius, t1, t2 in geo["arcs"]: msp.add_arc(center, radius, t1, t2)
-            for p0, p1 in geo["segments"]: msp.add_line(p0, p1)
-
-            doc.saveas(filename)
+            export_dxf(filename, self.calculateGeometry())
             self.stsVar.set(f"已导出DXF / DXF Exported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导出到DXF / Exported to DXF:\n{filename}")
         except Exception as e:
@@ -353,7 +222,7 @@ class MicrochannelTool:
             for key, value in imported_params.items():
                 if key in self.params: self.params[key].set(str(value))
             self.updateModel()
-            if "model_name" in data: self.ax.set_title(data["model_name"], fontsize=14); self.canvas.draw()
+            if "model_name" in data: self.ax.set_title(data["model_name"], fontsize=14); self.canvas.draw_idle()
             self.stsVar.set(f"已导入JSON / JSON Imported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导入JSON / Imported from JSON:\n{filename}")
         except Exception as e:
@@ -362,7 +231,6 @@ class MicrochannelTool:
 
     def quitApplication(self):
         # --- This section remains unchanged ---
-        plt.close('all')
         self.master.quit()
         self.master.destroy()
 
@@ -1,14 +1,11 @@
 # Copyright (c) 2025 [Grant]
 # Licensed under the MIT License.
 # See LICENSE in the project root for license information.
-import numpy as np
 
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 
-import matplotlib.patches as mpatches
-
 import tkinter as tk
 
 from tkinter import ttk, filedialog, messagebox
@@ -17,6 +14,9 @@ import json
 
 from datetime import datetime
 
+from Microfluid_Geometry import IncrementalGeometry, ParamSnapshot
+from Microfluid_Render import draw_primitives, fit_view, export_dxf
+
 class MicrochannelTool:
     # ─────────── 初始化 ──────────────────────────────────────────
 
@@ -74,8 +74,11 @@ class MicrochannelTool:
         # 其它框架变量
 
         self.bigFont = ('Helvetica', 12)
-        self.fig, self.ax = plt.subplots(figsize=(8, 6))
-        self.geoPatch = {k: [] for k in self.params}
+        self.fig = Figure(figsize=(8, 6))
+        self.ax = self.fig.add_subplot()
+        self.geoArtists = None
+        self.geometry = IncrementalGeometry("DdPCR2To1")
+        self.snapshot = ParamSnapshot("DdPCR2To1")
         self.stsVar = tk.StringVar(value="就绪 / Ready")
         self.curHlt = None
 
@@ -130,172 +133,45 @@ class MicrochannelTool:
         except ValueError:
             self.params[p].set(str(self.defaults[p])); messagebox.showerror("错误", "无效数字")
 
-    def getParam(self, name):
-        if name in self.params: return float(self.params[name].get())
-        R = self.getParam("Radius_1")
-        if name == "Distance_1":
-            W = self.getParam("Width_r1")
-            return R - np.sqrt(max(R**2 - (W**2)/4, 0))
-        if name == "Angle_rad":
-            return np.deg2rad(self.getParam("Angle"))
-        return 0.0
+    def paramValues(self):
+        """界面参数 -> 数值映射，作为几何内核的输入；无法解析的值恢复为默认值"""
+        values = {}
+        for name, var in self.params.items():
+            try:
+                values[name] = float(var.get())
+            except (ValueError, tk.TclError):
+                messagebox.showerror("参数错误 / Parameter Error", f"无法解析参数'{name}'\n将使用默认值.")
+                var.set(str(self.defaults[name]))
+                values[name] = self.defaults[name]
+        return values
 
     # ─────────── 高亮 ────────────────────────────────────────────
 
     def highlightComponent(self, key):
         self.curHlt = key
-
-        for pl in self.geoPatch.values():
-            for p in pl:
-                if hasattr(p, 'set_edgecolor'): p.set_edgecolor('blue')
-        if key in self.geoPatch:
-            for p in self.geoPatch[key]:
-                if hasattr(p, 'set_edgecolor'): p.set_edgecolor('red')
-        self.canvas.draw(); self.stsVar.set(f"已选择 / Selected: {key}")
+        if self.geoArtists is not None:
+            self.geoArtists.highlight(key)
+        self.stsVar.set(f"已选择 / Selected: {key}")
 
     # ─────────── 计算几何（核心改动） ─────────────────────────────
 
     def calculateGeometry(self):
-        # 快速取名
-
-        gp = self.getParam
-
-        R1, Dr1, Lv2, Lr1 = gp("Radius_1"), gp("Distance_r1"), gp("Length_v2"), gp("Length_r1")
-        Wr1, WOr, LOr, WOut, LOut, Lr2 = gp("Width_r1"), gp("Width_Or"), gp("Length_Or"), gp("Width_Out"), gp("Length_Out"), gp("Length_r2")
-        R2, Angle, L1, Lr3, Lr4 = gp("Radius_2"), gp("Angle_rad"), gp("Length_1"), gp("Length_r3"), gp("Length_r4")
-        D1 = gp("Distance_1"); sinA, cosA, tanA2 = np.sin(Angle), np.cos(Angle), np.tan(Angle/2)
-
-        # 圆
-
-        circles = [
-            ((0, 0), R1),
-            ((R1 + Dr1 - Lr1 - Wr1/2, 0), R1),
-            ((R1 + Dr1 + Wr1 + LOr + LOut + 2*L1*cosA + Lr3 + Lr4 + R1, 0), R1)
-        ]
-
-        # 圆弧
-
-        c1x = R1 + Dr1 + Wr1 + LOr + LOut + L1*cosA + R2*tanA2
-
-        c1y = WOut/2 + L1*sinA - R2
-
-        c3x = R1 + Dr1 + Wr1 + LOr + LOut + L1*cosA + Lr3 - R2*tanA2
-
-        c3y = c1y
-
-        arcs = [
-            ((c1x, c1y), R2, 90, 90+np.rad2deg(Angle)),             # arc1
-
-            ((c1x, -c1y), R2, -90-np.rad2deg(Angle), -90),           # arc2
-
-            ((c3x, c3y), R2, 90-np.rad2deg(Angle), 90),              # arc3
-
-            ((c3x, -c3y), R2, -90, -90+np.rad2deg(Angle))            # arc4
-
-        ]
-
-        # 线段
-
-        seg = lambda x1,y1,x2,y2: ((x1,y1),(x2,y2))
-        segments = [
-            seg(R1+Dr1, -Wr1/2, R1-D1, -Wr1/2),                      #1
-
-            seg(R1+Dr1,  Wr1/2, R1-D1,  Wr1/2),                      #2
-
-            seg(R1+Dr1, -Wr1/2, R1+Dr1, -Lv2/2+Wr1),                 #3
-
-            seg(R1+Dr1,  Wr1/2, R1+Dr1,  Lv2/2-Wr1),                 #4
-
-            seg(R1+Dr1+Wr1, -WOr/2, R1+Dr1+Wr1, -Lv2/2),             #5
-
-            seg(R1+Dr1+Wr1,  WOr/2, R1+Dr1+Wr1,  Lv2/2),             #6
-
-            seg(R1+Dr1+Wr1,  Lv2/2, R1+Dr1-Lr1-Wr1,  Lv2/2),         #7
-
-            seg(R1+Dr1+Wr1, -Lv2/2, R1+Dr1-Lr1-Wr1, -Lv2/2),         #8
-
-            seg(R1+Dr1,  Lv2/2-Wr1, R1+Dr1-Lr1,  Lv2/2-Wr1),         #9
-
-            seg(R1+Dr1, -Lv2/2+Wr1, R1+Dr1-Lr1, -Lv2/2+Wr1),         #10
-
-            seg(R1+Dr1-Lr1, -Lv2/2+Wr1, R1+Dr1-Lr1, -R1+D1),         #11
-
-            seg(R1+Dr1-Lr1-Wr1, -Lv2/2, R1+Dr1-Lr1-Wr1, -R1+D1),     #12
-
-            seg(R1+Dr1-Lr1,  Lv2/2-Wr1, R1+Dr1-Lr1,  R1-D1),         #13
-
-            seg(R1+Dr1-Lr1-Wr1,  Lv2/2, R1+Dr1-Lr1-Wr1,  R1-D1),     #14
-
-            seg(R1+Dr1+Wr1, -WOr/2, R1+Dr1+Wr1+LOr, -WOr/2),         #15
-
-            seg(R1+Dr1+Wr1,  WOr/2, R1+Dr1+Wr1+LOr,  WOr/2),         #16
-
-            seg(R1+Dr1+Wr1+LOr, -WOr/2, R1+Dr1+Wr1+LOr+LOut, -WOut/2),#17
-
-            seg(R1+Dr1+Wr1+LOr,  WOr/2, R1+Dr1+Wr1+LOr+LOut,  WOut/2),#18
-
-            seg(R1+Dr1+Wr1+LOr+LOut,  WOut/2,
-                R1+Dr1+Wr1+LOr+LOut+L1*cosA+R2*tanA2 - sinA*R2,
-                WOut/2 + L1*sinA - R2 + cosA*R2),                    #19
-
-            seg(R1+Dr1+Wr1+LOr+LOut, -WOut/2,
-                R1+Dr1+Wr1+LOr+LOut+L1*cosA+R2*tanA2 - sinA*R2,
-                -WOut/2 - L1*sinA + R2 - cosA*R2),                   #20
-
-            seg(c3x, -WOut/2 - L1*sinA, c1x, -WOut/2 - L1*sinA),     #21
-
-            seg(c3x,  WOut/2 + L1*sinA, c1x,  WOut/2 + L1*sinA),     #22
-
-            seg(c3x + sinA*R2,
-                -WOut/2 - L1*sinA + R2 - cosA*R2,
-                R1+Dr1+Wr1+LOr+LOut+2*L1*cosA+Lr3,
-                -WOut/2),                                            #23
-
-            seg(c3x + sinA*R2,
-                WOut/2 + L1*sinA - R2 + cosA*R2,
-                R1+Dr1+Wr1+LOr+LOut+2*L1*cosA+Lr3,
-                WOut/2),                                             #24
-
-            seg(R1+Dr1+Wr1+LOr+LOut+2*L1*cosA+Lr3+Lr4+D1,  WOut/2,
-                R1+Dr1+Wr1+LOr+LOut+2*L1*cosA+Lr3,  WOut/2),          #25
-
-            seg(R1+Dr1+Wr1+LOr+LOut+2*L1*cosA+Lr3+Lr4+D1, -WOut/2,
-                R1+Dr1+Wr1+LOr+LOut+2*L1*cosA+Lr3, -WOut/2),          #26
-
-        ]
-
-        return {"circles":circles,"arcs":arcs,"segments":segments,"rectangles":[]}
+        return self.geometry.cache.get(self.paramValues())
 
     # ─────────── 绘图刷新（与原程序相同） ─────────────────────────
 
     def updateModel(self):
         try:
-            self.ax.clear(); self.geoPatch = {k: [] for k in self.params}
-            g = self.calculateGeometry()
-            for ctr,r in g["circles"]:
-                c = mpatches.Circle(ctr,r,fill=False,edgecolor='blue',lw=1.5)
-                self.ax.add_patch(c); self.geoPatch["Radius_1"].append(c)
-            for ctr,r,a1,a2 in g["arcs"]:
-                a = mpatches.Arc(ctr,2*r,2*r,angle=0,theta1=a1,theta2=a2,edgecolor='blue',lw=1.5)
-                self.ax.add_patch(a); self.geoPatch.setdefault("Radius_2",[]).append(a)
-            for p0,p1 in g["segments"]:
-                ln = plt.Line2D([p0[0],p1[0]],[p0[1],p1[1]],color='blue',lw=1.5)
-                self.ax.add_line(ln); self.geoPatch.setdefault("Length_r1",[]).append(ln)
-
-            xs,ys=[],[]
-            for p in self.ax.patches:
-                if isinstance(p,mpatches.Circle):
-                    (cx,cy),r=p.center,p.radius; xs+=[cx-r,cx+r]; ys+=[cy-r,cy+r]
-                elif isinstance(p,mpatches.Arc):
-                    cx,cy=p.center; xs+=[cx-p.width/2,cx+p.width/2]; ys+=[cy-p.height/2,cy+p.height/2]
-            for l in self.ax.lines:
-                x,y=l.get_data(); xs+=list(x); ys+=list(y)
-            if not xs: xs=ys=[-1,1]
-            pad=max((max(xs)-min(xs))*0.1,(max(ys)-min(ys))*0.1,1)
-            self.ax.set_xlim(min(xs)-pad,max(xs)+pad); self.ax.set_ylim(min(ys)-pad,max(ys)+pad)
-            self.ax.set_aspect('equal'); self.ax.grid(True,ls='--',alpha=0.4)
-            self.ax.set_title("DdPCR2To1"); self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
-            self.canvas.draw(); 
+            self.snapshot = ParamSnapshot("DdPCR2To1", self.paramValues())
+            geo = self.geometry.update(self.snapshot)
+            if self.geoArtists is None:
+                self.geoArtists = draw_primitives(self.ax, geo)
+                self.ax.set_aspect('equal'); self.ax.grid(True,ls='--',alpha=0.4)
+                self.ax.set_title("DdPCR2To1"); self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
+            else:
+                self.geoArtists.update(geo, self.geometry.changed)
+            fit_view(self.ax, geo)
+            self.canvas.draw_idle()
             if self.curHlt:self.highlightComponent(self.curHlt)
             self.stsVar.set("模型更新成功 / Model updated successfully")
         except Exception as e:
@@ -308,11 +184,7 @@ class MicrochannelTool:
             f=filedialog.asksaveasfilename(defaultextension=".dxf",filetypes=[("DXF","*.dxf")]); 
             if not f:return
 
-            import ezdxf;doc=ezdxf.new('R2010');msp=doc.modelspace();g=self.calculateGeometry()
-            for c,r in g["circles"]:msp.add_circle(c,r)
-            for c,r,a1,a2 in g["arcs"]:msp.add_arc(c,r,a1,a2)
-            for p0,p1 in g["segments"]:msp.add_line(p0,p1)
-            doc.saveas(f); self.stsVar.set(f"已导出DXF {f}")
+            export_dxf(f, self.calculateGeometry()); self.stsVar.set(f"已导出DXF {f}")
         except Exception as e:
             messagebox.showerror("Error",f"导出DXF失败: {e}")
 
@@ -346,13 +218,13 @@ class MicrochannelTool:
             for k,v in data.get("parameters",{}).items():
                 if k in self.params: self.params[k].set(str(v))
             self.updateModel()
-            if "model_name" in data:self.ax.set_title(data["model_name"]); self.canvas.draw()
+            if "model_name" in data:self.ax.set_title(data["model_name"]); self.canvas.draw_idle()
             self.stsVar.set(f"已导入JSON {f}")
         except Exception as e:
             messagebox.showerror("Error",f"导入JSON失败: {e}")
 
     def quitApplication(self):
-        plt.close('all'); self.master.quit(); self.master.destroy()
+        self.master.quit(); self.master.destroy()
 
 if __name__ == "__main__":
     root=tk.Tk(); app=MicrochannelTool(root); root.mainloop()
@@ -1,14 +1,11 @@
 # Copyright (c) 2025 [Grant]
 # Licensed under the MIT License.
 # See LICENSE in the project root for license information.
-import numpy as np
 
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 
-import matplotlib.patches as mpatches
-
 import tkinter as tk
 
 from tkinter import ttk, filedialog, messagebox
@@ -17,6 +14,9 @@ import json
 
 from datetime import datetime
 
+from Microfluid_Geometry import IncrementalGeometry, ParamSnapshot
+from Microfluid_Render import draw_primitives, fit_view, export_dxf
+
 class MicrochannelTool:
     # ───────────────────────── 初始化 ──────────────────────────
 
@@ -72,8 +72,11 @@ class MicrochannelTool:
         # 其它通用变量
 
         self.bigFont = ('Helvetica', 12)
-        self.fig, self.ax = plt.subplots(figsize=(8, 6))
-        self.geoPatch = {k: [] for k in self.params}
+        self.fig = Figure(figsize=(8, 6))
+        self.ax = self.fig.add_subplot()
+        self.geoArtists = None
+        self.geometry = IncrementalGeometry("DdPCR3To1")
+        self.snapshot = ParamSnapshot("DdPCR3To1")
         self.stsVar = tk.StringVar(value="就绪 / Ready")
         self.curHlt = None
 
@@ -133,132 +136,59 @@ class MicrochannelTool:
         except ValueError:
             self.params[p].set(str(self.defaults[p])); messagebox.showerror("错误", "无效数字")
 
-    def getParam(self, name):
-        if name in self.params:
-            return float(self.params[name].get())
-        if name == "Distance_1":
-            R = self.getParam("Radius_1"); W = self.getParam("Width_r1")
-            return R - np.sqrt(max(R**2 - (W**2)/4, 0))
-        if name == "Angle_rad":
-            return np.deg2rad(self.getParam("Angle"))
-        return 0.0
+    def paramValues(self):
+        """界面参数 -> 数值映射，作为几何内核的输入；无法解析的值恢复为默认值"""
+        values = {}
+        for name, var in self.params.items():
+            try:
+                values[name] = float(var.get())
+            except (ValueError, tk.TclError):
+                messagebox.showerror("参数错误 / Parameter Error", f"无法解析参数'{name}'\n将使用默认值.")
+                var.set(str(self.defaults[name]))
+                values[name] = self.defaults[name]
+        return values
 
     # ──────────────────────── 高亮 ──────────────────────────────
 
     def highlightComponent(self, key):
         self.curHlt = key
-
-        for v in self.geoPatch.values():
-            for p in v:
-                if hasattr(p, 'set_edgecolor'): p.set_edgecolor('blue')
-        if key in self.geoPatch:
-            for p in self.geoPatch[key]:
-                if hasattr(p, 'set_edgecolor'): p.set_edgecolor('red')
-        self.canvas.draw(); self.stsVar.set(f"已选择 / Selected: {key}")
+        if self.geoArtists is not None:
+            self.geoArtists.highlight(key)
+        self.stsVar.set(f"已选择 / Selected: {key}")
 
     # ──────────────────── 几何计算（核心） ──────────────────────
 
     def calculateGeometry(self):
-        gp = self.getParam
-
-        R1, Dr1, Lv2 = gp("Radius_1"), gp("Distance_r1"), gp("Length_v2")
-        Wr1, WOr, LOr = gp("Width_r1"), gp("Width_Or"), gp("Length_Or")
-        WOut, LOut, Lr2 = gp("Width_Out"), gp("Length_Out"), gp("Length_r2")
-        Angle, L1 = gp("Angle_rad"), gp("Length_1")
-        Lr3, Lr4, R2 = gp("Length_r3"), gp("Length_r4"), gp("Radius_2")
-        D1 = gp("Distance_1")
-
-        sinA, cosA = np.sin(Angle), np.cos(Angle)
-
-        # ── 圆（4 个）
-        circles = [
-            ((0, 0), R1),                                           # 圆1
-
-            ((2*R1 + Dr1 + Wr1 + LOr + LOut + Lr2, 0), R1),         # 圆2
-
-            ((0, -Lv2/2 + Wr1/2), R1),                              # 圆3
-
-            ((0,  Lv2/2 - Wr1/2), R1),                              # 圆4
-
-        ]
-
-        # ── 线段（1–20）
-        seg = lambda x1,y1,x2,y2: ((x1,y1),(x2,y2))
-        segments = [
-            seg(R1+Dr1, -Wr1/2, R1-D1, -Wr1/2),                     #1
-
-            seg(R1+Dr1,  Wr1/2, R1-D1,  Wr1/2),                     #2
-
-            seg(R1+Dr1, -Wr1/2, R1+Dr1, -Lv2/2+Wr1),                #3
-
-            seg(R1+Dr1,  Wr1/2, R1+Dr1,  Lv2/2-Wr1),                #4
-
-            seg(R1+Dr1+Wr1, -WOr/2, R1+Dr1+Wr1, -Lv2/2),            #5
-
-            seg(R1+Dr1+Wr1,  WOr/2, R1+Dr1+Wr1,  Lv2/2),            #6
-
-            seg(R1+Dr1+Wr1,  Lv2/2, R1-D1, Lv2/2),                  #7
-
-            seg(R1+Dr1+Wr1,  -Lv2/2, R1-D1, -Lv2/2),                #8  
-
-            seg(R1+Dr1,  Lv2/2-Wr1, R1-D1, Lv2/2-Wr1),                #9
-
-            seg(R1+Dr1, -Lv2/2+Wr1, R1-D1,-Lv2/2+Wr1),              #10
-
-            seg(R1+Dr1+Wr1, -WOr/2, R1+Dr1+Wr1+LOr, -WOr/2),        #15
-
-            seg(R1+Dr1+Wr1,  WOr/2, R1+Dr1+Wr1+LOr,  WOr/2),        #16
-
-            seg(R1+Dr1+Wr1+LOr, -WOr/2, R1+Dr1+Wr1+LOr+LOut, -WOut/2),#17
-
-            seg(R1+Dr1+Wr1+LOr,  WOr/2, R1+Dr1+Wr1+LOr+LOut,  WOut/2),#18
-
-            seg(R1+Dr1+Wr1+LOr+LOut+Lr2+D1,  WOut/2,
-                R1+Dr1+Wr1+LOr+LOut, WOut/2),                       #19
-
-            seg(R1+Dr1+Wr1+LOr+LOut+Lr2+D1, -WOut/2,
-                R1+Dr1+Wr1+LOr+LOut, -WOut/2),                      #20
-
-        ]
-
-        return {"circles": circles, "arcs": [], "segments": segments, "rectangles": []}
+        return self.geometry.cache.get(self.paramValues())
 
     # ─────────────────── 绘图更新（与原版相同） ──────────────────
 
     def updateModel(self):
         try:
-            self.ax.clear(); self.geoPatch = {k: [] for k in self.params}
-            g = self.calculateGeometry()
-
-            for ctr, r in g["circles"]:
-                c = mpatches.Circle(ctr, r, fill=False, edgecolor='blue', lw=1.5)
-                self.ax.add_patch(c); self.geoPatch.setdefault("Radius_1", []).append(c)
-
-            for p0, p1 in g["segments"]:
-                ln = plt.Line2D([p0[0], p1[0]], [p0[1], p1[1]], color='blue', lw=1.5)
-                self.ax.add_line(ln); self.geoPatch.setdefault("Length_r2", []).append(ln)
-
-            xs, ys = [], []
-            for p in self.ax.patches:
-                (cx, cy), r = p.center, p.radius
-
-                xs += [cx - r, cx + r]; ys += [cy - r, cy + r]
-            for l in self.ax.lines:
-                x, y = l.get_data(); xs += list(x); ys += list(y)
-            if not xs: xs = ys = [-1, 1]
-            pad = max((max(xs)-min(xs))*0.1, (max(ys)-min(ys))*0.1, 1)
-            self.ax.set_xlim(min(xs)-pad, max(xs)+pad); self.ax.set_ylim(min(ys)-pad, max(ys)+pad)
-            self.ax.set_aspect('equal'); self.ax.grid(True, linestyle='--', alpha=0.4)
-            self.ax.set_title("DdPCR3To1"); self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
-            self.canvas.draw()
+            self.snapshot = ParamSnapshot("DdPCR3To1", self.paramValues())
+            geo = self.geometry.update(self.snapshot)
+            if self.geoArtists is None:
+                self.geoArtists = draw_primitives(self.ax, geo)
+                self.ax.set_aspect('equal'); self.ax.grid(True, linestyle='--', alpha=0.4)
+                self.ax.set_title("DdPCR3To1"); self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
+            else:
+                self.geoArtists.update(geo, self.geometry.changed)
+            fit_view(self.ax, geo)
+            self.canvas.draw_idle()
             if self.curHlt: self.highlightComponent(self.curHlt)
             self.stsVar.set("模型更新成功 / Model updated successfully")
         except Exception as e:
             messagebox.showerror("错误", f"模型更新失败: {e}"); self.stsVar.set(f"失败: {e}")
 
-    # ────────── 导出 / 导入 / 退出（保持原样） ──────────
+    # ────────── 导出 / 导入 / 退出 ──────────
 
-    def exportDxf(self): pass  # 省略；与原版相同
+    def exportDxf(self):
+        try:
+            f = filedialog.asksaveasfilename(defaultextension=".dxf", filetypes=[("DXF", "*.dxf")])
+            if not f: return
+            export_dxf(f, self.calculateGeometry()); self.stsVar.set(f"已导出DXF {f}")
+        except Exception as e:
+            messagebox.showerror("Error", f"导出DXF失败: {e}")
 
     def exportSvg(self): pass
 
@@ -266,7 +196,7 @@ class MicrochannelTool:
 
     def importJson(self): pass
 
-    def quitApplication(self): plt.close('all'); self.master.quit(); self.master.destroy()
+    def quitApplication(self): self.master.quit(); self.master.destroy()
 
 if __name__ == "__main__":
     root = tk.Tk(); app = MicrochannelTool(root); root.mainloop()
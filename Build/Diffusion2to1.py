@@ -1,17 +1,16 @@
 # Copyright (c) 2025 [Grant]
 # Licensed under the MIT License.
 # See LICENSE in the project root for license information.
-import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import matplotlib.patches as mpatches
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import ezdxf
-import math
 import json
 from datetime import datetime
 
+from Microfluid_Geometry import IncrementalGeometry, ParamSnapshot
+from Microfluid_Render import draw_primitives, fit_view, export_dxf
+
 class MicrochannelTool:
     def __init__(self, master):
         self.master = master
@@ -49,8 +48,11 @@ class MicrochannelTool:
         # --- Unchanged UI and Plotting Initialization ---
         self.bigFont = ('Helvetica', 12)
         self.headerFont = ('Helvetica', 12, 'bold')
-        self.fig, self.ax = plt.subplots(figsize=(8, 6))
-        self.geoPatch = {k: [] for k in self.params}
+        self.fig = Figure(figsize=(8, 6))
+        self.ax = self.fig.add_subplot()
+        self.geoArtists = None
+        self.geometry = IncrementalGeometry("Diffusion2to1")
+        self.snapshot = ParamSnapshot("Diffusion2to1")
         self.stsVar = tk.StringVar(value="就绪 / Ready")
         self.curHlt = None
         self.entries = {}
@@ -123,142 +125,44 @@ class MicrochannelTool:
             self.params[param].set(str(self.defaults[param]))
             messagebox.showerror("错误 / Error", f"无效的数值 / Invalid number: {e}")
 
-    def getParam(self, name):
-        # --- This section remains unchanged ---
-        try:
-            if name == "Angle":
-                return math.radians(float(self.params["Angle"].get()))
-            elif name == "Distance_h":
-                radius_1 = float(self.params["Radius_1"].get())
-                width_r1 = float(self.params["Width_r1"].get())
-                v = radius_1**2 - (width_r1 / 2)**2
-                if v < 0: raise ValueError("Radius_1 must be >= Width_r1 / 2")
-                return radius_1 - math.sqrt(v)
-            else:
-                return float(self.params[name].get())
-        except (ValueError, tk.TclError) as e:
-            messagebox.showerror("参数错误 / Parameter Error", f"无法计算参数'{name}': {e}\n将使用默认值.")
-            if name in self.defaults:
-                self.params[name].set(str(self.defaults[name]))
-                return self.defaults[name]
-            else: return 0.0
+    def paramValues(self):
+        """界面参数 -> 数值映射，作为几何内核的输入；无法解析的值恢复为默认值"""
+        values = {}
+        for name, var in self.params.items():
+            try:
+                values[name] = float(var.get())
+            except (ValueError, tk.TclError):
+                messagebox.showerror("参数错误 / Parameter Error", f"无法解析参数'{name}'\n将使用默认值.")
+                var.set(str(self.defaults[name]))
+                values[name] = self.defaults[name]
+        return values
 
     def highlightComponent(self, paramName):
         # --- This section remains unchanged ---
         self.curHlt = paramName
-        for patches in self.geoPatch.values():
-            for patch in patches:
-                if hasattr(patch, 'set_edgecolor'): patch.set_edgecolor('blue')
-                elif hasattr(patch, 'set_color'): patch.set_color('blue')
-        if paramName in self.geoPatch:
-            for patch in self.geoPatch[paramName]:
-                if hasattr(patch, 'set_edgecolor'): patch.set_edgecolor('red')
-                elif hasattr(patch, 'set_color'): patch.set_color('red')
-        self.canvas.draw()
+        if self.geoArtists is not None:
+            self.geoArtists.highlight(paramName)
         self.stsVar.set(f"已选择 / Selected: {paramName}")
 
     def calculateGeometry(self):
-        # ----------------- REPLACED GEOMETRY CALCULATION ------------------
-        # This method is entirely replaced with the new Y-Junction geometry.
-        Length_r1 = self.getParam("Length_r1")
-        Width_r1 = self.getParam("Width_r1")
-        Radius_1 = self.getParam("Radius_1")
-        Angle_rad = self.getParam("Angle")
-        Length_1 = self.getParam("Length_1")
-        Width_1 = self.getParam("Width_1")
-        Distance_h = self.getParam("Distance_h")
-
-        # The geometry consistently uses Angle/2.
-        Angle_half_rad = Angle_rad / 2
-        
-        circles, segments = [], []
-        
-        # Circle 1
-        circles.append(((0, 0), Radius_1))
-
-        # Inlet Channel (Segments 1 & 2)
-        segments.append(((Radius_1 - Distance_h, -Width_r1 / 2), (Radius_1 + Length_r1, -Width_r1 / 2)))
-        segments.append(((Radius_1 - Distance_h, Width_r1 / 2), (Radius_1 + Length_r1, Width_r1 / 2)))
-
-        # Y-Junction Segments
-        # Seg 3 (Top slanted line)
-        p3_start = (Radius_1 + Length_r1, Width_r1 / 2)
-        p3_end_x = Radius_1 + Length_r1 + (Length_1 + Distance_h) * math.cos(Angle_half_rad)
-        p3_end_y = Width_r1 / 2 + (Length_1 + Distance_h) * math.sin(Angle_half_rad)
-        segments.append((p3_start, (p3_end_x, p3_end_y)))
-
-        # Seg 4 (Bottom slanted line)
-        p4_start = (Radius_1 + Length_r1, -Width_r1 / 2)
-        p4_end_x = p3_end_x
-        p4_end_y = -Width_r1 / 2 - (Length_1 + Distance_h) * math.sin(Angle_half_rad)
-        segments.append((p4_start, (p4_end_x, p4_end_y)))
-
-        # Seg 5 (Connects top Y-branch to outlet channel)
-        p5_start_x = p3_end_x + Width_1 * math.sin(Angle_half_rad)
-        p5_start_y = p3_end_y - Width_1 * math.cos(Angle_half_rad)
-        p5_end_x = Radius_1 + Length_r1 + Width_1 / math.sin(Angle_half_rad)
-        p5_end_y = 0
-        segments.append(((p5_start_x, p5_start_y), (p5_end_x, p5_end_y)))
-
-        # Seg 6 (Connects bottom Y-branch to outlet channel)
-        p6_start_x = p5_start_x
-        p6_start_y = -(Width_r1/2 + (Length_1 + Distance_h) * math.sin(Angle_half_rad) - Width_1 * math.cos(Angle_half_rad))
-        p6_end_x = p5_end_x
-        p6_end_y = p5_end_y
-        segments.append(((p6_start_x, p6_start_y), (p6_end_x, p6_end_y)))
-
-        # Circles 2 & 3 (Outlet holes)
-        c2_x = Radius_1 + Length_r1 + (Length_1 + Radius_1) * math.cos(Angle_half_rad) + Width_1 * math.sin(Angle_half_rad) / 2
-        c2_y = -(Width_r1 / 2 + (Length_1 + Radius_1) * math.sin(Angle_half_rad) - Width_1 * math.cos(Angle_half_rad) / 2)
-        circles.append(((c2_x, c2_y), Radius_1))
-
-        c3_y = -c2_y # Mirrored y-coordinate
-        circles.append(((c2_x, c3_y), Radius_1))
-
-        return {"circles": circles, "segments": segments}
+        return self.geometry.cache.get(self.paramValues())
         # ----------------- END OF GEOMETRY REPLACEMENT ------------------
 
     def updateModel(self):
         # --- Updated to draw the new geometry ---
         try:
-            self.ax.clear()
-            self.geoPatch = {k: [] for k in self.params}
-            geo = self.calculateGeometry()
-
-            for center, radius in geo["circles"]:
-                patch = mpatches.Circle(center, radius, fill=False, edgecolor='blue', lw=1.5)
-                self.ax.add_patch(patch); self.geoPatch["Radius_1"].append(patch)
-
-            for p0, p1 in geo["segments"]:
-                line = plt.Line2D([p0[0], p1[0]], [p0[1], p1[1]], color='blue', lw=1.5)
-                self.ax.add_line(line)
-                # Heuristic for highlighting
-                if p0[1] == p1[1]:
-                    self.geoPatch["Length_r1"].append(line)
-                    self.geoPatch["Width_r1"].append(line)
-                else:
-                    self.geoPatch["Length_1"].append(line)
-                    self.geoPatch["Width_1"].append(line)
-                    self.geoPatch["Angle"].append(line)
-
-            # Auto-scaling and plot finalization
-            all_x, all_y = [], []
-            for patch in self.ax.patches:
-                center, r = patch.center, patch.radius
-                all_x.extend([center[0] - r, center[0] + r]); all_y.extend([center[1] - r, center[1] + r])
-            for line in self.ax.lines:
-                x_data, y_data = line.get_data()
-                all_x.extend(x_data); all_y.extend(y_data)
-            if not all_x or not all_y: all_x, all_y = [-1, 1], [-1, 1]
-            pad = max((max(all_x)-min(all_x))*0.1, (max(all_y)-min(all_y))*0.1, 1)
-
-            self.ax.set_xlim(min(all_x) - pad, max(all_x) + pad)
-            self.ax.set_ylim(min(all_y) - pad, max(all_y) + pad)
-            self.ax.set_aspect('equal', adjustable='box')
-            self.ax.grid(True, linestyle='--', alpha=0.5)
-            self.ax.set_title("Diffusion2to1", fontsize=14)
-            self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
-            self.canvas.draw()
+            self.snapshot = ParamSnapshot("Diffusion2to1", self.paramValues())
+            geo = self.geometry.update(self.snapshot)
+            if self.geoArtists is None:
+                self.geoArtists = draw_primitives(self.ax, geo)
+                self.ax.set_aspect('equal', adjustable='box')
+                self.ax.grid(True, linestyle='--', alpha=0.5)
+                self.ax.set_title("Diffusion2to1", fontsize=14)
+                self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
+            else:
+                self.geoArtists.update(geo, self.geometry.changed)
+            fit_view(self.ax, geo)
+            self.canvas.draw_idle()
             if self.curHlt: self.highlightComponent(self.curHlt)
             self.stsVar.set("模型更新成功 / Model updated successfully")
         except Exception as e:
@@ -270,11 +174,7 @@ class MicrochannelTool:
         try:
             filename = filedialog.asksaveasfilename(defaultextension=".dxf", filetypes=[("DXF Files", "*.dxf"), ("All Files", "*.*")], title="保存DXF / Save DXF")
             if not filename: return
-            doc = ezdxf.new('R2010'); msp = doc.modelspace()
-            geo = self.calculateGeometry()
-            for center, radius in geo["circles"]: msp.add_circle(center, radius)
-            for p0, p1 in geo["segments"]: msp.add_line(p0, p1)
-            doc.saveas(filename)
+            export_dxf(filename, self.calculateGeometry())
             self.stsVar.set(f"已导出DXF / DXF Exported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导出到DXF / Exported to DXF:\n{filename}")
         except Exception as e:
@@ -316,7 +216,7 @@ class MicrochannelTool:
             for key, value in imported_params.items():
                 if key in self.params: self.params[key].set(str(value))
             self.updateModel()
-            if "model_name" in data: self.ax.set_title(data["model_name"], fontsize=14); self.canvas.draw()
+            if "model_name" in data: self.ax.set_title(data["model_name"], fontsize=14); self.canvas.draw_idle()
             self.stsVar.set(f"已导入JSON / JSON Imported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导入JSON / Imported from JSON:\n{filename}")
         except Exception as e:
@@ -325,7 +225,6 @@ class MicrochannelTool:
 
     def quitApplication(self):
         # --- This section remains unchanged ---
-        plt.close('all')
         self.master.quit()
         self.master.destroy()
 
@@ -1,14 +1,11 @@
 # Copyright (c) 2025 [Grant]
 # Licensed under the MIT License.
 # See LICENSE in the project root for license information.
-import numpy as np
 
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 
-import matplotlib.patches as mpatches
-
 import tkinter as tk
 
 from tkinter import ttk, filedialog, messagebox
@@ -17,6 +14,9 @@ import json
 
 from datetime import datetime
 
+from Microfluid_Geometry import IncrementalGeometry, ParamSnapshot
+from Microfluid_Render import draw_primitives, fit_view, export_dxf
+
 class MicrochannelTool:
     def __init__(self, master):
         self.master = master
@@ -73,8 +73,11 @@ class MicrochannelTool:
         # ─────────────────────────── 其它框架变量 ────────────────────────────────
 
         self.bigFont = ('Helvetica', 12)
-        self.fig, self.ax = plt.subplots(figsize=(8, 6))
-        self.geoPatch = {k: [] for k in self.params}          # 基础分组
+        self.fig = Figure(figsize=(8, 6))
+        self.ax = self.fig.add_subplot()
+        self.geoArtists = None          # 基础分组
+        self.geometry = IncrementalGeometry("Droplet2To1")
+        self.snapshot = ParamSnapshot("Droplet2To1")
 
         self.stsVar = tk.StringVar(value="就绪 / Ready")
         self.curHlt = None
@@ -156,166 +159,48 @@ class MicrochannelTool:
             self.params[param].set(str(self.defaults[param]))
             messagebox.showerror("错误 / Error", "无效的数值 / Invalid number")
 
-    def getParam(self, name):
-        if name in self.params:
-            return float(self.params[name].get())
-        elif name == "Distance_1":   # 计算参数
-
-            R = self.getParam("Radius_1")
-            W = self.getParam("Width_r1")
-            val = R**2 - (W**2)/4
-
-            if val < 0:
-                raise ValueError("Radius_1 必须大于等于 Width_r1/2")
-            return R - np.sqrt(val)
-        else:
-            return 0.0
+    def paramValues(self):
+        """界面参数 -> 数值映射，作为几何内核的输入；无法解析的值恢复为默认值"""
+        values = {}
+        for name, var in self.params.items():
+            try:
+                values[name] = float(var.get())
+            except (ValueError, tk.TclError):
+                messagebox.showerror("参数错误 / Parameter Error", f"无法解析参数'{name}'\n将使用默认值.")
+                var.set(str(self.defaults[name]))
+                values[name] = self.defaults[name]
+        return values
 
     # ────────────────────────────  高亮  ─────────────────────────────────────
 
     def highlightComponent(self, paramName):
         self.curHlt = paramName
-
-        # 复原
-
-        for patches in self.geoPatch.values():
-            for patch in patches:
-                if hasattr(patch, 'set_edgecolor'):
-                    patch.set_edgecolor('blue')
-                elif hasattr(patch, 'set_color'):
-                    patch.set_color('blue')
-        # 加红
-
-        if paramName in self.geoPatch:
-            for patch in self.geoPatch[paramName]:
-                if hasattr(patch, 'set_edgecolor'):
-                    patch.set_edgecolor('red')
-                elif hasattr(patch, 'set_color'):
-                    patch.set_color('red')
-        self.canvas.draw()
+        if self.geoArtists is not None:
+            self.geoArtists.highlight(paramName)
         self.stsVar.set(f"已选择 / Selected: {paramName}")
 
     # ────────────────────────────  几何计算  ──────────────────────────────────
 
     def calculateGeometry(self):
-        R1   = self.getParam("Radius_1")
-        Dr1  = self.getParam("Distance_r1")
-        Lv2  = self.getParam("Length_v2")
-        Lr1  = self.getParam("Length_r1")
-        Wr1  = self.getParam("Width_r1")
-        WOr  = self.getParam("Width_Or")
-        LOr  = self.getParam("Length_Or")
-        WOut = self.getParam("Width_Out")
-        LOut = self.getParam("Length_Out")
-        Lr2  = self.getParam("Length_r2")
-        D1   = self.getParam("Distance_1")
-
-        # 圆 ─────────────
-
-        circles = []
-        circles.append(((0, 0), R1))  # 圆1
-
-        circles.append(((R1 + Dr1 - Lr1 - Wr1/2, 0), R1))  # 圆2
-
-        circles.append(((2*R1 + Dr1 + Wr1 + LOr + LOut + Lr2, 0), R1))  # 圆3
-
-        # 线段 ───────────
-
-        seg = lambda x1, y1, x2, y2: ((x1, y1), (x2, y2))
-        segments = [
-            # 1,2
-
-            seg(R1+Dr1,            -Wr1/2,  R1-D1,               -Wr1/2),
-            seg(R1+Dr1,             Wr1/2,  R1-D1,                Wr1/2),
-            # 3,4 (竖直)
-            seg(R1+Dr1,            -Wr1/2,  R1+Dr1,         -Lv2/2+Wr1),
-            seg(R1+Dr1,             Wr1/2,  R1+Dr1,          Lv2/2-Wr1),
-            # 5,6 (竖直 at x = R1+Dr1+Wr1)
-            seg(R1+Dr1+Wr1,     -WOr/2,     R1+Dr1+Wr1,     -Lv2/2),
-            seg(R1+Dr1+Wr1,      WOr/2,     R1+Dr1+Wr1,      Lv2/2),
-            # 7,8 (横向最外框)
-            seg(R1+Dr1+Wr1,      Lv2/2,     R1+Dr1-Lr1-Wr1,  Lv2/2),
-            seg(R1+Dr1+Wr1,     -Lv2/2,     R1+Dr1-Lr1-Wr1, -Lv2/2),
-            # 9,10 (横向内框)
-            seg(R1+Dr1,          Lv2/2-Wr1, R1+Dr1-Lr1,      Lv2/2-Wr1),
-            seg(R1+Dr1,         -Lv2/2+Wr1, R1+Dr1-Lr1,     -Lv2/2+Wr1),
-            # 11,12 (右竖内框)
-            seg(R1+Dr1-Lr1,     -Lv2/2+Wr1, R1+Dr1-Lr1,     -R1+D1),
-            seg(R1+Dr1-Lr1-Wr1, -Lv2/2,     R1+Dr1-Lr1-Wr1, -R1+D1),
-            # 13,14 (左竖内框)
-            seg(R1+Dr1-Lr1,      Lv2/2-Wr1, R1+Dr1-Lr1,      R1-D1),
-            seg(R1+Dr1-Lr1-Wr1,  Lv2/2,     R1+Dr1-Lr1-Wr1,  R1-D1),
-            # 15,16 (Or横向)
-            seg(R1+Dr1+Wr1,     -WOr/2,     R1+Dr1+Wr1+LOr, -WOr/2),
-            seg(R1+Dr1+Wr1,      WOr/2,     R1+Dr1+Wr1+LOr,  WOr/2),
-            # 17,18 (Out横向)
-            seg(R1+Dr1+Wr1+LOr, -WOr/2,     R1+Dr1+Wr1+LOr+LOut, -WOut/2),
-            seg(R1+Dr1+Wr1+LOr,  WOr/2,     R1+Dr1+Wr1+LOr+LOut,  WOut/2),
-            # 19,20 (最右)
-            seg(R1+Dr1+Wr1+LOr+LOut+Lr2+D1,  WOut/2,
-                R1+Dr1+Wr1+LOr+LOut,          WOut/2),
-            seg(R1+Dr1+Wr1+LOr+LOut+Lr2+D1, -WOut/2,
-                R1+Dr1+Wr1+LOr+LOut,         -WOut/2),
-        ]
-
-        return {
-            "circles":     circles,
-            "arcs":        [],        # 无圆弧
-
-            "segments":    segments,
-            "rectangles":  []         # 无矩形阵列
-
-        }
+        return self.geometry.cache.get(self.paramValues())
 
     # ───────────────────────────── 绘制更新 ────────────────────────────────────
 
     def updateModel(self):
         try:
-            self.ax.clear()
-            self.geoPatch = {k: [] for k in self.params}
-
-            geo = self.calculateGeometry()
-
-            # 圆
-
-            for center, radius in geo["circles"]:
-                patch = mpatches.Circle(center, radius, fill=False,
-                                        edgecolor='blue', lw=1.5)
-                self.ax.add_patch(patch)
-                self.geoPatch["Radius_1"].append(patch)
-
-            # 线段
-
-            for p0, p1 in geo["segments"]:
-                line = plt.Line2D([p0[0], p1[0]], [p0[1], p1[1]],
-                                  color='blue', lw=1.5)
-                self.ax.add_line(line)
-                self.geoPatch.setdefault("Length_r1", []).append(line)
-
-            # 自动缩放
-
-            all_x, all_y = [], []
-            for patch in self.ax.patches:
-                if isinstance(patch, mpatches.Circle):
-                    c, r = patch.center, patch.radius
-
-                    all_x.extend([c[0]-r, c[0]+r])
-                    all_y.extend([c[1]-r, c[1]+r])
-            for line in self.ax.lines:
-                xs, ys = line.get_data()
-                all_x.extend(xs)
-                all_y.extend(ys)
-            if not all_x:
-                all_x = all_y = [-1, 1]
-            pad = max((max(all_x)-min(all_x))*0.1, (max(all_y)-min(all_y))*0.1, 1)
-            self.ax.set_xlim(min(all_x)-pad, max(all_x)+pad)
-            self.ax.set_ylim(min(all_y)-pad, max(all_y)+pad)
-            self.ax.set_aspect('equal', adjustable='box')
-            self.ax.grid(True, linestyle='--', alpha=0.5)
-            self.ax.set_title("Droplet2To1", fontsize=14)
-            self.ax.set_xlabel("X (mm)")
-            self.ax.set_ylabel("Y (mm)")
-            self.canvas.draw()
+            self.snapshot = ParamSnapshot("Droplet2To1", self.paramValues())
+            geo = self.geometry.update(self.snapshot)
+            if self.geoArtists is None:
+                self.geoArtists = draw_primitives(self.ax, geo)
+                self.ax.set_aspect('equal', adjustable='box')
+                self.ax.grid(True, linestyle='--', alpha=0.5)
+                self.ax.set_title("Droplet2To1", fontsize=14)
+                self.ax.set_xlabel("X (mm)")
+                self.ax.set_ylabel("Y (mm)")
+            else:
+                self.geoArtists.update(geo, self.geometry.changed)
+            fit_view(self.ax, geo)
+            self.canvas.draw_idle()
 
             if self.curHlt:
                 self.highlightComponent(self.curHlt)
@@ -334,16 +219,7 @@ class MicrochannelTool:
                                                     title="保存DXF / Save DXF")
             if not filename: return
 
-            import ezdxf
-
-            doc = ezdxf.new('R2010')
-            msp = doc.modelspace()
-            geo = self.calculateGeometry()
-            for center, radius in geo["circles"]:
-                msp.add_circle(center, radius)
-            for p0, p1 in geo["segments"]:
-                msp.add_line(p0, p1)
-            doc.saveas(filename)
+            export_dxf(filename, self.calculateGeometry())
             self.stsVar.set(f"已导出DXF / DXF Exported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导出到DXF / Exported to DXF:\n{filename}")
         except Exception as e:
@@ -396,7 +272,7 @@ class MicrochannelTool:
             self.updateModel()
             if "model_name" in data:
                 self.ax.set_title(data["model_name"], fontsize=14)
-                self.canvas.draw()
+                self.canvas.draw_idle()
             self.stsVar.set(f"已导入JSON / JSON Imported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导入JSON / Imported from JSON:\n{filename}")
         except Exception as e:
@@ -404,7 +280,6 @@ class MicrochannelTool:
             self.stsVar.set("导入失败 / Import Failed")
 
     def quitApplication(self):
-        plt.close('all')
         self.master.quit()
         self.master.destroy()
 
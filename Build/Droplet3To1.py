@@ -2,13 +2,10 @@
 # Licensed under the MIT License.
 # See LICENSE in the project root for license information.import numpy as np
 
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 
-import matplotlib.patches as mpatches
-
-import numpy as np
 
 import tkinter as tk
 
@@ -18,6 +15,9 @@ import json
 
 from datetime import datetime
 
+from Microfluid_Geometry import IncrementalGeometry, ParamSnapshot
+from Microfluid_Render import draw_primitives, fit_view, export_dxf
+
 class MicrochannelTool:
     # ───────────────────────────── 初始化 ─────────────────────────────
 
@@ -63,8 +63,11 @@ class MicrochannelTool:
         # 其它界面变量
 
         self.bigFont = ('Helvetica', 12)
-        self.fig, self.ax = plt.subplots(figsize=(8, 6))
-        self.geoPatch = {k: [] for k in self.params}
+        self.fig = Figure(figsize=(8, 6))
+        self.ax = self.fig.add_subplot()
+        self.geoArtists = None
+        self.geometry = IncrementalGeometry("Droplet3To1")
+        self.snapshot = ParamSnapshot("Droplet3To1")
         self.stsVar = tk.StringVar(value="就绪 / Ready")
         self.curHlt = None
 
@@ -152,163 +155,48 @@ class MicrochannelTool:
             self.params[p].set(str(self.defaults[p]))
             messagebox.showerror("错误 / Error", "无效数值 / Invalid number")
 
-    def getParam(self, name):
-        if name in self.params:
-            return float(self.params[name].get())
-        elif name == "Distance_1":
-            R, W = self.getParam("Radius_1"), self.getParam("Width_r1")
-            val = R**2 - (W**2)/4
-
-            if val < 0:
-                raise ValueError("Radius_1 必须大于 Width_r1/2")
-            return R - np.sqrt(val)
-        return 0.0
+    def paramValues(self):
+        """界面参数 -> 数值映射，作为几何内核的输入；无法解析的值恢复为默认值"""
+        values = {}
+        for name, var in self.params.items():
+            try:
+                values[name] = float(var.get())
+            except (ValueError, tk.TclError):
+                messagebox.showerror("参数错误 / Parameter Error", f"无法解析参数'{name}'\n将使用默认值.")
+                var.set(str(self.defaults[name]))
+                values[name] = self.defaults[name]
+        return values
 
     # ─────────────────────────── 高亮 ────────────────────────────
 
     def highlightComponent(self, key):
         self.curHlt = key
-
-        # 先洗成蓝色
-
-        for patches in self.geoPatch.values():
-            for p in patches:
-                if hasattr(p, 'set_edgecolor'):
-                    p.set_edgecolor('blue')
-                elif hasattr(p, 'set_color'):
-                    p.set_color('blue')
-        # 再染红
-
-        if key in self.geoPatch:
-            for p in self.geoPatch[key]:
-                if hasattr(p, 'set_edgecolor'):
-                    p.set_edgecolor('red')
-                elif hasattr(p, 'set_color'):
-                    p.set_color('red')
-        self.canvas.draw()
+        if self.geoArtists is not None:
+            self.geoArtists.highlight(key)
         self.stsVar.set(f"已选择 / Selected: {key}")
 
     # ────────────────────── 几何计算（核心改动） ─────────────────────
 
     def calculateGeometry(self):
-        # 取参数
-
-        R1 = self.getParam("Radius_1")
-        Dr1 = self.getParam("Distance_r1")
-        Lv2 = self.getParam("Length_v2")
-        Wr1 = self.getParam("Width_r1")
-        WOr = self.getParam("Width_Or")
-        LOr = self.getParam("Length_Or")
-        WOut = self.getParam("Width_Out")
-        LOut = self.getParam("Length_Out")
-        Lr2 = self.getParam("Length_r2")
-        D1 = self.getParam("Distance_1")
-
-        # ─────────── 圆 ───────────
-
-        circles = [
-            ((0, 0), R1),
-            ((2*R1 + Dr1 + Wr1 + LOr + LOut + Lr2, 0), R1),
-            ((0, -Lv2/2 + Wr1/2), R1),
-            ((0,  Lv2/2 - Wr1/2), R1),
-        ]
-
-        # 辅助函数
-
-        seg = lambda x1, y1, x2, y2: ((x1, y1), (x2, y2))
-
-        # ─────────── 线段 (20) ───────────
-
-        segments = [
-            seg(R1+Dr1,             -Wr1/2,      R1-D1,               -Wr1/2),   #1
-
-            seg(R1+Dr1,              Wr1/2,      R1-D1,                Wr1/2),   #2
-
-            seg(R1+Dr1,             -Wr1/2,      R1+Dr1,         -Lv2/2+Wr1),    #3
-
-            seg(R1+Dr1,              Wr1/2,      R1+Dr1,          Lv2/2-Wr1),    #4
-
-            seg(R1+Dr1+Wr1,        -WOr/2,       R1+Dr1+Wr1,       -Lv2/2),      #5
-
-            seg(R1+Dr1+Wr1,         WOr/2,       R1+Dr1+Wr1,        Lv2/2),      #6
-
-            seg(R1+Dr1+Wr1,         Lv2/2,       R1-D1,              Lv2/2),     #7
-
-            seg(R1+Dr1+Wr1,        -Lv2/2,       R1-D1,             -Lv2/2),     #8
-
-            seg(R1+Dr1,             Lv2/2-Wr1,   R1-D1,              Lv2/2-Wr1), #9
-
-            seg(R1+Dr1,            -Lv2/2+Wr1,   R1-D1,             -Lv2/2+Wr1), #10
-
-            seg(R1+Dr1+Wr1,        -WOr/2,       R1+Dr1+Wr1+LOr,    -WOr/2),     #15
-
-            seg(R1+Dr1+Wr1,         WOr/2,       R1+Dr1+Wr1+LOr,     WOr/2),     #16
-
-            seg(R1+Dr1+Wr1+LOr,    -WOr/2,       R1+Dr1+Wr1+LOr+LOut, -WOut/2),  #17
-
-            seg(R1+Dr1+Wr1+LOr,     WOr/2,       R1+Dr1+Wr1+LOr+LOut,  WOut/2),  #18
-
-            seg(R1+Dr1+Wr1+LOr+LOut+Lr2+D1,  WOut/2,
-                R1+Dr1+Wr1+LOr+LOut,          WOut/2),                         #19
-
-            seg(R1+Dr1+Wr1+LOr+LOut+Lr2+D1, -WOut/2,
-                R1+Dr1+Wr1+LOr+LOut,         -WOut/2),                         #20
-
-        ]
-
-        return {"circles": circles,
-                "arcs": [],            # 无圆弧
-
-                "segments": segments,
-                "rectangles": []}      # 无矩形阵列
+        return self.geometry.cache.get(self.paramValues())
 
     # ─────────────────────────── 更新绘图 ───────────────────────────
 
     def updateModel(self):
         try:
-            self.ax.clear()
-            self.geoPatch = {k: [] for k in self.params}
-            geo = self.calculateGeometry()
-
-            # 圆
-
-            for ctr, r in geo["circles"]:
-                c = mpatches.Circle(ctr, r, fill=False,
-                                    edgecolor='blue', lw=1.5)
-                self.ax.add_patch(c)
-                self.geoPatch["Radius_1"].append(c)
-
-            # 线段
-
-            for p0, p1 in geo["segments"]:
-                ln = plt.Line2D([p0[0], p1[0]], [p0[1], p1[1]],
-                                color='blue', lw=1.5)
-                self.ax.add_line(ln)
-                self.geoPatch.setdefault("Length_r2", []).append(ln)
-
-            # 自动缩放
-
-            xs, ys = [], []
-            for p in self.ax.patches:
-                if isinstance(p, mpatches.Circle):
-                    c, r = p.center, p.radius
-
-                    xs += [c[0]-r, c[0]+r]
-                    ys += [c[1]-r, c[1]+r]
-            for l in self.ax.lines:
-                x, y = l.get_data()
-                xs += list(x); ys += list(y)
-            if not xs:
-                xs = ys = [-1, 1]
-            pad = max((max(xs)-min(xs))*0.1, (max(ys)-min(ys))*0.1, 1)
-            self.ax.set_xlim(min(xs)-pad, max(xs)+pad)
-            self.ax.set_ylim(min(ys)-pad, max(ys)+pad)
-            self.ax.set_aspect('equal', adjustable='box')
-            self.ax.grid(True, linestyle='--', alpha=0.5)
-            self.ax.set_title("Droplet3To1")
-            self.ax.set_xlabel("X (mm)")
-            self.ax.set_ylabel("Y (mm)")
-            self.canvas.draw()
+            self.snapshot = ParamSnapshot("Droplet3To1", self.paramValues())
+            geo = self.geometry.update(self.snapshot)
+            if self.geoArtists is None:
+                self.geoArtists = draw_primitives(self.ax, geo)
+                self.ax.set_aspect('equal', adjustable='box')
+                self.ax.grid(True, linestyle='--', alpha=0.5)
+                self.ax.set_title("Droplet3To1")
+                self.ax.set_xlabel("X (mm)")
+                self.ax.set_ylabel("Y (mm)")
+            else:
+                self.geoArtists.update(geo, self.geometry.changed)
+            fit_view(self.ax, geo)
+            self.canvas.draw_idle()
 
             if self.curHlt:
                 self.highlightComponent(self.curHlt)
@@ -327,16 +215,7 @@ class MicrochannelTool:
             if not name:
                 return
 
-            import ezdxf
-
-            doc = ezdxf.new('R2010')
-            msp = doc.modelspace()
-            geo = self.calculateGeometry()
-            for ctr, r in geo["circles"]:
-                msp.add_circle(ctr, r)
-            for p0, p1 in geo["segments"]:
-                msp.add_line(p0, p1)
-            doc.saveas(name)
+            export_dxf(name, self.calculateGeometry())
             self.stsVar.set(f"已导出DXF / DXF Exported: {name}")
             messagebox.showinfo("成功 / Success",
                                 f"已导出到DXF / Exported to DXF:\n{name}")
@@ -396,7 +275,7 @@ class MicrochannelTool:
             self.updateModel()
             if "model_name" in data:
                 self.ax.set_title(data["model_name"])
-                self.canvas.draw()
+                self.canvas.draw_idle()
             self.stsVar.set(f"已导入JSON / JSON Imported: {name}")
             messagebox.showinfo("成功 / Success",
                                 f"已导入JSON / Imported from JSON:\n{name}")
@@ -406,7 +285,6 @@ class MicrochannelTool:
             self.stsVar.set("导入失败 / Import Failed")
 
     def quitApplication(self):
-        plt.close('all')
         self.master.quit()
         self.master.destroy()
 
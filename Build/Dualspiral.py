@@ -1,26 +1,23 @@
 # Copyright (c) 2025 [Grant]
 # Licensed under the MIT License.
 # See LICENSE in the project root for license information.
-import numpy as np
 
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 
-import matplotlib.patches as mpatches
-
 import tkinter as tk
 
 from tkinter import ttk, filedialog, messagebox
 
-import ezdxf
-
-import math
 
 import json
 
 from datetime import datetime
 
+from Microfluid_Geometry import IncrementalGeometry, ParamSnapshot
+from Microfluid_Render import draw_primitives, fit_view, export_dxf
+
 class MicrochannelTool:
     def __init__(self, master):
         self.master = master
@@ -74,8 +71,11 @@ class MicrochannelTool:
         self.bigFont = ('Helvetica', 12)
         self.headerFont = ('Helvetica', 12, 'bold')
 
-        self.fig, self.ax = plt.subplots(figsize=(8, 6))
-        self.geoPatch = {k: [] for k in self.params}
+        self.fig = Figure(figsize=(8, 6))
+        self.ax = self.fig.add_subplot()
+        self.geoArtists = None
+        self.geometry = IncrementalGeometry("Dualspiral")
+        self.snapshot = ParamSnapshot("Dualspiral")
         self.stsVar = tk.StringVar(value="就绪 / Ready")
         self.curHlt = None
 
@@ -170,278 +170,48 @@ class MicrochannelTool:
             self.params[param].set(str(self.defaults[param]))
             messagebox.showerror("错误 / Error", "无效的数值 / Invalid number")
 
-    def getParam(self, name):
-        try:
-            if name == "Distance_1":
-                radius_1 = float(self.params["Radius_1"].get())
-                width_1 = float(self.params["Width_1"].get())
-                v = radius_1 ** 2 - (width_1 / 2) ** 2
-
-                if v < 0: return 0.0
-
-                return radius_1 - math.sqrt(v)
-            elif name == "Distance_2":
-                width_1 = float(self.params["Width_1"].get())
-                circle = int(float(self.params["Circle"].get()))
-                return width_1 * 2 * circle
-
-            elif name == "Angle":
-                return math.radians(float(self.params["Angle"].get()))
-            else:
-                return float(self.params[name].get())
-        except Exception:
-            # fallback
-
-            if name in self.defaults:
-                self.params[name].set(str(self.defaults[name]))
-                return self.defaults[name]
-            else:
-                return 0.0
+    def paramValues(self):
+        """界面参数 -> 数值映射，作为几何内核的输入；无法解析的值恢复为默认值"""
+        values = {}
+        for name, var in self.params.items():
+            try:
+                values[name] = float(var.get())
+            except (ValueError, tk.TclError):
+                messagebox.showerror("参数错误 / Parameter Error", f"无法解析参数'{name}'\n将使用默认值.")
+                var.set(str(self.defaults[name]))
+                values[name] = self.defaults[name]
+        return values
 
     def highlightComponent(self, paramName):
         self.curHlt = paramName
-
-        for patches in self.geoPatch.values():
-            for patch in patches:
-                if hasattr(patch, 'set_edgecolor'):
-                    patch.set_edgecolor('blue')
-                elif hasattr(patch, 'set_color'):
-                    patch.set_color('blue')
-        if paramName in self.geoPatch:
-            for patch in self.geoPatch[paramName]:
-                if hasattr(patch, 'set_edgecolor'):
-                    patch.set_edgecolor('red')
-                elif hasattr(patch, 'set_color'):
-                    patch.set_color('red')
-
-        self.canvas.draw()
+        if self.geoArtists is not None:
+            self.geoArtists.highlight(paramName)
         self.stsVar.set(f"已选择 / Selected: {paramName}")
 
     def calculateGeometry(self):
-        Radius_1 = self.getParam("Radius_1")
-        Width_1 = self.getParam("Width_1")
-        Circle = int(self.getParam("Circle"))
-        Distance_3 = self.getParam("Distance_3")
-        Length_r1 = self.getParam("Length_r1")
-        Length_v1 = self.getParam("Length_v1")
-        Angle = self.getParam("Angle")  # radians
-
-        Length_Out = self.getParam("Length_Out")
-        Distance_1 = self.getParam("Distance_1")
-        Distance_2 = self.getParam("Distance_2")
-
-        # 圆1
-
-        circle1_center = (0, -Width_1/2-Length_v1-Radius_1)
-        circle1_radius = Radius_1
-
-        # 圆2
-
-        x2 = Width_1/2+Distance_2+Length_v1+(Length_Out+Radius_1)*math.cos(Angle)+Width_1*math.sin(Angle)/2
-
-        y2 = Distance_2+Width_1/2+(Length_Out+Radius_1)*math.sin(Angle)-Width_1*math.cos(Angle)/2
-
-        circle2_center = (x2, y2)
-        circle2_radius = Radius_1
-
-        # 圆3
-
-        x3 = x2
-
-        y3 = Distance_2-Width_1/2-(Radius_1+Length_Out)*math.sin(Angle)+Width_1*math.cos(Angle)/2
-
-        circle3_center = (x3, y3)
-        circle3_radius = Radius_1
-
-        # 圆弧
-
-        arc_center = (Length_r1/2, -Width_1/2-Length_v1/2-Distance_1/2+(Length_v1+Distance_1)/2)
-        arc_radius = Width_1
-
-        arc_theta1 = 90
-
-        arc_theta2 = 180
-
-        # 线段
-
-        seg1_p0 = (Length_r1/2, -Width_1/2-Length_v1/2-Distance_1/2-(Length_v1+Distance_1)/2)
-        seg1_p1 = (Length_r1/2, -Width_1/2-Length_v1/2-Distance_1/2+(Length_v1+Distance_1)/2)
-        seg2_p0 = (-Length_r1/2, seg1_p0[1])
-        seg2_p1 = (-Length_r1/2, seg1_p1[1])
-        seg3_p0 = (Width_1/2, Distance_2+Width_1/2)
-        seg3_p1 = (Width_1/2+Distance_2+Length_v1, Distance_2+Width_1/2)
-        seg4_p0 = (Width_1/2, Distance_2-Width_1/2)
-        seg4_p1 = (Width_1/2+Distance_2+Length_v1, Distance_2-Width_1/2)
-        seg5_p0 = (
-            Width_1/2+Distance_2+Length_v1+(Distance_1+Length_Out)*math.cos(Angle),
-            Distance_2+Width_1/2+(Distance_1+Length_Out)*math.sin(Angle)
-        )
-        seg5_p1 = (Width_1/2+Distance_2+Length_v1, Distance_2+Width_1/2)
-        seg6_p0 = (
-            Width_1/2+Distance_2+Length_v1+(Distance_1+Length_Out)*math.cos(Angle),
-            Distance_2-Width_1/2-(Distance_1+Length_Out)*math.sin(Angle)
-        )
-        seg6_p1 = (Width_1/2+Distance_2+Length_v1, Distance_2-Width_1/2)
-        seg7_p0 = (Width_1/2+Distance_2+Length_v1+Width_1/math.sin(Angle), Distance_2+Width_1/2)
-        seg7_p1 = (
-            Width_1/2+Distance_2+Length_v1+(Distance_1+Length_Out)*math.cos(Angle)+Width_1*math.sin(Angle),
-            Distance_2+Width_1/2+(Distance_1+Length_Out)*math.sin(Angle)-Width_1*math.cos(Angle)
-        )
-        seg8_p0 = (Width_1/2+Distance_2+Length_v1+Width_1/math.sin(Angle), Distance_2-Width_1/2)
-        seg8_p1 = (
-            Width_1/2+Distance_2+Length_v1+(Distance_1+Length_Out)*math.cos(Angle)+Width_1*math.sin(Angle),
-            Distance_2-Width_1/2-(Distance_1+Length_Out)*math.sin(Angle)+Width_1*math.cos(Angle)
-        )
-        seg9_p0 = (Width_1/2+Distance_2+Length_v1+Width_1/math.sin(Angle), Distance_2+Width_1/2)
-        seg9_p1 = (
-            Width_1/2+Distance_2+Length_v1+Width_1/math.sin(Angle)-Width_1/2/math.tan(Angle),
-            Distance_2
-
-        )
-        seg10_p0 = (Width_1/2+Distance_2+Length_v1+Width_1/math.sin(Angle), Distance_2-Width_1/2)
-        seg10_p1 = (
-            Width_1/2+Distance_2+Length_v1+Width_1/math.sin(Angle)-Width_1/2/math.tan(Angle),
-            Distance_2
-
-        )
-
-        # 螺旋
-
-        spiral_points1 = []
-        spiral_points2 = []
-        s_range = np.linspace(0, 1, 500)
-        for s in s_range:
-            t = 2*math.pi*s*Circle
-
-            r1 = Distance_2*s+Distance_3+Width_1
-
-            r2 = Distance_2*s+Distance_3
-
-            x0 = Length_r1/2 + math.sin(t)*r1
-
-            y0 = -Distance_3-Width_1/2 + math.cos(t)*r1
-
-            x1 = Length_r1/2 + math.sin(t)*r2
-
-            y1 = -Distance_3-Width_1/2 + math.cos(t)*r2
-
-            spiral_points1.append((x0, y0))
-            spiral_points2.append((x1, y1))
-
-        return {
-            "circle1": (circle1_center, circle1_radius),
-            "circle2": (circle2_center, circle2_radius),
-            "circle3": (circle3_center, circle3_radius),
-            "arc1": (arc_center, arc_radius, arc_theta1, arc_theta2),
-            "segments": [
-                (seg1_p0, seg1_p1), (seg2_p0, seg2_p1), (seg3_p0, seg3_p1), (seg4_p0, seg4_p1),
-                (seg5_p0, seg5_p1), (seg6_p0, seg6_p1), (seg7_p0, seg7_p1), (seg8_p0, seg8_p1),
-                (seg9_p0, seg9_p1), (seg10_p0, seg10_p1)
-            ],
-            "spiral1": spiral_points1,
-            "spiral2": spiral_points2,
-        }
+        return self.geometry.cache.get(self.paramValues())
 
     def updateModel(self):
         try:
+            self.snapshot = ParamSnapshot("Dualspiral", self.paramValues())
             # 更新计算参数（但不显示在UI）
-            d1 = self.getParam("Distance_1")
-            d2 = self.getParam("Distance_2")
-
-            self.ax.clear()
-            for key in self.geoPatch:
-                self.geoPatch[key] = []
-
-            geo = self.calculateGeometry()
-
-            # 圆
-
-            c1 = mpatches.Circle(geo["circle1"][0], geo["circle1"][1], fill=False, edgecolor='blue', lw=2)
-            self.ax.add_patch(c1)
-            self.geoPatch["Radius_1"].append(c1)
-            c2 = mpatches.Circle(geo["circle2"][0], geo["circle2"][1], fill=False, edgecolor='blue', lw=2)
-            self.ax.add_patch(c2)
-            self.geoPatch["Radius_1"].append(c2)
-            c3 = mpatches.Circle(geo["circle3"][0], geo["circle3"][1], fill=False, edgecolor='blue', lw=2)
-            self.ax.add_patch(c3)
-            self.geoPatch["Radius_1"].append(c3)
-
-            # 圆弧
-
-            center, radius, theta1, theta2 = geo["arc1"]
-            arc = mpatches.Arc(center, 2*radius, 2*radius, angle=0, theta1=theta1, theta2=theta2, edgecolor='blue', lw=2)
-            self.ax.add_patch(arc)
-            self.geoPatch["Width_1"].append(arc)
-
-            # 线段
-
-            for idx, (p0, p1) in enumerate(geo["segments"], 1):
-                line = plt.Line2D([p0[0], p1[0]], [p0[1], p1[1]], color='blue', lw=2)
-                self.ax.add_line(line)
-                self.geoPatch["Width_1"].append(line)
-
-            # 螺旋
-
-            x_sp1, y_sp1 = zip(*geo["spiral1"])
-            x_sp2, y_sp2 = zip(*geo["spiral2"])
-            line1 = plt.Line2D(x_sp1, y_sp1, color='blue', lw=2)
-            line2 = plt.Line2D(x_sp2, y_sp2, color='blue', lw=2)
-            self.ax.add_line(line1)
-            self.ax.add_line(line2)
-            self.geoPatch["Circle"].extend([line1, line2])
-
-            # 边界自适应
-
-            all_x = []
-            all_y = []
-
-            # 螺旋
-
-            if len(geo["spiral1"]) > 0:
-                x_sp1, y_sp1 = zip(*geo["spiral1"])
-                all_x += list(x_sp1)
-                all_y += list(y_sp1)
+            d1 = self.snapshot["Distance_1"]
+            d2 = self.snapshot["Distance_2"]
+
+            geo = self.geometry.update(self.snapshot)
+            if self.geoArtists is None:
+                self.geoArtists = draw_primitives(self.ax, geo, lw=2)
+                self.ax.set_aspect('equal')
+                self.ax.grid(True, linestyle='--', alpha=0.5)
+
+                # 添加标题
+                self.ax.set_title("DualSpiral", fontsize=14)
+                self.ax.set_xlabel("")
+                self.ax.set_ylabel("")
             else:
-                x_sp1 = y_sp1 = []
-
-            if len(geo["spiral2"]) > 0:
-                x_sp2, y_sp2 = zip(*geo["spiral2"])
-                all_x += list(x_sp2)
-                all_y += list(y_sp2)
-            else:
-                x_sp2 = y_sp2 = []
-
-            # 圆心和半径极值
-
-            for ci in ["circle1", "circle2", "circle3"]:
-                cx, cy = geo[ci][0]
-                r = geo[ci][1]
-                all_x += [cx, cx - r, cx + r]
-                all_y += [cy, cy - r, cy + r]
-
-            # 线段端点
-
-            for p0, p1 in geo["segments"]:
-                all_x += [p0[0], p1[0]]
-                all_y += [p0[1], p1[1]]
-
-            # 弧的圆心极值
-
-            arc_center, arc_radius, _, _ = geo["arc1"]
-            all_x += [arc_center[0], arc_center[0] - arc_radius, arc_center[0] + arc_radius]
-            all_y += [arc_center[1], arc_center[1] - arc_radius, arc_center[1] + arc_radius]
-
-            pad = 2
-
-            self.ax.set_xlim(min(all_x)-pad, max(all_x)+pad)
-            self.ax.set_ylim(min(all_y)-pad, max(all_y)+pad)
-            self.ax.set_aspect('equal')
-            self.ax.grid(True, linestyle='--', alpha=0.5)
-
-            # 添加标题
-            self.ax.set_title("DualSpiral", fontsize=14)
-            self.ax.set_xlabel("")
-            self.ax.set_ylabel("")
+                self.geoArtists.update(geo, self.geometry.changed)
+            fit_view(self.ax, geo, pad=2)
+            self.canvas.draw_idle()
 
             if self.curHlt:
                 self.highlightComponent(self.curHlt)
@@ -460,34 +230,7 @@ class MicrochannelTool:
             if not filename:
                 return
 
-            doc = ezdxf.new('R2010')
-            msp = doc.modelspace()
-            geo = self.calculateGeometry()
-
-            # 圆
-
-            msp.add_circle(geo["circle1"][0], geo["circle1"][1])
-            msp.add_circle(geo["circle2"][0], geo["circle2"][1])
-            msp.add_circle(geo["circle3"][0], geo["circle3"][1])
-
-            # 圆弧
-
-            center, radius, theta1, theta2 = geo["arc1"]
-            msp.add_arc(center, radius, theta1, theta2)
-
-            # 线段
-
-            for p0, p1 in geo["segments"]:
-                msp.add_line(p0, p1)
-
-            # 螺旋
-
-            # 用多段线近似
-
-            msp.add_lwpolyline(geo["spiral1"])
-            msp.add_lwpolyline(geo["spiral2"])
-
-            doc.saveas(filename)
+            export_dxf(filename, self.calculateGeometry())
             self.stsVar.set(f"已导出DXF / DXF Exported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导出到DXF / Exported to DXF:\n{filename}")
 
@@ -590,7 +333,6 @@ class MicrochannelTool:
             self.stsVar.set("导入失败 / Import Failed")
 
     def quitApplication(self):
-        plt.close('all')
         self.master.quit()
         self.master.destroy()
 
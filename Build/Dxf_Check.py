@@ -0,0 +1,113 @@
+# Copyright (c) 2025 [Grant]
+# Licensed under the MIT License.
+# See LICENSE in the project root for license information.
+"""
+流式 DXF 自检与基准 / Round-trip check and benchmark for the streaming DXF writer
+
+对每个器件和每种螺旋写法，分别经由 ezdxf 文档和 stream_dxf 写出 DXF，用 ezdxf 读回后
+逐个比较实体 (类型、坐标、bulge、样条节点与权重)，并检查 ezdxf 的 audit 没有错误；
+分两块流式写出同一几何时，读回的实体应为两份依次排列。
+--tile N 时再把一个器件平铺成 N×N 阵列，比较两种写法的耗时和 Python 内存峰值：ezdxf 写法
+先合并出整个阵列，流式写法逐个单元平移后直接写出；峰值含生成阵列几何在内的整个过程。
+
+用法 / Usage:
+    python Dxf_Check.py                      # 检查全部器件
+    python Dxf_Check.py CdPCR --tile 40      # 另外测量 40×40 阵列的导出
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from Microfluid_Geometry import DEVICES, Primitives, device_geometry
+from Microfluid_Render import SPIRAL_MODES, export_dxf, stream_dxf
+
+def read_entities(filename):
+    """用 ezdxf 读回 -> (审计是否有错误, 实体列表)；句柄与所属块不参与比较"""
+    import ezdxf
+
+    doc = ezdxf.readfile(filename)
+    entities = []
+    for e in doc.modelspace():
+        kind = e.dxftype()
+        if kind == "LWPOLYLINE":
+            value = list(e.get_points("xyb"))
+        elif kind == "SPLINE":
+            value = ([tuple(p) for p in e.control_points], list(e.knots), list(e.weights),
+                     e.dxf.flags, e.dxf.degree)
+        else:
+            value = sorted((k, v) for k, v in e.dxf.all_existing_dxf_attribs().items()
+                           if k not in ("handle", "owner"))
+        entities.append((kind, value))
+    return doc.audit().has_errors, entities
+
+def check_device(name, tmpdir):
+    """返回发现的问题列表 (空表示通过)"""
+    geo = device_geometry(name)
+    problems = []
+    for spiral in SPIRAL_MODES:
+        ref, out = os.path.join(tmpdir, "ezdxf.dxf"), os.path.join(tmpdir, "stream.dxf")
+        export_dxf(ref, geo, spiral, stream=False)
+        export_dxf(out, geo, spiral, stream=True)
+        _, expected = read_entities(ref)
+        errors, entities = read_entities(out)
+        if errors:
+            problems.append(f"spiral={spiral}: ezdxf audit 报错 / audit errors")
+        if entities != expected:
+            problems.append(f"spiral={spiral}: 读回的实体与 ezdxf 写出的不同 / entities differ")
+        stream_dxf(out, iter([geo, geo]), spiral)
+        errors, entities = read_entities(out)
+        if errors or entities != expected * 2:
+            problems.append(f"spiral={spiral}: 分块流式写出的结果不对 / chunked stream differs")
+    return problems
+
+def tiles(name, n):
+    """器件按包围盒间距平铺成 n×n 阵列，逐个产出平移后的单元"""
+    geo = device_geometry(name)
+    xmin, ymin, xmax, ymax = geo.bounds()
+    dx, dy = (xmax - xmin) * 1.1, (ymax - ymin) * 1.1
+    return (geo.translated(i * dx, j * dy) for i in range(n) for j in range(n))
+
+def measure(filename, name, n, stream):
+    """生成 n×n 阵列并导出一次，返回 (耗时 s, Python 内存峰值 MB)"""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    if stream:
+        stream_dxf(filename, tiles(name, n))
+    else:
+        export_dxf(filename, Primitives.concatenate(tiles(name, n)), stream=False)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="流式 DXF 自检 / Streaming DXF round-trip check")
+    parser.add_argument("devices", nargs="*", help="器件名 (默认全部)")
+    parser.add_argument("--tile", type=int, metavar="N", help="另外测量 N×N 阵列的导出耗时与内存")
+    args = parser.parse_args(argv)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name in args.devices or DEVICES:
+            problems = check_device(name, tmpdir)
+            print(f"{name:<24}{'ok' if not problems else 'FAILED'}")
+            for msg in problems:
+                print(f"    {msg}")
+            failed |= bool(problems)
+        if args.tile:
+            for name in args.devices or DEVICES:
+                count = len(device_geometry(name)) * args.tile**2
+                print(f"{name} {args.tile}×{args.tile}: {count:,} 个图元 / primitives")
+                for label, stream in (("ezdxf", False), ("stream", True)):
+                    filename = os.path.join(tmpdir, f"{label}.dxf")
+                    elapsed, peak = measure(filename, name, args.tile, stream)
+                    size = os.path.getsize(filename) / 2**20
+                    print(f"    {label:<8}{elapsed:8.2f} s  峰值 / peak {peak:8.1f} MB  文件 / file {size:.1f} MB")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
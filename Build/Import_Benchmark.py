@@ -0,0 +1,105 @@
+# Copyright (c) 2025 [Grant]
+# Licensed under the MIT License.
+# See LICENSE in the project root for license information.
+"""
+各工具冷启动导入时间基准 / Cold-start import-time benchmark for every tool
+
+每个模块在新的 Python 进程中用 -X importtime 导入，取多次运行的最小值。
+同时检查导出专用的重量级依赖 (ezdxf、matplotlib.pyplot) 没有在导入时被加载。
+
+用法 / Usage:
+    python Import_Benchmark.py                       # 测量并打印
+    python Import_Benchmark.py --save baseline.json  # 保存基线
+    python Import_Benchmark.py --check baseline.json # 与基线比较，超出容差则返回非零
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 导入时不应加载的模块 (只在导出或独立脚本中使用)
+DEFERRED_MODULES = ("ezdxf", "matplotlib.pyplot")
+
+def tool_modules():
+    """Build 目录下的所有工具模块名"""
+    names = [os.path.splitext(os.path.basename(p))[0] for p in glob.glob(os.path.join(HERE, "*.py"))]
+    return sorted(n for n in names if n != "Import_Benchmark")
+
+def measure(module):
+    """在新进程中导入 module，返回 (累计导入时间 ms, 已加载的模块名集合)"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=HERE, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{module}: 导入失败 / import failed\n{proc.stderr.strip().splitlines()[-1]}")
+    total = None
+    loaded = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # 表头
+        loaded.add(name.strip())
+        if name.rstrip() == f" {module}":
+            total = int(cumulative) / 1000
+    return total, loaded
+
+def benchmark(modules, repeat=3):
+    """{模块: {"ms": 最小导入时间, "deferred_loaded": [...]}}"""
+    results = {}
+    for module in modules:
+        times = []
+        loaded = set()
+        for _ in range(repeat):
+            ms, loaded = measure(module)
+            times.append(ms)
+        results[module] = {"ms": min(times),
+                           "deferred_loaded": [m for m in DEFERRED_MODULES if m in loaded]}
+    return results
+
+def compare(results, baseline, tolerance):
+    """与基线比较，返回超出容差的 (模块, 当前, 基线)"""
+    regressions = []
+    for module, res in results.items():
+        base = baseline.get(module, {}).get("ms")
+        if base is not None and res["ms"] > base * (1 + tolerance):
+            regressions.append((module, res["ms"], base))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="工具导入时间基准 / Import-time benchmark")
+    parser.add_argument("modules", nargs="*", help="要测量的模块 (默认全部)")
+    parser.add_argument("--repeat", type=int, default=3, help="每个模块的运行次数，取最小值")
+    parser.add_argument("--save", metavar="JSON", help="保存结果为基线")
+    parser.add_argument("--check", metavar="JSON", help="与基线比较")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的相对增长 (默认 0.25)")
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.modules or tool_modules(), args.repeat)
+    failed = False
+    print(f"{'模块 Module':<28}{'导入 Import (ms)':>16}  延迟依赖 Deferred")
+    for module, res in results.items():
+        flag = ", ".join(res["deferred_loaded"]) or "-"
+        print(f"{module:<28}{res['ms']:>16.1f}  {flag}")
+        if res["deferred_loaded"]:
+            failed = True
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"基线已保存 / Baseline saved -> {args.save}")
+    if args.check:
+        with open(args.check, encoding="utf-8") as f:
+            baseline = json.load(f)
+        for module, now, base in compare(results, baseline, args.tolerance):
+            print(f"回退 Regression: {module} {now:.1f} ms > {base:.1f} ms × {1 + args.tolerance:g}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
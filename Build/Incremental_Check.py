@@ -0,0 +1,86 @@
+# Copyright (c) 2025 [Grant]
+# Licensed under the MIT License.
+# See LICENSE in the project root for license information.
+"""
+增量几何自检 / Self-check for incremental geometry recomputation
+
+对每个器件随机逐个改变参数，检查:
+  1. IncrementalGeometry 的结果与整体重算 (器件函数) 逐位相同，不用缓存和
+     经由 GeometryCache 命中时都检查；
+  2. changed 之外的图元类别与上次结果逐位相同；
+  3. 部件表中未声明的参数改变时，该部件的输出不变 (依赖声明完整)。
+
+用法 / Usage:
+    python Incremental_Check.py                  # 检查全部器件
+    python Incremental_Check.py CdPCR --trials 200
+"""
+import argparse
+import sys
+import warnings
+
+import numpy as np
+
+from Microfluid_Geometry import ALL_KINDS, CACHE_BYTES, DEVICES, GeometryCache, IncrementalGeometry, device_parts
+
+def perturb(value, rng):
+    """随机改变一个参数值；整数值保持为整数，0 (开关类参数) 变为 1"""
+    if value == 0:
+        return 1.0
+    new = value * rng.uniform(0.8, 1.25)
+    if float(value).is_integer() and value >= 1:
+        new = float(max(1, round(new)))
+    return new
+
+def check_device(name, trials=50, seed=0, cached=False):
+    """返回发现的问题列表 (空表示通过)；cached 为 False 时缓存容量为 0，每次都走部件重算"""
+    func, defaults, _ = DEVICES[name]
+    parts = device_parts(name)
+    rng = np.random.default_rng(seed)
+    inc = IncrementalGeometry(name, GeometryCache(name, maxbytes=CACHE_BYTES if cached else 0))
+    p = dict(defaults)
+    last = inc.update(p)
+    problems = []
+    for _ in range(trials):
+        key = rng.choice(list(defaults))
+        # 偶尔退回默认值，模拟来回切换
+        trial = {**p, key: defaults[key] if rng.random() < 0.2 else perturb(p[key], rng)}
+        try:
+            full = func(trial)
+        except (ValueError, ZeroDivisionError):
+            continue  # 参数组合无效，界面同样会拒绝
+        geo = inc.update(trial)
+        if not geo.identical(full):
+            problems.append(f"改变 {key} 后增量结果与整体重算不同 / incremental != full")
+        if geo.groups == last.groups:
+            for kind in set(ALL_KINDS) - inc.changed:
+                if not geo.same_kind(last, kind):
+                    problems.append(f"改变 {key} 后 {kind} 有变化却不在 changed 中 / missed change")
+        last = geo
+        for part_name, inputs, part in parts:
+            if key not in inputs and not part(trial).identical(part(p)):
+                problems.append(f"部件 {part_name} 依赖未声明的参数 / undeclared input: {key}")
+        p = trial
+    return sorted(set(problems))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="增量几何自检 / Incremental geometry self-check")
+    parser.add_argument("devices", nargs="*", help="器件名 (默认全部)")
+    parser.add_argument("--trials", type=int, default=50, help="每个器件的随机改动次数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name in args.devices or DEVICES:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # 极端参数下的 sqrt/arccos 域警告
+            problems = (check_device(name, args.trials, args.seed)
+                        + check_device(name, args.trials, args.seed, cached=True))
+        print(f"{name:<24}{'ok' if not problems else 'FAILED'}  ({len(device_parts(name))} 个部件 / parts)")
+        for msg in problems:
+            print(f"    {msg}")
+        failed |= bool(problems)
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,17 @@
 # Copyright (c) 2025 [Grant]
 # Licensed under the MIT License.
 # See LICENSE in the project root for license information.
-import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import matplotlib.patches as mpatches
 from matplotlib.path import Path
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import ezdxf
-import math
 import json
 from datetime import datetime
 
+from Microfluid_Geometry import IncrementalGeometry, ParamSnapshot
+from Microfluid_Render import draw_primitives, fit_view, export_dxf
+
 class MicrochannelTool:
     def __init__(self, master):
         self.master = master
@@ -64,8 +63,11 @@ class MicrochannelTool:
         self.headerFont = ('Helvetica', 12, 'bold')
 
         # 创建图形和相关变量
-        self.fig, self.ax = plt.subplots(figsize=(8, 6))
-        self.geoPatch = {k: [] for k in self.params}
+        self.fig = Figure(figsize=(8, 6))
+        self.ax = self.fig.add_subplot()
+        self.geoArtists = None
+        self.geometry = IncrementalGeometry("InertialSeparator")
+        self.snapshot = ParamSnapshot("InertialSeparator")
         self.stsVar = tk.StringVar(value="就绪 / Ready")
         self.curHlt = None
         self.entries = {}
@@ -181,342 +183,53 @@ class MicrochannelTool:
             self.params[param].set(str(self.defaults[param]))
             messagebox.showerror("错误 / Error", "无效的数值 / Invalid number")
 
-    def getParam(self, name):
-        try:
-            # 计算Distance_1
-            if name == "Distance_1":
-                radius_1 = self.getParam("Radius_1")
-                width_r1 = self.getParam("Width_r1")
-                # 计算 Distance_1 = Radius_1 - sqrt(Radius_1^2 - (Width_r1/2)^2)
-                discriminant = radius_1**2 - (width_r1/2)**2
-                if discriminant < 0:
-                    return 0.0  # 避免负值
-                return radius_1 - math.sqrt(discriminant)
-
-            # 计算Radius_5
-            elif name == "Radius_5":
-                # 计算Radius_5 = Radius_4*sin(Angle*2*pi/360) + Width_r1
-                angle_rad = self.getParam("Angle")  * math.pi / 360
-                return self.getParam("Radius_4") * math.sin(angle_rad) + self.getParam("Width_r1")
-
-            # 其他参数
-            return float(self.params[name].get())
-        except:
-            self.params[name].set(str(self.defaults[name]))
-            return self.defaults[name]
+    def paramValues(self):
+        """界面参数 -> 数值映射，作为几何内核的输入；无法解析的值恢复为默认值"""
+        values = {}
+        for name, var in self.params.items():
+            if name == "Radius_5":
+                continue  # 计算值，由内核给出
+            try:
+                values[name] = float(var.get())
+            except (ValueError, tk.TclError):
+                messagebox.showerror("参数错误 / Parameter Error", f"无法解析参数'{name}'\n将使用默认值.")
+                var.set(str(self.defaults[name]))
+                values[name] = self.defaults[name]
+        return values
 
     def highlightComponent(self, paramName):
         self.curHlt = paramName
-        # 将所有元素设为蓝色
-        for patches in self.geoPatch.values():
-            for patch in patches:
-                if hasattr(patch, 'set_edgecolor'):
-                    patch.set_edgecolor('blue')
-                elif hasattr(patch, 'set_color'):
-                    patch.set_color('blue')
-
-        # 将选中参数对应的元素设为红色
-        if paramName in self.geoPatch:
-            for patch in self.geoPatch[paramName]:
-                if hasattr(patch, 'set_edgecolor'):
-                    patch.set_edgecolor('red')  # 使用红色突出显示选中元素
-                elif hasattr(patch, 'set_color'):
-                    patch.set_color('red')  # 使用红色突出显示选中元素
-
-        self.canvas.draw()
+        if self.geoArtists is not None:
+            self.geoArtists.highlight(paramName)
         self.stsVar.set(f"已选择 / Selected: {paramName}")
 
     def calculateGeometry(self):
-        # 获取参数
-        radius_1 = self.getParam("Radius_1")
-        width_r1 = self.getParam("Width_r1")
-        length_r1 = self.getParam("Length_r1")
-
-        # 计算Distance_1
-        distance_1 = self.getParam("Distance_1")
-        radius_2 = self.getParam("Radius_2")
-        radius_3 = radius_2 + width_r1  # 直接计算小圆外半径
-        radius_4 = self.getParam("Radius_4")
-        angle = self.getParam("Angle") / 2
-        radius_5 = self.getParam("Radius_5")  # 计算值
-        number = int(self.getParam("number"))
-        length_r2 = self.getParam("Length_r2")
-
-        # 计算阵列间距
-        interval = radius_5*2 + radius_3*2 - 2*width_r1
-
-        # 基本元素位置计算
-        circle1_center = (-radius_1, width_r1/2)  # 中心点
-        rect1_pos = (-distance_1, 0)  # 左下角
-        rect1_width = length_r1 + distance_1
-        rect1_height = width_r1
-
-        arc1_center = (length_r1, width_r1)  # 中心点
-        arc1_radius = width_r1
-        arc1_angle = 90  # 扇形角
-        arc1_rotation = 270  # 旋转角 
-
-        # 计算基础单元中心位置
-        arc_unit_centers = []
-        for i in range(number):
-            offset = i * interval
-
-            # 各单元中的圆弧中心位置
-            arc2_center = (length_r1 + radius_2 + width_r1 + offset, width_r1)
-            arc3_center = (length_r1 + radius_3 + offset, width_r1)
-
-            angle_rad = angle * 2 * math.pi / 360
-            arc4_center_x = length_r1 + 2*radius_3 + radius_4 * math.sin(angle_rad) + offset
-            arc4_center_y = width_r1 + radius_4 * math.cos(angle_rad)
-            arc4_center = (arc4_center_x, arc4_center_y)
-
-            arc5_center = (length_r1 + radius_5 + 2*radius_3 - width_r1 + offset, width_r1)
-
-            # 添加到阵列列表
-            arc_unit_centers.append({
-                "arc2_center": arc2_center,
-                "arc3_center": arc3_center,
-                "arc4_center": arc4_center,
-                "arc5_center": arc5_center
-            })
-
-        # 计算弧6的参数
-        arc6_center = (length_r1 + radius_2 + width_r1 + (interval * number), width_r1)
-        arc6_radius = radius_2
-        arc6_angle = 180
-        arc6_rotation = 0  # 旋转180度
-
-        # 计算弧7的参数 - 修正旋转方向为0度
-        arc7_center = (length_r1 + radius_3 + (interval * number), width_r1)
-        arc7_radius = radius_3
-        arc7_angle = 180
-        arc7_rotation = 0  # 修正为0度
-
-        # 计算弧8的参数
-        arc8_center = (length_r1 + (interval * number) + (radius_3 * 2), width_r1)
-        arc8_radius = width_r1
-        arc8_angle = 90
-        arc8_rotation = 180  # 旋转180度
-
-        # 计算尾部矩形和圆参数
-        rect2_pos = (length_r1 + (interval * number) + (radius_3 * 2), 0)
-        rect2_width = length_r2 + distance_1
-        rect2_height = width_r1
-
-        circle2_center = (length_r1 + (interval * number) + (radius_3 * 2) + length_r2 + radius_1, width_r1 / 2)
-
-        return {
-            "circle1_center": circle1_center, "circle1_radius": radius_1,
-            "rect1_pos": rect1_pos, "rect1_width": rect1_width, "rect1_height": rect1_height,
-            "arc1_center": arc1_center, "arc1_radius": arc1_radius, 
-            "arc1_angle": arc1_angle, "arc1_rotation": arc1_rotation,
-            "arc2_radius": radius_2, "arc3_radius": radius_3,
-            "arc4_radius": radius_4, "arc4_angle": angle * 2,
-            "arc4_rotation": 270 - angle,
-            "arc5_radius": radius_5, "arc5_angle": 180, "arc5_rotation": 180,
-            "arc_unit_centers": arc_unit_centers,
-            "number": number, "interval": interval,
-            # 新增元素
-            "arc6_center": arc6_center, "arc6_radius": arc6_radius,
-            "arc6_angle": arc6_angle, "arc6_rotation": arc6_rotation,
-            "arc7_center": arc7_center, "arc7_radius": arc7_radius,
-            "arc7_angle": arc7_angle, "arc7_rotation": arc7_rotation,
-            "arc8_center": arc8_center, "arc8_radius": arc8_radius,
-            "arc8_angle": arc8_angle, "arc8_rotation": arc8_rotation,
-            "rect2_pos": rect2_pos, "rect2_width": rect2_width, "rect2_height": rect2_height,
-            "circle2_center": circle2_center, "circle2_radius": radius_1
-        }
+        return self.geometry.cache.get(self.paramValues())
 
     def updateModel(self):
         try:
+            self.snapshot = ParamSnapshot("InertialSeparator", self.paramValues())
             # 更新计算参数
-            r5 = self.getParam("Radius_5")
-            distance_1 = self.getParam("Distance_1")  # 获取计算值
+            r5 = self.snapshot["Radius_5"]
+            distance_1 = self.snapshot["Distance_1"]  # 获取计算值
 
             self.params["Radius_5"].set(str(round(r5, 4)))
 
-            self.ax.clear()
-            for key in self.geoPatch:
-                self.geoPatch[key] = []
-
-            # 计算几何参数
-            geo = self.calculateGeometry()
-
-            # 绘制圆1 (左侧入口)
-            circle1 = mpatches.Circle(geo["circle1_center"], geo["circle1_radius"], 
-                                     fill=False, edgecolor='blue', lw=2)
-            self.ax.add_patch(circle1)
-            self.geoPatch["Radius_1"].append(circle1)
-
-            # 绘制矩形1 (左侧通道) - 只绘制上下两条边
-            # 下边
-            line_bottom1 = plt.Line2D(
-                [geo["rect1_pos"][0], geo["rect1_pos"][0] + geo["rect1_width"]],
-                [geo["rect1_pos"][1], geo["rect1_pos"][1]],
-                color='blue', lw=2
-            )
-            self.ax.add_line(line_bottom1)
-            self.geoPatch["Length_r1"].append(line_bottom1)
-            self.geoPatch["Width_r1"].append(line_bottom1)
-
-            # 上边
-            line_top1 = plt.Line2D(
-                [geo["rect1_pos"][0], geo["rect1_pos"][0] + geo["rect1_width"]],
-                [geo["rect1_pos"][1] + geo["rect1_height"], geo["rect1_pos"][1] + geo["rect1_height"]],
-                color='blue', lw=2
-            )
-            self.ax.add_line(line_top1)
-            self.geoPatch["Length_r1"].append(line_top1)
-            self.geoPatch["Width_r1"].append(line_top1)
-
-            # 绘制弧1 (左侧连接弧)
-            arc1 = mpatches.Arc(geo["arc1_center"], 2*geo["arc1_radius"], 2*geo["arc1_radius"],
-                               theta1=geo["arc1_rotation"], theta2=geo["arc1_rotation"]+geo["arc1_angle"],
-                               edgecolor='blue', lw=2)
-            self.ax.add_patch(arc1)
-            self.geoPatch["Width_r1"].append(arc1)
-
-            # 绘制阵列单元
-            for i, centers in enumerate(geo["arc_unit_centers"]):
-                # 绘制弧2 (小圆内弧)
-                arc2 = mpatches.Arc(centers["arc2_center"], 2*geo["arc2_radius"], 2*geo["arc2_radius"],
-                                   theta1=0, theta2=180, edgecolor='blue', lw=2)
-                self.ax.add_patch(arc2)
-                self.geoPatch["Radius_2"].append(arc2)
-                self.geoPatch["number"].append(arc2)
-
-                # 绘制弧3 (小圆外弧)
-                arc3 = mpatches.Arc(centers["arc3_center"], 2*geo["arc3_radius"], 2*geo["arc3_radius"],
-                                   theta1=0, theta2=180, edgecolor='blue', lw=2)
-                self.ax.add_patch(arc3)
-                self.geoPatch["Radius_2"].append(arc3)  # 使用Radius_2替代
-                self.geoPatch["Width_r1"].append(arc3)  # 添加宽度依赖
-                self.geoPatch["number"].append(arc3)
-
-                # 绘制弧4 (大圆内弧)
-                arc4 = mpatches.Arc(centers["arc4_center"], 2*geo["arc4_radius"], 2*geo["arc4_radius"],
-                                   theta1=geo["arc4_rotation"], theta2=geo["arc4_rotation"]+geo["arc4_angle"],
-                                   edgecolor='blue', lw=2)
-                self.ax.add_patch(arc4)
-                self.geoPatch["Radius_4"].append(arc4)
-                self.geoPatch["Angle"].append(arc4)
-                self.geoPatch["number"].append(arc4)
-
-                # 绘制弧5 (大圆外弧)
-                arc5 = mpatches.Arc(centers["arc5_center"], 2*geo["arc5_radius"], 2*geo["arc5_radius"],
-                                   theta1=geo["arc5_rotation"], theta2=geo["arc5_rotation"]+geo["arc5_angle"],
-                                   edgecolor='blue', lw=2)
-                self.ax.add_patch(arc5)
-                self.geoPatch["Radius_5"].append(arc5)
-                self.geoPatch["number"].append(arc5)
-
-            # 绘制弧6 (右侧弧1)
-            arc6 = mpatches.Arc(geo["arc6_center"], 2*geo["arc6_radius"], 2*geo["arc6_radius"],
-                               theta1=geo["arc6_rotation"], theta2=geo["arc6_rotation"]+geo["arc6_angle"],
-                               edgecolor='blue', lw=2)
-            self.ax.add_patch(arc6)
-            self.geoPatch["Radius_2"].append(arc6)
-            self.geoPatch["number"].append(arc6)
-
-            # 绘制弧7 (右侧弧2) - 修正方向
-            arc7 = mpatches.Arc(geo["arc7_center"], 2*geo["arc7_radius"], 2*geo["arc7_radius"],
-                               theta1=geo["arc7_rotation"], theta2=geo["arc7_rotation"]+geo["arc7_angle"],
-                               edgecolor='blue', lw=2)
-            self.ax.add_patch(arc7)
-            self.geoPatch["Radius_2"].append(arc7)  # 使用Radius_2替代
-            self.geoPatch["Width_r1"].append(arc7)  # 添加宽度依赖
-            self.geoPatch["number"].append(arc7)
-
-            # 绘制弧8 (右侧弧3)
-            arc8 = mpatches.Arc(geo["arc8_center"], 2*geo["arc8_radius"], 2*geo["arc8_radius"],
-                               theta1=geo["arc8_rotation"], theta2=geo["arc8_rotation"]+geo["arc8_angle"],
-                               edgecolor='blue', lw=2)
-            self.ax.add_patch(arc8)
-            self.geoPatch["Width_r1"].append(arc8)
-            self.geoPatch["number"].append(arc8)
-
-            # 绘制尾部矩形 - 只绘制上下两条边
-            # 下边
-            line_bottom2 = plt.Line2D(
-                [geo["rect2_pos"][0], geo["rect2_pos"][0] + geo["rect2_width"]],
-                [geo["rect2_pos"][1], geo["rect2_pos"][1]],
-                color='blue', lw=2
-            )
-            self.ax.add_line(line_bottom2)
-            self.geoPatch["Length_r2"].append(line_bottom2)
-            self.geoPatch["Width_r1"].append(line_bottom2)
-
-            # 上边
-            line_top2 = plt.Line2D(
-                [geo["rect2_pos"][0], geo["rect2_pos"][0] + geo["rect2_width"]],
-                [geo["rect2_pos"][1] + geo["rect2_height"], geo["rect2_pos"][1] + geo["rect2_height"]],
-                color='blue', lw=2
-            )
-            self.ax.add_line(line_top2)
-            self.geoPatch["Length_r2"].append(line_top2)
-            self.geoPatch["Width_r1"].append(line_top2)
-
-            # 绘制尾部圆
-            circle2 = mpatches.Circle(geo["circle2_center"], geo["circle2_radius"], 
-                                     fill=False, edgecolor='blue', lw=2)
-            self.ax.add_patch(circle2)
-            self.geoPatch["Radius_1"].append(circle2)
-            self.geoPatch["Length_r2"].append(circle2)
-
-            # 计算边界和显示区域
-            all_centers = [geo["circle1_center"], geo["arc1_center"], geo["arc6_center"], 
-                          geo["arc7_center"], geo["arc8_center"], geo["circle2_center"]]
-
-            for centers in geo["arc_unit_centers"]:
-                all_centers.extend([centers["arc2_center"], centers["arc3_center"], 
-                                   centers["arc4_center"], centers["arc5_center"]])
-
-            # 计算边界
-            x_coords = [p[0] for p in all_centers]
-            y_coords = [p[1] for p in all_centers]
-
-            # 矩形1的四个角点
-            rect1_points = [
-                (geo["rect1_pos"][0], geo["rect1_pos"][1]),
-                (geo["rect1_pos"][0] + geo["rect1_width"], geo["rect1_pos"][1]),
-                (geo["rect1_pos"][0], geo["rect1_pos"][1] + geo["rect1_height"]),
-                (geo["rect1_pos"][0] + geo["rect1_width"], geo["rect1_pos"][1] + geo["rect1_height"])
-            ]
-            x_coords.extend([p[0] for p in rect1_points])
-            y_coords.extend([p[1] for p in rect1_points])
-
-            # 矩形2的四个角点
-            rect2_points = [
-                (geo["rect2_pos"][0], geo["rect2_pos"][1]),
-                (geo["rect2_pos"][0] + geo["rect2_width"], geo["rect2_pos"][1]),
-                (geo["rect2_pos"][0], geo["rect2_pos"][1] + geo["rect2_height"]),
-                (geo["rect2_pos"][0] + geo["rect2_width"], geo["rect2_pos"][1] + geo["rect2_height"])
-            ]
-            x_coords.extend([p[0] for p in rect2_points])
-            y_coords.extend([p[1] for p in rect2_points])
-
-            # 添加半径影响
-            max_radius = max(geo["circle1_radius"], geo["arc1_radius"], 
-                           geo["arc2_radius"], geo["arc3_radius"], 
-                           geo["arc4_radius"], geo["arc5_radius"], geo["circle2_radius"])
-
-            x_min = min(x_coords) - max_radius - 3
-            x_max = max(x_coords) + max_radius + 3
-            y_min = min(y_coords) - max_radius - 3
-            y_max = max(y_coords) + max_radius + 3
-
-            self.ax.set_xlim(x_min, x_max)
-            self.ax.set_ylim(y_min, y_max)
-            self.ax.set_aspect('equal')
-            self.ax.grid(True, linestyle='--', alpha=0.5)
-
-            # 添加标题
-            self.ax.set_title("InertialSeparator", fontsize=14)
-            self.ax.set_xlabel("")
-            self.ax.set_ylabel("")
-
-            self.canvas.draw()
-            self.stsVar.set(f"已更新 / Updated - R5={r5:.4f}mm, 阵列间距={geo['interval']:.4f}mm, Distance_1={distance_1:.4f}mm")
+            geo = self.geometry.update(self.snapshot)
+            if self.geoArtists is None:
+                self.geoArtists = draw_primitives(self.ax, geo, lw=2)
+                self.ax.set_aspect('equal')
+                self.ax.grid(True, linestyle='--', alpha=0.5)
+
+                # 添加标题
+                self.ax.set_title("InertialSeparator", fontsize=14)
+                self.ax.set_xlabel("")
+                self.ax.set_ylabel("")
+            else:
+                self.geoArtists.update(geo, self.geometry.changed)
+            fit_view(self.ax, geo, pad=3)
+            self.canvas.draw_idle()
+            self.stsVar.set(f"已更新 / Updated - R5={r5:.4f}mm, 阵列间距={self.snapshot['interval']:.4f}mm, Distance_1={distance_1:.4f}mm")
 
             # 如果有选中的参数，重新应用高亮
             if self.curHlt:
@@ -537,72 +250,7 @@ class MicrochannelTool:
             if not filename:
                 return
 
-            doc = ezdxf.new('R2010')
-            msp = doc.modelspace()
-            geo = self.calculateGeometry()
-
-            # 添加圆1 (入口)
-            msp.add_circle(geo["circle1_center"], geo["circle1_radius"])
-
-            # 添加矩形1 (左侧通道) - 只绘制上下两条边
-            # 下边
-            msp.add_line(
-                (geo["rect1_pos"][0], geo["rect1_pos"][1]),
-                (geo["rect1_pos"][0] + geo["rect1_width"], geo["rect1_pos"][1])
-            )
-
-            # 上边
-            msp.add_line(
-                (geo["rect1_pos"][0], geo["rect1_pos"][1] + geo["rect1_height"]),
-                (geo["rect1_pos"][0] + geo["rect1_width"], geo["rect1_pos"][1] + geo["rect1_height"])
-            )
-
-            # 添加弧1 (左侧连接弧)
-            msp.add_arc(geo["arc1_center"], geo["arc1_radius"],
-                       geo["arc1_rotation"], geo["arc1_rotation"] + geo["arc1_angle"])
-
-            # 添加阵列单元
-            for centers in geo["arc_unit_centers"]:
-                # 弧2 (小圆内弧)
-                msp.add_arc(centers["arc2_center"], geo["arc2_radius"], 0, 180)
-                # 弧3 (小圆外弧)
-                msp.add_arc(centers["arc3_center"], geo["arc3_radius"], 0, 180)
-                # 弧4 (大圆内弧)
-                msp.add_arc(centers["arc4_center"], geo["arc4_radius"], 
-                           geo["arc4_rotation"], geo["arc4_rotation"] + geo["arc4_angle"])
-                # 弧5 (大圆外弧)
-                msp.add_arc(centers["arc5_center"], geo["arc5_radius"], 
-                           geo["arc5_rotation"], geo["arc5_rotation"] + geo["arc5_angle"])
-
-            # 添加弧6 (右侧弧1)
-            msp.add_arc(geo["arc6_center"], geo["arc6_radius"],
-                       geo["arc6_rotation"], geo["arc6_rotation"] + geo["arc6_angle"])
-
-            # 添加弧7 (右侧弧2)
-            msp.add_arc(geo["arc7_center"], geo["arc7_radius"],
-                       geo["arc7_rotation"], geo["arc7_rotation"] + geo["arc7_angle"])
-
-            # 添加弧8 (右侧弧3)
-            msp.add_arc(geo["arc8_center"], geo["arc8_radius"],
-                       geo["arc8_rotation"], geo["arc8_rotation"] + geo["arc8_angle"])
-
-            # 添加尾部矩形 - 只绘制上下两条边
-            # 下边
-            msp.add_line(
-                (geo["rect2_pos"][0], geo["rect2_pos"][1]),
-                (geo["rect2_pos"][0] + geo["rect2_width"], geo["rect2_pos"][1])
-            )
-
-            # 上边
-            msp.add_line(
-                (geo["rect2_pos"][0], geo["rect2_pos"][1] + geo["rect2_height"]),
-                (geo["rect2_pos"][0] + geo["rect2_width"], geo["rect2_pos"][1] + geo["rect2_height"])
-            )
-
-            # 添加尾部圆
-            msp.add_circle(geo["circle2_center"], geo["circle2_radius"])
-
-            doc.saveas(filename)
+            export_dxf(filename, self.calculateGeometry())
             self.stsVar.set(f"已导出DXF / DXF Exported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导出到DXF / Exported to DXF:\n{filename}")
 
@@ -706,7 +354,6 @@ class MicrochannelTool:
             self.stsVar.set("导入失败 / Import Failed")
 
     def quitApplication(self):
-        plt.close('all')
         self.master.quit()
         self.master.destroy()
 
@@ -0,0 +1,81 @@
+# Copyright (c) 2025 [Grant]
+# Licensed under the MIT License.
+# See LICENSE in the project root for license information.
+"""
+反向设计自检 / Self-check of Microfluid_Inverse
+
+1. 往返：随机尺寸算出几何流阻，再由流阻反求该尺寸，代回后流阻与目标的相对误差不超过 RTOL；
+2. RECT_MOD 在 a = 1.3b 处不连续，目标值落在跳变间隙中时不能把跳变处当作根：
+   返回的尺寸必须确实给出目标流阻，无解时为 NaN。
+
+用法 / Usage:
+    python Inverse_Check.py
+    python Inverse_Check.py --samples 100000 --seed 1
+"""
+import argparse
+import sys
+
+import numpy as np
+
+import Microfluid_Batch as mb
+from Microfluid_Inverse import solve_dimension
+
+RTOL = 1e-9
+
+def check_round_trip(samples, rng):
+    """返回发现的问题列表 (空表示通过)"""
+    w, h, l = (np.exp(rng.uniform(np.log(1.0), np.log(1e3), samples)) for _ in range(3))
+    problems = []
+    for shape in sorted(mb.SHAPE_FUNCTIONS):
+        r = mb.SHAPE_FUNCTIONS[shape](w, h, l)
+        for unknown in ("w", "h", "l"):
+            x = solve_dimension(shape, unknown, r, w=w, h=h, l=l)
+            args = {"w": w, "h": h, "l": l, unknown: x}
+            err = np.abs(mb.SHAPE_FUNCTIONS[shape](args["w"], args["h"], args["l"]) / r - 1)
+            bad = ~(err <= RTOL)
+            if bad.any():
+                k = int(np.argmax(bad))
+                problems.append(f"{shape} 求 {unknown}: {bad.sum()} 个不满足 / failed, "
+                                f"如 w={w[k]!r} h={h[k]!r} l={l[k]!r} -> {x[k]!r}")
+    return problems
+
+def check_gap():
+    """目标落在 RECT_MOD 跳变间隙 (两侧极限之间) 时，返回的尺寸必须确实给出目标流阻，不能停在跳变处；
+    a = 1.3b 处 (w = h/1.3) 的间隙内没有任何解，应为 NaN"""
+    h, l = 50.0, 1.0
+    problems = []
+    for edge, solvable in ((h / 1.3, False), (h * 1.3, True)):
+        below = mb.resistance_factor_rect_mod(np.nextafter(edge, 0), h, l)
+        above = mb.resistance_factor_rect_mod(np.nextafter(edge, np.inf), h, l)
+        lo, hi = sorted((float(below), float(above)))
+        targets = lo + (hi - lo) * np.array([0.01, 0.5, 0.99])
+        w = solve_dimension("RECT_MOD", "w", targets, h=h, l=l)
+        for t, x in zip(targets, w):
+            if np.isnan(x):
+                if solvable:
+                    problems.append(f"目标 {t!r} 有解却返回 NaN / missed root")
+                continue
+            real = float(mb.resistance_factor_rect_mod(x, h, l))
+            if not solvable or abs(real / t - 1) > RTOL:
+                problems.append(f"间隙中的目标 {t!r} 返回 w={x!r} (实际流阻 {real!r}) / expected NaN")
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="反向设计自检 / Inverse sizing self-check")
+    parser.add_argument("--samples", type=int, default=10000, help="往返检查的随机尺寸组数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    failed = False
+    for name, problems in (("往返 / round trip", check_round_trip(args.samples, rng)),
+                           ("RECT_MOD 跳变间隙 / gap", check_gap())):
+        print(f"{name:<28}{'ok' if not problems else 'FAILED'}")
+        for msg in problems:
+            print(f"    {msg}")
+        failed |= bool(problems)
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# Copyright (c) 2025 [Grant]
+# Licensed under the MIT License.
+# See LICENSE in the project root for license information.
+"""
+流量/质量/速度/压力 批量换算命令行工具 / Streaming batch converter for tabs 1-6
+
+按固定行数分块读取 CSV (或 Parquet)，对每块调用 Microfluid_Batch 中的向量化函数，
+逐块写出结果，内存占用与文件大小无关。结束时输出吞吐量 (行/s)。
+
+用法 / Usage:
+    python Microfluid_Convert.py mass_to_quantity balance.csv flow.csv
+    python Microfluid_Convert.py quantity_to_velocity pump.csv out.csv --set shape=cyl --set d=100
+    python Microfluid_Convert.py resistance_to_pressure in.parquet out.parquet --map Q=flow_ul_min
+
+输入列默认与函数参数同名 (mass, time, density, Q, v, w, h, d, shape,
+resistance_factor, mu, P)，可用 --map 参数=列名 重命名，或用 --set 参数=值 指定常数。
+输出保留全部输入列，并在末尾追加结果列。Parquet 读写需要安装 pyarrow。
+"""
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+import Microfluid_Batch as mb
+
+#---------- 换算定义 ----------
+
+# 名称: (函数, 输入参数, 默认值, 输出列)
+CONVERSIONS = {
+    "mass_to_quantity": (mb.mass_to_quantity, ("mass", "time", "density"),
+                         {"density": 1e6}, ("Q_m3_s", "q_uL_min")),
+    "quantity_to_mass": (mb.quantity_to_mass, ("Q", "time", "density"),
+                         {"density": 1e6}, ("mass_g",)),
+    "quantity_to_velocity": (mb.quantity_to_velocity, ("Q", "w", "h", "d", "shape"),
+                             {"w": None, "h": None, "d": None, "shape": "rect"}, ("v_m_s",)),
+    "velocity_to_quantity": (mb.velocity_to_quantity, ("v", "w", "h", "d", "shape"),
+                             {"w": None, "h": None, "d": None, "shape": "rect"}, ("Q_uL_min",)),
+    "resistance_to_pressure": (mb.resistance_to_pressure, ("Q", "resistance_factor", "mu"),
+                               {"mu": 1.005}, ("P_MPa",)),
+    "pressure_to_resistance": (mb.pressure_to_resistance, ("P", "Q", "mu"),
+                               {"mu": 1.005}, ("resistance_factor",)),
+}
+
+# 保持字符串的参数 (其余参数均解析为浮点数)
+TEXT_PARAMS = ("shape",)
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise SystemExit("读写 Parquet 需要 pyarrow / Parquet support requires pyarrow: pip install pyarrow")
+    return pyarrow
+
+#---------- 分块读取 ----------
+
+def _csv_rows(path, reader, width):
+    """逐行产生数据行；跳过空行，列数与表头不同的行报错并给出行号"""
+    for row in reader:
+        if not row:
+            continue
+        if len(row) != width:
+            raise ValueError(f"{path}:{reader.line_num}: 该行 {len(row)} 列，表头 {width} 列 / "
+                             f"row has {len(row)} columns, header has {width}")
+        yield row
+
+def read_csv_chunks(path, chunk_size):
+    """逐块产生 (列名列表, {列名: 字符串元组})"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        rows = _csv_rows(path, reader, len(header))
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            yield header, dict(zip(header, zip(*chunk)))
+
+def read_parquet_chunks(path, chunk_size):
+    """逐块产生 (列名列表, {列名: 数组})"""
+    pa = _import_pyarrow()
+    pf = pa.parquet.ParquetFile(path)
+    header = pf.schema_arrow.names
+    for batch in pf.iter_batches(batch_size=chunk_size):
+        yield header, {name: batch.column(i).to_numpy(zero_copy_only=False)
+                       for i, name in enumerate(header)}
+
+#---------- 分块写出 ----------
+
+class CsvChunkWriter:
+    def __init__(self, path):
+        self.f = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.f)
+        self.header_written = False
+
+    def write(self, header, columns):
+        if not self.header_written:
+            self.writer.writerow(header)
+            self.header_written = True
+        cols = [c.tolist() if isinstance(c, np.ndarray) else c for c in (columns[h] for h in header)]
+        self.writer.writerows(zip(*cols))
+
+    def close(self):
+        self.f.close()
+
+class ParquetChunkWriter:
+    def __init__(self, path):
+        self.pa = _import_pyarrow()
+        self.path = path
+        self.writer = None
+
+    def write(self, header, columns):
+        table = self.pa.table({h: columns[h] for h in header})
+        if self.writer is None:
+            self.writer = self.pa.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+#---------- 换算 ----------
+
+def _to_float(values):
+    """列 -> 浮点数组；空单元格或无法解析的值记为 NaN"""
+    try:
+        return np.asarray(values, dtype=float)
+    except (ValueError, TypeError):
+        out = np.empty(len(values))
+        for i, x in enumerate(values):
+            try:
+                out[i] = float(x)
+            except (ValueError, TypeError):
+                out[i] = np.nan
+        return out
+
+def convert_chunk(conversion, columns, mapping, constants):
+    """对一块数据做换算，返回 {输出列: 数组}"""
+    func, params, defaults, outputs = CONVERSIONS[conversion]
+    kwargs = {}
+    for p in params:
+        col = mapping.get(p, p)
+        if p in constants:
+            kwargs[p] = constants[p]
+        elif col in columns:
+            values = columns[col]
+            kwargs[p] = np.asarray(values, dtype=str) if p in TEXT_PARAMS else _to_float(values)
+        elif p in defaults:
+            kwargs[p] = defaults[p]
+        else:
+            raise KeyError(f"缺少输入列 / missing input column: {col}")
+    results = func(**kwargs)
+    if len(outputs) == 1:
+        results = (results,)
+    n = len(next(iter(columns.values())))
+    return {name: np.broadcast_to(np.asarray(r, dtype=float), (n,)) for name, r in zip(outputs, results)}
+
+def run(conversion, src, dst, chunk_size=DEFAULT_CHUNK_SIZE, mapping=None, constants=None, progress=None):
+    """流式换算 src -> dst，返回 (行数, 耗时秒)"""
+    mapping = mapping or {}
+    constants = constants or {}
+    outputs = CONVERSIONS[conversion][3]
+    reader = read_parquet_chunks(src, chunk_size) if _is_parquet(src) else read_csv_chunks(src, chunk_size)
+    writer = ParquetChunkWriter(dst) if _is_parquet(dst) else CsvChunkWriter(dst)
+    rows = 0
+    t0 = time.perf_counter()
+    try:
+        for header, columns in reader:
+            results = convert_chunk(conversion, columns, mapping, constants)
+            columns.update(results)
+            writer.write(list(header) + [o for o in outputs if o not in header], columns)
+            rows += len(next(iter(results.values())))
+            if progress:
+                progress(rows, time.perf_counter() - t0)
+    finally:
+        writer.close()
+    return rows, time.perf_counter() - t0
+
+def _parse_pairs(pairs, numeric):
+    out = {}
+    for item in pairs:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise SystemExit(f"参数格式应为 名称=值 / expected NAME=VALUE: {item}")
+        out[key] = float(value) if numeric and key not in TEXT_PARAMS else value
+    return out
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="微流体批量换算 / Streaming batch converter (CSV or Parquet)")
+    parser.add_argument("conversion", choices=sorted(CONVERSIONS))
+    parser.add_argument("input", help="输入文件 .csv / .parquet")
+    parser.add_argument("output", help="输出文件 .csv / .parquet")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"每块行数 / rows per chunk (默认 {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--map", action="append", default=[], metavar="PARAM=COLUMN",
+                        help="参数对应的输入列名 / input column for a parameter")
+    parser.add_argument("--set", action="append", default=[], metavar="PARAM=VALUE",
+                        help="以常数代替输入列 / constant value for a parameter")
+    parser.add_argument("--quiet", action="store_true", help="不显示进度 / no progress output")
+    args = parser.parse_args(argv)
+    if args.chunk_size <= 0:
+        parser.error("--chunk-size 必须为正数")
+
+    def progress(rows, elapsed):
+        print(f"\r{rows:,} 行 / rows, {rows / max(elapsed, 1e-9):,.0f} 行/s (rows/s)",
+              end="", file=sys.stderr, flush=True)
+
+    rows, elapsed = run(args.conversion, args.input, args.output, args.chunk_size,
+                        _parse_pairs(args.map, numeric=False), _parse_pairs(args.set, numeric=True),
+                        None if args.quiet else progress)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"完成 / Done: {rows:,} 行 / rows, {elapsed:.2f} s, "
+          f"{rows / max(elapsed, 1e-9):,.0f} 行/s (rows/s) -> {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,555 @@
+# Copyright (c) 2025 [Grant]
+# Licensed under the MIT License.
+# See LICENSE in the project root for license information.
+"""
+微流体计算核心 / Headless calculation core
+
+不依赖 tkinter：包含标量计算函数，以及八个选项卡各自的请求/结果类型。
+请求对象负责输入解析与校验，结果对象负责显示格式与历史记录文本，
+MicrofluidCalculatorApp 只读取输入框并显示结果。
+
+用法 / Usage:
+    from Microfluid_Core import MassToFlowRequest
+    res = MassToFlowRequest.from_text(mass="5.48", time="5").solve()
+    print(res.q_text, res.history)
+"""
+import math
+from functools import lru_cache
+
+INPUT_ERROR = "输入错误"
+
+#---------- 1. 液滴转换器函数 ----------
+
+def droplet_d_to_v(d):
+    """直径(μm) -> 体积(nL)"""
+
+    return 4/3e6 * math.pi * (d/2)**3
+
+def droplet_v_to_d(v):
+
+    """体积(nL) -> 直径(μm)"""
+    return 100 * (3/4/math.pi*v)**(1/3) * 2
+
+#---------- 2. 流量转换计算器函数 ----------
+
+def mass_to_quantity(mass, time, density=1e6):
+    """质量转流量"""
+    Q = mass / time / density / 60  # m³/s
+    q = Q * 60 * 1e9  # μL/min
+
+    return Q, q
+
+def quantity_to_velocity(Q, w, h=None, d=None, shape="rect"):
+
+    """流量转速度"""
+
+    if shape == "rect":
+
+        v = Q / 60 / w / h * 1000
+
+    else:  # 圆柱
+
+        v = Q / 60 / (math.pi * (d/2)**2) * 1000
+
+    return v
+
+def velocity_to_quantity(v, w, h=None, d=None, shape="rect"):
+    """速度转流量"""
+    if shape == "rect":
+        Q = v * w * h * 60 / 1000  # μL/min
+
+    else:  # 圆柱
+        Q = v * math.pi * (d/2)**2 * 60 / 1000  # μL/min
+
+    return Q
+
+def quantity_to_mass(Q, time, density=1e6):
+
+    """流量转质量"""
+
+    Q_m3_s = Q / 60 / 1e9  # μL/min → m³/s
+
+    mass = Q_m3_s * density * 60 * time  # g
+
+    return mass
+
+def resistance_to_pressure(Q, resistance_factor, mu=1.005):
+    """几何流阻系数转压力"""
+
+    P = Q * resistance_factor * mu * 1e-6 * (1/60) * 1e-9 * 1e18 /100000
+    return P
+
+def pressure_to_resistance(P, Q, mu=1.005):
+    """压力转几何流阻系数"""
+
+    resistance_factor = P / (Q * mu * 1e-6 * (1/60) * 1e-9 * 1e18 * 1e-3)*100
+
+    return resistance_factor
+
+#---------- 3. 几何流阻计算器函数 ----------
+def resistance_factor_cyl(d, l):
+    """计算圆柱体(CYL)的几何流阻系数"""
+    return 128 * l / (math.pi * d**4)
+
+def resistance_factor_rect(w, h, l):
+    """计算矩形(RECT)的几何流阻系数"""
+    a = max(w, h)
+    b = min(w, h)
+
+    return 12 * l / (a * b**3) / (1 - 0.63 * (b/a))
+
+def resistance_factor_squa(w, h, l):
+    """计算方形(SQUA)的几何流阻系数"""
+
+    a = max(w, h)
+    b = min(w, h)
+
+    a = (a + b) / 2
+
+    return 28 * l * a**(-4)
+
+def resistance_factor_rect_mod(w, h, l):
+
+    """计算改进矩形(RECT_MOD)的几何流阻系数"""
+    a = max(w, h)
+
+    b = min(w, h)
+    if a > 1.3 * b:
+
+        return 12 * l / (a * b**3) / (1 - 0.63 * (b/a))
+
+    else:
+        a = (a + b) / 2
+        return 28 * l * a**(-4)
+
+# 奇数项 Σ 1/n^5 = (1 - 2^-5)·ζ(5)
+ODD_ZETA5 = 31/32 * 1.0369277551433699263
+
+@lru_cache(maxsize=4096)
+def rect_series_factor(ratio, rtol=1e-15):
+    """矩形截面级数修正因子 f(ε) = 1 - 192ε/π^5 · Σ tanh(nπ/2ε)/n^5 (n 为奇数, ε = b/a ≤ 1)
+
+    tanh(x) 写成 1 - 2e^{-2x}/(1+e^{-2x})，常数部分用 ODD_ZETA5 精确求和，
+    余项按几何级数收敛，逐项累加直到相对误差小于 rtol (ε=1 时约 5 项)。
+    """
+    if math.isnan(ratio):
+        return math.nan
+    if ratio <= 0:
+        return 1.0
+    c = 192 * ratio / math.pi**5
+    s = 0.0
+    n = 1
+    while True:
+        q = math.exp(-n * math.pi / ratio)
+        term = 2 * q / (1 + q) / (n * n * n * n * n)
+        s += term
+        if c * term <= rtol * (1 - c * ODD_ZETA5):
+            break
+        n += 2
+    return 1 - c * (ODD_ZETA5 - s)
+
+def resistance_factor_rect_exact(w, h, l, rtol=1e-15):
+    """计算矩形(RECT_EXACT)的几何流阻系数，Fourier 级数精确解"""
+    a = max(w, h)
+    b = min(w, h)
+    return 12 * l / (a * b * b * b) / rect_series_factor(b / a, rtol)
+
+def channel_v_cyl(d, l):
+    """计算圆柱体微通道体积(μL)"""
+
+    return d * d * l * math.pi * 0.25 * 1e-9
+
+def channel_v_cub(w, h, l):
+    """计算立方体微通道体积(μL)"""
+
+    return w * h * l * 1e-9
+
+#---------- 4. 请求/结果类型 ----------
+
+def _require_positive(*values):
+    """所有值必须为正数，否则抛出 ValueError"""
+    if any(v <= 0 for v in values):
+        raise ValueError("参数必须为正数")
+
+class _Record:
+    """轻量不可变记录：字段由子类 __slots__ 声明，默认值放在 _defaults 中。
+    未使用 dataclasses，以保持导入开销最小。"""
+    __slots__ = ()
+    _defaults = {}
+
+    def __init__(self, *args, **kwargs):
+        names = self.__slots__
+        if len(args) > len(names):
+            raise TypeError(f"{type(self).__name__} 最多接受 {len(names)} 个参数")
+        values = dict(zip(names, args))
+        for name, value in kwargs.items():
+            if name not in names or name in values:
+                raise TypeError(f"{type(self).__name__} 参数无效或重复: {name}")
+            values[name] = value
+        for name in names:
+            if name in values:
+                value = values[name]
+            elif name in self._defaults:
+                value = self._defaults[name]
+            else:
+                raise TypeError(f"{type(self).__name__} 缺少参数: {name}")
+            object.__setattr__(self, name, value)
+        self._validate()
+
+    def _validate(self):
+        pass
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} 为只读对象 / read-only")
+
+    def _astuple(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._astuple() == other._astuple()
+
+    def __hash__(self):
+        return hash((type(self), self._astuple()))
+
+    def __repr__(self):
+        args = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({args})"
+
+class _Request(_Record):
+    """请求基类：from_text 把输入框文本解析为数值字段 (str 类型字段原样保留)"""
+    __slots__ = ()
+
+    @classmethod
+    def from_text(cls, **raw):
+        types = cls.__annotations__
+        values = {name: text if types.get(name) is str else float(text)
+                  for name, text in raw.items()}
+        return cls(**values)
+
+# 选项卡1: 质量→流量
+class MassToFlowResult(_Record):
+    __slots__ = ("mass", "time", "Q", "q")
+    mass: float
+    time: float
+    Q: float  # m³/s
+    q: float  # μL/min
+
+    @property
+    def Q_text(self):
+        return f"{self.Q:.6e}"
+
+    @property
+    def q_text(self):
+        return f"{self.q:.4f}"
+
+    @property
+    def history(self):
+        return f"质量: {self.mass}g, 时间: {self.time}min → 流量: {self.q:.4f}μL/min"
+
+class MassToFlowRequest(_Request):
+    __slots__ = ("mass", "time", "density")
+    _defaults = {"density": 1e6}
+    mass: float  # g
+    time: float  # min
+    density: float  # g/m³
+
+    def _validate(self):
+        _require_positive(self.mass, self.time, self.density)
+
+    def solve(self):
+        Q, q = mass_to_quantity(self.mass, self.time, self.density)
+        return MassToFlowResult(self.mass, self.time, Q, q)
+
+# 选项卡2: 流量→质量
+class FlowToMassResult(_Record):
+    __slots__ = ("Q", "time", "mass")
+    Q: float
+    time: float
+    mass: float  # g
+
+    @property
+    def mass_text(self):
+        return f"{self.mass:.4f}"
+
+    @property
+    def history(self):
+        return f"流量: {self.Q}μL/min, 时间: {self.time}min → 质量: {self.mass:.4f}g"
+
+class FlowToMassRequest(_Request):
+    __slots__ = ("Q", "time", "density")
+    _defaults = {"density": 1e6}
+    Q: float  # μL/min
+    time: float  # min
+    density: float  # g/m³
+
+    def _validate(self):
+        _require_positive(self.Q, self.time, self.density)
+
+    def solve(self):
+        return FlowToMassResult(self.Q, self.time, quantity_to_mass(self.Q, self.time, self.density))
+
+def _channel_text(shape, w, h, d):
+    """历史记录中的通道描述"""
+    return f"矩形 {w}×{h}μm" if shape == "rect" else f"圆柱 Φ{d}μm"
+
+class _ChannelRequest(_Request):
+    """选项卡3/4共用：矩形(w, h)或圆柱(d)截面的校验"""
+    __slots__ = ()
+
+    def _check_channel(self):
+        if self.shape == "rect":
+            if self.w is None or self.h is None:
+                raise ValueError("矩形通道需要宽度和高度")
+            _require_positive(self.w, self.h)
+        else:
+            if self.d is None:
+                raise ValueError("圆柱通道需要直径")
+            _require_positive(self.d)
+
+# 选项卡3: 流量→速度
+class FlowToVelocityResult(_Record):
+    __slots__ = ("request", "v")
+    request: "FlowToVelocityRequest"
+    v: float  # m/s
+
+    @property
+    def v_text(self):
+        return f"{self.v:.6f}"
+
+    @property
+    def history(self):
+        r = self.request
+        return f"流量: {r.Q}μL/min, {_channel_text(r.shape, r.w, r.h, r.d)} → 速度: {self.v:.6f}m/s"
+
+class FlowToVelocityRequest(_ChannelRequest):
+    __slots__ = ("Q", "shape", "w", "h", "d")
+    _defaults = {"shape": "rect", "w": None, "h": None, "d": None}
+    Q: float  # μL/min
+    shape: str
+    w: float  # μm (可为 None)
+    h: float  # μm (可为 None)
+    d: float  # μm (可为 None)
+
+    def _validate(self):
+        _require_positive(self.Q)
+        self._check_channel()
+
+    def solve(self):
+        if self.shape == "rect":
+            v = quantity_to_velocity(self.Q, self.w, self.h, shape="rect")
+        else:
+            v = quantity_to_velocity(self.Q, None, None, self.d, shape="cyl")
+        return FlowToVelocityResult(self, v)
+
+# 选项卡4: 速度→流量
+class VelocityToFlowResult(_Record):
+    __slots__ = ("request", "Q")
+    request: "VelocityToFlowRequest"
+    Q: float  # μL/min
+
+    @property
+    def Q_text(self):
+        return f"{self.Q:.4f}"
+
+    @property
+    def history(self):
+        r = self.request
+        return f"速度: {r.v}m/s, {_channel_text(r.shape, r.w, r.h, r.d)} → 流量: {self.Q:.4f}μL/min"
+
+class VelocityToFlowRequest(_ChannelRequest):
+    __slots__ = ("v", "shape", "w", "h", "d")
+    _defaults = {"shape": "rect", "w": None, "h": None, "d": None}
+    v: float  # m/s
+    shape: str
+    w: float  # μm (可为 None)
+    h: float  # μm (可为 None)
+    d: float  # μm (可为 None)
+
+    def _validate(self):
+        _require_positive(self.v)
+        self._check_channel()
+
+    def solve(self):
+        if self.shape == "rect":
+            Q = velocity_to_quantity(self.v, self.w, self.h, shape="rect")
+        else:
+            Q = velocity_to_quantity(self.v, None, None, self.d, shape="cyl")
+        return VelocityToFlowResult(self, Q)
+
+# 选项卡5: 流阻→压力
+class ResistanceToPressureResult(_Record):
+    __slots__ = ("Q", "resistance_factor", "P")
+    Q: float
+    resistance_factor: float
+    P: float  # MPa
+
+    @property
+    def P_text(self):
+        return f"{self.P:.6f}"
+
+    @property
+    def history(self):
+        return f"流量: {self.Q}μL/min, 几何流阻系数: {self.resistance_factor} → 压力: {self.P:.6f}MPa"
+
+class ResistanceToPressureRequest(_Request):
+    __slots__ = ("Q", "resistance_factor", "mu")
+    _defaults = {"mu": 1.005}
+    Q: float  # μL/min
+    resistance_factor: float  # 1e16 m^-3
+    mu: float  # 10^-3 Pa·s
+
+    def _validate(self):
+        _require_positive(self.Q, self.resistance_factor, self.mu)
+
+    def solve(self):
+        P = resistance_to_pressure(self.Q, self.resistance_factor, self.mu)
+        return ResistanceToPressureResult(self.Q, self.resistance_factor, P)
+
+# 选项卡6: 压力→流阻
+class PressureToResistanceResult(_Record):
+    __slots__ = ("P", "Q", "resistance_factor")
+    P: float
+    Q: float
+    resistance_factor: float  # 1e16 m^-3
+
+    @property
+    def resistance_factor_text(self):
+        return f"{self.resistance_factor:.6f}"
+
+    @property
+    def history(self):
+        return f"压力: {self.P}MPa, 流量: {self.Q}μL/min → 几何流阻: {self.resistance_factor:.6f}"
+
+class PressureToResistanceRequest(_Request):
+    __slots__ = ("P", "Q", "mu")
+    _defaults = {"mu": 1.005}
+    P: float  # MPa
+    Q: float  # μL/min
+    mu: float  # 10^-3 Pa·s
+
+    def _validate(self):
+        _require_positive(self.P, self.Q, self.mu)
+
+    def solve(self):
+        rf = pressure_to_resistance(self.P, self.Q, self.mu)
+        return PressureToResistanceResult(self.P, self.Q, rf)
+
+# 选项卡7: 液滴转换器
+DROPLET_MODES = ("d_to_v", "v_to_d")
+
+class DropletResult(_Record):
+    __slots__ = ("mode", "value", "result")
+    mode: str
+    value: float
+    result: float
+
+    @property
+    def result_text(self):
+        """体积小于1nL时转为pL显示"""
+        if self.mode == "d_to_v" and self.result < 1:
+            return f"{self.result * 1000:.4f}"
+        return f"{self.result:.4f}"
+
+    @property
+    def output_label(self):
+        if self.mode == "v_to_d":
+            return "直径(μm):"
+        return "体积Volume(pL):" if self.result < 1 else "体积Volume(nL):"
+
+    @property
+    def history(self):
+        if self.mode == "v_to_d":
+            return f"体积 {self.value:.4f} nL → 直径 {self.result:.2f} μm"
+        if self.result < 1:
+            return f"直径 {self.value:.2f} μm → 体积 {self.result*1000:.4f} pL"
+        return f"直径 {self.value:.2f} μm → 体积 {self.result:.4f} nL"
+
+class DropletRequest(_Request):
+    __slots__ = ("value", "mode")
+    _defaults = {"mode": "d_to_v"}
+    value: float  # d_to_v: 直径(μm); v_to_d: 体积(nL)
+    mode: str
+
+    def _validate(self):
+        if self.mode not in DROPLET_MODES:
+            raise ValueError(f"未知模式: {self.mode}")
+
+    def solve(self):
+        if self.mode == "d_to_v":
+            return DropletResult(self.mode, self.value, droplet_d_to_v(self.value))
+        return DropletResult(self.mode, self.value, droplet_v_to_d(self.value))
+
+# 选项卡8: 几何流阻计算
+GEO_SHAPE_LABELS = ('CYL (圆柱体)', 'RECT (矩形)', 'SQUA (方形)', 'RECT_MOD (改进矩形)',
+                    'RECT_EXACT (精确矩形)')
+
+GEO_DEFAULT_VALUES = {
+    "CYL": {"d": 100, "l": 1000},
+    "RECT": {"w": 100, "h": 50, "l": 1000},
+    "SQUA": {"w": 100, "h": 100, "l": 1000},
+    "RECT_MOD": {"w": 100, "h": 70, "l": 1000},
+    "RECT_EXACT": {"w": 100, "h": 50, "l": 1000}
+}
+
+_GEO_FUNCTIONS = {
+    "RECT": (resistance_factor_rect, "矩形"),
+    "SQUA": (resistance_factor_squa, "方形"),
+    "RECT_MOD": (resistance_factor_rect_mod, "改进矩形"),
+    "RECT_EXACT": (resistance_factor_rect_exact, "精确矩形"),
+}
+
+def geo_shape_code(label):
+    """下拉框文本 -> 形状代码，例如 'RECT (矩形)' -> 'RECT'"""
+    return label.split()[0] if label else "CYL"
+
+class GeometricResistanceResult(_Record):
+    __slots__ = ("request", "r", "volume")
+    request: "GeometricResistanceRequest"
+    r: float  # 10^18 m^-1
+    volume: float  # μL
+
+    @property
+    def r_text(self):
+        return f"{self.r:.6e}"
+
+    @property
+    def volume_text(self):
+        return f"{self.volume:.6f}"
+
+    @property
+    def history(self):
+        q = self.request
+        if q.shape == "CYL":
+            return f"圆柱体: Φ{q.d}μm × {q.l}μm → 几何流阻: {self.r:.6e}"
+        name = _GEO_FUNCTIONS[q.shape][1]
+        return f"{name}: {q.w}×{q.h}×{q.l}μm → 几何流阻: {self.r:.6e}"
+
+class GeometricResistanceRequest(_Request):
+    __slots__ = ("shape", "l", "w", "h", "d")
+    _defaults = {"w": None, "h": None, "d": None}
+    shape: str  # CYL / RECT / SQUA / RECT_MOD / RECT_EXACT
+    l: float  # μm
+    w: float  # μm (可为 None)
+    h: float  # μm (可为 None)
+    d: float  # μm (可为 None)
+
+    def _validate(self):
+        if self.shape == "CYL":
+            if self.d is None:
+                raise ValueError("圆柱体需要直径")
+            _require_positive(self.d, self.l)
+        elif self.shape in _GEO_FUNCTIONS:
+            if self.w is None or self.h is None:
+                raise ValueError("矩形截面需要宽度和高度")
+            _require_positive(self.w, self.h, self.l)
+        else:
+            raise ValueError(f"未知形状: {self.shape}")
+
+    def solve(self):
+        if self.shape == "CYL":
+            r = resistance_factor_cyl(self.d, self.l)
+            v = channel_v_cyl(self.d, self.l)
+        else:
+            r = _GEO_FUNCTIONS[self.shape][0](self.w, self.h, self.l)
+            v = channel_v_cub(self.w, self.h, self.l)
+        return GeometricResistanceResult(self, r, v)
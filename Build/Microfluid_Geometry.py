@@ -0,0 +1,2923 @@
+# Copyright (c) 2025 [Grant]
+# Licensed under the MIT License.
+# See LICENSE in the project root for license information.
+"""
+器件几何内核 / Pure geometry kernel for the device generators
+
+每个器件一个纯函数：参数映射 (长度 mm，角度 °) -> Primitives。Primitives 把圆、
+圆弧、线段、矩形、螺旋和折线分别存成连续的 float64 数组，另附每个图元所属参数的标签，
+界面绘制、高亮和 DXF 导出都直接读取它。计算参数 (Distance_1、弧度等) 由 *_derived 给出，
+ParamSnapshot 把原始参数和计算参数一次算好，供一次更新中的各部件共用 (见第 22 节)。
+本模块只依赖 numpy，不导入 tkinter / matplotlib，可在无界面的服务器上批量生成
+版图，函数也可以直接 pickle 到子进程。图元较多的器件拆成声明了依赖参数的部件，
+IncrementalGeometry 只重算输入变化了的部件 (见第 21 节)。
+
+用法 / Usage:
+    from Microfluid_Geometry import device_geometry
+    geo = device_geometry("BurstValve", {"Number_v": 8, "Number_r": 4})
+"""
+import hashlib
+import math
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import numpy as np
+
+#---------- 1. 图元容器 ----------
+# 每类图元一个连续 float64 数组，每行一个图元：
+#   circles    (N, 3)  cx, cy, r
+#   arcs       (N, 5)  cx, cy, r, theta1, theta2 (°, 逆时针)
+#   segments   (N, 4)  x0, y0, x1, y1
+#   rectangles (N, 4)  x, y, w, h (左下角、宽、高)
+#   spirals    (N, 5)  cx, cy, r0, pitch, turns (阿基米德螺旋，见 spiral_curve；按解析式保存，
+#                      绘制和导出时再按各自的容差离散)
+# 折线 (螺旋等) 的顶点依次存放在 points (M, 2)，第 k 条为 points[offsets[k]:offsets[k+1]]。
+# 每个图元还有一个 uint16 标签，指向 groups 中的一组所属参数，供界面高亮使用。
+KINDS = {"circles": 3, "arcs": 5, "segments": 4, "rectangles": 4, "spirals": 5}
+TAG_DTYPE = np.uint16
+
+class Primitives:
+    """紧凑几何容器；一百万个线段约占 34 MB"""
+    __slots__ = ("circles", "arcs", "segments", "rectangles", "spirals", "points", "offsets",
+                 "tags", "groups")
+
+    def __init__(self, circles=None, arcs=None, segments=None, rectangles=None, spirals=None,
+                 points=None, offsets=None, tags=None, groups=((),)):
+        blocks = {"circles": circles, "arcs": arcs, "segments": segments, "rectangles": rectangles,
+                  "spirals": spirals}
+        for kind, width in KINDS.items():
+            data = blocks[kind] if blocks[kind] is not None else np.empty((0, width))
+            setattr(self, kind, np.ascontiguousarray(data, dtype=float).reshape(-1, width))
+        self.points = np.ascontiguousarray(points if points is not None else np.empty((0, 2)),
+                                           dtype=float).reshape(-1, 2)
+        self.offsets = np.asarray(offsets if offsets is not None else [0], dtype=np.int64)
+        self.groups = tuple(tuple(g) for g in groups) or ((),)
+        tags = tags or {}
+        self.tags = {kind: np.asarray(tags[kind], dtype=TAG_DTYPE) if kind in tags
+                     else np.zeros(self.count(kind), dtype=TAG_DTYPE)
+                     for kind in (*KINDS, "polylines")}
+
+    def count(self, kind):
+        """某类图元的数量 (kind 为 KINDS 之一或 "polylines")"""
+        if kind == "polylines":
+            return len(self.offsets) - 1
+        return len(getattr(self, kind))
+
+    def __len__(self):
+        return sum(self.count(kind) for kind in (*KINDS, "polylines"))
+
+    @property
+    def nbytes(self):
+        """数组占用的字节数"""
+        arrays = [getattr(self, kind) for kind in KINDS] + [self.points, self.offsets]
+        return sum(a.nbytes for a in arrays) + sum(t.nbytes for t in self.tags.values())
+
+    def polylines(self):
+        """逐条返回折线顶点 (视图，不复制)"""
+        for k in range(self.count("polylines")):
+            yield self.points[self.offsets[k]:self.offsets[k + 1]]
+
+    def identical(self, other):
+        """与另一个 Primitives 逐位相同 (数组、标签与标签组)"""
+        arrays = (*KINDS, "points", "offsets")
+        return (self.groups == other.groups
+                and all(np.array_equal(getattr(self, a), getattr(other, a), equal_nan=True) for a in arrays)
+                and all(np.array_equal(self.tags[k], other.tags[k]) for k in self.tags))
+
+    def same_kind(self, other, kind):
+        """kind 类图元 (含标签) 与 other 中的逐位相同"""
+        if kind == "polylines":
+            arrays = ("points", "offsets")
+        else:
+            arrays = (kind,)
+        return (all(np.array_equal(getattr(self, a), getattr(other, a), equal_nan=True) for a in arrays)
+                and np.array_equal(self.tags[kind], other.tags[kind]))
+
+    def owned_by(self, kind, param):
+        """布尔掩码：kind 类图元中属于参数 param 的那些"""
+        hits = [i for i, group in enumerate(self.groups) if param in group]
+        return np.isin(self.tags[kind], hits)
+
+    def bounds(self):
+        """(xmin, ymin, xmax, ymax)；圆弧按整圆、螺旋按最大半径的整圆计；没有图元时返回 None"""
+        xs, ys = [], []
+        sp = self.spirals
+        for cx, cy, r in (self.circles[:, :3].T, self.arcs[:, :3].T,
+                          (sp[:, 0], sp[:, 1], np.maximum(abs(sp[:, 2]), abs(sp[:, 2] + sp[:, 3])))):
+            xs += [cx - r, cx + r]
+            ys += [cy - r, cy + r]
+        s, rect = self.segments, self.rectangles
+        xs += [s[:, 0], s[:, 2], rect[:, 0], rect[:, 0] + rect[:, 2], self.points[:, 0]]
+        ys += [s[:, 1], s[:, 3], rect[:, 1], rect[:, 1] + rect[:, 3], self.points[:, 1]]
+        xs, ys = np.concatenate(xs), np.concatenate(ys)
+        if not len(xs):
+            return None
+        return xs.min(), ys.min(), xs.max(), ys.max()
+
+    def digest(self):
+        """几何内容的 SHA-256 (十六进制)；数组、标签与标签组都相同时才相同"""
+        h = hashlib.sha256()
+        arrays = ([getattr(self, kind) for kind in KINDS] + [self.points, self.offsets]
+                  + [self.tags[kind] for kind in (*KINDS, "polylines")])
+        for a in arrays:
+            h.update(repr(a.shape).encode())
+            h.update(a.tobytes())
+        h.update(repr(self.groups).encode())
+        return h.hexdigest()
+
+    def translated(self, dx, dy):
+        """平移后的副本"""
+        shift = {"circles": [dx, dy, 0], "arcs": [dx, dy, 0, 0, 0],
+                 "segments": [dx, dy, dx, dy], "rectangles": [dx, dy, 0, 0],
+                 "spirals": [dx, dy, 0, 0, 0]}
+        return Primitives(**{kind: getattr(self, kind) + shift[kind] for kind in KINDS},
+                          points=self.points + [dx, dy], offsets=self.offsets,
+                          tags=self.tags, groups=self.groups)
+
+    @classmethod
+    def concatenate(cls, parts):
+        """合并多个 Primitives (例如整片晶圆上的器件)，标签组取并集"""
+        parts = list(parts)
+        groups = {}
+        remaps = []
+        for part in parts:
+            remaps.append(np.array([groups.setdefault(g, len(groups)) for g in part.groups],
+                                   dtype=TAG_DTYPE))
+        arrays = {kind: np.concatenate([getattr(p, kind) for p in parts] or [np.empty((0, width))])
+                  for kind, width in KINDS.items()}
+        tags = {kind: np.concatenate([remap[p.tags[kind]] for p, remap in zip(parts, remaps)]
+                                     or [np.empty(0, TAG_DTYPE)])
+                for kind in (*KINDS, "polylines")}
+        starts = np.cumsum([0] + [len(p.points) for p in parts])
+        offsets = np.concatenate([[0]] + [p.offsets[1:] + start for p, start in zip(parts, starts)])
+        points = np.concatenate([p.points for p in parts] or [np.empty((0, 2))])
+        return cls(**arrays, points=points, offsets=offsets, tags=tags,
+                   groups=sorted(groups, key=groups.get))
+
+class PrimitiveBuilder:
+    """按块收集图元，build() 时一次性合并为 Primitives
+
+    每次添加时给出所属参数名 (可以是多个)，同一组参数共用一个标签。
+    """
+    def __init__(self):
+        self._blocks = {kind: [] for kind in (*KINDS, "polylines")}
+        self._groups = {}
+
+    def _tag(self, owners):
+        return self._groups.setdefault(tuple(owners), len(self._groups))
+
+    def add(self, kind, rows, *owners):
+        """添加一块 (N, 宽度) 数组"""
+        rows = np.asarray(rows, dtype=float).reshape(-1, KINDS[kind])
+        if len(rows):
+            self._blocks[kind].append((rows, self._tag(owners)))
+        return self
+
+    def circles(self, items, *owners):
+        """(center, r) 序列"""
+        return self.add("circles", [(c[0], c[1], r) for c, r in items], *owners)
+
+    def arcs(self, items, *owners):
+        """(center, r, theta1, theta2) 序列"""
+        return self.add("arcs", [(c[0], c[1], r, t1, t2) for c, r, t1, t2 in items], *owners)
+
+    def segments(self, items, *owners):
+        """(p0, p1) 序列"""
+        return self.add("segments", [(p0[0], p0[1], p1[0], p1[1]) for p0, p1 in items], *owners)
+
+    def rectangles(self, items, *owners):
+        """(x, y, w, h) 序列"""
+        return self.add("rectangles", list(items), *owners)
+
+    def spirals(self, items, *owners):
+        """(center, r0, pitch, turns) 序列"""
+        return self.add("spirals", [(c[0], c[1], r0, pitch, turns) for c, r0, pitch, turns in items],
+                        *owners)
+
+    def polyline(self, points, *owners):
+        """一条折线，顶点为 (x, y) 序列或 (M, 2) 数组"""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if len(points):
+            self._blocks["polylines"].append((points, self._tag(owners)))
+        return self
+
+    def build(self):
+        arrays, tags = {}, {}
+        for kind, width in KINDS.items():
+            blocks = self._blocks[kind]
+            arrays[kind] = np.concatenate([rows for rows, _ in blocks]) if blocks else None
+            tags[kind] = np.concatenate([np.full(len(rows), tag, dtype=TAG_DTYPE) for rows, tag in blocks]
+                                        or [np.empty(0, TAG_DTYPE)])
+        lines = self._blocks["polylines"]
+        points = np.concatenate([pts for pts, _ in lines]) if lines else None
+        offsets = np.cumsum([0] + [len(pts) for pts, _ in lines])
+        tags["polylines"] = np.array([tag for _, tag in lines], dtype=TAG_DTYPE)
+        return Primitives(**arrays, points=points, offsets=offsets, tags=tags,
+                          groups=sorted(self._groups, key=self._groups.get))
+
+#---------- 2. 螺旋采样 ----------
+CHORD_TOLERANCE = 0.0005  # mm，折线弦与真实曲线的最大偏差 (0.5 µm)
+
+def spiral_curve(center, r0, pitch, turns, tol=CHORD_TOLERANCE):
+    """按弦高容差自适应采样的阿基米德螺旋，返回 (N, 2) 数组
+
+    从 12 点方向顺时针展开 turns 圈，半径由 r0 线性增加到 r0 + pitch。
+    曲率半径 ρ 处长为 L 的弦偏差约 L²/(8ρ)，据此逐点确定允许的转角步长：
+    外圈加密、内圈稀疏，顶点数为满足容差的最少值。
+    """
+    if tol <= 0:
+        raise ValueError("弦高容差必须为正 / Chord tolerance must be positive")
+    sweep = 2 * np.pi * turns
+    if sweep == 0:
+        s = np.array([0.0, 1.0])
+    else:
+        # 单位转角所需步数 dθ/Δθ = sqrt(r²+2b²) / ((r²+b²)^¼ · sqrt(8·tol))，b = dr/dθ
+        b = pitch / sweep
+        grid = np.linspace(0, 1, 1025)
+        r = r0 + pitch * grid
+        density = sweep * np.sqrt(r**2 + 2*b**2) / ((r**2 + b**2) ** 0.25 * math.sqrt(8 * tol))
+        steps = np.concatenate(([0.0], np.cumsum((density[1:] + density[:-1]) / 2 * np.diff(grid))))
+        # 步数均分后反查参数 s
+        s = np.interp(np.linspace(0, steps[-1], max(2, math.ceil(steps[-1]) + 1)), steps, grid)
+    t = sweep * s
+    r = r0 + pitch * s
+    return np.asarray(center, dtype=float) + np.column_stack((np.sin(t), np.cos(t))) * r[:, None]
+
+def _spiral_frame(center, r0, pitch, turns, s):
+    """参数 s 处螺旋上的点和单位切向 (沿 s 增大方向)"""
+    t = 2 * np.pi * turns * s
+    r = r0 + pitch * s
+    sin, cos = np.sin(t), np.cos(t)
+    points = np.asarray(center, dtype=float) + np.column_stack((sin, cos)) * r[:, None]
+    d = pitch * np.column_stack((sin, cos)) + 2 * np.pi * turns * r[:, None] * np.column_stack((cos, -sin))
+    return points, d / np.linalg.norm(d, axis=1, keepdims=True)
+
+def _cross(a, b):
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+def _bulge(tangent, chord):
+    """从切向 tangent 出发、弦为 chord 的圆弧的 bulge 值 (tan(圆心角/4)，逆时针为正)"""
+    return np.tan(np.arctan2(_cross(tangent, chord), np.einsum("ij,ij->i", tangent, chord)) / 2)
+
+def _arc_distance(start, end, bulge, points):
+    """points (K, M, 2) 到对应圆弧 (K 段) 所在圆或直线的距离"""
+    chord = end - start
+    length = np.linalg.norm(chord, axis=1)
+    normal = np.column_stack((-chord[:, 1], chord[:, 0])) / length[:, None]
+    flat = np.abs(bulge) < 1e-9
+    b = np.where(flat, 1.0, bulge)
+    center = (start + end) / 2 + normal * (length * (1 - b**2) / (4 * b))[:, None]
+    radius = length * (1 + b**2) / (4 * np.abs(b))
+    to_circle = np.abs(np.linalg.norm(points - center[:, None], axis=2) - radius[:, None])
+    to_line = np.abs(np.einsum("kmj,kj->km", points - start[:, None], normal))
+    return np.where(flat[:, None], to_line, to_circle)
+
+def spiral_biarcs(center, r0, pitch, turns, tol=CHORD_TOLERANCE):
+    """用 G1 连续的双圆弧拟合阿基米德螺旋，偏差不超过 tol
+
+    返回 (vertices (N, 2), bulges (N,))，即 LWPOLYLINE 的 "xyb" 格式：bulges[i] 描述
+    vertices[i] -> vertices[i+1] 的圆弧，偶数下标的顶点位于螺旋上。顶点数通常只有
+    spiral_curve 同容差折线的十分之一左右。
+    """
+    if tol <= 0:
+        raise ValueError("弦高容差必须为正 / Chord tolerance must be positive")
+    if turns == 0:
+        points, _ = _spiral_frame(center, r0, pitch, 0, np.array([0.0, 1.0]))
+        return points, np.zeros(2)
+    # 先按四分之一圈划分，不满足容差的区间对半再分
+    knots = np.linspace(0, 1, max(2, math.ceil(4 * abs(turns)) + 1))
+    pending = np.column_stack((knots[:-1], knots[1:]))
+    done = []
+    probe = np.linspace(0, 1, 17)[1:-1]
+    for _ in range(40):
+        if not len(pending):
+            break
+        p1, t1 = _spiral_frame(center, r0, pitch, turns, pending[:, 0])
+        p2, t2 = _spiral_frame(center, r0, pitch, turns, pending[:, 1])
+        # 等切线长双圆弧：两段圆弧在 pm 处相切
+        v = p2 - p1
+        tt = t1 + t2
+        vt = np.einsum("ij,ij->i", v, tt)
+        denom = 2 * (1 - np.einsum("ij,ij->i", t1, t2))
+        vv = np.einsum("ij,ij->i", v, v)
+        parallel = denom < 1e-12
+        d = np.where(parallel, vv / (4 * np.maximum(np.abs(np.einsum("ij,ij->i", v, t2)), 1e-300)),
+                     (-vt + np.sqrt(vt**2 + denom * vv)) / np.where(parallel, 1, denom))
+        pm = (p1 + p2 + d[:, None] * (t1 - t2)) / 2
+        bulge1 = _bulge(t1, pm - p1)
+        chord = (pm - p1) / np.linalg.norm(pm - p1, axis=1, keepdims=True)
+        tm = 2 * np.einsum("ij,ij->i", chord, t1)[:, None] * chord - t1
+        bulge2 = _bulge(tm, p2 - pm)
+        # 区间内取样点，按 pm 处法线分给前后两段圆弧
+        s = pending[:, :1] + (pending[:, 1:] - pending[:, :1]) * probe
+        samples = _spiral_frame(center, r0, pitch, turns, s.ravel())[0].reshape(len(s), -1, 2)
+        first = np.einsum("kmj,kj->km", samples - pm[:, None], tm) < 0
+        error = np.where(first, _arc_distance(p1, pm, bulge1, samples),
+                         _arc_distance(pm, p2, bulge2, samples)).max(axis=1)
+        ok = error <= tol
+        done.append(np.column_stack((pending[ok], p1[ok], pm[ok], bulge1[ok], bulge2[ok])))
+        mid = pending[~ok].mean(axis=1)
+        pending = np.concatenate((np.column_stack((pending[~ok, 0], mid)),
+                                  np.column_stack((mid, pending[~ok, 1]))))
+    pieces = np.concatenate(done)
+    pieces = pieces[np.argsort(pieces[:, 0])]
+    vertices = np.empty((2 * len(pieces) + 1, 2))
+    vertices[0:-1:2] = pieces[:, 2:4]
+    vertices[1::2] = pieces[:, 4:6]
+    vertices[-1] = _spiral_frame(center, r0, pitch, turns, np.array([1.0]))[0][0]
+    bulges = np.zeros(len(vertices))
+    bulges[0:-1:2] = pieces[:, 6]
+    bulges[1::2] = pieces[:, 7]
+    return vertices, bulges
+
+#---------- 3. BurstValve ----------
+BURST_VALVE_DEFAULTS = {
+    "Length_r1":  5.0,
+    "Width_r1":   0.2,
+    "Radius_1":   0.4,
+    "Length_r2":  1.7,
+    "Number_v":   5.0,
+    "Number_r":   3.0,
+    "Distance_v": 0.05,
+    "Distance_r": 0.15,
+    "Length_3":   0.6,
+    "Radius_2":   0.2,
+    "Radius_3":   0.1,
+    "Angle_1":    60.0,
+    "Stagger":    0.0,
+}
+
+def pillar_grid(x0, y0, pitch_x, pitch_y, nx, ny, stagger=False):
+    """nx 列 × ny 行微柱阵列的中心坐标 (nx*ny, 2)，按列排列，(x0, y0) 为第一个
+
+    stagger 为真时奇数行右移半个列距 (交错 / 六方排布)，整体左移四分之一列距保持居中；
+    行距取 pitch_x·√3/2 时即为正六方排布。
+    """
+    i, j = np.meshgrid(np.arange(nx), np.arange(ny), indexing="ij")
+    x = x0 + i * pitch_x
+    if stagger and ny > 1:
+        x = x + (j % 2 - 0.5) * (pitch_x / 2)
+    return np.column_stack((x.ravel(), (y0 + j * pitch_y).ravel()))
+
+def burst_valve_derived(p):
+    """BurstValve 的计算参数"""
+    Angle_1_rad = np.deg2rad(p["Angle_1"])
+    val = p["Radius_1"]**2 - (p["Width_r1"]**2)/4
+    if val < 0:
+        raise ValueError("Radius_1 必须大于等于 Width_r1/2")
+    return {"Angle_1_rad": Angle_1_rad,
+            "Distance_1": p["Radius_1"] - np.sqrt(val),
+            "Length_1": p["Length_3"] * np.cos(Angle_1_rad),
+            "Length_5": 2 * p["Length_3"] * np.sin(Angle_1_rad),
+            "Mov_x": p["Distance_v"] + 2*p["Radius_3"],
+            "Mov_y": p["Distance_r"] + 2*p["Radius_3"]}
+
+def _burst_valve_channel(p):
+    """BurstValve 流道与进出口 (不含微柱)"""
+    q = ParamSnapshot.of("BurstValve", p)
+    Length_r1 = q["Length_r1"]
+    Width_r1 = q["Width_r1"]
+    Radius_1 = q["Radius_1"]
+    Length_r2 = q["Length_r2"]
+    Length_3 = q["Length_3"]
+    Radius_2 = q["Radius_2"]
+    Angle_1 = q["Angle_1"]
+    Angle_1_rad = q["Angle_1_rad"]
+    Distance_1 = q["Distance_1"]
+    Length_1 = q["Length_1"]
+    Length_5 = q["Length_5"]
+
+    circles = []
+    # 圆1
+
+    c1 = (-Radius_1, Width_r1/2)
+    circles.append((c1, Radius_1))
+    # 圆2
+
+    c2 = (Length_r1+2*Length_1+Length_r2+Length_r1+Radius_1, Width_r1/2)
+    circles.append((c2, Radius_1))
+
+    arcs = []
+    # 圆弧1
+
+    arc1_center = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2), Width_r1+Length_1*np.tan(Angle_1_rad)-Radius_2)
+    arcs.append((arc1_center, Radius_2, 90, 90+Angle_1))
+    # 圆弧2
+
+    arc2_center = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2), -Length_1*np.tan(Angle_1_rad)+Radius_2)
+    arcs.append((arc2_center, Radius_2, -90-Angle_1, -90))
+    # 圆弧3
+
+    arc3_center = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2), Width_r1+Length_1*np.tan(Angle_1_rad)-Radius_2)
+    arcs.append((arc3_center, Radius_2, 90-Angle_1, 90))
+    # 圆弧4
+
+    arc4_center = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2), -Length_1*np.tan(Angle_1_rad)+Radius_2)
+    arcs.append((arc4_center, Radius_2, -90, -90+Angle_1))
+
+    segments = []
+    # 线段1
+
+    seg1_p1 = (-Distance_1, Width_r1)
+    seg1_p2 = (Length_r1, Width_r1)
+    segments.append((seg1_p1, seg1_p2))
+    # 线段2
+
+    seg2_p1 = (-Distance_1, 0)
+    seg2_p2 = (Length_r1, 0)
+    segments.append((seg2_p1, seg2_p2))
+    # 线段3
+
+    seg3_p1 = (Length_r1, Width_r1)
+    seg3_p2 = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2)-Radius_2*np.sin(Angle_1_rad),
+               Width_r1+Length_1*np.tan(Angle_1_rad)-Radius_2+Radius_2*np.cos(Angle_1_rad))
+    segments.append((seg3_p1, seg3_p2))
+    # 线段4
+
+    seg4_p1 = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2), Width_r1+Length_1*np.tan(Angle_1_rad))
+    seg4_p2 = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2), Width_r1+Length_1*np.tan(Angle_1_rad))
+    segments.append((seg4_p1, seg4_p2))
+    # 线段5
+
+    seg5_p1 = (Length_r1+2*Length_1+Length_r2, Width_r1)
+    seg5_p2 = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2)+Radius_2*np.sin(Angle_1_rad),
+               Width_r1+Length_1*np.tan(Angle_1_rad)-Radius_2+Radius_2*np.cos(Angle_1_rad))
+    segments.append((seg5_p1, seg5_p2))
+    # 线段6
+
+    seg6_p1 = (Length_r1, 0)
+    seg6_p2 = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2)-Radius_2*np.sin(Angle_1_rad),
+               -Length_1*np.tan(Angle_1_rad)+Radius_2-Radius_2*np.cos(Angle_1_rad))
+    segments.append((seg6_p1, seg6_p2))
+    # 线段7
+
+    seg7_p1 = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2), -Length_1*np.tan(Angle_1_rad))
+    seg7_p2 = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2), -Length_1*np.tan(Angle_1_rad))
+    segments.append((seg7_p1, seg7_p2))
+    # 线段8
+
+    seg8_p1 = (Length_r1+2*Length_1+Length_r2, 0)
+    seg8_p2 = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2)+Radius_2*np.sin(Angle_1_rad),
+               -Length_1*np.tan(Angle_1_rad)+Radius_2-Radius_2*np.cos(Angle_1_rad))
+    segments.append((seg8_p1, seg8_p2))
+    # 线段9
+
+    seg9_p1 = (Length_r1+2*Length_1+Length_r2, 0)
+    seg9_p2 = (Length_r1+2*Length_1+Length_r2+Length_r1+Distance_1, 0)
+    segments.append((seg9_p1, seg9_p2))
+    # 线段10
+
+    seg10_p1 = (Length_r1+2*Length_1+Length_r2, Width_r1)
+    seg10_p2 = (Length_r1+2*Length_1+Length_r2+Length_r1+Distance_1, Width_r1)
+    segments.append((seg10_p1, seg10_p2))
+
+    return (PrimitiveBuilder()
+            .circles(circles, "Radius_1")
+            .arcs(arcs, "Radius_2")
+            .segments(segments, "Length_r1")
+            .build())
+
+def _burst_valve_pillars(p):
+    """BurstValve 圆形微柱阵列"""
+    q = ParamSnapshot.of("BurstValve", p)
+    Radius_3 = q["Radius_3"]
+    Number_v = int(round(q["Number_v"]))
+    Number_r = int(round(q["Number_r"]))
+    Mov_x, Mov_y = q["Mov_x"], q["Mov_y"]
+    c3_base_x = q["Length_r1"]+q["Length_1"]+q["Length_r2"]/2-Radius_3-((Number_v-1)*Mov_x/2)+Radius_3
+
+    c3_base_y = q["Width_r1"]/2-Radius_3-((Number_r-1)*Mov_y/2)+Radius_3
+
+    pillars = pillar_grid(c3_base_x, c3_base_y, Mov_x, Mov_y, Number_v, Number_r, q.get("Stagger", 0))
+    return (PrimitiveBuilder()
+            .add("circles", np.column_stack((pillars, np.full(len(pillars), Radius_3))),
+                 "Radius_3", "Number_v", "Number_r", "Distance_v", "Distance_r", "Stagger")
+            .build())
+
+# 部件表：(部件名, 依赖的参数, 部件函数)；只有依赖的参数变化时才需要重算该部件
+BURST_VALVE_PARTS = (
+    ("channel", ("Length_r1", "Width_r1", "Radius_1", "Length_r2", "Length_3", "Radius_2", "Angle_1"),
+     _burst_valve_channel),
+    ("pillars", ("Length_r1", "Width_r1", "Length_r2", "Length_3", "Angle_1", "Radius_3",
+                 "Number_v", "Number_r", "Distance_v", "Distance_r", "Stagger"),
+     _burst_valve_pillars),
+)
+
+def burst_valve(p):
+    """BurstValve 几何: 参数映射 -> Primitives"""
+    return assemble(BURST_VALVE_PARTS, ParamSnapshot.of("BurstValve", p))
+
+#---------- 4. BurstValve2 ----------
+BURST_VALVE2_DEFAULTS = {
+    "Length_r1":  5.0,
+    "Width_r1":   0.2,
+    "Radius_1":   0.4,
+    "Length_r2":  1.7,
+    "Number_v":   5.0,
+    "Number_r":   3.0,
+    "Distance_v": 0.05,
+    "Distance_r": 0.15,
+    "Length_3":   0.6,
+    "Radius_2":   0.2,
+    "Angle_1":    60.0,
+    "Width_r2":   0.1,
+    "Length_r3":  0.3,
+    "Stagger":    0.0,
+}
+
+def burst_valve2_derived(p):
+    """BurstValve2 的计算参数"""
+    Angle_1_rad = np.deg2rad(p["Angle_1"])
+    val = p["Radius_1"]**2 - (p["Width_r1"]**2)/4
+    if val < 0:
+        raise ValueError("Radius_1 必须大于等于 Width_r1/2")
+    return {"Angle_1_rad": Angle_1_rad,
+            "Distance_1": p["Radius_1"] - np.sqrt(val),
+            "Length_1": p["Length_3"] * np.cos(Angle_1_rad),
+            "Length_5": 2 * p["Length_3"] * np.sin(Angle_1_rad),
+            "Mov_x": p["Distance_v"] + p["Length_r3"],
+            "Mov_y": p["Distance_r"] + p["Width_r2"]}
+
+def _burst_valve2_channel(p):
+    """BurstValve2 流道与进出口 (不含微柱)"""
+    q = ParamSnapshot.of("BurstValve2", p)
+    Length_r1 = q["Length_r1"]
+    Width_r1 = q["Width_r1"]
+    Radius_1 = q["Radius_1"]
+    Length_r2 = q["Length_r2"]
+    Length_3 = q["Length_3"]
+    Radius_2 = q["Radius_2"]
+
+    Angle_1 = q["Angle_1"]
+    Angle_1_rad = q["Angle_1_rad"]
+    Distance_1 = q["Distance_1"]
+    Length_1 = q["Length_1"]
+    Length_5 = q["Length_5"]
+
+    # 圆1
+
+    circles = []
+    c1 = (-Radius_1, Width_r1/2)
+    circles.append((c1, Radius_1))
+    # 圆2
+
+    c2 = (Length_r1+2*Length_1+Length_r2+Length_r1+Radius_1, Width_r1/2)
+    circles.append((c2, Radius_1))
+
+    # 圆弧
+
+    arcs = []
+    arc1_center = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2), Width_r1+Length_1*np.tan(Angle_1_rad)-Radius_2)
+    arcs.append((arc1_center, Radius_2, 90, 90+Angle_1))
+    arc2_center = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2), -Length_1*np.tan(Angle_1_rad)+Radius_2)
+    arcs.append((arc2_center, Radius_2, -90-Angle_1, -90))
+    arc3_center = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2), Width_r1+Length_1*np.tan(Angle_1_rad)-Radius_2)
+    arcs.append((arc3_center, Radius_2, 90-Angle_1, 90))
+    arc4_center = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2), -Length_1*np.tan(Angle_1_rad)+Radius_2)
+    arcs.append((arc4_center, Radius_2, -90, -90+Angle_1))
+
+    # 线段
+
+    segments = []
+    seg1_p1 = (-Distance_1, Width_r1)
+    seg1_p2 = (Length_r1, Width_r1)
+    segments.append((seg1_p1, seg1_p2))
+    seg2_p1 = (-Distance_1, 0)
+    seg2_p2 = (Length_r1, 0)
+    segments.append((seg2_p1, seg2_p2))
+    seg3_p1 = (Length_r1, Width_r1)
+    seg3_p2 = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2)-Radius_2*np.sin(Angle_1_rad),
+               Width_r1+Length_1*np.tan(Angle_1_rad)-Radius_2+Radius_2*np.cos(Angle_1_rad))
+    segments.append((seg3_p1, seg3_p2))
+    seg4_p1 = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2), Width_r1+Length_1*np.tan(Angle_1_rad))
+    seg4_p2 = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2), Width_r1+Length_1*np.tan(Angle_1_rad))
+    segments.append((seg4_p1, seg4_p2))
+    seg5_p1 = (Length_r1+2*Length_1+Length_r2, Width_r1)
+    seg5_p2 = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2)+Radius_2*np.sin(Angle_1_rad),
+               Width_r1+Length_1*np.tan(Angle_1_rad)-Radius_2+Radius_2*np.cos(Angle_1_rad))
+    segments.append((seg5_p1, seg5_p2))
+    seg6_p1 = (Length_r1, 0)
+    seg6_p2 = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2)-Radius_2*np.sin(Angle_1_rad),
+               -Length_1*np.tan(Angle_1_rad)+Radius_2-Radius_2*np.cos(Angle_1_rad))
+    segments.append((seg6_p1, seg6_p2))
+    seg7_p1 = (Length_r1+Length_1+Radius_2*np.tan(Angle_1_rad/2), -Length_1*np.tan(Angle_1_rad))
+    seg7_p2 = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2), -Length_1*np.tan(Angle_1_rad))
+    segments.append((seg7_p1, seg7_p2))
+    seg8_p1 = (Length_r1+2*Length_1+Length_r2, 0)
+    seg8_p2 = (Length_r1+Length_1+Length_r2-Radius_2*np.tan(Angle_1_rad/2)+Radius_2*np.sin(Angle_1_rad),
+               -Length_1*np.tan(Angle_1_rad)+Radius_2-Radius_2*np.cos(Angle_1_rad))
+    segments.append((seg8_p1, seg8_p2))
+    seg9_p1 = (Length_r1+2*Length_1+Length_r2, 0)
+    seg9_p2 = (Length_r1+2*Length_1+Length_r2+Length_r1+Distance_1, 0)
+    segments.append((seg9_p1, seg9_p2))
+    seg10_p1 = (Length_r1+2*Length_1+Length_r2, Width_r1)
+    seg10_p2 = (Length_r1+2*Length_1+Length_r2+Length_r1+Distance_1, Width_r1)
+    segments.append((seg10_p1, seg10_p2))
+
+    return (PrimitiveBuilder()
+            .circles(circles, "Radius_1")
+            .arcs(arcs, "Radius_2")
+            .segments(segments, "Length_1", "Length_r1")
+            .build())
+
+def _burst_valve2_pillars(p):
+    """BurstValve2 矩形微柱阵列"""
+    q = ParamSnapshot.of("BurstValve2", p)
+    Number_v = int(round(q["Number_v"]))
+    Number_r = int(round(q["Number_r"]))
+    Mov_x, Mov_y = q["Mov_x"], q["Mov_y"]
+    Width_r2 = q["Width_r2"]
+    Length_r3 = q["Length_r3"]
+
+    # 矩形阵列
+
+    rect_x0 = q["Length_r1"]+q["Length_1"]+q["Length_r2"]/2-Length_r3/2-((Number_v-1)*Mov_x/2)
+    rect_y0 = q["Width_r1"]/2-Width_r2/2-((Number_r-1)*Mov_y/2)
+    corners = pillar_grid(rect_x0, rect_y0, Mov_x, Mov_y, Number_v, Number_r, q.get("Stagger", 0))
+    rectangles = np.column_stack((corners, np.full((len(corners), 2), (Length_r3, Width_r2))))  # 左下角x,y,宽,高
+
+    return (PrimitiveBuilder()
+            .add("rectangles", rectangles, "Length_r3", "Width_r2", "Number_v", "Number_r",
+                 "Distance_v", "Distance_r", "Stagger")
+            .build())
+
+BURST_VALVE2_PARTS = (
+    ("channel", ("Length_r1", "Width_r1", "Radius_1", "Length_r2", "Length_3", "Radius_2", "Angle_1"),
+     _burst_valve2_channel),
+    ("pillars", ("Length_r1", "Width_r1", "Length_r2", "Length_3", "Angle_1", "Length_r3", "Width_r2",
+                 "Number_v", "Number_r", "Distance_v", "Distance_r", "Stagger"),
+     _burst_valve2_pillars),
+)
+
+def burst_valve2(p):
+    """BurstValve2 几何: 参数映射 -> Primitives"""
+    return assemble(BURST_VALVE2_PARTS, ParamSnapshot.of("BurstValve2", p))
+
+#---------- 5. CdPCR ----------
+CDPCR_DEFAULTS = {
+    "Radius_1":    0.36,
+    "Distance_r1": 2.5,
+    "Length_v2":   3.0,
+    "Length_r1":   6.0,
+    "Width_r1":    0.2,
+    "Width_Or":    0.1,
+    "Length_Or":   0.1,
+    "Width_Res":   0.2,
+    "Length_Out":  0.3,
+    "Length_r2":   5.0,
+    "Angle":       60.0,
+    "Length_r4":   3.0,
+    "Length_r3":   0.3,
+    "Length_v3":   10.0,
+    "Number":      10.0,
+}
+
+def cdpcr_derived(p):
+    """CdPCR 的计算参数"""
+    R = p["Radius_1"]
+    return {"Distance_1": R - np.sqrt(max(R**2 - (p["Width_r1"]**2)/4, 0)),
+            "Distance_2": R - np.sqrt(max(R**2 - (p["Width_Res"]**2)/4, 0)),
+            "Length_v1": p["Length_v3"]/2 - p["Width_Res"]*2,
+            "Angle_rad": np.deg2rad(p["Angle"])}
+
+def _cdpcr_inlet(p):
+    """CdPCR 进样口、入口流道与限流口 (与阵列数目、阵列长度无关)"""
+    q = ParamSnapshot.of("CdPCR", p)
+    R1   = q["Radius_1"]
+    Dr1  = q["Distance_r1"]
+    Lv2  = q["Length_v2"]
+    Lr1  = q["Length_r1"]
+    Wr1  = q["Width_r1"]
+    WOr  = q["Width_Or"]
+    LOr  = q["Length_Or"]
+    WRes = q["Width_Res"]
+    LOut = q["Length_Out"]
+    Lr3  = q["Length_r3"]
+    D1   = q["Distance_1"]
+
+    # ─── 圆 ───
+
+    circles = [
+        ((0, 0), R1),
+        ((R1 + Dr1 - Lr1 - Wr1/2, 0), R1),
+    ]
+
+    # ─── 直线 ───
+
+    seg = lambda x1, y1, x2, y2: ((x1, y1), (x2, y2))
+    segments = [
+        seg(R1+Dr1,             -Wr1/2,  R1-D1,               -Wr1/2),   #1
+
+        seg(R1+Dr1,              Wr1/2,  R1-D1,                Wr1/2),   #2
+
+        seg(R1+Dr1,             -Wr1/2,  R1+Dr1,         -Lv2/2+Wr1),    #3
+
+        seg(R1+Dr1,              Wr1/2,  R1+Dr1,          Lv2/2-Wr1),    #4
+
+        seg(R1+Dr1+Wr1,        -WOr/2,   R1+Dr1+Wr1,       -Lv2/2),      #5
+
+        seg(R1+Dr1+Wr1,         WOr/2,   R1+Dr1+Wr1,        Lv2/2),      #6
+
+        seg(R1+Dr1+Wr1,         Lv2/2,   R1+Dr1-Lr1-Wr1,    Lv2/2),      #7
+
+        seg(R1+Dr1+Wr1,        -Lv2/2,   R1+Dr1-Lr1-Wr1,   -Lv2/2),      #8
+
+        seg(R1+Dr1,             Lv2/2-Wr1, R1+Dr1-Lr1,      Lv2/2-Wr1),  #9
+
+        seg(R1+Dr1,            -Lv2/2+Wr1, R1+Dr1-Lr1,    -Lv2/2+Wr1),  #10
+
+        seg(R1+Dr1-Lr1,        -Lv2/2+Wr1, R1+Dr1-Lr1,    -R1+D1),      #11
+
+        seg(R1+Dr1-Lr1-Wr1,    -Lv2/2,   R1+Dr1-Lr1-Wr1,  -R1+D1),      #12
+
+        seg(R1+Dr1-Lr1,         Lv2/2-Wr1, R1+Dr1-Lr1,     R1-D1),      #13
+
+        seg(R1+Dr1-Lr1-Wr1,     Lv2/2,   R1+Dr1-Lr1-Wr1,   R1-D1),      #14
+
+        seg(R1+Dr1+Wr1,        -WOr/2,   R1+Dr1+Wr1+LOr,  -WOr/2),      #15
+
+        seg(R1+Dr1+Wr1,         WOr/2,   R1+Dr1+Wr1+LOr,   WOr/2),      #16
+
+        seg(R1+Dr1+Wr1+LOr,    -WOr/2,   R1+Dr1+Wr1+LOr+LOut, -WRes/2), #17
+
+        seg(R1+Dr1+Wr1+LOr,     WOr/2,   R1+Dr1+Wr1+LOr+LOut,  WRes/2), #18
+
+        seg(R1+Dr1+Wr1+LOr+LOut,  WRes/2,
+            R1+Dr1+Wr1+LOr+LOut+Lr3-WRes/2, WRes/2),                    #19
+
+        seg(R1+Dr1+Wr1+LOr+LOut, -WRes/2,
+            R1+Dr1+Wr1+LOr+LOut+Lr3-WRes/2,-WRes/2),                    #20
+
+    ]
+
+    return (PrimitiveBuilder()
+            .circles(circles, "Radius_1")
+            .segments(segments, "Length_r1")
+            .build())
+
+def _cdpcr_array(p):
+    """CdPCR 蛇形阵列与出口"""
+    q = ParamSnapshot.of("CdPCR", p)
+    R1   = q["Radius_1"]
+    Dr1  = q["Distance_r1"]
+    Wr1  = q["Width_r1"]
+    LOr  = q["Length_Or"]
+    WRes = q["Width_Res"]
+    LOut = q["Length_Out"]
+    Lr3  = q["Length_r3"]
+    Num  = int(round(q["Number"]))
+    D2   = q["Distance_2"]
+    Lv1  = q["Length_v1"]
+
+    # 辅助基点
+
+    base_x = R1 + Dr1 + Wr1 + LOr + LOut + Lr3
+
+    y_down = -WRes + Lv1
+
+    y_up   =  WRes - Lv1
+
+    circles = [((base_x + 3*WRes + 4*Num*WRes + WRes + Lr3 + R1 , 0), R1)]
+
+    # ─── 圆弧 ───
+
+    arcs = []
+
+    # (1)(2) 左端第一对圆弧
+
+    c1 = (base_x + 1.5*WRes, y_down)
+    arcs += [(c1, 1.5*WRes,   0, 180),  # 大弧
+
+             (c1, 0.5*WRes,   0, 180)]  # 小弧
+
+    # (3)(4)(5)(6) 及其阵列
+
+    for i in range(Num):
+        off = i * 4 * WRes
+
+        # 向上弧（-180 → 0）
+        c_up = (base_x + 1.5*WRes + 2*WRes + off, y_up)
+        arcs += [(c_up, 1.5*WRes, -180,   0),
+                 (c_up, 0.5*WRes, -180,   0)]
+        # 向下弧（0 → 180）
+        c_dn = (base_x + 1.5*WRes + 4*WRes + off, y_down)
+        arcs += [(c_dn, 1.5*WRes,   0, 180),
+                 (c_dn, 0.5*WRes,   0, 180)]
+
+    # (7)(8) 左侧最外框
+
+    cL = (base_x - WRes/2, WRes)
+    arcs += [(cL, 1.5*WRes, -90,   0),
+             (cL, 0.5*WRes, -90,   0)]
+
+    # (9)(10) 右侧最外框
+
+    cR = (base_x + WRes*3 + WRes*4*Num + WRes/2, WRes)
+    arcs += [(cR, 1.5*WRes, 180, 270),
+             (cR, 0.5*WRes, 180, 270)]
+
+    # ─── 直线 ───
+
+    seg = lambda x1, y1, x2, y2: ((x1, y1), (x2, y2))
+    segments = [
+        seg(base_x, y_down, base_x, WRes),                              #21
+
+        seg(base_x+WRes, y_down, base_x+WRes, WRes),                    #22
+
+    ]
+
+    # (23)(24)(25)(26) 及其阵列
+
+    for i in range(Num):
+        off = i * 4 * WRes
+
+        segments += [
+            seg(base_x + 3*WRes + off, -WRes+Lv1, base_x + 3*WRes + off,  WRes-Lv1),   #23
+
+            seg(base_x + 2*WRes + off, -WRes+Lv1, base_x + 2*WRes + off,  WRes-Lv1),   #24
+
+            seg(base_x + 5*WRes + off,  WRes-Lv1, base_x + 5*WRes + off, -WRes+Lv1),   #25
+
+            seg(base_x + 4*WRes + off,  WRes-Lv1, base_x + 4*WRes + off, -WRes+Lv1),   #26
+
+        ]
+
+    # (27)(28) 阵列右端竖线
+
+    segments += [
+        seg(base_x + 3*WRes + 4*Num*WRes - WRes,
+            -WRes+Lv1,
+            base_x + 3*WRes + 4*Num*WRes - WRes, WRes),                 #27
+
+        seg(base_x + 3*WRes + 4*Num*WRes,
+            -WRes+Lv1,
+            base_x + 3*WRes + 4*Num*WRes,     WRes),                   #28
+
+    ]
+    # (29)(30) 右端水平
+
+    segments += [
+        seg(base_x + 3*WRes + 4*Num*WRes + WRes/2,  WRes/2,
+            base_x + 3*WRes + 4*Num*WRes + WRes + Lr3 + D2,  WRes/2),  #29
+
+        seg(base_x + 2*WRes + 4*Num*WRes + 1.5*WRes, -WRes/2,
+            base_x + 3*WRes + 4*Num*WRes + WRes + Lr3 + D2, -WRes/2),  #30
+
+    ]
+
+    return (PrimitiveBuilder()
+            .circles(circles, "Radius_1")
+            .arcs(arcs, "Width_Res")
+            .segments(segments, "Length_r1")
+            .build())
+
+CDPCR_PARTS = (
+    ("inlet", ("Radius_1", "Distance_r1", "Length_v2", "Length_r1", "Width_r1", "Width_Or",
+               "Length_Or", "Width_Res", "Length_Out", "Length_r3"), _cdpcr_inlet),
+    ("array", ("Radius_1", "Distance_r1", "Width_r1", "Length_Or", "Width_Res", "Length_Out",
+               "Length_r3", "Length_v3", "Number"), _cdpcr_array),
+)
+
+def cdpcr(p):
+    """CdPCR 几何: 参数映射 -> Primitives"""
+    return assemble(CDPCR_PARTS, ParamSnapshot.of("CdPCR", p))
+
+#---------- 6. Chamber ----------
+CHAMBER_DEFAULTS = {
+    "Length_r1": 5.0,
+    "Width_r1":  0.2,
+    "Radius_1":  0.4,
+    "Angle_1":   60.0,
+    "Length_r2": 1.7,
+    "Length_3":  0.6,
+    "Radius_2":  0.2,
+}
+
+def chamber_derived(p):
+    """Chamber 的计算参数"""
+    v = p["Radius_1"]**2 - (p["Width_r1"] / 2)**2
+    if v < 0:
+        raise ValueError("Radius_1 must be >= Width_r1 / 2")
+    angle_rad = math.radians(p["Angle_1"])
+    return {"Angle_1_deg": p["Angle_1"],  # 角度制，绘图用
+            "Angle_1": angle_rad,         # 弧度制，计算用
+            "Distance_1": p["Radius_1"] - math.sqrt(v),
+            "Length_1": p["Length_3"] * math.cos(angle_rad),
+            "Length_5": 2 * p["Length_3"] * math.sin(angle_rad)}
+
+def chamber(p):
+    """Chamber 几何: 参数映射 -> Primitives"""
+    q = ParamSnapshot.of("Chamber", p)
+    Length_r1 = q["Length_r1"]
+    Width_r1 = q["Width_r1"]
+    Radius_1 = q["Radius_1"]
+    Angle_1_rad = q["Angle_1"]
+    Angle_1_deg = q["Angle_1_deg"]
+    Length_r2 = q["Length_r2"]
+    Length_3 = q["Length_3"]
+    Radius_2 = q["Radius_2"]
+    Distance_1 = q["Distance_1"]
+    Length_1 = q["Length_1"]
+
+    circles, arcs, segments = [], [], []
+
+    # Circles
+    c1_center = (-Radius_1, Width_r1 / 2)
+    c2_x = Length_r1 + 2 * Length_1 + Length_r2 + Length_r1 + Radius_1
+    c2_center = (c2_x, Width_r1 / 2)
+    circles.extend([(c1_center, Radius_1), (c2_center, Radius_1)])
+
+    # Arcs
+    y_valve_top = Width_r1 + Length_3 * math.sin(Angle_1_rad)
+    y_valve_bottom = -Length_3 * math.sin(Angle_1_rad)
+
+    arc1_center = (Length_r1 + Length_1 + Radius_2 * math.tan(Angle_1_rad/2), y_valve_bottom + Radius_2)
+    arcs.append((arc1_center, Radius_2, -90 - Angle_1_deg, -90))
+
+    arc2_center = (Length_r1 + Length_1 + Radius_2 * math.tan(Angle_1_rad/2), y_valve_top - Radius_2)
+    arcs.append((arc2_center, Radius_2, 90, 90 + Angle_1_deg)) # Corrected angle direction
+
+    arc3_center = (Length_r1 + Length_1 + Length_r2 - Radius_2 * math.tan(Angle_1_rad/2), y_valve_top - Radius_2)
+    arcs.append((arc3_center, Radius_2, 90 - Angle_1_deg, 90))
+
+    arc4_center = (Length_r1 + Length_1 + Length_r2 - Radius_2 * math.tan(Angle_1_rad/2), y_valve_bottom + Radius_2)
+    arcs.append((arc4_center, Radius_2, -90, -90 + Angle_1_deg))
+
+    # Line Segments
+    segments.append(((-Distance_1, Width_r1), (Length_r1, Width_r1))) # seg 1
+    segments.append(((-Distance_1, 0), (Length_r1, 0))) # seg 2
+
+    # Connect inlet to top valve corner
+    p3_end_x = arc2_center[0] - Radius_2 * math.sin(Angle_1_rad)
+    p3_end_y = arc2_center[1] + Radius_2 * math.cos(Angle_1_rad)
+    segments.append(((Length_r1, Width_r1), (p3_end_x, p3_end_y))) # seg 3
+
+    # Top horizontal part of valve
+    segments.append(((arc2_center[0], arc2_center[1] + Radius_2), (arc3_center[0], arc3_center[1] + Radius_2))) # seg 4
+
+    # Connect top valve corner to outlet
+    p5_start_x = arc3_center[0] + Radius_2 * math.sin(Angle_1_rad)
+    p5_start_y = arc3_center[1] + Radius_2 * math.cos(Angle_1_rad)
+    segments.append(((p5_start_x, p5_start_y), (Length_r1 + 2 * Length_1 + Length_r2, Width_r1))) # seg 5
+
+    # Connect inlet to bottom valve corner
+    p6_end_x = arc1_center[0] - Radius_2 * math.sin(Angle_1_rad)
+    p6_end_y = arc1_center[1] - Radius_2 * math.cos(Angle_1_rad)
+    segments.append(((Length_r1, 0), (p6_end_x, p6_end_y))) # seg 6
+
+    # Bottom horizontal part of valve
+    segments.append(((arc1_center[0], arc1_center[1] - Radius_2), (arc4_center[0], arc4_center[1] - Radius_2))) # seg 7
+
+    # Connect bottom valve corner to outlet
+    p9_start_x = arc4_center[0] + Radius_2 * math.sin(Angle_1_rad)
+    p9_start_y = arc4_center[1] - Radius_2 * math.cos(Angle_1_rad)
+    segments.append(((p9_start_x, p9_start_y), (Length_r1 + 2 * Length_1 + Length_r2, 0))) # seg 9
+
+    # Outlet channels
+    segments.append(((Length_r1 + 2 * Length_1 + Length_r2, 0), (c2_center[0] - Radius_1 + Distance_1, 0))) # seg 8
+    segments.append(((Length_r1 + 2 * Length_1 + Length_r2, Width_r1), (c2_center[0] - Radius_1 + Distance_1, Width_r1))) # seg 10
+
+    # 水平线段归入流道长度，斜线归入阀口
+    horizontal = [s for s in segments if s[0][1] == s[1][1]]
+    slanted = [s for s in segments if s[0][1] != s[1][1]]
+    return (PrimitiveBuilder()
+            .circles(circles, "Radius_1")
+            .arcs(arcs, "Radius_2")
+            .segments(horizontal, "Length_r1", "Length_r2", "Width_r1")
+            .segments(slanted, "Length_3", "Angle_1", "Width_r1")
+            .build())
+
+#---------- 7. DdPCR2To1 ----------
+DDPCR_2TO1_DEFAULTS = {
+    "Radius_1":    0.36,
+    "Distance_r1": 2.5,
+    "Length_v2":   3.0,
+    "Length_r1":   6.0,
+    "Width_r1":    0.2,
+    "Width_Or":    0.1,
+    "Length_Or":   0.1,
+    "Width_Out":   0.2,
+    "Length_Out":  0.3,
+    "Length_r2":   5.0,
+    "Radius_2":    0.2,
+    "Angle":       60.0,
+    "Length_1":    1.0,
+    "Length_r3":   0.3,
+    "Length_r4":   3.0,
+}
+
+def ddpcr_2to1_derived(p):
+    """DdPCR2To1 的计算参数"""
+    R, W = p["Radius_1"], p["Width_r1"]
+    return {"Distance_1": R - np.sqrt(max(R**2 - (W**2)/4, 0)),
+            "Angle_rad": np.deg2rad(p["Angle"])}
+
+def ddpcr_2to1(p):
+    """DdPCR2To1 几何: 参数映射 -> Primitives"""
+    q = ParamSnapshot.of("DdPCR2To1", p)
+    R1, Dr1, Lv2, Lr1 = q["Radius_1"], q["Distance_r1"], q["Length_v2"], q["Length_r1"]
+    Wr1, WOr, LOr, WOut, LOut, Lr2 = q["Width_r1"], q["Width_Or"], q["Length_Or"], q["Width_Out"], q["Length_Out"], q["Length_r2"]
+    R2, Angle, L1, Lr3, Lr4 = q["Radius_2"], q["Angle_rad"], q["Length_1"], q["Length_r3"], q["Length_r4"]
+    D1 = q["Distance_1"]; sinA, cosA, tanA2 = np.sin(Angle), np.cos(Angle), np.tan(Angle/2)
+
+    # 圆
+
+    circles = [
+        ((0, 0), R1),
+        ((R1 + Dr1 - Lr1 - Wr1/2, 0), R1),
+        ((R1 + Dr1 + Wr1 + LOr + LOut + 2*L1*cosA + Lr3 + Lr4 + R1, 0), R1)
+    ]
+
+    # 圆弧
+
+    c1x = R1 + Dr1 + Wr1 + LOr + LOut + L1*cosA + R2*tanA2
+
+    c1y = WOut/2 + L1*sinA - R2
+
+    c3x = R1 + Dr1 + Wr1 + LOr + LOut + L1*cosA + Lr3 - R2*tanA2
+
+    c3y = c1y
+
+    arcs = [
+        ((c1x, c1y), R2, 90, 90+np.rad2deg(Angle)),             # arc1
+
+        ((c1x, -c1y), R2, -90-np.rad2deg(Angle), -90),           # arc2
+
+        ((c3x, c3y), R2, 90-np.rad2deg(Angle), 90),              # arc3
+
+        ((c3x, -c3y), R2, -90, -90+np.rad2deg(Angle))            # arc4
+
+    ]
+
+    # 线段
+
+    seg = lambda x1,y1,x2,y2: ((x1,y1),(x2,y2))
+    segments = [
+        seg(R1+Dr1, -Wr1/2, R1-D1, -Wr1/2),                      #1
+
+        seg(R1+Dr1,  Wr1/2, R1-D1,  Wr1/2),                      #2
+
+        seg(R1+Dr1, -Wr1/2, R1+Dr1, -Lv2/2+Wr1),                 #3
+
+        seg(R1+Dr1,  Wr1/2, R1+Dr1,  Lv2/2-Wr1),                 #4
+
+        seg(R1+Dr1+Wr1, -WOr/2, R1+Dr1+Wr1, -Lv2/2),             #5
+
+        seg(R1+Dr1+Wr1,  WOr/2, R1+Dr1+Wr1,  Lv2/2),             #6
+
+        seg(R1+Dr1+Wr1,  Lv2/2, R1+Dr1-Lr1-Wr1,  Lv2/2),         #7
+
+        seg(R1+Dr1+Wr1, -Lv2/2, R1+Dr1-Lr1-Wr1, -Lv2/2),         #8
+
+        seg(R1+Dr1,  Lv2/2-Wr1, R1+Dr1-Lr1,  Lv2/2-Wr1),         #9
+
+        seg(R1+Dr1, -Lv2/2+Wr1, R1+Dr1-Lr1, -Lv2/2+Wr1),         #10
+
+        seg(R1+Dr1-Lr1, -Lv2/2+Wr1, R1+Dr1-Lr1, -R1+D1),         #11
+
+        seg(R1+Dr1-Lr1-Wr1, -Lv2/2, R1+Dr1-Lr1-Wr1, -R1+D1),     #12
+
+        seg(R1+Dr1-Lr1,  Lv2/2-Wr1, R1+Dr1-Lr1,  R1-D1),         #13
+
+        seg(R1+Dr1-Lr1-Wr1,  Lv2/2, R1+Dr1-Lr1-Wr1,  R1-D1),     #14
+
+        seg(R1+Dr1+Wr1, -WOr/2, R1+Dr1+Wr1+LOr, -WOr/2),         #15
+
+        seg(R1+Dr1+Wr1,  WOr/2, R1+Dr1+Wr1+LOr,  WOr/2),         #16
+
+        seg(R1+Dr1+Wr1+LOr, -WOr/2, R1+Dr1+Wr1+LOr+LOut, -WOut/2),#17
+
+        seg(R1+Dr1+Wr1+LOr,  WOr/2, R1+Dr1+Wr1+LOr+LOut,  WOut/2),#18
+
+        seg(R1+Dr1+Wr1+LOr+LOut,  WOut/2,
+            R1+Dr1+Wr1+LOr+LOut+L1*cosA+R2*tanA2 - sinA*R2,
+            WOut/2 + L1*sinA - R2 + cosA*R2),                    #19
+
+        seg(R1+Dr1+Wr1+LOr+LOut, -WOut/2,
+            R1+Dr1+Wr1+LOr+LOut+L1*cosA+R2*tanA2 - sinA*R2,
+            -WOut/2 - L1*sinA + R2 - cosA*R2),                   #20
+
+        seg(c3x, -WOut/2 - L1*sinA, c1x, -WOut/2 - L1*sinA),     #21
+
+        seg(c3x,  WOut/2 + L1*sinA, c1x,  WOut/2 + L1*sinA),     #22
+
+        seg(c3x + sinA*R2,
+            -WOut/2 - L1*sinA + R2 - cosA*R2,
+            R1+Dr1+Wr1+LOr+LOut+2*L1*cosA+Lr3,
+            -WOut/2),                                            #23
+
+        seg(c3x + sinA*R2,
+            WOut/2 + L1*sinA - R2 + cosA*R2,
+            R1+Dr1+Wr1+LOr+LOut+2*L1*cosA+Lr3,
+            WOut/2),                                             #24
+
+        seg(R1+Dr1+Wr1+LOr+LOut+2*L1*cosA+Lr3+Lr4+D1,  WOut/2,
+            R1+Dr1+Wr1+LOr+LOut+2*L1*cosA+Lr3,  WOut/2),          #25
+
+        seg(R1+Dr1+Wr1+LOr+LOut+2*L1*cosA+Lr3+Lr4+D1, -WOut/2,
+            R1+Dr1+Wr1+LOr+LOut+2*L1*cosA+Lr3, -WOut/2),          #26
+
+    ]
+
+    return (PrimitiveBuilder()
+            .circles(circles, "Radius_1")
+            .arcs(arcs, "Radius_2")
+            .segments(segments, "Length_r1")
+            .build())
+
+#---------- 8. DdPCR3To1 ----------
+DDPCR_3TO1_DEFAULTS = {
+    "Radius_1":    0.36,
+    "Distance_r1": 2.5,
+    "Length_v2":   3.0,
+    "Width_r1":    0.2,
+    "Width_Or":    0.1,
+    "Length_Or":   0.1,
+    "Width_Out":   0.2,
+    "Length_Out":  0.3,
+    "Length_r2":   5.0,
+    "Angle":       60.0,
+    "Length_1":    3.0,
+    "Length_r3":   2.0,
+    "Length_r4":   3.0,
+    "Radius_2":    0.5,
+}
+
+def ddpcr_3to1_derived(p):
+    """DdPCR3To1 的计算参数"""
+    R, W = p["Radius_1"], p["Width_r1"]
+    return {"Distance_1": R - np.sqrt(max(R**2 - (W**2)/4, 0)),
+            "Angle_rad": np.deg2rad(p["Angle"])}
+
+def ddpcr_3to1(p):
+    """DdPCR3To1 几何: 参数映射 -> Primitives"""
+    q = ParamSnapshot.of("DdPCR3To1", p)
+    R1, Dr1, Lv2 = q["Radius_1"], q["Distance_r1"], q["Length_v2"]
+    Wr1, WOr, LOr = q["Width_r1"], q["Width_Or"], q["Length_Or"]
+    WOut, LOut, Lr2 = q["Width_Out"], q["Length_Out"], q["Length_r2"]
+    Angle, L1 = q["Angle_rad"], q["Length_1"]
+    Lr3, Lr4, R2 = q["Length_r3"], q["Length_r4"], q["Radius_2"]
+    D1 = q["Distance_1"]
+
+    sinA, cosA = np.sin(Angle), np.cos(Angle)
+
+    # ── 圆（4 个）
+    circles = [
+        ((0, 0), R1),                                           # 圆1
+
+        ((2*R1 + Dr1 + Wr1 + LOr + LOut + Lr2, 0), R1),         # 圆2
+
+        ((0, -Lv2/2 + Wr1/2), R1),                              # 圆3
+
+        ((0,  Lv2/2 - Wr1/2), R1),                              # 圆4
+
+    ]
+
+    # ── 线段（1–20）
+    seg = lambda x1,y1,x2,y2: ((x1,y1),(x2,y2))
+    segments = [
+        seg(R1+Dr1, -Wr1/2, R1-D1, -Wr1/2),                     #1
+
+        seg(R1+Dr1,  Wr1/2, R1-D1,  Wr1/2),                     #2
+
+        seg(R1+Dr1, -Wr1/2, R1+Dr1, -Lv2/2+Wr1),                #3
+
+        seg(R1+Dr1,  Wr1/2, R1+Dr1,  Lv2/2-Wr1),                #4
+
+        seg(R1+Dr1+Wr1, -WOr/2, R1+Dr1+Wr1, -Lv2/2),            #5
+
+        seg(R1+Dr1+Wr1,  WOr/2, R1+Dr1+Wr1,  Lv2/2),            #6
+
+        seg(R1+Dr1+Wr1,  Lv2/2, R1-D1, Lv2/2),                  #7
+
+        seg(R1+Dr1+Wr1,  -Lv2/2, R1-D1, -Lv2/2),                #8  
+
+        seg(R1+Dr1,  Lv2/2-Wr1, R1-D1, Lv2/2-Wr1),                #9
+
+        seg(R1+Dr1, -Lv2/2+Wr1, R1-D1,-Lv2/2+Wr1),              #10
+
+        seg(R1+Dr1+Wr1, -WOr/2, R1+Dr1+Wr1+LOr, -WOr/2),        #15
+
+        seg(R1+Dr1+Wr1,  WOr/2, R1+Dr1+Wr1+LOr,  WOr/2),        #16
+
+        seg(R1+Dr1+Wr1+LOr, -WOr/2, R1+Dr1+Wr1+LOr+LOut, -WOut/2),#17
+
+        seg(R1+Dr1+Wr1+LOr,  WOr/2, R1+Dr1+Wr1+LOr+LOut,  WOut/2),#18
+
+        seg(R1+Dr1+Wr1+LOr+LOut+Lr2+D1,  WOut/2,
+            R1+Dr1+Wr1+LOr+LOut, WOut/2),                       #19
+
+        seg(R1+Dr1+Wr1+LOr+LOut+Lr2+D1, -WOut/2,
+            R1+Dr1+Wr1+LOr+LOut, -WOut/2),                      #20
+
+    ]
+
+    return (PrimitiveBuilder()
+            .circles(circles, "Radius_1")
+            .segments(segments, "Length_r2")
+            .build())
+
+#---------- 9. Diffusion2to1 ----------
+DIFFUSION_2TO1_DEFAULTS = {
+    "Length_r1": 15.0,
+    "Width_r1":  0.2,
+    "Radius_1":  0.4,
+    "Angle":     90.0,
+    "Length_1":  4.0,
+    "Width_1":   0.2,
+}
+
+def diffusion_2to1_derived(p):
+    """Diffusion2to1 的计算参数"""
+    v = p["Radius_1"]**2 - (p["Width_r1"] / 2)**2
+    if v < 0:
+        raise ValueError("Radius_1 must be >= Width_r1 / 2")
+    return {"Angle": math.radians(p["Angle"]),
+            "Distance_h": p["Radius_1"] - math.sqrt(v)}
+
+def diffusion_2to1(p):
+    """Diffusion2to1 几何: 参数映射 -> Primitives"""
+    q = ParamSnapshot.of("Diffusion2to1", p)
+    Length_r1 = q["Length_r1"]
+    Width_r1 = q["Width_r1"]
+    Radius_1 = q["Radius_1"]
+    Angle_rad = q["Angle"]
+    Length_1 = q["Length_1"]
+    Width_1 = q["Width_1"]
+    Distance_h = q["Distance_h"]
+
+    # The geometry consistently uses Angle/2.
+    Angle_half_rad = Angle_rad / 2
+
+    circles, segments = [], []
+
+    # Circle 1
+    circles.append(((0, 0), Radius_1))
+
+    # Inlet Channel (Segments 1 & 2)
+    segments.append(((Radius_1 - Distance_h, -Width_r1 / 2), (Radius_1 + Length_r1, -Width_r1 / 2)))
+    segments.append(((Radius_1 - Distance_h, Width_r1 / 2), (Radius_1 + Length_r1, Width_r1 / 2)))
+
+    # Y-Junction Segments
+    # Seg 3 (Top slanted line)
+    p3_start = (Radius_1 + Length_r1, Width_r1 / 2)
+    p3_end_x = Radius_1 + Length_r1 + (Length_1 + Distance_h) * math.cos(Angle_half_rad)
+    p3_end_y = Width_r1 / 2 + (Length_1 + Distance_h) * math.sin(Angle_half_rad)
+    segments.append((p3_start, (p3_end_x, p3_end_y)))
+
+    # Seg 4 (Bottom slanted line)
+    p4_start = (Radius_1 + Length_r1, -Width_r1 / 2)
+    p4_end_x = p3_end_x
+    p4_end_y = -Width_r1 / 2 - (Length_1 + Distance_h) * math.sin(Angle_half_rad)
+    segments.append((p4_start, (p4_end_x, p4_end_y)))
+
+    # Seg 5 (Connects top Y-branch to outlet channel)
+    p5_start_x = p3_end_x + Width_1 * math.sin(Angle_half_rad)
+    p5_start_y = p3_end_y - Width_1 * math.cos(Angle_half_rad)
+    p5_end_x = Radius_1 + Length_r1 + Width_1 / math.sin(Angle_half_rad)
+    p5_end_y = 0
+    segments.append(((p5_start_x, p5_start_y), (p5_end_x, p5_end_y)))
+
+    # Seg 6 (Connects bottom Y-branch to outlet channel)
+    p6_start_x = p5_start_x
+    p6_start_y = -(Width_r1/2 + (Length_1 + Distance_h) * math.sin(Angle_half_rad) - Width_1 * math.cos(Angle_half_rad))
+    p6_end_x = p5_end_x
+    p6_end_y = p5_end_y
+    segments.append(((p6_start_x, p6_start_y), (p6_end_x, p6_end_y)))
+
+    # Circles 2 & 3 (Outlet holes)
+    c2_x = Radius_1 + Length_r1 + (Length_1 + Radius_1) * math.cos(Angle_half_rad) + Width_1 * math.sin(Angle_half_rad) / 2
+    c2_y = -(Width_r1 / 2 + (Length_1 + Radius_1) * math.sin(Angle_half_rad) - Width_1 * math.cos(Angle_half_rad) / 2)
+    circles.append(((c2_x, c2_y), Radius_1))
+
+    c3_y = -c2_y # Mirrored y-coordinate
+    circles.append(((c2_x, c3_y), Radius_1))
+
+    # 水平线段归入入口流道，斜线归入 Y 形分支
+    horizontal = [s for s in segments if s[0][1] == s[1][1]]
+    slanted = [s for s in segments if s[0][1] != s[1][1]]
+    return (PrimitiveBuilder()
+            .circles(circles, "Radius_1")
+            .segments(horizontal, "Length_r1", "Width_r1")
+            .segments(slanted, "Length_1", "Width_1", "Angle")
+            .build())
+
+#---------- 10. Droplet2To1 ----------
+DROPLET_2TO1_DEFAULTS = {
+    "Radius_1":    0.36,
+    "Distance_r1": 2.5,
+    "Length_v2":   3.0,
+    "Length_r1":   6.0,
+    "Width_r1":    0.2,
+    "Width_Or":    0.1,
+    "Length_Or":   0.1,
+    "Width_Out":   0.2,
+    "Length_Out":  0.3,
+    "Length_r2":   5.0,
+}
+
+def droplet_2to1_derived(p):
+    """Droplet2To1 的计算参数"""
+    R, W = p["Radius_1"], p["Width_r1"]
+    val = R**2 - (W**2)/4
+    if val < 0:
+        raise ValueError("Radius_1 必须大于等于 Width_r1/2")
+    return {"Distance_1": R - np.sqrt(val)}
+
+def droplet_2to1(p):
+    """Droplet2To1 几何: 参数映射 -> Primitives"""
+    q = ParamSnapshot.of("Droplet2To1", p)
+    R1   = q["Radius_1"]
+    Dr1  = q["Distance_r1"]
+    Lv2  = q["Length_v2"]
+    Lr1  = q["Length_r1"]
+    Wr1  = q["Width_r1"]
+    WOr  = q["Width_Or"]
+    LOr  = q["Length_Or"]
+    WOut = q["Width_Out"]
+    LOut = q["Length_Out"]
+    Lr2  = q["Length_r2"]
+    D1   = q["Distance_1"]
+
+    # 圆 ─────────────
+
+    circles = []
+    circles.append(((0, 0), R1))  # 圆1
+
+    circles.append(((R1 + Dr1 - Lr1 - Wr1/2, 0), R1))  # 圆2
+
+    circles.append(((2*R1 + Dr1 + Wr1 + LOr + LOut + Lr2, 0), R1))  # 圆3
+
+    # 线段 ───────────
+
+    seg = lambda x1, y1, x2, y2: ((x1, y1), (x2, y2))
+    segments = [
+        # 1,2
+
+        seg(R1+Dr1,            -Wr1/2,  R1-D1,               -Wr1/2),
+        seg(R1+Dr1,             Wr1/2,  R1-D1,                Wr1/2),
+        # 3,4 (竖直)
+        seg(R1+Dr1,            -Wr1/2,  R1+Dr1,         -Lv2/2+Wr1),
+        seg(R1+Dr1,             Wr1/2,  R1+Dr1,          Lv2/2-Wr1),
+        # 5,6 (竖直 at x = R1+Dr1+Wr1)
+        seg(R1+Dr1+Wr1,     -WOr/2,     R1+Dr1+Wr1,     -Lv2/2),
+        seg(R1+Dr1+Wr1,      WOr/2,     R1+Dr1+Wr1,      Lv2/2),
+        # 7,8 (横向最外框)
+        seg(R1+Dr1+Wr1,      Lv2/2,     R1+Dr1-Lr1-Wr1,  Lv2/2),
+        seg(R1+Dr1+Wr1,     -Lv2/2,     R1+Dr1-Lr1-Wr1, -Lv2/2),
+        # 9,10 (横向内框)
+        seg(R1+Dr1,          Lv2/2-Wr1, R1+Dr1-Lr1,      Lv2/2-Wr1),
+        seg(R1+Dr1,         -Lv2/2+Wr1, R1+Dr1-Lr1,     -Lv2/2+Wr1),
+        # 11,12 (右竖内框)
+        seg(R1+Dr1-Lr1,     -Lv2/2+Wr1, R1+Dr1-Lr1,     -R1+D1),
+        seg(R1+Dr1-Lr1-Wr1, -Lv2/2,     R1+Dr1-Lr1-Wr1, -R1+D1),
+        # 13,14 (左竖内框)
+        seg(R1+Dr1-Lr1,      Lv2/2-Wr1, R1+Dr1-Lr1,      R1-D1),
+        seg(R1+Dr1-Lr1-Wr1,  Lv2/2,     R1+Dr1-Lr1-Wr1,  R1-D1),
+        # 15,16 (Or横向)
+        seg(R1+Dr1+Wr1,     -WOr/2,     R1+Dr1+Wr1+LOr, -WOr/2),
+        seg(R1+Dr1+Wr1,      WOr/2,     R1+Dr1+Wr1+LOr,  WOr/2),
+        # 17,18 (Out横向)
+        seg(R1+Dr1+Wr1+LOr, -WOr/2,     R1+Dr1+Wr1+LOr+LOut, -WOut/2),
+        seg(R1+Dr1+Wr1+LOr,  WOr/2,     R1+Dr1+Wr1+LOr+LOut,  WOut/2),
+        # 19,20 (最右)
+        seg(R1+Dr1+Wr1+LOr+LOut+Lr2+D1,  WOut/2,
+            R1+Dr1+Wr1+LOr+LOut,          WOut/2),
+        seg(R1+Dr1+Wr1+LOr+LOut+Lr2+D1, -WOut/2,
+            R1+Dr1+Wr1+LOr+LOut,         -WOut/2),
+    ]
+
+    return (PrimitiveBuilder()
+            .circles(circles, "Radius_1")
+            .segments(segments, "Length_r1")
+            .build())
+
+#---------- 11. Droplet3To1 ----------
+DROPLET_3TO1_DEFAULTS = {
+    "Radius_1":    0.36,
+    "Distance_r1": 2.5,
+    "Length_v2":   3.0,
+    "Width_r1":    0.2,
+    "Width_Or":    0.1,
+    "Length_Or":   0.1,
+    "Width_Out":   0.2,
+    "Length_Out":  0.3,
+    "Length_r2":   5.0,
+}
+
+def droplet_3to1_derived(p):
+    """Droplet3To1 的计算参数"""
+    R, W = p["Radius_1"], p["Width_r1"]
+    val = R**2 - (W**2)/4
+    if val < 0:
+        raise ValueError("Radius_1 必须大于 Width_r1/2")
+    return {"Distance_1": R - np.sqrt(val)}
+
+def droplet_3to1(p):
+    """Droplet3To1 几何: 参数映射 -> Primitives"""
+    q = ParamSnapshot.of("Droplet3To1", p)
+    # 取参数
+
+    R1 = q["Radius_1"]
+    Dr1 = q["Distance_r1"]
+    Lv2 = q["Length_v2"]
+    Wr1 = q["Width_r1"]
+    WOr = q["Width_Or"]
+    LOr = q["Length_Or"]
+    WOut = q["Width_Out"]
+    LOut = q["Length_Out"]
+    Lr2 = q["Length_r2"]
+    D1 = q["Distance_1"]
+
+    # ─────────── 圆 ───────────
+
+    circles = [
+        ((0, 0), R1),
+        ((2*R1 + Dr1 + Wr1 + LOr + LOut + Lr2, 0), R1),
+        ((0, -Lv2/2 + Wr1/2), R1),
+        ((0,  Lv2/2 - Wr1/2), R1),
+    ]
+
+    # 辅助函数
+
+    seg = lambda x1, y1, x2, y2: ((x1, y1), (x2, y2))
+
+    # ─────────── 线段 (20) ───────────
+
+    segments = [
+        seg(R1+Dr1,             -Wr1/2,      R1-D1,               -Wr1/2),   #1
+
+        seg(R1+Dr1,              Wr1/2,      R1-D1,                Wr1/2),   #2
+
+        seg(R1+Dr1,             -Wr1/2,      R1+Dr1,         -Lv2/2+Wr1),    #3
+
+        seg(R1+Dr1,              Wr1/2,      R1+Dr1,          Lv2/2-Wr1),    #4
+
+        seg(R1+Dr1+Wr1,        -WOr/2,       R1+Dr1+Wr1,       -Lv2/2),      #5
+
+        seg(R1+Dr1+Wr1,         WOr/2,       R1+Dr1+Wr1,        Lv2/2),      #6
+
+        seg(R1+Dr1+Wr1,         Lv2/2,       R1-D1,              Lv2/2),     #7
+
+        seg(R1+Dr1+Wr1,        -Lv2/2,       R1-D1,             -Lv2/2),     #8
+
+        seg(R1+Dr1,             Lv2/2-Wr1,   R1-D1,              Lv2/2-Wr1), #9
+
+        seg(R1+Dr1,            -Lv2/2+Wr1,   R1-D1,             -Lv2/2+Wr1), #10
+
+        seg(R1+Dr1+Wr1,        -WOr/2,       R1+Dr1+Wr1+LOr,    -WOr/2),     #15
+
+        seg(R1+Dr1+Wr1,         WOr/2,       R1+Dr1+Wr1+LOr,     WOr/2),     #16
+
+        seg(R1+Dr1+Wr1+LOr,    -WOr/2,       R1+Dr1+Wr1+LOr+LOut, -WOut/2),  #17
+
+        seg(R1+Dr1+Wr1+LOr,     WOr/2,       R1+Dr1+Wr1+LOr+LOut,  WOut/2),  #18
+
+        seg(R1+Dr1+Wr1+LOr+LOut+Lr2+D1,  WOut/2,
+            R1+Dr1+Wr1+LOr+LOut,          WOut/2),                         #19
+
+        seg(R1+Dr1+Wr1+LOr+LOut+Lr2+D1, -WOut/2,
+            R1+Dr1+Wr1+LOr+LOut,         -WOut/2),                         #20
+
+    ]
+
+    return (PrimitiveBuilder()
+            .circles(circles, "Radius_1")
+            .segments(segments, "Length_r2")
+            .build())
+
+#---------- 12. Dualspiral ----------
+DUAL_SPIRAL_DEFAULTS = {
+    "Radius_1":   0.4,
+    "Width_1":    0.2,
+    "Circle":     5.0,
+    "Distance_3": 0.8,
+    "Length_r1":  0.2,
+    "Length_v1":  0.5,
+    "Angle":      30.0,
+    "Length_Out": 2.0,
+}
+
+def dual_spiral_derived(p):
+    """Dualspiral 的计算参数"""
+    v = p["Radius_1"] ** 2 - (p["Width_1"] / 2) ** 2
+    return {"Distance_1": p["Radius_1"] - math.sqrt(v) if v >= 0 else 0.0,
+            "Distance_2": p["Width_1"] * 2 * int(p["Circle"]),
+            "Angle": math.radians(p["Angle"])}
+
+def _dual_spiral_channel(p):
+    """Dualspiral 进出口与分叉流道 (不含螺旋)"""
+    q = ParamSnapshot.of("Dualspiral", p)
+    Radius_1 = q["Radius_1"]
+    Width_1 = q["Width_1"]
+    Length_r1 = q["Length_r1"]
+    Length_v1 = q["Length_v1"]
+    Angle = q["Angle"]  # radians
+
+    Length_Out = q["Length_Out"]
+    Distance_1 = q["Distance_1"]
+    Distance_2 = q["Distance_2"]
+
+    # 圆1
+
+    circle1_center = (0, -Width_1/2-Length_v1-Radius_1)
+    circle1_radius = Radius_1
+
+    # 圆2
+
+    x2 = Width_1/2+Distance_2+Length_v1+(Length_Out+Radius_1)*math.cos(Angle)+Width_1*math.sin(Angle)/2
+
+    y2 = Distance_2+Width_1/2+(Length_Out+Radius_1)*math.sin(Angle)-Width_1*math.cos(Angle)/2
+
+    circle2_center = (x2, y2)
+    circle2_radius = Radius_1
+
+    # 圆3
+
+    x3 = x2
+
+    y3 = Distance_2-Width_1/2-(Radius_1+Length_Out)*math.sin(Angle)+Width_1*math.cos(Angle)/2
+
+    circle3_center = (x3, y3)
+    circle3_radius = Radius_1
+
+    # 圆弧
+
+    arc_center = (Length_r1/2, -Width_1/2-Length_v1/2-Distance_1/2+(Length_v1+Distance_1)/2)
+    arc_radius = Width_1
+
+    arc_theta1 = 90
+
+    arc_theta2 = 180
+
+    # 线段
+
+    seg1_p0 = (Length_r1/2, -Width_1/2-Length_v1/2-Distance_1/2-(Length_v1+Distance_1)/2)
+    seg1_p1 = (Length_r1/2, -Width_1/2-Length_v1/2-Distance_1/2+(Length_v1+Distance_1)/2)
+    seg2_p0 = (-Length_r1/2, seg1_p0[1])
+    seg2_p1 = (-Length_r1/2, seg1_p1[1])
+    seg3_p0 = (Width_1/2, Distance_2+Width_1/2)
+    seg3_p1 = (Width_1/2+Distance_2+Length_v1, Distance_2+Width_1/2)
+    seg4_p0 = (Width_1/2, Distance_2-Width_1/2)
+    seg4_p1 = (Width_1/2+Distance_2+Length_v1, Distance_2-Width_1/2)
+    seg5_p0 = (
+        Width_1/2+Distance_2+Length_v1+(Distance_1+Length_Out)*math.cos(Angle),
+        Distance_2+Width_1/2+(Distance_1+Length_Out)*math.sin(Angle)
+    )
+    seg5_p1 = (Width_1/2+Distance_2+Length_v1, Distance_2+Width_1/2)
+    seg6_p0 = (
+        Width_1/2+Distance_2+Length_v1+(Distance_1+Length_Out)*math.cos(Angle),
+        Distance_2-Width_1/2-(Distance_1+Length_Out)*math.sin(Angle)
+    )
+    seg6_p1 = (Width_1/2+Distance_2+Length_v1, Distance_2-Width_1/2)
+    seg7_p0 = (Width_1/2+Distance_2+Length_v1+Width_1/math.sin(Angle), Distance_2+Width_1/2)
+    seg7_p1 = (
+        Width_1/2+Distance_2+Length_v1+(Distance_1+Length_Out)*math.cos(Angle)+Width_1*math.sin(Angle),
+        Distance_2+Width_1/2+(Distance_1+Length_Out)*math.sin(Angle)-Width_1*math.cos(Angle)
+    )
+    seg8_p0 = (Width_1/2+Distance_2+Length_v1+Width_1/math.sin(Angle), Distance_2-Width_1/2)
+    seg8_p1 = (
+        Width_1/2+Distance_2+Length_v1+(Distance_1+Length_Out)*math.cos(Angle)+Width_1*math.sin(Angle),
+        Distance_2-Width_1/2-(Distance_1+Length_Out)*math.sin(Angle)+Width_1*math.cos(Angle)
+    )
+    seg9_p0 = (Width_1/2+Distance_2+Length_v1+Width_1/math.sin(Angle), Distance_2+Width_1/2)
+    seg9_p1 = (
+        Width_1/2+Distance_2+Length_v1+Width_1/math.sin(Angle)-Width_1/2/math.tan(Angle),
+        Distance_2
+
+    )
+    seg10_p0 = (Width_1/2+Distance_2+Length_v1+Width_1/math.sin(Angle), Distance_2-Width_1/2)
+    seg10_p1 = (
+        Width_1/2+Distance_2+Length_v1+Width_1/math.sin(Angle)-Width_1/2/math.tan(Angle),
+        Distance_2
+
+    )
+
+    segments = [
+        (seg1_p0, seg1_p1), (seg2_p0, seg2_p1), (seg3_p0, seg3_p1), (seg4_p0, seg4_p1),
+        (seg5_p0, seg5_p1), (seg6_p0, seg6_p1), (seg7_p0, seg7_p1), (seg8_p0, seg8_p1),
+        (seg9_p0, seg9_p1), (seg10_p0, seg10_p1)
+    ]
+    circles = [(circle1_center, circle1_radius), (circle2_center, circle2_radius),
+               (circle3_center, circle3_radius)]
+    return (PrimitiveBuilder()
+            .circles(circles, "Radius_1")
+            .arcs([(arc_center, arc_radius, arc_theta1, arc_theta2)], "Width_1")
+            .segments(segments, "Width_1")
+            .build())
+
+def _dual_spiral_spirals(p):
+    """Dualspiral 螺旋内外壁"""
+    q = ParamSnapshot.of("Dualspiral", p)
+    Width_1 = q["Width_1"]
+    Distance_3 = q["Distance_3"]
+    spiral_center = (q["Length_r1"]/2, -Distance_3-Width_1/2)
+    return (PrimitiveBuilder()
+            .spirals([(spiral_center, Distance_3+Width_1, q["Distance_2"], int(q["Circle"])),
+                      (spiral_center, Distance_3, q["Distance_2"], int(q["Circle"]))], "Circle")
+            .build())
+
+DUAL_SPIRAL_PARTS = (
+    ("channel", ("Radius_1", "Width_1", "Circle", "Length_r1", "Length_v1", "Angle", "Length_Out"),
+     _dual_spiral_channel),
+    ("spirals", ("Width_1", "Circle", "Distance_3", "Length_r1"), _dual_spiral_spirals),
+)
+
+def dual_spiral(p):
+    """Dualspiral 几何: 参数映射 -> Primitives"""
+    return assemble(DUAL_SPIRAL_PARTS, ParamSnapshot.of("Dualspiral", p))
+
+#---------- 13. InertialSeparator ----------
+INERTIAL_SEPARATOR_DEFAULTS = {
+    "Length_r1": 1.0,
+    "Width_r1":  0.2,
+    "Radius_1":  0.4,
+    "Radius_2":  0.1,
+    "Radius_4":  0.8,
+    "Angle":     120.0,
+    "number":    5.0,
+    "Length_r2": 1.0,
+}
+
+def inertial_separator_derived(p):
+    """InertialSeparator 的计算参数"""
+    discriminant = p["Radius_1"]**2 - (p["Width_r1"]/2)**2
+    angle_rad = p["Angle"] * math.pi / 360
+    radius_5 = p["Radius_4"] * math.sin(angle_rad) + p["Width_r1"]
+    radius_3 = p["Radius_2"] + p["Width_r1"]
+    return {"Distance_1": p["Radius_1"] - math.sqrt(discriminant) if discriminant >= 0 else 0.0,
+            "Radius_5": radius_5,
+            "interval": radius_5*2 + radius_3*2 - 2*p["Width_r1"]}  # 阵列间距
+
+def _inertial_separator_inlet(p):
+    """InertialSeparator 入口: 进样圆、入口直流道与第一个转角"""
+    q = ParamSnapshot.of("InertialSeparator", p)
+    radius_1 = q["Radius_1"]
+    width_r1 = q["Width_r1"]
+    length_r1 = q["Length_r1"]
+    distance_1 = q["Distance_1"]
+
+    # 基本元素位置计算
+    circle1_center = (-radius_1, width_r1/2)  # 中心点
+    rect1_pos = (-distance_1, 0)  # 左下角
+    rect1_width = length_r1 + distance_1
+    rect1_height = width_r1
+
+    arc1_center = (length_r1, width_r1)  # 中心点
+    arc1_radius = width_r1
+    arc1_angle = 90  # 扇形角
+    arc1_rotation = 270  # 旋转角 
+
+    # 直流道只画上下两条边
+    (x, y), w, h = rect1_pos, rect1_width, rect1_height
+    return (PrimitiveBuilder()
+            .circles([(circle1_center, radius_1)], "Radius_1")
+            .segments([((x, y), (x + w, y)), ((x, y + h), (x + w, y + h))], "Length_r1", "Width_r1")
+            .arcs([(arc1_center, arc1_radius, arc1_rotation, arc1_rotation + arc1_angle)], "Width_r1")
+            .build())
+
+def _inertial_separator_units(p):
+    """InertialSeparator 重复的分离单元 (弧 2~5)"""
+    q = ParamSnapshot.of("InertialSeparator", p)
+    width_r1 = q["Width_r1"]
+    length_r1 = q["Length_r1"]
+    radius_2 = q["Radius_2"]
+    radius_3 = radius_2 + width_r1  # 直接计算小圆外半径
+    radius_4 = q["Radius_4"]
+    angle = q["Angle"] / 2
+    radius_5 = q["Radius_5"]  # 计算值
+    number = int(q["number"])
+
+    # 计算阵列间距
+    interval = radius_5*2 + radius_3*2 - 2*width_r1
+
+    b = PrimitiveBuilder()
+    for i in range(number):
+        offset = i * interval
+
+        # 各单元中的圆弧中心位置
+        arc2_center = (length_r1 + radius_2 + width_r1 + offset, width_r1)
+        arc3_center = (length_r1 + radius_3 + offset, width_r1)
+
+        angle_rad = angle * 2 * math.pi / 360
+        arc4_center_x = length_r1 + 2*radius_3 + radius_4 * math.sin(angle_rad) + offset
+        arc4_center_y = width_r1 + radius_4 * math.cos(angle_rad)
+        arc4_center = (arc4_center_x, arc4_center_y)
+
+        arc5_center = (length_r1 + radius_5 + 2*radius_3 - width_r1 + offset, width_r1)
+
+        b.arcs([(arc2_center, radius_2, 0, 180)], "Radius_2", "number")
+        b.arcs([(arc3_center, radius_3, 0, 180)], "Radius_2", "Width_r1", "number")
+        b.arcs([(arc4_center, radius_4, 270 - angle, 270 - angle + angle * 2)],
+               "Radius_4", "Angle", "number")
+        b.arcs([(arc5_center, radius_5, 180, 180 + 180)], "Radius_5", "number")
+    return b.build()
+
+def _inertial_separator_outlet(p):
+    """InertialSeparator 出口: 末端弧、出口直流道与出样圆"""
+    q = ParamSnapshot.of("InertialSeparator", p)
+    radius_1 = q["Radius_1"]
+    width_r1 = q["Width_r1"]
+    length_r1 = q["Length_r1"]
+    distance_1 = q["Distance_1"]
+    radius_2 = q["Radius_2"]
+    radius_3 = radius_2 + width_r1
+    radius_5 = q["Radius_5"]
+    number = int(q["number"])
+    length_r2 = q["Length_r2"]
+    interval = radius_5*2 + radius_3*2 - 2*width_r1
+
+    # 计算弧6的参数
+    arc6_center = (length_r1 + radius_2 + width_r1 + (interval * number), width_r1)
+    arc6_radius = radius_2
+    arc6_angle = 180
+    arc6_rotation = 0  # 旋转180度
+
+    # 计算弧7的参数 - 修正旋转方向为0度
+    arc7_center = (length_r1 + radius_3 + (interval * number), width_r1)
+    arc7_radius = radius_3
+    arc7_angle = 180
+    arc7_rotation = 0  # 修正为0度
+
+    # 计算弧8的参数
+    arc8_center = (length_r1 + (interval * number) + (radius_3 * 2), width_r1)
+    arc8_radius = width_r1
+    arc8_angle = 90
+    arc8_rotation = 180  # 旋转180度
+
+    # 计算尾部矩形和圆参数
+    rect2_pos = (length_r1 + (interval * number) + (radius_3 * 2), 0)
+    rect2_width = length_r2 + distance_1
+    rect2_height = width_r1
+
+    circle2_center = (length_r1 + (interval * number) + (radius_3 * 2) + length_r2 + radius_1, width_r1 / 2)
+
+    (x, y), w, h = rect2_pos, rect2_width, rect2_height
+    return (PrimitiveBuilder()
+            .circles([(circle2_center, radius_1)], "Radius_1", "Length_r2")
+            .segments([((x, y), (x + w, y)), ((x, y + h), (x + w, y + h))], "Length_r2", "Width_r1")
+            .arcs([(arc6_center, arc6_radius, arc6_rotation, arc6_rotation + arc6_angle)], "Radius_2", "number")
+            .arcs([(arc7_center, arc7_radius, arc7_rotation, arc7_rotation + arc7_angle)],
+                  "Radius_2", "Width_r1", "number")
+            .arcs([(arc8_center, arc8_radius, arc8_rotation, arc8_rotation + arc8_angle)], "Width_r1", "number")
+            .build())
+
+INERTIAL_SEPARATOR_PARTS = (
+    ("inlet", ("Length_r1", "Width_r1", "Radius_1"), _inertial_separator_inlet),
+    ("units", ("Length_r1", "Width_r1", "Radius_2", "Radius_4", "Angle", "number"), _inertial_separator_units),
+    ("outlet", ("Length_r1", "Width_r1", "Radius_1", "Radius_2", "Radius_4", "Angle", "number", "Length_r2"),
+     _inertial_separator_outlet),
+)
+
+def inertial_separator(p):
+    """InertialSeparator 几何: 参数映射 -> Primitives"""
+    return assemble(INERTIAL_SEPARATOR_PARTS, ParamSnapshot.of("InertialSeparator", p))
+
+#---------- 14. Mixer ----------
+MIXER_DEFAULTS = {
+    "Distance_r1": 4.0,
+    "Width_r1":    0.2,
+    "Radius_1":    0.4,
+    "Number":      10.0,
+    "Length_1":    0.4,
+    "Distance_r2": 0.5,
+    "Length_r1":   0.3,
+    "Angle":       60.0,
+}
+
+def mixer_derived(p):
+    """Mixer 的计算参数"""
+    v = p["Radius_1"]**2 - (p["Width_r1"] / 2)**2
+    if v < 0:
+        raise ValueError("Radius_1 must be >= Width_r1 / 2")
+    return {"Distance_h": p["Radius_1"] - math.sqrt(v),
+            "Angle": math.radians(p["Angle"])}
+
+def _mixer_unit_width(q):
+    """单个混合单元 (含间隔) 的宽度"""
+    return 2 * q["Length_1"] * math.cos(q["Angle"]) + q["Length_r1"] + q["Distance_r2"]
+
+# 水平线段归入流道，斜线归入混合单元
+MIXER_CHANNEL_OWNERS = ("Width_r1", "Length_r1", "Distance_r1", "Distance_r2", "Number")
+MIXER_UNIT_OWNERS = ("Length_1", "Angle", "Distance_r1", "Distance_r2", "Number")
+
+def _mixer_inlet(p):
+    """Mixer 入口: 进样圆与入口流道"""
+    q = ParamSnapshot.of("Mixer", p)
+    Distance_r1 = q["Distance_r1"]
+    Width_r1 = q["Width_r1"]
+    Radius_1 = q["Radius_1"]
+    Distance_h = q["Distance_h"] # Calculated
+
+    segments = []
+    # Inlet Channel (Segments 1 & 2)
+    segments.append(((Radius_1 - Distance_h, -Width_r1 / 2), (Radius_1 + Distance_r1, -Width_r1 / 2)))
+    segments.append(((Radius_1 - Distance_h,  Width_r1 / 2), (Radius_1 + Distance_r1,  Width_r1 / 2)))
+
+    return (PrimitiveBuilder()
+            .circles([((0, 0), Radius_1)], "Radius_1") # Circle 1
+            .segments(segments, *MIXER_CHANNEL_OWNERS)
+            .build())
+
+def _mixer_chambers(p):
+    """Mixer 混合单元阵列"""
+    q = ParamSnapshot.of("Mixer", p)
+    Distance_r1 = q["Distance_r1"]
+    Width_r1 = q["Width_r1"]
+    Radius_1 = q["Radius_1"]
+    Number = int(q["Number"])
+    Length_1 = q["Length_1"]
+    Distance_r2 = q["Distance_r2"]
+    Length_r1 = q["Length_r1"]
+    Angle = q["Angle"] # Already in radians
+
+    segments = []
+
+    # Chamber Array
+    # Calculate the width of a single chamber unit including spacing
+    chamber_unit_width = _mixer_unit_width(q)
+
+    for i in range(Number):
+        x_offset = i * chamber_unit_width
+        base_x = Radius_1 + Distance_r1 + x_offset
+
+        # Upper chamber part
+        p3_1 = (base_x, Width_r1 / 2)
+        p3_2 = (base_x + Length_1 * math.cos(Angle), Width_r1 / 2 + Length_1 * math.sin(Angle))
+        segments.append((p3_1, p3_2)) # Seg 3
+
+        p4_1 = p3_2
+        p4_2 = (p4_1[0] + Length_r1, p4_1[1])
+        segments.append((p4_1, p4_2)) # Seg 4
+
+        p5_1 = p4_2
+        p5_2 = (base_x + 2 * Length_1 * math.cos(Angle) + Length_r1, Width_r1 / 2)
+        segments.append((p5_1, p5_2)) # Seg 5
+
+        # Lower chamber part
+        p7_1 = (base_x, -Width_r1 / 2)
+        p7_2 = (base_x + Length_1 * math.cos(Angle), -Width_r1 / 2 - Length_1 * math.sin(Angle))
+        segments.append((p7_1, p7_2)) # Seg 7
+
+        p8_1 = p7_2
+        p8_2 = (p8_1[0] + Length_r1, p8_1[1])
+        segments.append((p8_1, p8_2)) # Seg 8
+
+        p9_1 = p8_2
+        p9_2 = (base_x + 2 * Length_1 * math.cos(Angle) + Length_r1, -Width_r1 / 2)
+        segments.append((p9_1, p9_2)) # Seg 9
+
+        # Connecting segments to the next chamber (if not the last one)
+        if i < Number - 1:
+            segments.append((p5_2, (p5_2[0] + Distance_r2, p5_2[1]))) # Seg 6
+            segments.append((p9_2, (p9_2[0] + Distance_r2, p9_2[1]))) # Seg 10
+
+    horizontal = [s for s in segments if s[0][1] == s[1][1]]
+    slanted = [s for s in segments if s[0][1] != s[1][1]]
+    return (PrimitiveBuilder()
+            .segments(horizontal, *MIXER_CHANNEL_OWNERS)
+            .segments(slanted, *MIXER_UNIT_OWNERS)
+            .build())
+
+def _mixer_outlet(p):
+    """Mixer 出口: 出口流道与出样圆"""
+    q = ParamSnapshot.of("Mixer", p)
+    Distance_r1 = q["Distance_r1"]
+    Width_r1 = q["Width_r1"]
+    Radius_1 = q["Radius_1"]
+    Number = int(q["Number"])
+    Distance_r2 = q["Distance_r2"]
+    Distance_h = q["Distance_h"] # Calculated
+
+    # Outlet Channel
+    total_array_width = Number * _mixer_unit_width(q)
+    outlet_start_x = Radius_1 + Distance_r1 + total_array_width - Distance_r2
+    outlet_end_x = outlet_start_x + Distance_r1 + Distance_h
+    segments = [((outlet_start_x,  Width_r1 / 2), (outlet_end_x,  Width_r1 / 2)),
+                ((outlet_start_x, -Width_r1 / 2), (outlet_end_x, -Width_r1 / 2))]
+
+    # Circle 2
+    c2_x = outlet_end_x + Radius_1 - Distance_h
+    return (PrimitiveBuilder()
+            .circles([((c2_x, 0), Radius_1)], "Radius_1")
+            .segments(segments, *MIXER_CHANNEL_OWNERS)
+            .build())
+
+MIXER_PARTS = (
+    ("inlet", ("Distance_r1", "Width_r1", "Radius_1"), _mixer_inlet),
+    ("chambers", tuple(MIXER_DEFAULTS), _mixer_chambers),
+    ("outlet", tuple(MIXER_DEFAULTS), _mixer_outlet),
+)
+
+def mixer(p):
+    """Mixer 几何: 参数映射 -> Primitives"""
+    return assemble(MIXER_PARTS, ParamSnapshot.of("Mixer", p))
+
+#---------- 15. PneumaticChamberArray ----------
+PNEUMATIC_CHAMBER_ARRAY_DEFAULTS = {
+    "Distance_r1": 4.0,
+    "Width_r1":    0.2,
+    "Radius_1":    0.4,
+    "Number":      12.0,
+    "Angle":       60.0,
+    "Width_1":     0.2,
+    "Length_1":    0.4,
+    "Distance_r2": 0.2,
+}
+
+def pneumatic_chamber_array_derived(p):
+    """PneumaticChamberArray 的计算参数"""
+    v = p["Radius_1"]**2 - (p["Width_r1"] / 2)**2
+    if v < 0:
+        raise ValueError("Radius_1 must be >= Width_r1 / 2")
+    return {"Distance_h": p["Radius_1"] - math.sqrt(v)}
+
+def _pneumatic_chamber_segments(b, q, segments):
+    """按线段所在区域 (入口、气腔阵列、出口) 归属参数，加入 b"""
+    Width_r1 = q["Width_r1"]
+    inlet_x_limit = q["Radius_1"] + q["Distance_r1"]
+    outlet_x_start = inlet_x_limit + q["Number"] * (q["Width_1"] + q["Distance_r2"])
+    for p0, p1 in segments:
+        owners = []
+        if p1[0] <= inlet_x_limit or p0[0] >= outlet_x_start:
+            owners.append("Distance_r1")
+        if abs(p0[1]) == Width_r1/2 and abs(p1[1]) == Width_r1/2:
+            owners.append("Width_r1")
+        if inlet_x_limit < p0[0] < outlet_x_start:
+            owners += ["Number", "Width_1", "Length_1", "Distance_r2"]
+        b.segments([(p0, p1)], *owners)
+    return b
+
+def _pneumatic_chamber_inlet(p):
+    """PneumaticChamberArray 入口: 进样圆与入口流道"""
+    q = ParamSnapshot.of("PneumaticChamberArray", p)
+    Distance_r1 = q["Distance_r1"]
+    Width_r1 = q["Width_r1"]
+    Radius_1 = q["Radius_1"]
+    Distance_h = q["Distance_h"] # Calculated
+
+    segments = []
+    # Segments 1 & 2 (Inlet channel)
+    segments.append(((Radius_1 - Distance_h, -Width_r1 / 2), (Radius_1 + Distance_r1, -Width_r1 / 2)))
+    segments.append(((Radius_1 - Distance_h, Width_r1 / 2), (Radius_1 + Distance_r1, Width_r1 / 2)))
+
+    b = PrimitiveBuilder().circles([((0, 0), Radius_1)], "Radius_1") # Circle 1
+    return _pneumatic_chamber_segments(b, q, segments).build()
+
+def _pneumatic_chamber_chambers(p):
+    """PneumaticChamberArray 气腔阵列"""
+    q = ParamSnapshot.of("PneumaticChamberArray", p)
+    Distance_r1 = q["Distance_r1"]
+    Width_r1 = q["Width_r1"]
+    Radius_1 = q["Radius_1"]
+    Number = int(q["Number"])
+    Width_1 = q["Width_1"]
+    Length_1 = q["Length_1"]
+    Distance_r2 = q["Distance_r2"]
+
+    segments = []
+
+    # Chamber Array
+    for i in range(Number):
+        x_offset = i * (Width_1 + Distance_r2)
+        x_base = Radius_1 + Distance_r1 + x_offset
+
+        # Upper chamber part
+        segments.append(((x_base, Width_r1 / 2), (x_base, Width_r1 / 2 + Length_1))) # Seg 3
+
+        segments.append(((x_base, Width_r1 / 2 + Length_1), (x_base + Width_1, Width_r1 / 2 + Length_1))) # Seg 4
+        segments.append(((x_base + Width_1, Width_r1 / 2), (x_base + Width_1, Width_r1 / 2 + Length_1))) # Seg 5
+
+        # Lower chamber part
+        segments.append(((x_base, -Width_r1 / 2), (x_base, -Width_r1 / 2 - Length_1))) # Seg 7
+        segments.append(((x_base, -Width_r1 / 2 - Length_1), (x_base + Width_1, -Width_r1 / 2 - Length_1))) # Seg 8
+
+        segments.append(((x_base + Width_1, -Width_r1 / 2), (x_base + Width_1, -Width_r1 / 2 - Length_1))) # Seg 9
+
+        # Connecting segments between chambers (if not the last one)
+        if i < Number - 1:
+            segments.append(((x_base + Width_1, Width_r1 / 2), (x_base + Width_1 + Distance_r2, Width_r1 / 2))) # Seg 6
+            segments.append(((x_base + Width_1, -Width_r1 / 2), (x_base + Width_1 + Distance_r2, -Width_r1 / 2))) # Seg 10
+
+    return _pneumatic_chamber_segments(PrimitiveBuilder(), q, segments).build()
+
+def _pneumatic_chamber_outlet(p):
+    """PneumaticChamberArray 出口: 出口流道与出样圆"""
+    q = ParamSnapshot.of("PneumaticChamberArray", p)
+    Distance_r1 = q["Distance_r1"]
+    Width_r1 = q["Width_r1"]
+    Radius_1 = q["Radius_1"]
+    Number = int(q["Number"])
+    Width_1 = q["Width_1"]
+    Distance_r2 = q["Distance_r2"]
+    Distance_h = q["Distance_h"] # Calculated
+
+    # Total width of the array structure
+    array_total_width = Number * (Width_1 + Distance_r2)
+
+    # Circle 2
+    c2_x = Radius_1 + Distance_r1 + array_total_width + Distance_r1 + Radius_1
+
+    # Segments 12 & 13 (Outlet channel)
+    outlet_start_x = Radius_1 + Distance_r1 + array_total_width - Distance_r2
+    outlet_end_x = c2_x - (Radius_1 - Distance_h)
+    segments = [((outlet_start_x, Width_r1 / 2), (outlet_end_x, Width_r1 / 2)),
+                ((outlet_start_x, -Width_r1 / 2), (outlet_end_x, -Width_r1 / 2))]
+
+    b = PrimitiveBuilder().circles([((c2_x, 0), Radius_1)], "Radius_1")
+    return _pneumatic_chamber_segments(b, q, segments).build()
+
+# Angle 不影响几何，不在任何部件的依赖中
+PNEUMATIC_CHAMBER_ARRAY_PARTS = (
+    ("inlet", ("Distance_r1", "Width_r1", "Radius_1"), _pneumatic_chamber_inlet),
+    ("chambers", ("Distance_r1", "Width_r1", "Radius_1", "Number", "Width_1", "Length_1", "Distance_r2"),
+     _pneumatic_chamber_chambers),
+    ("outlet", ("Distance_r1", "Width_r1", "Radius_1", "Number", "Width_1", "Distance_r2"),
+     _pneumatic_chamber_outlet),
+)
+
+def pneumatic_chamber_array(p):
+    """PneumaticChamberArray 几何: 参数映射 -> Primitives"""
+    return assemble(PNEUMATIC_CHAMBER_ARRAY_PARTS, ParamSnapshot.of("PneumaticChamberArray", p))
+
+#---------- 16. Resistor ----------
+RESISTOR_DEFAULTS = {
+    "Radius_1":  0.4,
+    "Length_r1": 5.0,
+    "Width_Res": 0.2,
+    "Number":    5.0,
+    "Length_v2": 10.0,
+}
+
+def resistor_derived(p):
+    """Resistor 的计算参数"""
+    v = p["Radius_1"]**2 - (p["Width_Res"]/2)**2
+    if v < 0:
+        raise ValueError("Radius_1 must be >= Width_Res / 2")
+    return {"Distance_1": p["Radius_1"] - math.sqrt(v),
+            "Length_v1": p["Length_v2"] / 2 - p["Width_Res"] * 3 / 2,
+            "Number": int(p["Number"])}
+
+def _resistor_x_c2(q):
+    """出样圆 (圆2) 的圆心横坐标"""
+    Radius_1, Length_r1, Width_Res, Number = q["Radius_1"], q["Length_r1"], q["Width_Res"], q["Number"]
+    return 2 * Radius_1 + Length_r1 + 3 * Width_Res + Width_Res * 4 * (Number - 1) + Length_r1
+
+def _resistor_ports(p):
+    """Resistor 进样圆与出样圆"""
+    q = ParamSnapshot.of("Resistor", p)
+    Radius_1 = q["Radius_1"]
+    # 圆1 / Circle 1；圆2 / Circle 2
+    return PrimitiveBuilder().circles([((0, 0), Radius_1), ((_resistor_x_c2(q), 0), Radius_1)], "Radius_1").build()
+
+def _resistor_channel(p):
+    """Resistor 蛇形流道"""
+    q = ParamSnapshot.of("Resistor", p)
+    # Get all required parameter values first
+    Radius_1 = q["Radius_1"]
+    Length_r1 = q["Length_r1"]
+    Width_Res = q["Width_Res"]
+    Number = q["Number"]
+    Length_v2 = q["Length_v2"]
+    # Get calculated parameters
+    Distance_1 = q["Distance_1"]
+    Length_v1 = q["Length_v1"]
+
+    arcs, segments = [], []
+
+    # --- Start of Geometry Definition (with comments as requested) ---
+
+    # 圆2 / Circle 2 (见 _resistor_ports)
+    x_c2 = _resistor_x_c2(q)
+
+    # The following geometry definitions are implemented inside a loop to handle 'Number' of repetitions
+    for i in range(Number-1):
+        x_offset = i * (Width_Res * 4)
+
+        # 圆弧1 / Arc 1 (part of repeating unit)
+        # This is the bottom-left U-turn (inner arc)
+        arc1_center_x = Radius_1 + Length_r1 + 3 * Width_Res / 2 + x_offset
+        arc1_center_y = -Width_Res / 2 + Length_v1
+        arcs.append(((arc1_center_x, arc1_center_y), Width_Res / 2, 0, 180))
+
+        # 圆弧2 / Arc 2 (part of repeating unit)
+        # This is the bottom-left U-turn (outer arc)
+        arcs.append(((arc1_center_x, arc1_center_y), 3 * Width_Res / 2, 0, 180))
+
+        # 圆弧3 / Arc 3 (part of repeating unit)
+        # This is the top-right U-turn (inner arc)
+        arc3_center_x = Radius_1 + Length_r1 + 3 * Width_Res + Width_Res / 2 + x_offset
+        arc3_center_y = Width_Res / 2 - Length_v1
+        arcs.append(((arc3_center_x, arc3_center_y), Width_Res / 2, -180, 0))
+
+        # 圆弧4 / Arc 4 (part of repeating unit)
+        # This is the top-right U-turn (outer arc)
+        arcs.append(((arc3_center_x, arc3_center_y), 3 * Width_Res / 2, -180, 0))
+
+        # 线段5 / Segment 5 (part of repeating unit)
+        p1 = (Radius_1 + Length_r1 + 2 * Width_Res + x_offset, Width_Res / 2 - Length_v1)
+        p2 = (Radius_1 + Length_r1 + 2 * Width_Res + x_offset, -Width_Res / 2 + Length_v1)
+        segments.append((p1, p2))
+
+        # 线段6 / Segment 6 (part of repeating unit)
+        p1 = (Radius_1 + Length_r1 + 3 * Width_Res + x_offset, Width_Res / 2 - Length_v1)
+        p2 = (Radius_1 + Length_r1 + 3 * Width_Res + x_offset, -Width_Res / 2 + Length_v1)
+        segments.append((p1, p2))
+
+        # 线段7 / Segment 7 (part of repeating unit)
+        p1 = (Radius_1 + Length_r1 + 3 * Width_Res + Width_Res + x_offset, Width_Res / 2 - Length_v1)
+        p2 = (Radius_1 + Length_r1 + 3 * Width_Res + Width_Res + x_offset, -Width_Res / 2 + Length_v1)
+        segments.append((p1, p2))
+
+        # 线段8 / Segment 8 (part of repeating unit)
+        p1 = (Radius_1 + Length_r1 + 3 * Width_Res + 2 * Width_Res + x_offset, Width_Res / 2 - Length_v1)
+
+        p2 = (Radius_1 + Length_r1 + 3 * Width_Res + 2 * Width_Res + x_offset, -Width_Res / 2 + Length_v1)
+        segments.append((p1, p2))
+
+    # --- Static geometry (inlets/outlets and connectors) ---
+    # 圆弧5 / Arc 5
+    arc5_center_x = Radius_1 + Length_r1 + 3 * Width_Res / 2 + Width_Res * 4 * (Number - 1)
+    arc5_center_y = -Width_Res / 2 + Length_v1
+    arcs.append(((arc5_center_x, arc5_center_y), Width_Res / 2, 0, 180))
+
+    # 圆弧6 / Arc 6
+    arc6_center_x = Radius_1 + Length_r1 + 3 * Width_Res / 2 + Width_Res * 4 * (Number - 1)
+    arc6_center_y = -Width_Res / 2 + Length_v1
+    arcs.append(((arc6_center_x, arc6_center_y), 3 * Width_Res / 2, 0, 180))
+
+    # 圆弧7 / Arc 7
+    arc7_center_x = Radius_1 + Length_r1 - Width_Res / 2
+    arc7_center_y = Width_Res / 2 + Width_Res / 2
+    arcs.append(((arc7_center_x, arc7_center_y), Width_Res / 2, -90, 0))
+
+    # 圆弧8 / Arc 8
+    arcs.append(((arc7_center_x, arc7_center_y), 3 * Width_Res / 2, -90, 0))
+
+    # 圆弧9 / Arc 9
+    arc9_center_x = Radius_1 + Length_r1 + 3 * Width_Res + Width_Res * 4 * (Number - 1) + Width_Res / 2
+    arc9_center_y = Width_Res / 2 + Width_Res / 2
+    arcs.append(((arc9_center_x, arc9_center_y), Width_Res / 2, 180, 270))
+
+    # 圆弧10 / Arc 10
+    arcs.append(((arc9_center_x, arc9_center_y), 3 * Width_Res / 2, 180, 270))
+
+    # 线段1 / Segment 1
+    segments.append(((Radius_1, Width_Res / 2), (Radius_1 + Length_r1 - Width_Res / 2, Width_Res / 2)))
+
+    # 线段2 / Segment 2
+    segments.append(((Radius_1, -Width_Res / 2), (Radius_1 + Length_r1 - Width_Res / 2, -Width_Res / 2)))
+
+    # 线段3 / Segment 3
+    segments.append(((Radius_1 + Length_r1, Width_Res), (Radius_1 + Length_r1, -Width_Res / 2 + Length_v1)))
+
+    # 线段4 / Segment 4
+    segments.append(((Radius_1 + Length_r1 + Width_Res, -Width_Res / 2 + Width_Res * 3 / 2), (Radius_1 + Length_r1 + Width_Res, -Width_Res / 2 + Length_v1)))
+
+    # 线段9 / Segment 9
+    seg9_x = Radius_1 + Length_r1 + 2 * Width_Res + Width_Res * 4 * (Number - 1)
+    segments.append(((seg9_x, Width_Res), (seg9_x, -Width_Res / 2 + Length_v1)))
+
+    # 线段10 / Segment 10
+    seg10_x = Radius_1 + Length_r1 + 3 * Width_Res + Width_Res * 4 * (Number - 1)
+    # Corrected a typo in your spec: --Width_Res/2 -> -Width_Res/2
+    segments.append(((seg10_x, Width_Res), (seg10_x, -Width_Res / 2 + Length_v1)))
+
+    # 线段11 / Segment 11
+    seg11_start_x = Radius_1 + Length_r1 + 3 * Width_Res + Width_Res * 4 * (Number - 1) + Width_Res / 2
+    seg11_end_x = x_c2 - Radius_1
+    segments.append(((seg11_start_x, Width_Res / 2), (seg11_end_x, Width_Res / 2)))
+
+    # 线段12 / Segment 12
+    seg12_end_x = x_c2 - Radius_1
+    segments.append(((seg11_start_x, -Width_Res / 2), (seg12_end_x, -Width_Res / 2)))
+
+    # Note: The original spec for Arc 5, 6 and Segments 9, 10 appears to be describing the connections
+    # for the *last* repeating unit. The loop above now handles all repeating units correctly,
+    # and the static connectors (like Seg 3,4 and 9,10) are handled outside the loop.
+    # The provided formulas for Arc 5,6 were identical to Arc 1,2 but with the (Number-1) offset,
+    # which is now implemented by the loop.
+
+    return (PrimitiveBuilder()
+            .arcs(arcs, "Width_Res")
+            .segments(segments, "Length_r1", "Length_v2", "Number")
+            .build())
+
+RESISTOR_PARTS = (
+    ("ports", ("Radius_1", "Length_r1", "Width_Res", "Number"), _resistor_ports),
+    ("channel", tuple(RESISTOR_DEFAULTS), _resistor_channel),
+)
+
+def resistor(p):
+    """Resistor 几何: 参数映射 -> Primitives"""
+    return assemble(RESISTOR_PARTS, ParamSnapshot.of("Resistor", p))
+
+#---------- 17. Straight_Microchannel ----------
+STRAIGHT_MICROCHANNEL_DEFAULTS = {
+    "cirDia": 0.4,
+    "recWid": 0.2,
+    "recLen": 17.0,
+}
+
+def straight_microchannel_derived(p):
+    """Straight_Microchannel 的计算参数"""
+    R = p["cirDia"]/2
+    W = p["recWid"]
+    return {"Dx": math.sqrt(max(R**2 - (W/2)**2, 0))}
+
+def straight_microchannel(p):
+    """Straight_Microchannel 几何: 参数映射 -> Primitives"""
+    q = ParamSnapshot.of("Straight_Microchannel", p)
+    # 基本量
+
+    R   = q["cirDia"]/2
+
+    W   = q["recWid"]
+    L   = q["recLen"]
+    Dx  = q["Dx"]
+
+    # 圆心 X
+
+    xL = -L/2 - R
+
+    xR =  L/2 + R
+
+    # ─── primitives ───
+
+    circles  = [((xL,0), R), ((xR,0), R)]
+    arcs     = []                      # 本模型没有圆弧独立对象
+
+    segments = [
+        ((xL+Dx,  W/2), (xR-Dx,  W/2)),   # 上边
+
+        ((xL+Dx, -W/2), (xR-Dx, -W/2)),   # 下边
+
+    ]
+    return (PrimitiveBuilder()
+            .circles(circles, "cirDia")
+            .segments(segments, "recWid", "recLen")
+            .build())
+
+#---------- 18. TeslaValveArray ----------
+TESLA_VALVE_ARRAY_DEFAULTS = {
+    "Length_1":  0.4,
+    "Angle":     60.0,
+    "Width":     0.2,
+    "number":    3.0,
+    "Length_r1": 1.5,
+    "Radius_1":  0.4,
+}
+
+def tesla_valve_array_derived(p):
+    """TeslaValveArray 的计算参数"""
+    Angle = np.deg2rad(p["Angle"])
+    cotA = 1 / np.tan(Angle)
+    Length_1, Width, Radius_1 = p["Length_1"], p["Width"], p["Radius_1"]
+    val = Radius_1**2 - (Width**2)/4
+    if val < 0:
+        raise ValueError("Radius_1 必须大于等于 Width/2")
+    Length_2 = Length_1*np.tan(Angle/2) + Width
+    x_mov1 = (Length_2*(np.sin(Angle)-(1-np.cos(Angle))*cotA)
+              + Length_1-Length_1*np.cos(Angle)
+              + Width*np.sin(Angle)
+              + cotA*(Width+Length_1*np.sin(Angle)+Width*np.cos(Angle)))
+    return {"Angle_rad": Angle, "cot_Angle": cotA,
+            "number": int(round(p["number"])),
+            "Distance_1": Radius_1 - np.sqrt(val),
+            "Length_2": Length_2,
+            "x_mov1": x_mov1,
+            "x_mov2": np.cos(Angle)*x_mov1,
+            "y_mov2": np.sin(Angle)*x_mov1}
+
+def _tesla_valve_array_units(p):
+    """TeslaValveArray 阀单元阵列及首尾单元 (与进出口圆、入口流道长度无关)"""
+    q = ParamSnapshot.of("TeslaValveArray", p)
+    # 获取参数
+
+    Length_1 = q["Length_1"]
+    Angle = q["Angle_rad"]
+    Angle_deg = q["Angle"]
+    Width = q["Width"]
+    number = q["number"]
+    Length_2 = q["Length_2"]
+    cot_Angle = q["cot_Angle"]
+    x_mov1 = q["x_mov1"]
+    x_mov2 = q["x_mov2"]
+    y_mov2 = q["y_mov2"]
+
+    arcs = []
+    segments = []
+
+    # =======================
+    # 阵列部分
+
+    # =======================
+    for i in range(number-1):
+        dx = i * (x_mov1 + x_mov2)
+        dy = i * y_mov2
+
+        # 圆弧1
+
+        arc1_center = (Length_1 + dx, Length_1 * np.tan(Angle/2) + dy)
+        arc1_radius = Length_1 * np.tan(Angle/2)
+        arcs.append((arc1_center, arc1_radius, -90, 90+Angle_deg))
+        # 圆弧2
+
+        arc2_center = arc1_center
+
+        arc2_radius = arc1_radius + Width
+
+        arcs.append((arc2_center, arc2_radius, -90, 90))
+        # 圆弧3
+
+        arc3_center = (Length_1 + x_mov2 + dx, Length_1 * np.tan(Angle/2) + y_mov2 + dy)
+        arc3_radius = arc1_radius
+
+        arcs.append((arc3_center, arc3_radius, -90, 90+Angle_deg))
+        # 圆弧4
+
+        arc4_center = arc3_center
+
+        arc4_radius = arc3_radius + Width
+
+        arcs.append((arc4_center, arc4_radius, -90+Angle_deg, 90+Angle_deg))
+        # 圆弧5
+
+        arc5_center = (Length_1 + x_mov2 + x_mov1 + dx, Length_1 * np.tan(Angle/2) + y_mov2 + dy)
+        arc5_radius = arc1_radius + Width
+
+        arcs.append((arc5_center, arc5_radius, -90, 90))
+        # 圆弧6
+
+        arc6_center = arc5_center
+
+        arc6_radius = arc1_radius
+
+        arcs.append((arc6_center, arc6_radius, -90, 90+Angle_deg))
+
+        # 线段5
+
+        seg5_p1 = (x_mov2 + dx, y_mov2 + dy)
+        seg5_p2 = (Length_1*np.cos(Angle) + x_mov2 + dx, Length_1*np.sin(Angle) + y_mov2 + dy)
+        segments.append((seg5_p1, seg5_p2))
+        # 线段6
+
+        seg6_p1 = (x_mov2 + dx, y_mov2 + dy)
+        seg6_p2 = (Length_1 + x_mov2 + dx, y_mov2 + dy)
+        segments.append((seg6_p1, seg6_p2))
+        # 线段7
+
+        seg7_p1 = (Length_1*np.cos(Angle)-Width*np.sin(Angle)-cot_Angle*(Width+Length_1*np.sin(Angle)+Width*np.cos(Angle)) + x_mov2 + dx,
+                   -Width + y_mov2 + dy)
+        seg7_p2 = (Length_1*np.cos(Angle)-Width*np.sin(Angle) + x_mov2 + dx,
+                   Length_1*np.sin(Angle)+Width*np.cos(Angle)+y_mov2 + dy)
+        segments.append((seg7_p1, seg7_p2))
+        # 线段8
+
+        seg8_p1 = (Length_1 + dx, -Width + y_mov2 + dy)
+        seg8_p2 = (Length_1 + x_mov2 + x_mov1 + dx, -Width + y_mov2 + dy)
+        segments.append((seg8_p1, seg8_p2))
+        # 线段9
+
+        seg9_p1 = (x_mov2 + x_mov1 + dx, y_mov2 + dy)
+        seg9_p2 = (Length_1*np.cos(Angle) + x_mov2 + x_mov1 + dx, Length_1*np.sin(Angle) + y_mov2 + dy)
+        segments.append((seg9_p1, seg9_p2))
+        # 线段10
+
+        seg10_p1 = (x_mov2 + x_mov1 + dx, y_mov2 + dy)
+        seg10_p2 = (Length_1 + x_mov2 + x_mov1 + dx, y_mov2 + dy)
+        segments.append((seg10_p1, seg10_p2))
+        # 线段11
+
+        seg11_p1 = (Length_1 + x_mov2 + (Length_1*np.tan(Angle/2)+Width)*np.sin(Angle) + dx,
+                    (Length_1)*np.tan(Angle/2)+y_mov2 + dy - (Length_1*np.tan(Angle/2)+Width)*np.cos(Angle))
+        seg11_p2 = (Length_1*np.cos(Angle)-Width*np.sin(Angle)-cot_Angle*(Width+Length_1*np.sin(Angle)+Width*np.cos(Angle))
+                    + 2*x_mov2 + x_mov1 + dx,
+                    -Width + y_mov2*2 + dy)
+        segments.append((seg11_p1, seg11_p2))
+
+    # =======================
+    # 非阵列部分
+
+    # =======================
+    # 圆弧7
+
+    arc7_center = (Length_1 + (x_mov2 + x_mov1)*(number-1) + x_mov2,
+                   Length_1 * np.tan(Angle/2) + (y_mov2)*number)
+    arc7_radius = Length_1 * np.tan(Angle/2)
+    arcs.append((arc7_center, arc7_radius, -90, 90+Angle_deg))
+    # 圆弧8
+
+    arc8_center = arc7_center
+
+    arc8_radius = arc7_radius + Width
+
+    theta_start8 = -90 + np.arccos(arc7_radius/arc8_radius)*360/(2*np.pi)
+    arcs.append((arc8_center, arc8_radius, theta_start8, 90+Angle_deg))
+
+    # 线段1
+
+    seg1_p1 = (0, 0)
+    seg1_p2 = (Length_1*np.cos(Angle), Length_1*np.sin(Angle))
+    segments.append((seg1_p1, seg1_p2))
+    # 线段2
+
+    seg2_p1 = (0, 0)
+    seg2_p2 = (Length_1, 0)
+    segments.append((seg2_p1, seg2_p2))
+    # 线段3
+
+    seg3_p1 = (Length_1*np.cos(Angle)-Width*np.sin(Angle)-cot_Angle*(Width+Length_1*np.sin(Angle)+Width*np.cos(Angle))+cot_Angle*Width, 0)
+    seg3_p2 = (Length_1*np.cos(Angle)-Width*np.sin(Angle)-cot_Angle*(Width+Length_1*np.sin(Angle)+Width*np.cos(Angle))+x_mov2, -Width + y_mov2)
+    segments.append((seg3_p1, seg3_p2))
+    # 线段4
+
+    seg4_p1 = (Length_1*np.cos(Angle)-Width*np.sin(Angle)-cot_Angle*(Width+Length_1*np.sin(Angle)+Width*np.cos(Angle))+cot_Angle*Width, -Width)
+    seg4_p2 = (Length_1, -Width)
+    segments.append((seg4_p1, seg4_p2))
+    # 线段12
+
+    seg12_p1 = ((x_mov2 + x_mov1)*(number-1)+x_mov2, (y_mov2)*number)
+    seg12_p2 = (Length_1*np.cos(Angle)+(x_mov2 + x_mov1)*(number-1)+x_mov2, Length_1*np.sin(Angle)+(y_mov2)*number)
+    segments.append((seg12_p1, seg12_p2))
+    # 线段13
+
+    seg13_p1 = ((x_mov2 + x_mov1)*(number-1)+x_mov2, (y_mov2)*number)
+    seg13_p2 = (Length_1+(x_mov2 + x_mov1)*(number-1)+x_mov2, (y_mov2)*number)
+    segments.append((seg13_p1, seg13_p2))
+    # 线段14
+
+    seg14_p1 = (Length_1*np.cos(Angle)-Width*np.sin(Angle)-cot_Angle*(Width+Length_1*np.sin(Angle)+Width*np.cos(Angle))+(x_mov2 + x_mov1)*(number-1)+x_mov2,
+                -Width+(y_mov2)*number)
+    seg14_p2 = (Length_1*np.cos(Angle)-Width*np.sin(Angle)+(x_mov2 + x_mov1)*(number-1)+x_mov2,
+                Length_1*np.sin(Angle)+Width*np.cos(Angle)+(y_mov2)*number)
+    segments.append((seg14_p1, seg14_p2))
+    # 线段15
+
+    seg15_p1 = (Length_1+(x_mov2 + x_mov1)*(number-1), -Width+(y_mov2)*number)
+    seg15_p2 = (Length_1+(x_mov2 + x_mov1)*(number-1)+x_mov2, -Width+(y_mov2)*number)
+    segments.append((seg15_p1, seg15_p2))
+
+    return (PrimitiveBuilder()
+            .arcs(arcs, "Width")
+            .segments(segments, "Length_1", "number")
+            .build())
+
+def _tesla_valve_array_ports(p):
+    """TeslaValveArray 进出口圆与进出口流道"""
+    q = ParamSnapshot.of("TeslaValveArray", p)
+    # 获取参数
+
+    Length_1 = q["Length_1"]
+    Angle = q["Angle_rad"]
+    Width = q["Width"]
+    number = q["number"]
+    Length_r1 = q["Length_r1"]
+    Radius_1 = q["Radius_1"]
+    Distance_1 = q["Distance_1"]
+    cot_Angle = q["cot_Angle"]
+    x_mov1 = q["x_mov1"]
+    x_mov2 = q["x_mov2"]
+    y_mov2 = q["y_mov2"]
+
+    circles = []
+    segments = []
+
+    # 圆1
+
+    x_c1 = Length_1*np.cos(Angle) - Width*np.sin(Angle) - cot_Angle*(Width + Length_1*np.sin(Angle) + Width*np.cos(Angle)) - Length_r1 - Radius_1
+
+    y_c1 = -Width/2
+
+    circles.append(((x_c1, y_c1), Radius_1))
+    # 圆2
+
+    x_c2 = Length_1 + (x_mov2 + x_mov1)*(number-1) + x_mov2 + Length_r1 + Distance_1 + Radius_1
+
+    y_c2 = y_mov2*number - Width/2
+
+    circles.append(((x_c2, y_c2), Radius_1))
+
+    # 线段16
+
+    seg16_p1 = (Length_1+(x_mov2 + x_mov1)*(number-1)+x_mov2+Length_r1+Distance_1, -Width+(y_mov2)*number)
+    seg16_p2 = (Length_1+(x_mov2 + x_mov1)*(number-1)+x_mov2, -Width+(y_mov2)*number)
+    segments.append((seg16_p1, seg16_p2))
+    # 线段17
+
+    seg17_p1 = (Length_1+(x_mov2 + x_mov1)*(number-1)+x_mov2+Length_r1+Distance_1, (y_mov2)*number)
+    seg17_p2 = (Length_1+(x_mov2 + x_mov1)*(number-1)+x_mov2+np.sqrt((Length_1*np.tan(Angle/2)+Width)**2-(Length_1*np.tan(Angle/2))**2),
+               (y_mov2)*number)
+    segments.append((seg17_p1, seg17_p2))
+
+    # 线段18
+
+    seg18_p1 = (Length_1*np.cos(Angle)-Width*np.sin(Angle)-cot_Angle*(Width+Length_1*np.sin(Angle)+Width*np.cos(Angle))+cot_Angle*Width, -Width)
+    seg18_p2 = (Length_1*np.cos(Angle)-Width*np.sin(Angle)-cot_Angle*(Width+Length_1*np.sin(Angle)+Width*np.cos(Angle))-Length_r1-Distance_1, -Width)
+    segments.append((seg18_p1, seg18_p2))
+    # 线段19
+
+    seg19_p1 = (Length_1*np.cos(Angle)-Width*np.sin(Angle)-cot_Angle*(Width+Length_1*np.sin(Angle)+Width*np.cos(Angle))+cot_Angle*Width, 0)
+    seg19_p2 = (Length_1*np.cos(Angle)-Width*np.sin(Angle)-cot_Angle*(Width+Length_1*np.sin(Angle)+Width*np.cos(Angle))-Length_r1-Distance_1, 0)
+    segments.append((seg19_p1, seg19_p2))
+
+    return (PrimitiveBuilder()
+            .circles(circles, "Radius_1")
+            .segments(segments, "Length_1", "number")
+            .build())
+
+TESLA_VALVE_ARRAY_PARTS = (
+    ("units", ("Length_1", "Angle", "Width", "number"), _tesla_valve_array_units),
+    ("ports", ("Length_1", "Angle", "Width", "number", "Length_r1", "Radius_1"), _tesla_valve_array_ports),
+)
+
+def tesla_valve_array(p):
+    """TeslaValveArray 几何: 参数映射 -> Primitives"""
+    return assemble(TESLA_VALVE_ARRAY_PARTS, ParamSnapshot.of("TeslaValveArray", p))
+
+#---------- 19. TripleSpiral ----------
+TRIPLE_SPIRAL_DEFAULTS = {
+    "Radius_1":   0.4,
+    "Width_1":    0.2,
+    "Circle":     5.0,
+    "Distance_3": 0.8,
+    "Length_r1":  0.2,
+    "Length_v1":  0.5,
+    "Angle":      30.0,
+    "Length_Out": 2.0,
+}
+
+def triple_spiral_derived(p):
+    """TripleSpiral 的计算参数"""
+    v = p["Radius_1"]**2 - (p["Width_1"] / 2)**2
+    if v < 0:
+        raise ValueError("Radius_1 must be >= Width_1 / 2")
+    return {"Distance_1": p["Radius_1"] - math.sqrt(v),
+            "Distance_2": p["Width_1"] * 2 * int(p["Circle"]),
+            "Angle": math.radians(p["Angle"])}
+
+def _triple_spiral_channel(p):
+    """TripleSpiral 进出口与三分叉流道 (不含螺旋)"""
+    q = ParamSnapshot.of("TripleSpiral", p)
+    # --- THIS METHOD IS UPDATED WITH THE MISSING LINE ---
+    Radius_1 = q["Radius_1"]
+    Width_1 = q["Width_1"]
+    Length_r1 = q["Length_r1"]
+    Length_v1 = q["Length_v1"]
+    Angle = q["Angle"]
+    Length_Out = q["Length_Out"]
+    Distance_1 = q["Distance_1"]
+    Distance_2 = q["Distance_2"]
+
+    c1_center = (0, -Width_1/2 - Length_v1 - Radius_1)
+    c2_x = Width_1/2 + Distance_2 + Length_v1 + (Length_Out + Radius_1) * math.cos(Angle) + Width_1 * math.sin(Angle) / 2
+    c2_y = Distance_2 + Width_1/2 + (Length_Out + Radius_1) * math.sin(Angle) - Width_1 * math.cos(Angle) / 2
+    c2_center = (c2_x, c2_y)
+    c3_x = c2_x
+    c3_y = Distance_2 - Width_1/2 - (Radius_1 + Length_Out) * math.sin(Angle) + Width_1 * math.cos(Angle) / 2
+    c3_center = (c3_x, c3_y)
+    c4_center = (Width_1/2 + Distance_2 + Length_v1 + Length_Out + Radius_1, Distance_2)
+    circles = [(c1_center, Radius_1), (c2_center, Radius_1), (c3_center, Radius_1), (c4_center, Radius_1)]
+
+    arc_center = (Length_r1/2, -Width_1/2 - Length_v1/2 - Distance_1/2 + (Length_v1 + Distance_1) / 2)
+    arc_radius = Width_1
+    arc_theta1 = 90
+    arc_theta2 = 180
+    arcs = [(arc_center, arc_radius, arc_theta1, arc_theta2)]
+
+    segments = []
+    seg1_p0 = (Length_r1/2, -Width_1/2 - Length_v1/2 - Distance_1/2 - (Length_v1 + Distance_1) / 2)
+    seg1_p1 = (Length_r1/2, -Width_1/2 - Length_v1/2 - Distance_1/2 + (Length_v1 + Distance_1) / 2)
+    segments.append((seg1_p0, seg1_p1))
+    seg2_p0 = (-Length_r1/2, seg1_p0[1])
+    seg2_p1 = (-Length_r1/2, seg1_p1[1])
+    segments.append((seg2_p0, seg2_p1))
+    seg3_p0 = (Width_1/2, Distance_2 + Width_1/2)
+    seg3_p1 = (Width_1/2 + Distance_2 + Length_v1, Distance_2 + Width_1/2)
+    segments.append((seg3_p0, seg3_p1))
+    seg4_p0 = (Width_1/2, Distance_2 - Width_1/2)
+    seg4_p1 = (Width_1/2 + Distance_2 + Length_v1, Distance_2 - Width_1/2)
+    segments.append((seg4_p0, seg4_p1))
+    seg5_p0 = (Width_1/2 + Distance_2 + Length_v1 + Width_1 / math.sin(Angle), Distance_2 - Width_1/2)
+    seg5_p1 = (Width_1/2 + Distance_2 + Length_v1 + Length_Out + Distance_1, Distance_2 - Width_1/2)
+    segments.append((seg5_p0, seg5_p1))
+    seg6_p0 = (Width_1/2 + Distance_2 + Length_v1 + (Distance_1 + Length_Out) * math.cos(Angle), Distance_2 - Width_1/2 - (Distance_1 + Length_Out) * math.sin(Angle))
+    seg6_p1 = (Width_1/2 + Distance_2 + Length_v1, Distance_2 - Width_1/2)
+    segments.append((seg6_p0, seg6_p1))
+    segments.append((seg6_p1, seg6_p0))
+    seg8_p0 = (Width_1/2 + Distance_2 + Length_v1 + Width_1 / math.sin(Angle), Distance_2 + Width_1/2)
+    seg8_p1 = (Width_1/2 + Distance_2 + Length_v1 + Length_Out + Distance_1, Distance_2 + Width_1/2)
+    segments.append((seg8_p0, seg8_p1))
+    seg9_p0 = (Width_1/2 + Distance_2 + Length_v1 + Width_1 / math.sin(Angle), Distance_2 + Width_1/2)
+    seg9_p1 = (Width_1/2 + Distance_2 + Length_v1 + (Distance_1 + Length_Out) * math.cos(Angle) + Width_1 * math.sin(Angle), Distance_2 + Width_1/2 + (Distance_1 + Length_Out) * math.sin(Angle) - Width_1 * math.cos(Angle))
+    segments.append((seg9_p0, seg9_p1))
+    seg10_p0 = (Width_1/2 + Distance_2 + Length_v1 + Width_1 / math.sin(Angle), Distance_2 - Width_1/2)
+
+    seg10_p1 = (Width_1/2 + Distance_2 + Length_v1 + (Distance_1 + Length_Out) * math.cos(Angle) + Width_1 * math.sin(Angle), Distance_2 - Width_1/2 - (Distance_1 + Length_Out) * math.sin(Angle) + Width_1 * math.cos(Angle))
+    segments.append((seg10_p0, seg10_p1))
+
+    # *** ADDED MISSING LINE AS PER YOUR REQUEST ***
+    missing_line_p0 = (Width_1/2 + Distance_2 + Length_v1, Distance_2 + Width_1/2)
+    missing_line_p1 = (Width_1/2 + Distance_2 + Length_v1 + (Distance_1 + Length_Out) * math.cos(Angle), Distance_2 + Width_1/2 + (Distance_1 + Length_Out) * math.sin(Angle))
+    segments.append((missing_line_p0, missing_line_p1))
+
+    b = (PrimitiveBuilder()
+         .circles(circles, "Radius_1")
+         .arcs(arcs, "Width_1", "Length_v1"))
+    for p0, p1 in segments:
+        owners = []
+        if abs(p0[0]) <= Length_r1/2 or abs(p1[0]) <= Length_r1/2:
+            owners.append("Length_r1")
+        if p0[0] > 0 and p1[0] > 0:
+            owners += ["Length_Out", "Angle"]
+        b.segments([(p0, p1)], *owners, "Width_1")
+    return b.build()
+
+def _triple_spiral_spirals(p):
+    """TripleSpiral 螺旋内外壁"""
+    q = ParamSnapshot.of("TripleSpiral", p)
+    Width_1 = q["Width_1"]
+    Distance_3 = q["Distance_3"]
+    spiral_center = (q["Length_r1"] / 2, -Distance_3 - Width_1 / 2)
+    return (PrimitiveBuilder()
+            .spirals([(spiral_center, Distance_3 + Width_1, q["Distance_2"], int(q["Circle"])),
+                      (spiral_center, Distance_3, q["Distance_2"], int(q["Circle"]))], "Circle", "Distance_3")
+            .build())
+
+TRIPLE_SPIRAL_PARTS = (
+    ("channel", ("Radius_1", "Width_1", "Circle", "Length_r1", "Length_v1", "Angle", "Length_Out"),
+     _triple_spiral_channel),
+    ("spirals", ("Width_1", "Circle", "Distance_3", "Length_r1"), _triple_spiral_spirals),
+)
+
+def triple_spiral(p):
+    """TripleSpiral 几何: 参数映射 -> Primitives"""
+    return assemble(TRIPLE_SPIRAL_PARTS, ParamSnapshot.of("TripleSpiral", p))
+
+#---------- 20. 注册表 ----------
+# 器件名 -> (几何函数, 默认参数, 计算参数函数)；器件名与工具文件名相同
+DEVICES = {
+    "BurstValve": (burst_valve, BURST_VALVE_DEFAULTS, burst_valve_derived),
+    "BurstValve2": (burst_valve2, BURST_VALVE2_DEFAULTS, burst_valve2_derived),
+    "CdPCR": (cdpcr, CDPCR_DEFAULTS, cdpcr_derived),
+    "Chamber": (chamber, CHAMBER_DEFAULTS, chamber_derived),
+    "DdPCR2To1": (ddpcr_2to1, DDPCR_2TO1_DEFAULTS, ddpcr_2to1_derived),
+    "DdPCR3To1": (ddpcr_3to1, DDPCR_3TO1_DEFAULTS, ddpcr_3to1_derived),
+    "Diffusion2to1": (diffusion_2to1, DIFFUSION_2TO1_DEFAULTS, diffusion_2to1_derived),
+    "Droplet2To1": (droplet_2to1, DROPLET_2TO1_DEFAULTS, droplet_2to1_derived),
+    "Droplet3To1": (droplet_3to1, DROPLET_3TO1_DEFAULTS, droplet_3to1_derived),
+    "Dualspiral": (dual_spiral, DUAL_SPIRAL_DEFAULTS, dual_spiral_derived),
+    "InertialSeparator": (inertial_separator, INERTIAL_SEPARATOR_DEFAULTS, inertial_separator_derived),
+    "Mixer": (mixer, MIXER_DEFAULTS, mixer_derived),
+    "PneumaticChamberArray": (pneumatic_chamber_array, PNEUMATIC_CHAMBER_ARRAY_DEFAULTS, pneumatic_chamber_array_derived),
+    "Resistor": (resistor, RESISTOR_DEFAULTS, resistor_derived),
+    "Straight_Microchannel": (straight_microchannel, STRAIGHT_MICROCHANNEL_DEFAULTS, straight_microchannel_derived),
+    "TeslaValveArray": (tesla_valve_array, TESLA_VALVE_ARRAY_DEFAULTS, tesla_valve_array_derived),
+    "TripleSpiral": (triple_spiral, TRIPLE_SPIRAL_DEFAULTS, triple_spiral_derived),
+}
+
+def device_geometry(name, params=None):
+    """按器件名生成几何；params 中未给出的参数取默认值，结果经由器件共用的几何缓存"""
+    return geometry_cache(name).get(params)
+
+#---------- 21. 部件与增量计算 ----------
+# 图元较多的器件拆成若干部件 (*_PARTS)，每个部件声明它依赖的参数，部件函数与器件函数一样
+# 是 参数映射 -> Primitives。器件几何就是各部件依次合并的结果，因此只重算输入变化了的部件、
+# 其余沿用旧结果，得到的几何与整体重算逐位相同。未拆分的器件整体作为一个部件。
+PARTS = {
+    "BurstValve": BURST_VALVE_PARTS,
+    "BurstValve2": BURST_VALVE2_PARTS,
+    "CdPCR": CDPCR_PARTS,
+    "Dualspiral": DUAL_SPIRAL_PARTS,
+    "InertialSeparator": INERTIAL_SEPARATOR_PARTS,
+    "Mixer": MIXER_PARTS,
+    "PneumaticChamberArray": PNEUMATIC_CHAMBER_ARRAY_PARTS,
+    "Resistor": RESISTOR_PARTS,
+    "TeslaValveArray": TESLA_VALVE_ARRAY_PARTS,
+    "TripleSpiral": TRIPLE_SPIRAL_PARTS,
+}
+
+def assemble(parts, p):
+    """依次生成各部件并合并为一个 Primitives"""
+    return Primitives.concatenate(func(p) for _, _, func in parts)
+
+def device_parts(name):
+    """器件的部件表 ((部件名, 依赖的参数, 部件函数), ...)"""
+    try:
+        func, defaults, _ = DEVICES[name]
+    except KeyError:
+        raise ValueError(f"未知器件: {name}") from None
+    return PARTS.get(name, (("all", tuple(defaults), func),))
+
+ALL_KINDS = (*KINDS, "polylines")
+
+class IncrementalGeometry:
+    """按参数依赖增量计算一个器件的几何
+
+    update() 先查器件共用的 GeometryCache，未命中时只重算依赖参数有变化的部件。
+    recomputed 为本次重算的部件名；changed 为与上次返回的几何相比有变化的图元类别，
+    PrimitiveArtists.update 据此跳过未变化的集合。
+    """
+    def __init__(self, name, cache=None):
+        self.name = name
+        self.parts = device_parts(name)
+        self.cache = cache if cache is not None else geometry_cache(name)
+        self._inputs = [None] * len(self.parts)
+        self._results = [None] * len(self.parts)
+        self._assembled = None  # 各部件当前结果合并成的几何
+        self.geometry = None    # 上次返回的几何
+        self.recomputed = ()
+        self.changed = frozenset()
+
+    def update(self, params):
+        """按新参数 (映射或 ParamSnapshot) 更新并返回几何；未给出的参数取默认值"""
+        p = ParamSnapshot.of(self.name, params)
+        key = self.cache.key(p)
+        geo = self.cache.lookup(key)
+        candidates = ALL_KINDS
+        self.recomputed = ()
+        if geo is None:
+            assembled = self._assembled
+            touched = self._recompute(p)
+            geo = self._assembled
+            self.cache.put(key, geo)
+            if self.geometry is assembled:
+                # 上次返回的就是部件合并结果，未重算的部件不变，只需比较重算部件含有的类别
+                candidates = touched
+        previous, self.geometry = self.geometry, geo
+        if previous is geo:
+            self.changed = frozenset()
+        elif previous is None or previous.groups != geo.groups:
+            # 标签组变了，所有标签都重新编号
+            self.changed = frozenset(ALL_KINDS)
+        else:
+            self.changed = frozenset(kind for kind in candidates if not previous.same_kind(geo, kind))
+        return geo
+
+    def _recompute(self, p):
+        """重算输入有变化的部件，返回这些部件新旧结果中含有的图元类别"""
+        inputs = [tuple(p[n] for n in names) for _, names, _ in self.parts]
+        stale = [k for k, values in enumerate(inputs) if values != self._inputs[k]]
+        # 先全部算完再写回，某个部件出错时缓存保持不变
+        fresh = {k: self.parts[k][2](p) for k in stale}
+        touched = set()
+        for k, result in fresh.items():
+            old = self._results[k]
+            touched.update(kind for kind in ALL_KINDS
+                           if result.count(kind) or (old is not None and old.count(kind)))
+            self._results[k], self._inputs[k] = result, inputs[k]
+        self.recomputed = tuple(self.parts[k][0] for k in stale)
+        if stale:
+            self._assembled = Primitives.concatenate(self._results)
+        return touched
+
+#---------- 22. 参数快照 ----------
+# 器件名与参数名元组 -> {参数名: 位置}；同一器件的所有快照共用一个索引
+_SNAPSHOT_INDEX = {}
+
+class ParamSnapshot(Mapping):
+    """一次更新所用的全部参数 (原始参数与计算参数)，创建时校验，之后只读
+
+    值按位置存放在元组里，参数名索引由同一器件的快照共用，实例没有 __dict__。
+    计算参数只在创建时算一次，各部件和几何内核直接读取同一个快照；与 *_derived 的
+    约定相同，计算参数与原始参数同名时 (如 Dualspiral 的 Angle 为弧度) 以计算值为准。
+    """
+    __slots__ = ("device", "_index", "_values", "_raw")
+
+    def __init__(self, device, params=None):
+        try:
+            _, defaults, derived = DEVICES[device]
+        except KeyError:
+            raise ValueError(f"未知器件: {device}") from None
+        params = params or {}
+        unknown = set(params) - set(defaults)
+        if unknown:
+            raise ValueError(f"{device} 没有参数: {', '.join(sorted(unknown))}")
+        raw = {}
+        for name, default in defaults.items():
+            try:
+                value = float(params.get(name, default))
+            except (TypeError, ValueError):
+                raise ValueError(f"无法解析参数 {name} / cannot parse: {params[name]!r}") from None
+            if not math.isfinite(value):
+                raise ValueError(f"参数 {name} 不是有限数值 / not a finite number: {value}")
+            raw[name] = value
+        values = {**raw, **derived(raw)}
+        key = (device, tuple(values))
+        index = _SNAPSHOT_INDEX.get(key)
+        if index is None:
+            index = _SNAPSHOT_INDEX[key] = {name: i for i, name in enumerate(values)}
+        object.__setattr__(self, "device", device)
+        object.__setattr__(self, "_index", index)
+        object.__setattr__(self, "_values", tuple(values.values()))
+        object.__setattr__(self, "_raw", tuple(raw.values()))
+
+    @classmethod
+    def of(cls, device, params=None):
+        """params 已是该器件的快照时直接返回，否则新建"""
+        if isinstance(params, cls) and params.device == device:
+            return params
+        return cls(device, params)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("参数快照只读 / ParamSnapshot is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError("参数快照只读 / ParamSnapshot is read-only")
+
+    def __getitem__(self, name):
+        return self._values[self._index[name]]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._values)
+
+    def raw(self):
+        """原始参数 (不含计算参数) 的字典"""
+        return dict(zip(DEVICES[self.device][1], self._raw))
+
+    def __repr__(self):
+        return f"ParamSnapshot({self.device!r}, {self.raw()!r})"
+
+    def __reduce__(self):
+        # pickle 时只保存原始参数，计算参数在加载时重新得出
+        return (ParamSnapshot, (self.device, self.raw()))
+
+#---------- 23. 几何缓存 ----------
+QUANTUM = 1e-9          # 缓存键的量化步长 (mm 或 °)，远小于任何加工精度
+CACHE_BYTES = 64 << 20  # 每个器件缓存的几何总大小上限 (字节)
+
+class GeometryCache:
+    """一个器件最近用过的几何 (LRU)
+
+    键为按 QUANTUM 量化的原始参数元组 (按默认参数的顺序、缺省值已补齐)，参数顺序、
+    int/float 或字符串写法不同而数值相同的设计共用一项。总大小按 Primitives.nbytes
+    计，超过 maxbytes 时淘汰最久未用的项；hits / misses 为命中与未命中次数。
+    返回的几何是共用对象，存入时其中的数组都设为只读，误改会直接报错。
+    """
+    def __init__(self, name, maxbytes=CACHE_BYTES):
+        self.name = name
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def key(self, params):
+        """规范化的缓存键"""
+        snap = ParamSnapshot.of(self.name, params)
+        return tuple(round(v / QUANTUM) for v in snap.raw().values())
+
+    def lookup(self, key):
+        """取出缓存的几何并记为最近使用；没有时返回 None"""
+        geo = self._items.get(key)
+        if geo is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return geo
+
+    def put(self, key, geo):
+        """存入几何，必要时淘汰最久未用的项；单个超过容量的几何不缓存"""
+        if key in self._items:
+            self.nbytes -= self._items.pop(key).nbytes
+        if geo.nbytes > self.maxbytes:
+            return
+        for arr in (*(getattr(geo, kind) for kind in KINDS), geo.points, geo.offsets, *geo.tags.values()):
+            arr.flags.writeable = False
+        self._items[key] = geo
+        self.nbytes += geo.nbytes
+        while self.nbytes > self.maxbytes:
+            _, old = self._items.popitem(last=False)
+            self.nbytes -= old.nbytes
+
+    def get(self, params):
+        """按参数取几何，未命中时计算并存入"""
+        snap = ParamSnapshot.of(self.name, params)
+        key = self.key(snap)
+        geo = self.lookup(key)
+        if geo is None:
+            geo = DEVICES[self.name][0](snap)
+            self.put(key, geo)
+        return geo
+
+    def clear(self):
+        """清空缓存 (计数保留)"""
+        self._items.clear()
+        self.nbytes = 0
+
+_CACHES = {}
+
+def geometry_cache(name):
+    """器件共用的几何缓存，首次使用时创建"""
+    if name not in _CACHES:
+        if name not in DEVICES:
+            raise ValueError(f"未知器件: {name}")
+        _CACHES[name] = GeometryCache(name)
+    return _CACHES[name]
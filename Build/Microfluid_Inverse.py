@@ -0,0 +1,160 @@
+# Copyright (c) 2025 [Grant]
+# Licensed under the MIT License.
+# See LICENSE in the project root for license information.
+"""
+反向设计：由目标几何流阻 (或给定流量下的压力) 求通道尺寸 / Inverse channel sizing
+
+给定形状与 w、h、l (圆柱体为 d、l) 中除一个以外的尺寸，求剩下的尺寸。
+所有参数可为数组 (支持广播)，一次求解整批电阻通道。
+
+    l            闭式解：几何流阻与长度成正比
+    d (CYL)      闭式解
+    w/h (SQUA)   闭式解：a = (w+h)/2
+    w/h (RECT, RECT_MOD, RECT_EXACT)
+                 向量化区间迭代 (对数坐标下的 Illinois 割线法，越界时退回二分)
+
+RECT_MOD 在 a = 1.3b 处切换公式，流阻随尺寸不连续：先按分支切分求解区间，
+在每个区间内单调求根。目标值落在跳变间隙时无解 (NaN)；有多个解时返回最小的尺寸。
+
+用法 / Usage:
+    python Microfluid_Inverse.py RECT_MOD w --r 0.01 0.02 0.05 -H 50 -l 10000
+    python Microfluid_Inverse.py RECT l --P 0.05 --Q 10 -w 100 -H 50
+"""
+import argparse
+
+import numpy as np
+
+import Microfluid_Batch as mb
+
+# 数值求根的搜索范围：已知边长的 [1e-4, 1e4] 倍
+SEARCH_SPAN = 1e4
+MAX_ITER = 100
+RESIDUAL_RTOL = 1e-9  # 根处流阻与目标的最大相对偏差，超过时视为收敛到了跳变处 (无解)
+
+def _target(r, P, Q, mu):
+    if r is not None:
+        return np.asarray(r, dtype=float)
+    if P is None or Q is None:
+        raise ValueError("需要目标几何流阻 r，或压力 P 与流量 Q")
+    return mb.pressure_to_resistance(P, Q, mu)
+
+def _bracketed_root(func, target, lo, hi):
+    """在 [lo, hi] 上求单调递减函数 func(x, mask) = target 的根 (逐元素，数组形状相同)
+
+    func(x, mask) 对 mask 选中的元素计算；区间内无根的元素返回 NaN。
+    """
+    log_target = np.log(target)
+    fa = np.log(func(lo, None)) - log_target
+    fb = np.log(func(hi, None)) - log_target
+    root = np.full(target.shape, np.nan)
+    ok = (fa >= 0) & (fb <= 0)
+    if not ok.any():
+        return root
+    log_target = log_target[ok]
+    a, b, fa, fb = np.log(lo[ok]), np.log(hi[ok]), fa[ok], fb[ok]
+    t = a
+    side = np.zeros(a.shape, dtype=np.int8)
+    for _ in range(MAX_ITER):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = b - fb * (b - a) / (fb - fa)
+        # 割线点不在区间内时取中点
+        t = np.where((t > a) & (t < b), t, (a + b) / 2)
+        ft = np.log(func(np.exp(t), ok)) - log_target
+        left = ft > 0
+        # Illinois 修正：同一端连续两次保留时把其函数值减半
+        fb = np.where(left & (side == 1), fb / 2, fb)
+        fa = np.where(~left & (side == -1), fa / 2, fa)
+        a, fa = np.where(left, t, a), np.where(left, ft, fa)
+        b, fb = np.where(left, b, t), np.where(left, fb, ft)
+        side = np.where(left, 1, -1).astype(np.int8)
+        if np.all((b - a <= 1e-15 * np.maximum(np.abs(a), 1)) | (ft == 0)):
+            break
+    root[ok] = np.exp(t)
+    return root
+
+def solve_length(shape, r=None, w=None, h=None, d=None, P=None, Q=None, mu=1.005):
+    """求通道长度 l (μm)，闭式解"""
+    target = _target(r, P, Q, mu)
+    if shape == "CYL":
+        return target / mb.resistance_factor_cyl(d, 1.0)
+    return target / mb.SHAPE_FUNCTIONS[shape](w, h, 1.0)
+
+def solve_diameter(r=None, l=None, P=None, Q=None, mu=1.005):
+    """求圆柱体直径 d (μm)，闭式解"""
+    target = _target(r, P, Q, mu)
+    return np.sqrt(np.sqrt(128 * np.asarray(l, dtype=float) / (np.pi * target)))
+
+def solve_side(shape, known, r=None, l=None, P=None, Q=None, mu=1.005):
+    """已知另一边 known 与长度 l，求矩形截面的宽或高 (μm)"""
+    target = _target(r, P, Q, mu)
+    known = np.asarray(known, dtype=float)
+    l = np.asarray(l, dtype=float)
+    if shape == "SQUA":
+        m = np.sqrt(np.sqrt(28 * l / target))
+        x = 2 * m - known
+        return np.where(x > 0, x, np.nan)
+    fn = mb.SHAPE_FUNCTIONS[shape]
+    shape_ = np.broadcast(target, known, l).shape
+    target, known, l = (np.broadcast_to(x, shape_) for x in (target, known, l))
+
+    def func(x, mask):
+        if mask is None:
+            return fn(x, known, l)
+        return fn(x, known[mask], l[mask])
+
+    # 单调区间边界：RECT_MOD 在 x = k/1.3 与 x = 1.3k 处换分支
+    edges = [known / SEARCH_SPAN]
+    if shape == "RECT_MOD":
+        edges += [known / 1.3, known * 1.3]
+    edges.append(known * SEARCH_SPAN)
+
+    result = np.full(shape_, np.nan)
+    for k in range(len(edges) - 1):
+        lo = edges[k] if k == 0 else np.nextafter(edges[k], np.inf)
+        root = _bracketed_root(func, target, lo, edges[k + 1])
+        # 区间端点与相邻分支共用，跳变处两侧的值也能"夹住"目标；按根处的实际流阻复核
+        with np.errstate(invalid="ignore"):
+            miss = ~(np.abs(func(root, None) / target - 1) <= RESIDUAL_RTOL)
+        root = np.where(miss, np.nan, root)
+        result = np.where(np.isnan(result), root, result)
+    return result
+
+def solve_dimension(shape, unknown, r=None, w=None, h=None, d=None, l=None, P=None, Q=None, mu=1.005):
+    """由目标几何流阻 r (或压力 P + 流量 Q) 求缺少的尺寸 unknown ('w'/'h'/'d'/'l')"""
+    if shape != "CYL" and shape not in mb.SHAPE_FUNCTIONS:
+        raise ValueError(f"未知形状: {shape}")
+    if unknown == "l":
+        return solve_length(shape, r, w, h, d, P, Q, mu)
+    if shape == "CYL":
+        if unknown != "d":
+            raise ValueError("圆柱体只能求直径 d 或长度 l")
+        return solve_diameter(r, l, P, Q, mu)
+    if unknown not in ("w", "h"):
+        raise ValueError("矩形截面只能求 w、h 或 l")
+    return solve_side(shape, h if unknown == "w" else w, r, l, P, Q, mu)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="反向设计：目标流阻 -> 通道尺寸 / Inverse channel sizing")
+    parser.add_argument("shape", choices=["CYL"] + sorted(mb.SHAPE_FUNCTIONS))
+    parser.add_argument("unknown", choices=["w", "h", "d", "l"])
+    parser.add_argument("--r", type=float, nargs="+", help="目标几何流阻系数")
+    parser.add_argument("--P", type=float, nargs="+", help="目标压力 (MPa)，需配合 --Q")
+    parser.add_argument("--Q", type=float, help="流量 (μL/min)")
+    parser.add_argument("--mu", type=float, default=1.005, help="粘度 (10^-3 Pa·s)")
+    parser.add_argument("-w", "--width", type=float)
+    parser.add_argument("-H", "--height", type=float)
+    parser.add_argument("-d", "--diameter", type=float)
+    parser.add_argument("-l", "--length", type=float)
+    args = parser.parse_args(argv)
+    try:
+        x = solve_dimension(args.shape, args.unknown, args.r, args.width, args.height, args.diameter,
+                            args.length, args.P, args.Q, args.mu)
+    except ValueError as e:
+        parser.error(str(e))
+    targets = args.r if args.r is not None else args.P
+    label = "r" if args.r is not None else "P (MPa)"
+    for t, v in zip(targets, np.broadcast_to(x, (len(targets),))):
+        print(f"{label} = {t:g} -> {args.unknown} = {v:.6f} μm" if v == v else f"{label} = {t:g} -> 无解 / no solution")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# Copyright (c) 2025 [Grant]
+# Licensed under the MIT License.
+# See LICENSE in the project root for license information.
+"""
+无界面批量出图 / Headless batch layout export
+
+读取器件工具 "导出JSON" 保存的参数文件，不启动界面直接计算几何并写出 DXF / SVG / JSON。
+多个文件由进程池并行处理，逐个报告各步骤耗时；有文件失败时返回非零。
+
+输入可以是文件、目录 (其中的全部 *.json) 或通配符；输出与输入文件同名，放在 -o 目录下。
+JSON 输出为补齐默认值后的完整参数，格式与 "导出JSON" 相同，可再导入界面。
+
+用法 / Usage:
+    python Microfluid_Layout.py BurstValve designs/ -o out
+    python Microfluid_Layout.py Dualspiral "nightly/*.json" -o out -f dxf svg -j 8 --spiral spline
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from Microfluid_Geometry import CHORD_TOLERANCE, DEVICES, ParamSnapshot, device_geometry
+from Microfluid_Render import SPIRAL_MODES, draw_primitives, export_dxf, fit_view
+
+FORMATS = ("dxf", "svg", "json")
+
+def collect_inputs(patterns):
+    """文件、目录或通配符 -> JSON 文件列表 (按给出的顺序，去重)"""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, "*.json")))
+        elif any(c in pattern for c in "*?["):
+            matches = sorted(glob.glob(pattern, recursive=True))
+        else:
+            matches = [pattern]
+        if not matches:
+            raise ValueError(f"没有匹配的参数文件 / No parameter files match: {pattern}")
+        files += matches
+    return list(dict.fromkeys(files))
+
+def output_stem(path, outdir):
+    """输入文件 -> 输出路径 (不含扩展名)"""
+    return os.path.join(outdir, os.path.splitext(os.path.basename(path))[0])
+
+def load_design(device, path):
+    """读取参数文件 -> (标题, ParamSnapshot, 忽略的参数名)
+
+    与界面 "导入JSON" 一样只取器件已有的参数，未给出的取默认值；计算参数 (如 Radius_5)
+    不报告，其余未知参数列在忽略的参数名中。无法解析的值直接报错，不退回默认值。
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    params = data.get("parameters", {})
+    defaults = DEVICES[device][1]
+    snap = ParamSnapshot(device, {k: v for k, v in params.items() if k in defaults})
+    ignored = sorted(set(params) - set(snap))
+    return data.get("model_name") or device, snap, ignored
+
+def save_svg(filename, prims, title):
+    """按界面的样式画出图元并保存为 SVG (不经过 pyplot / tkinter)"""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(8, 6))
+    ax = fig.add_subplot()
+    draw_primitives(ax, prims)
+    ax.set_aspect('equal', adjustable='box')
+    ax.grid(True, linestyle='--', alpha=0.5)
+    ax.set_title(title, fontsize=14)
+    ax.set_xlabel("X (mm)")
+    ax.set_ylabel("Y (mm)")
+    fit_view(ax, prims)
+    fig.savefig(filename, format='svg', bbox_inches='tight')
+
+def save_json(filename, title, snap):
+    """保存完整参数，格式与工具的 "导出JSON" 相同"""
+    data = {"model_name": title, "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "parameters": snap.raw()}
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+
+def write_outputs(stem, geo, title, snap, formats=FORMATS, spiral="arc", tol=CHORD_TOLERANCE):
+    """把一个设计写成 stem.<格式>，返回 {格式: 耗时 s}"""
+    writers = {"dxf": lambda f: export_dxf(f, geo, spiral, tol),
+               "svg": lambda f: save_svg(f, geo, title),
+               "json": lambda f: save_json(f, title, snap)}
+    timings = {}
+    for fmt in formats:
+        t0 = time.perf_counter()
+        writers[fmt](f"{stem}.{fmt}")
+        timings[fmt] = time.perf_counter() - t0
+    return timings
+
+def layout_file(device, path, outdir, formats=FORMATS, spiral="arc", tol=CHORD_TOLERANCE):
+    """处理一个参数文件，返回 ({步骤: 耗时 s}, 忽略的参数名)；在进程池的工作进程中运行"""
+    t0 = time.perf_counter()
+    title, snap, ignored = load_design(device, path)
+    t1 = time.perf_counter()
+    geo = device_geometry(device, snap)
+    t2 = time.perf_counter()
+    timings = {"load": t1 - t0, "geometry": t2 - t1}
+    timings.update(write_outputs(output_stem(path, outdir), geo, title, snap, formats, spiral, tol))
+    return timings, ignored
+
+def run(device, files, outdir, formats=FORMATS, spiral="arc", tol=CHORD_TOLERANCE, jobs=None):
+    """按完成顺序逐个产出 (文件, 结果或异常)；jobs 为 1 时在本进程内依次处理"""
+    if jobs == 1:
+        for path in files:
+            try:
+                yield path, layout_file(device, path, outdir, formats, spiral, tol)
+            except Exception as e:
+                yield path, e
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(layout_file, device, path, outdir, formats, spiral, tol): path
+                   for path in files}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无界面批量出图 / Headless batch layout export")
+    parser.add_argument("device", choices=sorted(DEVICES), help="器件名 / device name")
+    parser.add_argument("inputs", nargs="+", help="参数 JSON 文件、目录或通配符")
+    parser.add_argument("-o", "--outdir", default=".", help="输出目录 (默认当前目录)")
+    parser.add_argument("-f", "--formats", nargs="+", choices=FORMATS, default=list(FORMATS),
+                        help="输出格式 (默认全部)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="并行进程数 (默认 CPU 核数，1 为不用进程池)")
+    parser.add_argument("--spiral", choices=SPIRAL_MODES, default="arc", help="DXF 中螺旋的写法")
+    parser.add_argument("--tol", type=float, default=CHORD_TOLERANCE, help="螺旋拟合容差 (mm)")
+    args = parser.parse_args(argv)
+
+    try:
+        files = collect_inputs(args.inputs)
+    except ValueError as e:
+        parser.error(str(e))
+    stems = {}
+    for path in files:
+        stem = output_stem(path, args.outdir)
+        if stem in stems:
+            parser.error(f"输出文件名重复 / Duplicate output name: {path} 与 {stems[stem]}")
+        if "json" in args.formats and os.path.abspath(f"{stem}.json") == os.path.abspath(path):
+            parser.error(f"JSON 输出会覆盖输入 / JSON output would overwrite input: {path}")
+        stems[stem] = path
+    os.makedirs(args.outdir, exist_ok=True)
+    jobs = max(1, min(args.jobs or 1, len(files)))
+
+    t0 = time.perf_counter()
+    width = max(len(os.path.basename(p)) for p in files) + 2
+    busy = 0.0
+    failed = []
+    for path, result in run(args.device, files, args.outdir, args.formats, args.spiral, args.tol, jobs):
+        name = os.path.basename(path)
+        if isinstance(result, Exception):
+            failed.append(path)
+            print(f"{name:<{width}}FAILED  {type(result).__name__}: {result}")
+            continue
+        timings, ignored = result
+        total = sum(timings.values())
+        busy += total
+        steps = "  ".join(f"{step} {t * 1e3:.1f}" for step, t in timings.items())
+        print(f"{name:<{width}}ok  {steps}  total {total * 1e3:.1f} ms")
+        if ignored:
+            print(f"{'':<{width}}    忽略的参数 / ignored: {', '.join(ignored)}")
+    elapsed = time.perf_counter() - t0
+    print(f"完成 / Done: {len(files) - len(failed)}/{len(files)} 个文件 / files, {jobs} 个进程 / workers, "
+          f"{elapsed:.2f} s (各文件合计 / sum {busy:.2f} s) -> {args.outdir}")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+# Copyright (c) 2025 [Grant]
+# Licensed under the MIT License.
+# See LICENSE in the project root for license information.
+"""
+器件版图参数扫描 / Layout parameter sweep for the device generators
+
+对一个器件的若干参数做全组合网格扫描，每个组合生成一份版图 (DXF / SVG / JSON)。
+组合按块分发到进程池，在途的块数有上限，上万个组合也不会一次全部提交。
+
+输出目录中:
+    sweep.json       扫描设置 (器件、基准参数、各参数取值、导出选项)
+    manifest.jsonl   每完成一个组合追加一行: 序号、完整参数、输出文件及其 SHA-256、
+                     几何摘要 (Primitives.digest)、图元数、耗时；失败的组合记录 error
+    <器件>_<序号>.<格式>
+
+中断后用同样的命令重新运行即可续跑：manifest 中已成功且输出文件都在的组合会跳过。
+DXF 文件含创建时间，文件哈希每次生成都不同；判断几何是否相同请比较 geometry 摘要。
+取值写法与 Microfluid_Sweep.py 的网格扫描相同。
+
+用法 / Usage:
+    python Microfluid_LayoutSweep.py Resistor doe/ -p Number=2,4,8 -p Width_Res=0.05:0.2:4 -p Length_v2=1:3:5
+    python Microfluid_LayoutSweep.py TeslaValveArray doe/ --base base.json -p number=2:10:5 -f dxf svg -j 8
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from Microfluid_Geometry import CHORD_TOLERANCE, DEVICES, ParamSnapshot, device_geometry
+from Microfluid_Layout import FORMATS, load_design, write_outputs
+from Microfluid_Render import SPIRAL_MODES
+from Microfluid_Sweep import parse_grid_spec
+
+SETTINGS_FILE = "sweep.json"
+MANIFEST_FILE = "manifest.jsonl"
+DEFAULT_CHUNK_SIZE = 16
+
+def parse_assignment(text):
+    """NAME=取值写法 -> (参数名, 取值列表)"""
+    name, sep, spec = text.partition("=")
+    if not sep:
+        raise ValueError(f"扫描参数应写成 名称=取值 / expected NAME=SPEC: {text}")
+    return name.strip(), [float(v) for v in parse_grid_spec(spec)]
+
+class LayoutSweep:
+    """一个器件的全组合参数扫描
+
+    base 为固定参数 (未给出的取默认值)，grid 为 {参数名: 取值序列}；组合按 grid 的顺序
+    展开，最后一个参数变化最快。组合只在用到时生成，无效组合在生成版图时才报错。
+    """
+
+    def __init__(self, device, base=None, grid=None):
+        self.device = device
+        self.base = ParamSnapshot(device, base).raw()
+        self.grid = {name: [float(v) for v in values] for name, values in (grid or {}).items()}
+        unknown = set(self.grid) - set(self.base)
+        if unknown:
+            raise ValueError(f"{device} 没有参数: {', '.join(sorted(unknown))}")
+        empty = [name for name, values in self.grid.items() if not values]
+        if empty:
+            raise ValueError(f"参数没有取值 / no values: {', '.join(empty)}")
+        self.size = math.prod(len(values) for values in self.grid.values())
+        self.digits = max(5, len(str(self.size - 1)))
+
+    def variant(self, index):
+        """第 index 个组合的完整参数"""
+        params = dict(self.base)
+        for name, values in reversed(self.grid.items()):
+            index, k = divmod(index, len(values))
+            params[name] = values[k]
+        return params
+
+    def name(self, index):
+        """第 index 个组合的输出文件名 (不含扩展名)"""
+        return f"{self.device}_{index:0{self.digits}d}"
+
+    def settings(self, spiral, tol):
+        """写入 sweep.json 的扫描设置；续跑时必须与已有的一致"""
+        return {"device": self.device, "base": self.base, "grid": self.grid,
+                "size": self.size, "spiral": spiral, "tol": tol}
+
+def file_sha256(path):
+    """文件内容的 SHA-256 (十六进制)"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def layout_chunk(device, items, outdir, formats, spiral="arc", tol=CHORD_TOLERANCE):
+    """生成一块组合的版图，返回 manifest 记录列表；在进程池的工作进程中运行
+
+    items 为 (序号, 文件名, 参数) 序列。单个组合出错只记在它的记录里，不影响同一块的其他组合。
+    """
+    records = []
+    for index, name, params in items:
+        t0 = time.perf_counter()
+        record = {"index": index, "params": params}
+        try:
+            snap = ParamSnapshot(device, params)
+            geo = device_geometry(device, snap)
+            write_outputs(os.path.join(outdir, name), geo, f"{device} #{index}", snap, formats, spiral, tol)
+            record["files"] = {fmt: {"path": f"{name}.{fmt}",
+                                     "sha256": file_sha256(os.path.join(outdir, f"{name}.{fmt}"))}
+                               for fmt in formats}
+            record["geometry"] = geo.digest()
+            record["primitives"] = len(geo)
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        record["seconds"] = round(time.perf_counter() - t0, 6)
+        records.append(record)
+    return records
+
+def read_manifest(path):
+    """manifest.jsonl -> {序号: 记录}；同一序号以最后一条为准，中断时写了一半的行忽略"""
+    records = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[record["index"]] = record
+    return records
+
+def completed(records, outdir, formats):
+    """已成功且所需格式的输出文件都在的组合序号"""
+    return {index for index, record in records.items()
+            if "error" not in record
+            and all(fmt in record["files"] and os.path.exists(os.path.join(outdir, record["files"][fmt]["path"]))
+                    for fmt in formats)}
+
+def run(sweep, indices, outdir, formats=("dxf",), spiral="arc", tol=CHORD_TOLERANCE,
+        jobs=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """按完成顺序逐块产出记录列表；在途的块不超过 jobs 的两倍，jobs 为 1 时在本进程内依次处理"""
+    def chunks():
+        for start in range(0, len(indices), chunk_size):
+            yield [(i, sweep.name(i), sweep.variant(i)) for i in indices[start:start + chunk_size]]
+
+    if jobs == 1:
+        for items in chunks():
+            yield layout_chunk(sweep.device, items, outdir, formats, spiral, tol)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = set()
+        for items in chunks():
+            if len(pending) >= 2 * jobs:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(pool.submit(layout_chunk, sweep.device, items, outdir, formats, spiral, tol))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="器件版图参数扫描 / Layout parameter sweep")
+    parser.add_argument("device", choices=sorted(DEVICES), help="器件名 / device name")
+    parser.add_argument("outdir", help="输出目录 (同时存放 sweep.json 与 manifest.jsonl)")
+    parser.add_argument("-p", "--param", action="append", default=[], metavar="NAME=SPEC",
+                        help="扫描参数及取值，可重复；如 Number=2,4,8 或 Width_Res=0.05:0.2:4")
+    parser.add_argument("--base", metavar="JSON", help="基准参数文件 (工具 \"导出JSON\" 的格式)")
+    parser.add_argument("-f", "--formats", nargs="+", choices=FORMATS, default=["dxf"],
+                        help="输出格式 (默认 dxf)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="并行进程数 (默认 CPU 核数，1 为不用进程池)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="每个任务包含的组合数")
+    parser.add_argument("--spiral", choices=SPIRAL_MODES, default="arc", help="DXF 中螺旋的写法")
+    parser.add_argument("--tol", type=float, default=CHORD_TOLERANCE, help="螺旋拟合容差 (mm)")
+    args = parser.parse_args(argv)
+
+    try:
+        base = load_design(args.device, args.base)[1].raw() if args.base else None
+        grid = dict(parse_assignment(text) for text in args.param)
+        sweep = LayoutSweep(args.device, base, grid)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if args.chunk_size <= 0:
+        parser.error("--chunk-size 必须为正 / must be positive")
+
+    os.makedirs(args.outdir, exist_ok=True)
+    settings_path = os.path.join(args.outdir, SETTINGS_FILE)
+    settings = json.loads(json.dumps(sweep.settings(args.spiral, args.tol)))
+    if os.path.exists(settings_path):
+        with open(settings_path, encoding="utf-8") as f:
+            if json.load(f) != settings:
+                parser.error(f"{args.outdir} 中已有另一个扫描 / a different sweep already lives here "
+                             f"(删除 {SETTINGS_FILE} 或换一个目录)")
+    else:
+        with open(settings_path, "w", encoding="utf-8") as f:
+            json.dump(settings, f, indent=4, ensure_ascii=False)
+
+    manifest_path = os.path.join(args.outdir, MANIFEST_FILE)
+    done = completed(read_manifest(manifest_path), args.outdir, args.formats)
+    indices = [i for i in range(sweep.size) if i not in done]
+    print(f"{sweep.device}: {sweep.size:,} 个组合 / variants, 已完成 / done {len(done):,}, "
+          f"待生成 / to do {len(indices):,}")
+    if not indices:
+        return
+    jobs = max(1, min(args.jobs or 1, math.ceil(len(indices) / args.chunk_size)))
+
+    t0 = last = time.perf_counter()
+    finished = 0
+    failed = []
+    with open(manifest_path, "a", encoding="utf-8") as manifest:
+        for records in run(sweep, indices, args.outdir, args.formats, args.spiral, args.tol,
+                           jobs, args.chunk_size):
+            for record in records:
+                manifest.write(json.dumps(record, ensure_ascii=False) + "\n")
+                if "error" in record:
+                    failed.append(record["index"])
+                    print(f"  {sweep.name(record['index'])}  FAILED  {record['error']}")
+            manifest.flush()
+            finished += len(records)
+            now = time.perf_counter()
+            if now - last >= 1 or finished == len(indices):
+                print(f"  [{finished:>{len(str(len(indices)))}}/{len(indices)}]  "
+                      f"{finished / (now - t0):.1f} 个/s / variants/s")
+                last = now
+    elapsed = time.perf_counter() - t0
+    print(f"完成 / Done: {finished - len(failed):,}/{len(indices):,} 个组合 / variants, {jobs} 个进程 / workers, "
+          f"{elapsed:.2f} s -> {manifest_path}")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# Copyright (c) 2025 [Grant]
+# Licensed under the MIT License.
+# See LICENSE in the project root for license information.
+"""
+微流控流阻网络求解器 / Hydraulic network solver
+
+通道为节点之间的边，几何流阻系数由 Microfluid_Batch 中的 resistance_factor_* 计算。
+组装稀疏节点导纳矩阵 G (图 Laplacian)，消去给定压力的节点后求解
+    G_ff · P_f = q_f - G_fc · P_c
+得到所有节点压力与通道流量。单位与选项卡5/6一致：压力 MPa，流量 μL/min。
+
+LU 分解按"给定压力的节点集合"缓存：只改变压力值或注入流量时，
+再次求解只做回代。需要 scipy (可选依赖，首次求解时导入)。
+
+用法 / Usage:
+    net = HydraulicNetwork.from_channels([
+        ("inlet1", "junction", "RECT_MOD", {"w": 100, "h": 50, "l": 5000}),
+        ("inlet2", "junction", "RECT_MOD", {"w": 100, "h": 50, "l": 8000}),
+        ("junction", "outlet", "CYL", {"d": 200, "l": 10000}),
+    ])
+    sol = net.solve(pressures={"inlet1": 0.02, "inlet2": 0.02, "outlet": 0.0})
+    print(sol.channel_flows(), sol.node_pressure("junction"))
+"""
+import numpy as np
+
+import Microfluid_Batch as mb
+from Microfluid_Batch import channel_resistance_factors
+
+def _sparse():
+    try:
+        import scipy.sparse
+        import scipy.sparse.linalg
+    except ImportError:
+        raise ImportError("流阻网络求解需要 scipy / the network solver requires scipy: pip install scipy")
+    return scipy.sparse
+
+class NetworkSolution:
+    """求解结果：节点压力 (MPa) 与通道流量 (μL/min，src→dst 为正)"""
+    __slots__ = ("network", "pressures", "flows")
+
+    def __init__(self, network, pressures, flows):
+        self.network = network
+        self.pressures = pressures
+        self.flows = flows
+
+    def node_pressure(self, node):
+        return float(self.pressures[self.network.node_index[node]])
+
+    def node_pressures(self):
+        return dict(zip(self.network.nodes, self.pressures.tolist()))
+
+    def channel_flows(self):
+        return dict(zip(self.network.channel_names, self.flows.tolist()))
+
+class HydraulicNetwork:
+    """稀疏流阻网络
+
+    src, dst: 每条通道两端的节点编号 (0..n_nodes-1)
+    resistance_factor: 每条通道的几何流阻系数 (1e16 m^-3)
+    mu: 粘度 (10^-3 Pa·s)，标量或逐通道数组
+    """
+
+    def __init__(self, src, dst, resistance_factor, mu=1.005, n_nodes=None, nodes=None, channel_names=None):
+        self.src = np.asarray(src, dtype=np.intp)
+        self.dst = np.asarray(dst, dtype=np.intp)
+        resistance_factor = np.asarray(resistance_factor, dtype=float)
+        if not (self.src.shape == self.dst.shape == np.broadcast(self.src, resistance_factor).shape):
+            raise ValueError("src、dst、resistance_factor 长度必须一致")
+        if np.any(~(resistance_factor > 0)) or np.any(~(np.asarray(mu) > 0)):
+            raise ValueError("参数必须为正数")
+        self.n_nodes = int(max(self.src.max(initial=-1), self.dst.max(initial=-1)) + 1) if n_nodes is None else n_nodes
+        self.nodes = list(range(self.n_nodes)) if nodes is None else list(nodes)
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+        self.channel_names = list(range(len(self.src))) if channel_names is None else list(channel_names)
+        # 导纳: 单位压差下的流量 (μL/min / MPa)
+        self.conductance = 1 / mb.resistance_to_pressure(1.0, resistance_factor, mu)
+        self._matrix = None
+        self._factors = {}
+
+    @classmethod
+    def from_channels(cls, channels, mu=1.005):
+        """由 (起点, 终点, 形状代码, 尺寸字典) 列表建立网络，节点可为任意可哈希标签"""
+        node_index = {}
+        src, dst, shapes = [], [], []
+        dims = {"l": [], "w": [], "h": [], "d": []}
+        for a, b, shape, size in channels:
+            src.append(node_index.setdefault(a, len(node_index)))
+            dst.append(node_index.setdefault(b, len(node_index)))
+            shapes.append(shape)
+            for key, values in dims.items():
+                values.append(size.get(key, np.nan))
+        r = channel_resistance_factors(np.array(shapes), **{k: np.array(v, dtype=float) for k, v in dims.items()})
+        return cls(src, dst, r, mu, n_nodes=len(node_index), nodes=list(node_index))
+
+    def matrix(self):
+        """节点导纳矩阵 G (CSR，对称半正定)"""
+        if self._matrix is None:
+            sp = _sparse()
+            g = self.conductance
+            rows = np.concatenate([self.src, self.dst, self.src, self.dst])
+            cols = np.concatenate([self.src, self.dst, self.dst, self.src])
+            data = np.concatenate([g, g, -g, -g])
+            self._matrix = sp.csr_matrix((data, (rows, cols)), shape=(self.n_nodes, self.n_nodes))
+        return self._matrix
+
+    def _factor(self, fixed):
+        """给定压力节点集合对应的 (自由节点, LU 分解, G_fc)，按集合缓存"""
+        key = fixed.tobytes()
+        if key not in self._factors:
+            sp = _sparse()
+            G = self.matrix()
+            free_mask = np.ones(self.n_nodes, dtype=bool)
+            free_mask[fixed] = False
+            free = np.flatnonzero(free_mask)
+            G_free = G[free]
+            try:
+                lu = sp.linalg.splu(G_free[:, free].tocsc(), permc_spec="MMD_AT_PLUS_A")
+            except RuntimeError:
+                raise ValueError("网络中存在没有给定压力的孤立部分 / floating sub-network without a pressure reference")
+            self._factors[key] = (free, lu, G_free[:, fixed])
+        return self._factors[key]
+
+    def _boundary(self, values):
+        if not values:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        idx = np.array([self.node_index[n] for n in values], dtype=np.intp)
+        return idx, np.array(list(values.values()), dtype=float)
+
+    def solve(self, pressures, inflows=None):
+        """求解网络
+
+        pressures: {节点: 压力 MPa}，至少一个
+        inflows: {节点: 注入流量 μL/min}，未列出的自由节点流量守恒 (注入为 0)
+        """
+        fixed, p_fixed = self._boundary(pressures)
+        if len(fixed) == 0:
+            raise ValueError("至少需要一个给定压力的节点")
+        order = np.argsort(fixed)
+        fixed, p_fixed = fixed[order], p_fixed[order]
+        free, lu, G_fc = self._factor(fixed)
+
+        q = np.zeros(self.n_nodes)
+        inflow_idx, inflow_values = self._boundary(inflows)
+        np.add.at(q, inflow_idx, inflow_values)
+
+        P = np.empty(self.n_nodes)
+        P[fixed] = p_fixed
+        if len(free):
+            P[free] = lu.solve(q[free] - G_fc @ p_fixed)
+        flows = self.conductance * (P[self.src] - P[self.dst])
+        return NetworkSolution(self, P, flows)
@@ -0,0 +1,389 @@
+# Copyright (c) 2025 [Grant]
+# Licensed under the MIT License.
+# See LICENSE in the project root for license information.
+"""
+图元绘制与 DXF 导出 / Drawing and DXF export for Primitives
+
+各器件工具的 updateModel / exportDxf 共用这里的函数，直接读取
+Microfluid_Geometry.Primitives 中的数组，不再经过元组列表。绘制时每类图元只建
+一个集合 (见 PrimitiveArtists)，上万个图元也只有几个 artist；参数变化时用
+PrimitiveArtists.update() 原地更新，不必 ax.clear() 重建，配合
+Microfluid_Geometry.IncrementalGeometry 时只重设变化了的图元类别。
+
+螺旋按解析式保存，导出时可选三种写法 (spiral=)：
+    "arc"      双圆弧拟合，写成带 bulge 的 LWPOLYLINE (默认，顶点最少)
+    "spline"   同一组双圆弧精确转换成二次有理 SPLINE
+    "polyline" 按弦高容差采样的普通 LWPOLYLINE
+三者与真实螺旋的偏差都不超过 tol (mm)。
+
+整片晶圆级的大版图可用 stream_dxf 流式写出 (export_dxf 在图元很多时自动改用)：
+不建 ezdxf 文档，实体直接格式化写入文件。stream_dxf 也接受逐块产出的 Primitives
+(如逐个阵列单元平移出的副本)，此时整个版图不必同时放在内存中。
+"""
+import re
+
+import numpy as np
+
+from Microfluid_Geometry import CHORD_TOLERANCE, Primitives, spiral_biarcs, spiral_curve
+
+SPIRAL_MODES = ("arc", "spline", "polyline")
+
+ARC_STEP = 6.0  # 度，圆弧细分为折线时的最大步长 (弦高 < 0.14% 半径)
+
+def _arc_polylines(arcs):
+    """一次性把 (N, 5) 圆弧细分为 (N, K, 2) 折线；角度按逆时针从 theta1 到 theta2"""
+    if not len(arcs):
+        return np.empty((0, 2, 2))
+    cx, cy, r, t1, t2 = arcs.T
+    span = (t2 - t1) % 360
+    span[(span == 0) & (t2 != t1)] = 360
+    k = max(2, int(np.ceil(span.max() / ARC_STEP)) + 1)
+    theta = np.deg2rad(t1[:, None] + span[:, None] * np.linspace(0, 1, k))
+    return np.stack((cx[:, None] + r[:, None] * np.cos(theta),
+                     cy[:, None] + r[:, None] * np.sin(theta)), axis=-1)
+
+def _rectangle_outlines(rectangles):
+    """(N, 4) 矩形 -> (N, 5, 2) 闭合折线"""
+    x, y, w, h = rectangles.T
+    return np.stack([np.column_stack(p) for p in ((x, y), (x+w, y), (x+w, y+h), (x, y+h), (x, y))],
+                    axis=1)
+
+def _join_by_tag(lines, tags):
+    """同一标签的折线用 NaN 断开后首尾相接，合并成一条；返回 (折线列表, 对应标签)
+
+    LineCollection 为每个元素建一个 Path，上万个小线段时这一步比绘制还慢；
+    按标签合并后元素数只有标签组数，而高亮本来就是按组进行的。
+    """
+    groups = np.unique(tags)
+    joined = []
+    for group in groups.tolist():
+        if isinstance(lines, np.ndarray):
+            # (N, K, 2) 等长折线：每条后面补一个 NaN 点再展平
+            sel = lines[tags == group]
+            sel = np.concatenate((sel, np.full((len(sel), 1, 2), np.nan)), axis=1)
+            joined.append(sel.reshape(-1, 2)[:-1])
+        else:
+            pieces = [part for line, tag in zip(lines, tags.tolist()) if tag == group
+                      for part in (line, np.full((1, 2), np.nan))]
+            joined.append(np.concatenate(pieces[:-1]))
+    return joined, groups
+
+LINE_KINDS = ("segments", "arcs", "rectangles", "polylines", "spirals")
+
+SCREEN_TOLERANCE = 0.25  # 像素，屏幕上螺旋折线与真实螺旋的最大偏差
+
+def _screen_tolerance(ax, bounds=None):
+    """ax 上 SCREEN_TOLERANCE 像素对应的长度 (mm)，不小于导出用的 CHORD_TOLERANCE
+
+    bounds 为图元包围盒，视图范围还没按图元设好时 (首次绘制) 按包围盒估计。
+    """
+    (x0, x1), (y0, y1) = ax.get_xlim(), ax.get_ylim()
+    dx, dy = abs(x1 - x0), abs(y1 - y0)
+    if bounds is not None:
+        xmin, ymin, xmax, ymax = bounds
+        dx, dy = max(dx, xmax - xmin), max(dy, ymax - ymin)
+    width, height = ax.bbox.width, ax.bbox.height
+    if width <= 0 or height <= 0:
+        return CHORD_TOLERANCE
+    return max(CHORD_TOLERANCE, SCREEN_TOLERANCE * max(dx / width, dy / height))
+
+def _line_data(prims, kind, tol=CHORD_TOLERANCE):
+    """除圆以外某类图元细分后的折线；螺旋按弦高容差 tol 采样"""
+    if kind == "segments":
+        return prims.segments.reshape(-1, 2, 2)
+    if kind == "arcs":
+        return _arc_polylines(prims.arcs)
+    if kind == "rectangles":
+        return _rectangle_outlines(prims.rectangles)
+    if kind == "polylines":
+        return list(prims.polylines())
+    return [spiral_curve((cx, cy), r0, pitch, turns, tol)
+            for cx, cy, r0, pitch, turns in prims.spirals.tolist()]
+
+def _make_collections(ax, lw, color, **kwargs):
+    """每类图元一个空集合"""
+    # 只在绘制时才导入 matplotlib，无界面批量导出 DXF 时不加载
+    from matplotlib.collections import EllipseCollection, LineCollection
+
+    collections = {
+        "circles": EllipseCollection([], [], 0, units='xy', offsets=np.empty((0, 2)),
+                                     offset_transform=ax.transData, facecolors='none',
+                                     edgecolors=color, linewidths=lw, **kwargs),
+    }
+    for kind in LINE_KINDS:
+        collections[kind] = LineCollection([], colors=color, linewidths=lw, **kwargs)
+    for coll in collections.values():
+        ax.add_collection(coll, autolim=False)
+    return collections
+
+class PrimitiveArtists:
+    """一个器件在 ax 上的全部图元：每类图元一个集合
+
+    圆为 EllipseCollection，每个圆一个元素；其余图元细分为折线后按标签合并，
+    每个标签组是 LineCollection 中的一个元素。集合只在构造时创建一次，参数变化后
+    由 update() 原地替换数据。
+
+    螺旋只需在屏幕上看不出折线：按当前视图一个像素的几分之一采样 (见 _screen_tolerance)，
+    不用导出时的 CHORD_TOLERANCE；缩放使所需容差变化超过一倍时重新采样。
+
+    高亮画在另一组 animated 集合 (overlay) 上：普通重绘不画它们，每次重绘后缓存
+    不含高亮的背景，切换高亮时只恢复背景、画出选中的那部分图元并 blit，
+    不触发整幅重绘。
+    """
+    def __init__(self, ax, prims, color='blue', lw=1.5, highlight_color='red'):
+        self.ax = ax
+        self.collections = _make_collections(ax, lw, color)
+        # 高亮线宽略大，完全盖住底下的原色线条
+        self.overlay = _make_collections(ax, lw + 1, highlight_color, animated=True, zorder=3)
+        self.param = None
+        self.background = None
+        # 每个集合元素的标签，以及合并后的折线 (高亮时从中挑选)
+        self.tags = {}
+        self.lines = {}
+        ax.figure.canvas.mpl_connect('draw_event', self._on_draw)
+        ax.callbacks.connect('xlim_changed', self._on_limits)
+        ax.callbacks.connect('ylim_changed', self._on_limits)
+        self.spiral_tol = _screen_tolerance(ax, prims.bounds())
+        self.update(prims)
+
+    def update(self, prims, kinds=None):
+        """换成新的几何：原地更新各集合的数据，保留当前高亮 (随下一次重绘画出)
+
+        kinds 为可能变化的图元类别 (如 IncrementalGeometry.changed)，其余类别的集合
+        不重新细分、不重设数据；None 表示全部更新。
+        """
+        self.prims = prims
+        if kinds is None or "circles" in kinds:
+            c = prims.circles
+            circles = self.collections["circles"]
+            circles.set_offsets(c[:, :2])
+            circles.set_widths(2*c[:, 2])
+            circles.set_heights(2*c[:, 2])
+            self.tags["circles"] = prims.tags["circles"]
+        for kind in LINE_KINDS:
+            if kinds is None or kind in kinds:
+                self._set_lines(kind)
+        # 旧背景已过期，等重绘后再 blit
+        self.background = None
+        self._set_overlay()
+
+    def _set_lines(self, kind):
+        data = _line_data(self.prims, kind, self.spiral_tol)
+        self.lines[kind], self.tags[kind] = _join_by_tag(data, self.prims.tags[kind])
+        self.collections[kind].set_segments(self.lines[kind])
+
+    def _on_limits(self, ax):
+        tol = _screen_tolerance(ax)
+        if self.spiral_tol / 2 <= tol <= self.spiral_tol * 2:
+            return
+        self.spiral_tol = tol
+        if len(self.prims.spirals):
+            self._set_lines("spirals")
+            self._set_overlay()
+
+    def highlight(self, param):
+        """高亮属于参数 param 的图元；param 为 None 时取消高亮"""
+        self.param = param
+        self._set_overlay()
+        self._blit()
+
+    def _set_overlay(self):
+        groups = [i for i, group in enumerate(self.prims.groups) if self.param in group]
+        mask = np.isin(self.tags["circles"], groups)
+        c = self.prims.circles[mask]
+        circles = self.overlay["circles"]
+        circles.set_offsets(c[:, :2])
+        circles.set_widths(2*c[:, 2])
+        circles.set_heights(2*c[:, 2])
+        for kind in LINE_KINDS:
+            mask = np.isin(self.tags[kind], groups)
+            self.overlay[kind].set_segments([line for line, hit in zip(self.lines[kind], mask) if hit])
+
+    def _on_draw(self, event):
+        canvas = self.ax.figure.canvas
+        if hasattr(canvas, 'copy_from_bbox'):
+            self.background = canvas.copy_from_bbox(self.ax.bbox)
+            self._blit()
+
+    def _blit(self):
+        canvas = self.ax.figure.canvas
+        if self.background is None:
+            return
+        canvas.restore_region(self.background)
+        for coll in self.overlay.values():
+            self.ax.draw_artist(coll)
+        canvas.blit(self.ax.bbox)
+
+def draw_primitives(ax, prims, color='blue', lw=1.5):
+    """把 Primitives 画到 ax 上，返回 PrimitiveArtists 供高亮使用"""
+    return PrimitiveArtists(ax, prims, color, lw)
+
+def fit_view(ax, prims, pad=None):
+    """按图元包围盒设置坐标范围；pad 默认取跨度的 10% (至少 1 mm)"""
+    bounds = prims.bounds()
+    xmin, ymin, xmax, ymax = bounds if bounds is not None else (-1, -1, 1, 1)
+    if pad is None:
+        pad = max((xmax - xmin) * 0.1, (ymax - ymin) * 0.1, 1)
+    ax.set_xlim(xmin - pad, xmax + pad)
+    ax.set_ylim(ymin - pad, ymax + pad)
+
+def _biarc_nurbs(vertices, bulges):
+    """bulge 折线 -> 二次有理 B 样条 (控制点, 权重, 节点)，每段圆弧对应一段，形状完全相同"""
+    start, end, half = vertices[:-1], vertices[1:], 2 * np.arctan(bulges[:-1])
+    chord = end - start
+    left = np.column_stack((-chord[:, 1], chord[:, 0]))
+    # 中间控制点为两端切线的交点，权重 cos(圆心角/2)
+    apex = (start + end) / 2 - left / 2 * np.tan(half)[:, None]
+    points = np.empty((2 * len(start) + 1, 2))
+    points[0:-1:2], points[1::2], points[-1] = start, apex, end[-1]
+    weights = np.ones(len(points))
+    weights[1::2] = np.cos(half)
+    knots = np.concatenate(([0], np.repeat(np.arange(len(start) + 1), 2), [len(start)]))
+    return points, weights, knots
+
+def add_to_modelspace(msp, prims, spiral="arc", tol=CHORD_TOLERANCE):
+    """把 Primitives 写入 ezdxf 模型空间；矩形和折线写成 LWPOLYLINE，螺旋按 spiral 指定的写法"""
+    if spiral not in SPIRAL_MODES:
+        raise ValueError(f"未知的螺旋导出方式 / Unknown spiral mode: {spiral}")
+    for cx, cy, r in prims.circles.tolist():
+        msp.add_circle((cx, cy), r)
+    for cx, cy, r, t1, t2 in prims.arcs.tolist():
+        msp.add_arc((cx, cy), r, t1, t2)
+    for x0, y0, x1, y1 in prims.segments.tolist():
+        msp.add_line((x0, y0), (x1, y1))
+    for x, y, w, h in prims.rectangles.tolist():
+        msp.add_lwpolyline([(x, y), (x+w, y), (x+w, y+h), (x, y+h), (x, y)])
+    for points in prims.polylines():
+        msp.add_lwpolyline(points, format="xy")
+    for cx, cy, r0, pitch, turns in prims.spirals.tolist():
+        if spiral == "polyline":
+            msp.add_lwpolyline(spiral_curve((cx, cy), r0, pitch, turns, tol), format="xy")
+            continue
+        vertices, bulges = spiral_biarcs((cx, cy), r0, pitch, turns, tol)
+        if spiral == "arc":
+            msp.add_lwpolyline(np.column_stack((vertices, bulges)), format="xyb")
+        else:
+            points, weights, knots = _biarc_nurbs(vertices, bulges)
+            msp.add_rational_spline(points, weights, degree=2, knots=knots)
+
+def export_dxf(filename, prims, spiral="arc", tol=CHORD_TOLERANCE, stream=None):
+    """保存为 R2010 DXF 文件；spiral / tol 见模块说明
+
+    stream 为 True 时用 stream_dxf 流式写出，False 时经由 ezdxf 文档；None 表示
+    图元数达到 STREAM_MIN_PRIMITIVES 时才流式写出。
+    """
+    if stream is None:
+        stream = len(prims) >= STREAM_MIN_PRIMITIVES
+    if stream:
+        stream_dxf(filename, prims, spiral, tol)
+        return
+    import ezdxf
+
+    doc = ezdxf.new('R2010')
+    add_to_modelspace(doc.modelspace(), prims, spiral, tol)
+    doc.saveas(filename)
+
+#---------- 流式 DXF ----------
+STREAM_MIN_PRIMITIVES = 50_000  # export_dxf 默认改为流式写出的图元数
+STREAM_BLOCK = 8192             # 流式写出时每次格式化的图元行数
+
+_dxf_template = None
+
+def _template():
+    """空 R2010 文档在 ENTITIES 段处切开 -> (段前文本, 段后文本, 模型空间句柄, 首个空闲句柄)
+
+    表头、CLASSES、TABLES、BLOCKS 与 OBJECTS 都由 ezdxf 生成，每个进程只生成一次。
+    """
+    global _dxf_template
+    if _dxf_template is None:
+        import io
+        import ezdxf
+
+        doc = ezdxf.new('R2010')
+        buf = io.StringIO()
+        doc.write(buf)
+        text = buf.getvalue()
+        marker = "  2\nENTITIES\n"
+        start = text.index(marker) + len(marker)
+        end = text.index("  0\nENDSEC\n", start)
+        seed = int(re.search(_HANDSEED, text).group(2), 16)
+        _dxf_template = (text[:start], text[end:], doc.modelspace().layout_key, seed)
+    return _dxf_template
+
+_HANDSEED = re.compile(r"(\$HANDSEED\n  5\n)([0-9A-Fa-f]+)\n")
+_HANDSEED_FORMAT = "%016X"  # 流式写出时 $HANDSEED 的定宽写法 (前导零不影响句柄值)
+
+def _entity_format(owner, dxftype, body):
+    """实体的 % 格式串：句柄 (%X) 之后依次为 body 中的各个值"""
+    return f"  0\n{dxftype}\n  5\n%X\n330\n{owner}\n100\nAcDbEntity\n  8\n0\n{body}"
+
+def _lwpolyline(fmt, handle, points, bulges=None):
+    """一条 LWPOLYLINE 的文本；bulge 为 0 的顶点不写 42 组码 (与 ezdxf 相同)"""
+    out = [fmt % (handle, len(points))]
+    if bulges is None:
+        out += [" 10\n%r\n 20\n%r\n" % (x, y) for x, y in points.tolist()]
+    else:
+        out += [" 10\n%r\n 20\n%r\n" % (x, y) + (" 42\n%r\n" % b if b else "")
+                for (x, y), b in zip(points.tolist(), bulges.tolist())]
+    return "".join(out)
+
+def _spline(fmt, handle, points, weights, knots):
+    """一条二次有理 SPLINE 的文本 (组码顺序与 ezdxf 相同)"""
+    return "".join([fmt % (handle, len(knots), len(points))]
+                   + [" 40\n%r\n" % k for k in knots.tolist()]
+                   + [" 41\n%r\n" % w for w in weights.tolist()]
+                   + [" 10\n%r\n 20\n%r\n 30\n0.0\n" % (x, y) for x, y in points.tolist()])
+
+def stream_dxf(filename, prims, spiral="arc", tol=CHORD_TOLERANCE):
+    """流式写出 R2010 DXF：不建 ezdxf 文档，图元按块格式化后直接写入带缓冲的文件
+
+    prims 可以是一个 Primitives，也可以是逐块产出 Primitives 的可迭代对象 (如按阵列
+    单元或部件生成的生成器)，各块依次写出，用完即可释放。表头等段取自 ezdxf 生成的空文档，
+    实体的组码与 add_to_modelspace 经 ezdxf 写出的相同 (同样的顺序和数值)，可由 ezdxf 读回。
+    除写出时的 STREAM_BLOCK 行之外，内存中只有当前的一块图元。
+    """
+    if spiral not in SPIRAL_MODES:
+        raise ValueError(f"未知的螺旋导出方式 / Unknown spiral mode: {spiral}")
+    chunks = (prims,) if isinstance(prims, Primitives) else prims
+    head, tail, owner, seed = _template()
+    # 每个图元写成一个实体，句柄从 seed 起连续分配；图元总数事先未知，表头的 $HANDSEED
+    # 先写成定宽的占位值，写完实体后再回填用完后的值
+    match = _HANDSEED.search(head)
+    line = _entity_format(owner, "LINE", "100\nAcDbLine\n 10\n%r\n 20\n%r\n 30\n0.0\n"
+                                         " 11\n%r\n 21\n%r\n 31\n0.0\n")
+    circle = _entity_format(owner, "CIRCLE", "100\nAcDbCircle\n 10\n%r\n 20\n%r\n 30\n0.0\n 40\n%r\n")
+    arc = _entity_format(owner, "ARC", "100\nAcDbCircle\n 10\n%r\n 20\n%r\n 30\n0.0\n 40\n%r\n"
+                                       "100\nAcDbArc\n 50\n%r\n 51\n%r\n")
+    lwpolyline = _entity_format(owner, "LWPOLYLINE", "100\nAcDbPolyline\n 90\n%d\n 70\n0\n")
+    spline = _entity_format(owner, "SPLINE", "100\nAcDbSpline\n 70\n4\n 71\n2\n 72\n%d\n 73\n%d\n 74\n0\n")
+    handle = seed
+    with open(filename, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.write(head[:match.start(2)])
+        seed_pos = f.tell()
+        f.write(_HANDSEED_FORMAT % 0 + head[match.end(2):])
+        for chunk in chunks:
+            for fmt, rows in ((circle, chunk.circles), (arc, chunk.arcs), (line, chunk.segments)):
+                for start in range(0, len(rows), STREAM_BLOCK):
+                    block = rows[start:start + STREAM_BLOCK].tolist()
+                    f.write("".join(fmt % (h, *row) for h, row in enumerate(block, handle)))
+                    handle += len(block)
+            for start in range(0, len(chunk.rectangles), STREAM_BLOCK):
+                block = _rectangle_outlines(chunk.rectangles[start:start + STREAM_BLOCK])
+                f.write("".join(_lwpolyline(lwpolyline, h, outline) for h, outline in enumerate(block, handle)))
+                handle += len(block)
+            for points in chunk.polylines():
+                f.write(_lwpolyline(lwpolyline, handle, points))
+                handle += 1
+            for cx, cy, r0, pitch, turns in chunk.spirals.tolist():
+                if spiral == "polyline":
+                    f.write(_lwpolyline(lwpolyline, handle, spiral_curve((cx, cy), r0, pitch, turns, tol)))
+                else:
+                    vertices, bulges = spiral_biarcs((cx, cy), r0, pitch, turns, tol)
+                    if spiral == "arc":
+                        f.write(_lwpolyline(lwpolyline, handle, vertices, bulges))
+                    else:
+                        f.write(_spline(spline, handle, *_biarc_nurbs(vertices, bulges)))
+                handle += 1
+        f.write(tail)
+        f.seek(seed_pos)
+        f.write(_HANDSEED_FORMAT % handle)
@@ -0,0 +1,246 @@
+# Copyright (c) 2025 [Grant]
+# Licensed under the MIT License.
+# See LICENSE in the project root for license information.
+"""
+几何流阻参数扫描 / Geometric resistance parameter sweep
+
+对选项卡8的几何流阻与通道体积做批量扫描，支持两种模式：
+    grid  全组合网格，每个尺寸给出取值序列
+    lhs   拉丁超立方采样，每个尺寸给出取值范围
+
+按块计算 (默认每块 10^6 点)，结果逐块写入 .npy (结构化数组) 或 .npz
+(每列一个数组)，不在内存中保留整列结果。网格模式的内存占用与扫描点数无关；
+拉丁超立方模式需为每个尺寸保存一个覆盖全部点的分层排列 (int32)，内存随
+点数 × 尺寸数线性增长，10^7 点约 40 MB/尺寸。可选输出流阻曲面汇总图。
+
+尺寸写法 / Dimension specs:
+    grid: 50:500:10 (linspace)  1000:1e5:20:log (geomspace)  50,100,200 (列表)  100 (常数)
+    lhs:  50:500 (均匀)  1000:1e5:log (对数均匀)  100 (常数)
+
+用法 / Usage:
+    python Microfluid_Sweep.py RECT_MOD sweep.npz -w 20:500:200 -H 10:200:200 -l 1000,5000,10000 --plot r.png
+    python Microfluid_Sweep.py RECT sweep.npy --lhs 10000000 -w 20:500 -H 10:200 -l 1000:1e5:log --seed 1
+"""
+import argparse
+import os
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+
+import Microfluid_Batch as mb
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+LHS_JITTER_BLOCK = 1 << 16  # 分层内抖动按全局序号每这么多点播种一次，与分块大小无关
+
+def shape_dims(shape):
+    """形状代码 -> 扫描尺寸名"""
+    if shape == "CYL":
+        return ("d", "l")
+    if shape in mb.SHAPE_FUNCTIONS:
+        return ("w", "h", "l")
+    raise ValueError(f"未知形状: {shape}")
+
+def evaluate(shape, dims):
+    """对一组尺寸数组计算 (几何流阻, 体积 μL)"""
+    if shape == "CYL":
+        return mb.resistance_factor_cyl(dims["d"], dims["l"]), mb.channel_v_cyl(dims["d"], dims["l"])
+    return (mb.SHAPE_FUNCTIONS[shape](dims["w"], dims["h"], dims["l"]),
+            mb.channel_v_cub(dims["w"], dims["h"], dims["l"]))
+
+def parse_grid_spec(text):
+    """网格尺寸写法 -> 取值数组"""
+    parts = text.split(":")
+    if len(parts) == 1:
+        return np.array([float(x) for x in text.split(",")])
+    if len(parts) in (3, 4):
+        start, stop, num = float(parts[0]), float(parts[1]), int(parts[2])
+        if len(parts) == 4:
+            if parts[3] != "log":
+                raise ValueError(f"无法解析尺寸: {text}")
+            return np.geomspace(start, stop, num)
+        return np.linspace(start, stop, num)
+    raise ValueError(f"无法解析尺寸: {text}")
+
+def parse_lhs_spec(text):
+    """采样尺寸写法 -> (下限, 上限, 是否对数)"""
+    parts = text.split(":")
+    if len(parts) == 1:
+        return float(text), float(text), False
+    if len(parts) == 2 or (len(parts) == 3 and parts[2] == "log"):
+        return float(parts[0]), float(parts[1]), len(parts) == 3
+    raise ValueError(f"无法解析尺寸: {text}")
+
+class ResistanceSweep:
+    """流阻扫描：按块生成尺寸并计算流阻与体积
+
+    grid: specs 为 {尺寸: 取值数组}
+    lhs:  specs 为 {尺寸: (下限, 上限, 是否对数)}，samples 为采样点数
+    """
+
+    def __init__(self, shape, specs, mode="grid", samples=None, seed=0):
+        self.shape = shape
+        self.dims = shape_dims(shape)
+        missing = [d for d in self.dims if d not in specs]
+        if missing:
+            raise ValueError(f"缺少尺寸: {', '.join(missing)}")
+        self.mode = mode
+        self.seed = seed
+        if mode == "grid":
+            self.axes = [np.asarray(specs[d], dtype=float) for d in self.dims]
+            self.grid_shape = tuple(len(a) for a in self.axes)
+            self.size = int(np.prod(self.grid_shape))
+        elif mode == "lhs":
+            if not samples or samples <= 0:
+                raise ValueError("拉丁超立方采样需要正的采样点数")
+            self.bounds = [specs[d] for d in self.dims]
+            self.size = int(samples)
+            # 每个尺寸独立打乱分层顺序 (int32 存储，10^7 点约 40 MB/尺寸)
+            rng = np.random.default_rng(seed)
+            self._strata = [rng.permutation(self.size).astype(np.int32) for _ in self.dims]
+        else:
+            raise ValueError(f"未知扫描模式: {mode}")
+        self.columns = self.dims + ("r", "volume")
+
+    def _lhs_values(self, k, start, stop):
+        lo, hi, log = self.bounds[k]
+        # 分层内抖动按全局序号所在的固定大小块 (LHS_JITTER_BLOCK) 播种，与 --chunk-size 无关，
+        # 同一 seed 在任意分块方式下结果相同
+        first, last = start // LHS_JITTER_BLOCK, (stop - 1) // LHS_JITTER_BLOCK
+        jitter = np.concatenate([np.random.default_rng([self.seed, k, b]).random(LHS_JITTER_BLOCK)
+                                 for b in range(first, last + 1)])
+        offset = start - first * LHS_JITTER_BLOCK
+        jitter = jitter[offset:offset + stop - start]
+        u = (self._strata[k][start:stop] + jitter) / self.size
+        if log:
+            return np.exp(np.log(lo) + u * (np.log(hi) - np.log(lo)))
+        return lo + u * (hi - lo)
+
+    def chunk(self, start, stop):
+        """计算第 start..stop-1 个点，返回 {列名: 数组}"""
+        if self.mode == "grid":
+            idx = np.unravel_index(np.arange(start, stop), self.grid_shape)
+            dims = {d: axis[i] for d, axis, i in zip(self.dims, self.axes, idx)}
+        else:
+            dims = {d: self._lhs_values(k, start, stop) for k, d in enumerate(self.dims)}
+        dims["r"], dims["volume"] = evaluate(self.shape, dims)
+        return dims
+
+    def chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        for start in range(0, self.size, chunk_size):
+            yield start, self.chunk(start, min(start + chunk_size, self.size))
+
+    def run(self, path, chunk_size=DEFAULT_CHUNK_SIZE, dtype=np.float64):
+        """逐块写出结果 (.npy 为结构化数组，.npz 为每列一个数组)"""
+        if path.endswith(".npz"):
+            write_npz(path, self, chunk_size, dtype)
+        else:
+            write_npy(path, self, chunk_size, dtype)
+
+    def surface(self, n=200):
+        """汇总图用的流阻曲面：(x 轴名, x, y 轴名, y, r)，长度取中位值
+
+        圆柱体为 d × l 平面，矩形截面为 w × h 平面。
+        """
+        def axis(k):
+            if self.mode == "grid":
+                return self.axes[k]
+            lo, hi, log = self.bounds[k]
+            return np.geomspace(lo, hi, n) if log else np.linspace(lo, hi, n)
+        if self.shape == "CYL":
+            x, y = axis(0), axis(1)
+            X, Y = np.meshgrid(x, y)
+            return "d", x, "l", y, evaluate(self.shape, {"d": X, "l": Y})[0]
+        x, y, l = axis(0), axis(1), axis(2)
+        X, Y = np.meshgrid(x, y)
+        r = evaluate(self.shape, {"w": X, "h": Y, "l": np.full_like(X, np.median(l))})[0]
+        return "w", x, "h", y, r
+
+def write_npy(path, sweep, chunk_size=DEFAULT_CHUNK_SIZE, dtype=np.float64):
+    """结构化 .npy，通过内存映射逐块填充"""
+    record = np.dtype([(name, dtype) for name in sweep.columns])
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=record, shape=(sweep.size,))
+    for start, cols in sweep.chunks(chunk_size):
+        block = out[start:start + len(cols["r"])]
+        for name in sweep.columns:
+            block[name] = cols[name]
+    out.flush()
+    del out
+
+def write_npz(path, sweep, chunk_size=DEFAULT_CHUNK_SIZE, dtype=np.float64, compress=True):
+    """每列一个 .npy 成员：每块只计算一次，各列先写入临时目录中的内存映射 .npy，最后打包成 zip
+
+    内存中不保留整列；临时文件放在输出文件所在目录，约占未压缩结果的大小。
+    """
+    compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as tmp:
+        columns = {name: np.lib.format.open_memmap(os.path.join(tmp, f"{name}.npy"), mode="w+",
+                                                   dtype=dtype, shape=(sweep.size,))
+                   for name in sweep.columns}
+        for start, cols in sweep.chunks(chunk_size):
+            for name, out in columns.items():
+                out[start:start + len(cols[name])] = cols[name]
+        for out in columns.values():
+            out.flush()
+        del columns, out
+        with zipfile.ZipFile(path, "w", compression=compression, allowZip64=True) as zf:
+            if sweep.mode == "grid":
+                for name, axis in zip(sweep.dims, sweep.axes):
+                    with zf.open(f"{name}_axis.npy", "w") as f:
+                        np.lib.format.write_array(f, axis.astype(dtype))
+            for name in sweep.columns:
+                zf.write(os.path.join(tmp, f"{name}.npy"), f"{name}.npy")
+
+def plot_surface(sweep, path):
+    """保存流阻曲面汇总图 (对数色标)"""
+    from matplotlib.figure import Figure
+    from matplotlib.colors import LogNorm
+
+    xname, x, yname, y, r = sweep.surface()
+    fig = Figure(figsize=(6, 5))
+    ax = fig.add_subplot()
+    mesh = ax.pcolormesh(x, y, r, shading="auto", norm=LogNorm())
+    fig.colorbar(mesh, ax=ax, label="Resistance factor")
+    ax.set_xlabel(f"{xname} (μm)")
+    ax.set_ylabel(f"{yname} (μm)")
+    title = f"{sweep.shape}"
+    if sweep.shape != "CYL":
+        l = sweep.axes[2] if sweep.mode == "grid" else np.array(sweep.bounds[2][:2])
+        title += f", l = {np.median(l):g} μm"
+    ax.set_title(title)
+    fig.savefig(path, dpi=150, bbox_inches="tight")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="几何流阻参数扫描 / Geometric resistance sweep")
+    parser.add_argument("shape", choices=["CYL"] + sorted(mb.SHAPE_FUNCTIONS))
+    parser.add_argument("output", help="结果文件 .npy / .npz")
+    parser.add_argument("-w", "--width", help="宽度 w (μm)")
+    parser.add_argument("-H", "--height", help="高度 h (μm)")
+    parser.add_argument("-d", "--diameter", help="直径 d (μm)")
+    parser.add_argument("-l", "--length", required=True, help="长度 l (μm)")
+    parser.add_argument("--lhs", type=int, metavar="N", help="拉丁超立方采样点数 (不指定则为网格扫描)")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子 / RNG seed")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--float32", action="store_true", help="以 float32 保存 / store as float32")
+    parser.add_argument("--plot", metavar="PNG", help="保存流阻曲面汇总图 / save a summary plot")
+    args = parser.parse_args(argv)
+
+    texts = {"w": args.width, "h": args.height, "d": args.diameter, "l": args.length}
+    parse = parse_lhs_spec if args.lhs else parse_grid_spec
+    try:
+        specs = {d: parse(texts[d]) for d in shape_dims(args.shape) if texts[d] is not None}
+        sweep = ResistanceSweep(args.shape, specs, "lhs" if args.lhs else "grid", args.lhs, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+    t0 = time.perf_counter()
+    sweep.run(args.output, args.chunk_size, np.float32 if args.float32 else np.float64)
+    elapsed = time.perf_counter() - t0
+    print(f"完成 / Done: {sweep.size:,} 点 / points, {elapsed:.2f} s -> {args.output}")
+    if args.plot:
+        plot_surface(sweep, args.plot)
+        print(f"汇总图 / Summary plot -> {args.plot}")
+
+if __name__ == "__main__":
+    main()
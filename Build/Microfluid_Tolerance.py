@@ -0,0 +1,221 @@
+# Copyright (c) 2025 [Grant]
+# Licensed under the MIT License.
+# See LICENSE in the project root for license information.
+"""
+加工公差蒙特卡洛分析 / Monte-Carlo fabrication-tolerance analysis
+
+按给定分布 (正态或均匀，各尺寸相对 sigma 独立设置) 对通道尺寸抽样，
+向量化计算几何流阻，并传播到：
+    定流量 Q 下的压降 P (MPa)
+    定压 (名义尺寸下的压降) 下的流量 Q (μL/min)
+输出分位数、变异系数与各尺寸的灵敏度：
+    弹性系数  d ln r / d ln x (名义点中心差分)
+    方差贡献  ln r 对 ln x 的标准化回归系数平方 (SRC²)
+
+随机数生成器使用固定种子，结果可复现。10^6 个样本通常在 1 秒内完成。
+
+用法 / Usage:
+    python Microfluid_Tolerance.py RECT -w 100 -H 50 -l 10000 --sigma 0.05 --Q 10
+    python Microfluid_Tolerance.py RECT_MOD -w 100 -H 70 -l 5000 --sigma w=0.05 --sigma h=0.1 --dist uniform
+"""
+import argparse
+import time
+
+import numpy as np
+
+import Microfluid_Batch as mb
+from Microfluid_Sweep import shape_dims, evaluate
+
+DEFAULT_SAMPLES = 1_000_000
+DEFAULT_PERCENTILES = (1, 5, 50, 95, 99)
+DISTRIBUTIONS = ("normal", "uniform")
+
+def sample_dimensions(nominal, sigma, samples=DEFAULT_SAMPLES, dist="normal", seed=0):
+    """按相对 sigma 抽样尺寸
+
+    normal:  x = x0·(1 + sigma·z)，非正值重新抽样
+    uniform: x = x0·(1 + sigma·u)，u ∈ [-1, 1]，即 ±sigma
+    dist 可为字符串或 {尺寸: 分布}；sigma 或 dist 中有 nominal 以外的尺寸名时报错
+    """
+    unknown = set(sigma) | (set(dist) if isinstance(dist, dict) else set())
+    unknown -= set(nominal)
+    if unknown:
+        raise ValueError(f"没有尺寸 / unknown dimension: {', '.join(sorted(unknown))} "
+                         f"(可用 / available: {', '.join(nominal)})")
+    rng = np.random.default_rng(seed)
+    out = {}
+    for name, x0 in nominal.items():
+        s = sigma.get(name, 0.0)
+        kind = dist.get(name, "normal") if isinstance(dist, dict) else dist
+        if kind not in DISTRIBUTIONS:
+            raise ValueError(f"未知分布: {kind}")
+        if s <= 0:
+            out[name] = np.full(samples, float(x0))
+            continue
+        if kind == "uniform":
+            if s >= 1:
+                raise ValueError("均匀分布的相对公差必须小于 1")
+            out[name] = x0 * (1 + s * rng.uniform(-1.0, 1.0, samples))
+            continue
+        x = x0 * (1 + s * rng.standard_normal(samples))
+        bad = x <= 0
+        while bad.any():
+            x[bad] = x0 * (1 + s * rng.standard_normal(int(bad.sum())))
+            bad = x <= 0
+        out[name] = x
+    return out
+
+def elasticities(shape, nominal, rel_step=1e-6):
+    """名义点处各尺寸的弹性系数 d ln r / d ln x"""
+    out = {}
+    for name in shape_dims(shape):
+        up = dict(nominal)
+        down = dict(nominal)
+        up[name] = nominal[name] * (1 + rel_step)
+        down[name] = nominal[name] * (1 - rel_step)
+        r_up = evaluate(shape, up)[0]
+        r_down = evaluate(shape, down)[0]
+        out[name] = float(np.log(r_up / r_down) / np.log((1 + rel_step) / (1 - rel_step)))
+    return out
+
+def variance_shares(samples, r):
+    """ln r 对 ln x 线性回归的标准化系数平方 (SRC²)，各尺寸对方差的近似贡献"""
+    names = [n for n, x in samples.items() if np.ptp(x) > 0]
+    if not names:
+        return {}
+    y = np.log(r)
+    X = np.column_stack([np.log(samples[n]) for n in names])
+    X -= X.mean(axis=0)
+    coef = np.linalg.lstsq(X, y - y.mean(), rcond=None)[0]
+    src2 = (coef * X.std(axis=0) / y.std()) ** 2
+    return dict(zip(names, src2.tolist()))
+
+class ToleranceResult:
+    """蒙特卡洛结果：样本尺寸、流阻、定流量压降、定压流量"""
+    __slots__ = ("shape", "nominal", "samples", "r", "P", "Q", "r_nominal", "P_nominal", "Q_nominal")
+
+    def __init__(self, shape, nominal, samples, r, P, Q, r_nominal, P_nominal, Q_nominal):
+        self.shape = shape
+        self.nominal = nominal
+        self.samples = samples
+        self.r = r
+        self.P = P
+        self.Q = Q
+        self.r_nominal = r_nominal
+        self.P_nominal = P_nominal
+        self.Q_nominal = Q_nominal
+
+    def percentiles(self, q=DEFAULT_PERCENTILES):
+        """{量: {分位: 值}}，量为 r / P / Q"""
+        return {name: dict(zip(q, np.percentile(values, q).tolist()))
+                for name, values in (("r", self.r), ("P", self.P), ("Q", self.Q))}
+
+    def cv(self):
+        """变异系数 std/mean"""
+        return {name: float(values.std() / values.mean())
+                for name, values in (("r", self.r), ("P", self.P), ("Q", self.Q))}
+
+    def sensitivity(self):
+        """(弹性系数, 方差贡献)"""
+        return elasticities(self.shape, self.nominal), variance_shares(self.samples, self.r)
+
+    def report(self, q=DEFAULT_PERCENTILES):
+        """文本报告"""
+        pct = self.percentiles(q)
+        cv = self.cv()
+        lines = [f"形状 Shape: {self.shape}, 样本数 Samples: {len(self.r):,}",
+                 "名义尺寸 Nominal: " + ", ".join(f"{k}={v:g}μm" for k, v in self.nominal.items())]
+        header = "".join(f"{f'P{p:g}':>14}" for p in q)
+        lines.append(f"{'':<22}{'名义 Nominal':>14}{header}{'CV':>10}")
+        rows = (("r", "几何流阻 r", self.r_nominal, "{:14.6e}"),
+                ("P", "压降 P (MPa)", self.P_nominal, "{:14.6e}"),
+                ("Q", "流量 Q (μL/min)", self.Q_nominal, "{:14.6f}"))
+        for key, label, nom, fmt in rows:
+            values = "".join(fmt.format(pct[key][p]) for p in q)
+            lines.append(f"{label:<22}{fmt.format(nom)}{values}{cv[key]:10.2%}")
+        elastic, shares = self.sensitivity()
+        lines.append("灵敏度 Sensitivity (d ln r / d ln x, 方差贡献 SRC²):")
+        for name in elastic:
+            share = f"{shares[name]:.1%}" if name in shares else "-"
+            lines.append(f"  {name}: {elastic[name]:+.3f}, {share}")
+        return "\n".join(lines)
+
+def tolerance_analysis(shape, nominal, sigma, Q=None, P=None, mu=1.005, samples=DEFAULT_SAMPLES,
+                       dist="normal", seed=0):
+    """蒙特卡洛公差分析
+
+    nominal: 名义尺寸 {w, h, l} 或 {d, l} (μm)
+    sigma: 相对公差 {尺寸: sigma}，未列出的尺寸不变；不属于该形状的尺寸名报错
+    Q / P: 名义工作点，给定流量 (μL/min) 或给定压降 (MPa)，二选一
+    """
+    dims = shape_dims(shape)
+    missing = [d for d in dims if d not in nominal]
+    if missing:
+        raise ValueError(f"缺少尺寸: {', '.join(missing)}")
+    unknown = set(sigma) | (set(dist) if isinstance(dist, dict) else set())
+    unknown -= set(dims)
+    if unknown:
+        raise ValueError(f"{shape} 没有尺寸 / has no dimension: {', '.join(sorted(unknown))} "
+                         f"(可用 / available: {', '.join(dims)})")
+    nominal = {d: float(nominal[d]) for d in dims}
+    if any(v <= 0 for v in nominal.values()):
+        raise ValueError("参数必须为正数")
+    r_nominal = float(evaluate(shape, nominal)[0])
+    unit = mb.resistance_to_pressure(1.0, r_nominal, mu)  # 名义通道单位流量的压降
+    if Q is not None:
+        Q_nominal, P_nominal = float(Q), float(Q * unit)
+    elif P is not None:
+        Q_nominal, P_nominal = float(P / unit), float(P)
+    else:
+        raise ValueError("需要流量 Q 或压降 P")
+
+    x = sample_dimensions(nominal, sigma, samples, dist, seed)
+    r = evaluate(shape, x)[0]
+    ratio = r / r_nominal
+    return ToleranceResult(shape, nominal, x, r, P_nominal * ratio, Q_nominal / ratio,
+                           r_nominal, P_nominal, Q_nominal)
+
+def _parse_sigma(items, dims):
+    sigma = {}
+    for item in items:
+        name, sep, value = item.partition("=")
+        if sep:
+            sigma[name] = float(value)
+        else:
+            # 未指定尺寸时作用于截面尺寸 (长度通常由掩膜精确决定)
+            sigma.update({d: float(item) for d in dims if d != "l"})
+    return sigma
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="加工公差蒙特卡洛分析 / Monte-Carlo tolerance analysis")
+    parser.add_argument("shape", choices=["CYL"] + sorted(mb.SHAPE_FUNCTIONS))
+    parser.add_argument("-w", "--width", type=float)
+    parser.add_argument("-H", "--height", type=float)
+    parser.add_argument("-d", "--diameter", type=float)
+    parser.add_argument("-l", "--length", type=float, required=True)
+    parser.add_argument("--sigma", action="append", default=[], metavar="[DIM=]SIGMA",
+                        help="相对公差，如 0.05 (所有截面尺寸) 或 h=0.1")
+    parser.add_argument("--dist", choices=DISTRIBUTIONS, default="normal")
+    parser.add_argument("--Q", type=float, help="名义流量 (μL/min)")
+    parser.add_argument("--P", type=float, help="名义压降 (MPa)")
+    parser.add_argument("--mu", type=float, default=1.005, help="粘度 (10^-3 Pa·s)")
+    parser.add_argument("-n", "--samples", type=int, default=DEFAULT_SAMPLES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    dims = shape_dims(args.shape)
+    values = {"w": args.width, "h": args.height, "d": args.diameter, "l": args.length}
+    nominal = {d: values[d] for d in dims if values[d] is not None}
+    try:
+        t0 = time.perf_counter()
+        res = tolerance_analysis(args.shape, nominal, _parse_sigma(args.sigma, dims),
+                                 args.Q, args.P if args.Q is None else None, args.mu,
+                                 args.samples, args.dist, args.seed)
+        elapsed = time.perf_counter() - t0
+    except ValueError as e:
+        parser.error(str(e))
+    print(res.report())
+    print(f"用时 Elapsed: {elapsed:.3f} s")
+
+if __name__ == "__main__":
+    main()
@@ -1,124 +1,25 @@
 # Copyright (c) 2025 [Grant]
 # Licensed under the MIT License.
 # See LICENSE in the project root for license information.
-import tkinter as tk
-from tkinter import ttk
-
-import math
-
-#---------- 1. 液滴转换器函数 ----------
-
-def droplet_d_to_v(d):
-    """直径(μm) -> 体积(nL)"""
-
-    return 4/3e6 * math.pi * (d/2)**3
-
-def droplet_v_to_d(v):
-
-    """体积(nL) -> 直径(μm)"""
-    return 100 * (3/4/math.pi*v)**(1/3) * 2
-
-#---------- 2. 流量转换计算器函数 ----------
-
-def mass_to_quantity(mass, time, density=1e6):
-    """质量转流量"""
-    Q = mass / time / density / 60  # m³/s
-    q = Q * 60 * 1e9  # μL/min
-
-    return Q, q
-
-def quantity_to_velocity(Q, w, h=None, d=None, shape="rect"):
-
-    """流量转速度"""
-
-    if shape == "rect":
-
-        v = Q / 60 / w / h * 1000
-
-    else:  # 圆柱
-
-        v = Q / 60 / (math.pi * (d/2)**2) * 1000
-
-    return v
-
-def velocity_to_quantity(v, w, h=None, d=None, shape="rect"):
-    """速度转流量"""
-    if shape == "rect":
-        Q = v * w * h * 60 / 1000  # μL/min
-
-    else:  # 圆柱
-        Q = v * math.pi * (d/2)**2 * 60 / 1000  # μL/min
-
-    return Q
-
-def quantity_to_mass(Q, time, density=1e6):
-
-    """流量转质量"""
-
-    Q_m3_s = Q / 60 / 1e9  # μL/min → m³/s
-
-    mass = Q_m3_s * density * 60 * time  # g
-
-    return mass
-
-def resistance_to_pressure(Q, resistance_factor, mu=1.005):
-    """几何流阻系数转压力"""
-
-    P = Q * resistance_factor * mu * 1e-6 * (1/60) * 1e-9 * 1e18 /100000
-    return P
-
-def pressure_to_resistance(P, Q, mu=1.005):
-    """压力转几何流阻系数"""
-
-    resistance_factor = P / (Q * mu * 1e-6 * (1/60) * 1e-9 * 1e18 * 1e-3)*100
-
-    return resistance_factor
-
-#---------- 3. 几何流阻计算器函数 ----------
-def resistance_factor_cyl(d, l):
-    """计算圆柱体(CYL)的几何流阻系数"""
-    return 128 * l / (math.pi * d**4)
-
-def resistance_factor_rect(w, h, l):
-    """计算矩形(RECT)的几何流阻系数"""
-    a = max(w, h)
-    b = min(w, h)
-
-    return 12 * l / (a * b**3) / (1 - 0.63 * (b/a))
-
-def resistance_factor_squa(w, h, l):
-    """计算方形(SQUA)的几何流阻系数"""
-
-    a = max(w, h)
-    b = min(w, h)
-
-    a = (a + b) / 2
-
-    return 28 * l * a**(-4)
-
-def resistance_factor_rect_mod(w, h, l):
-
-    """计算改进矩形(RECT_MOD)的几何流阻系数"""
-    a = max(w, h)
-
-    b = min(w, h)
-    if a > 1.3 * b:
-
-        return 12 * l / (a * b**3) / (1 - 0.63 * (b/a))
-
-    else:
-        a = (a + b) / 2
-        return 28 * l * a**(-4)
+import sys
+import time
 
-def channel_v_cyl(d, l):
-    """计算圆柱体微通道体积(μL)"""
+_START_TIME = time.perf_counter()  # 启动计时起点 (含 tkinter 导入)
 
-    return d * d * l * math.pi * 0.25 * 1e-9
-
-def channel_v_cub(w, h, l):
-    """计算立方体微通道体积(μL)"""
+import tkinter as tk
+from tkinter import ttk
 
-    return w * h * l * 1e-9
+from Microfluid_Core import (
+    INPUT_ERROR, GEO_SHAPE_LABELS, GEO_DEFAULT_VALUES, geo_shape_code,
+    MassToFlowRequest, FlowToMassRequest, FlowToVelocityRequest, VelocityToFlowRequest,
+    ResistanceToPressureRequest, PressureToResistanceRequest, DropletRequest,
+    GeometricResistanceRequest,
+    # 计算函数保留在本模块命名空间中，兼容旧的导入方式
+    droplet_d_to_v, droplet_v_to_d, mass_to_quantity, quantity_to_velocity,
+    velocity_to_quantity, quantity_to_mass, resistance_to_pressure, pressure_to_resistance,
+    resistance_factor_cyl, resistance_factor_rect, resistance_factor_squa,
+    resistance_factor_rect_mod, resistance_factor_rect_exact, channel_v_cyl, channel_v_cub,
+)
 
 class MicrofluidCalculatorApp:
     def __init__(self, root):
@@ -156,10 +57,13 @@ class MicrofluidCalculatorApp:
             self.tab_control.add(self.tabs[i], text=name)
         
         self.tab_control.pack(expand=1, fill="both")
-        
-        # 设置各选项卡
 
-        self.setup_tabs()
+        # 选项卡在首次选中时才创建并执行初始计算
+        self.tab_builders = [self.setup_tab1, self.setup_tab2, self.setup_tab3, self.setup_tab4,
+                             self.setup_tab5, self.setup_tab6, self.setup_tab7, self.setup_tab8]
+        self.built_tabs = set()
+        self.tab_control.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.build_tab(self.tab_control.index("current"))
 
         # 添加版权标签 - 在这里添加
 
@@ -208,21 +112,21 @@ class MicrofluidCalculatorApp:
             history_labels[i].config(text=f"{i+1}. {record}")
 
     
-    def setup_tabs(self):
-        """设置所有选项卡"""
-
-        self.setup_tab1()  # 质量→流量
+    def build_tab(self, index):
+        """创建选项卡内容 (每个选项卡只创建一次)"""
+        if index not in self.built_tabs:
+            self.built_tabs.add(index)
+            self.tab_builders[index]()
 
-        self.setup_tab2()  # 流量→质量
+    def on_tab_changed(self, event):
+        """切换选项卡时按需创建"""
+        self.build_tab(self.tab_control.index("current"))
 
-        self.setup_tab3()  # 流量→速度
-        self.setup_tab4()  # 速度→流量
-        self.setup_tab5()  # 流阻→压力
-
-        self.setup_tab6()  # 压力→流阻
-        self.setup_tab7()  # 液滴转换器
+    def setup_tabs(self):
+        """设置所有选项卡 (一次性全部创建)"""
+        for index in range(len(self.tab_builders)):
+            self.build_tab(index)
 
-        self.setup_tab8()  # 几何流阻计算
 
     
     def setup_tab1(self):
@@ -640,26 +544,16 @@ class MicrofluidCalculatorApp:
 
     
         # 预填充默认值
-        self.default_values = {
-
-            "CYL": {"d": 100, "l": 1000},
-
-            "RECT": {"w": 100, "h": 50, "l": 1000},
-
-            "SQUA": {"w": 100, "h": 100, "l": 1000},
-
-            "RECT_MOD": {"w": 100, "h": 70, "l": 1000}
-
-        }
+        self.default_values = GEO_DEFAULT_VALUES
         
         # 形状选择
 
         ttk.Label(frame, text="选择形状:").grid(column=0, row=1, sticky=tk.W, pady=5)
         
         self.shape_var = tk.StringVar()
-        self.shape_combo = ttk.Combobox(frame, textvariable=self.shape_var, width=15, state="readonly")
+        self.shape_combo = ttk.Combobox(frame, textvariable=self.shape_var, width=20, state="readonly")
 
-        self.shape_combo['values'] = ('CYL (圆柱体)', 'RECT (矩形)', 'SQUA (方形)', 'RECT_MOD (改进矩形)')
+        self.shape_combo['values'] = GEO_SHAPE_LABELS
 
         self.shape_combo.grid(column=1, row=1, columnspan=2, sticky=tk.W, pady=5)
         self.shape_combo.bind('<<ComboboxSelected>>', self.on_shape_select)
@@ -771,9 +665,7 @@ class MicrofluidCalculatorApp:
     
     def on_shape_select(self, event):
         """处理形状选择"""
-        shape_full = self.shape_var.get()
-
-        shape = shape_full.split()[0] if shape_full else "CYL"
+        shape = geo_shape_code(self.shape_var.get())
 
         
         # 切换输入框
@@ -844,334 +736,133 @@ class MicrofluidCalculatorApp:
         self.calculate_droplet()
 
     
-    def format_volume_result(self, volume_nl):
-        """格式化体积结果，小于1nL时转为pL"""
-        if volume_nl < 1:
-            # 转换为pL
-            volume_pl = volume_nl * 1000
-            self.result_label.config(text=f"{volume_pl:.4f}")
-
-            self.output_label.config(text="体积Volume(pL):")
-
-        else:
-            self.result_label.config(text=f"{volume_nl:.4f}")
-            self.output_label.config(text="体积Volume(nL):")
-    
     def calculate_droplet(self):
-
         """执行液滴转换计算"""
         try:
-            input_value = float(self.input_entry.get())
-            
-            if self.current_mode == "d_to_v":
-                result = droplet_d_to_v(input_value)
-                self.format_volume_result(result)
-                
-                # 添加到历史记录
-
-                if result < 1:
-                    record = f"直径 {input_value:.2f} μm → 体积 {result*1000:.4f} pL"
-                else:
-                    record = f"直径 {input_value:.2f} μm → 体积 {result:.4f} nL"
+            res = DropletRequest.from_text(value=self.input_entry.get(), mode=self.current_mode).solve()
+            self.result_label.config(text=res.result_text)
+            self.output_label.config(text=res.output_label)
 
-            else:
-                result = droplet_v_to_d(input_value)
-
-                self.result_label.config(text=f"{result:.4f}")
-                
-                # 添加到历史记录
-                record = f"体积 {input_value:.4f} nL → 直径 {result:.2f} μm"
-            
             # 更新历史记录
-            self.history["tab7"].insert(0, record)
-
+            self.history["tab7"].insert(0, res.history)
             if len(self.history["tab7"]) > 5:
                 self.history["tab7"].pop()
-
-            
             for i, label in enumerate(self.history_labels_tab7):
                 if i < len(self.history["tab7"]):
                     label.config(text=self.history["tab7"][i])
-
                 else:
                     label.config(text="")
-                    
         except ValueError:
-            self.result_label.config(text="输入错误")
-    
+            self.result_label.config(text=INPUT_ERROR)
+
     def calculate_quantity(self):
         """计算流量"""
         try:
-            mass = float(self.mass_entry.get())
-            time = float(self.time_m2q_entry.get())
-            density = float(self.density_m2q_entry.get())
-
-            
-            if mass <= 0 or time <= 0 or density <= 0:
-
-                raise ValueError()
-                
-            Q, q = mass_to_quantity(mass, time, density)
-
-            
-            self.Q_var.set(f"{Q:.6e}")
-            self.q_var.set(f"{q:.4f}")
-            
-            # 添加到历史记录
-            history_entry = f"质量: {mass}g, 时间: {time}min → 流量: {q:.4f}μL/min"
-            self.add_to_history("tab1", history_entry)
-            
+            res = MassToFlowRequest.from_text(
+                mass=self.mass_entry.get(),
+                time=self.time_m2q_entry.get(),
+                density=self.density_m2q_entry.get(),
+            ).solve()
+            self.Q_var.set(res.Q_text)
+            self.q_var.set(res.q_text)
+            self.add_to_history("tab1", res.history)
         except ValueError:
-            self.Q_var.set("输入错误")
-
-            self.q_var.set("输入错误")
+            self.Q_var.set(INPUT_ERROR)
+            self.q_var.set(INPUT_ERROR)
 
-    
     def calculate_velocity(self):
-
         """计算流速"""
         try:
-            Q = float(self.Q_entry.get())
-
             shape = self.q2v_shape_var.get()
-            
-            if Q <= 0:
-
-                raise ValueError()
-                
             if shape == "rect":
-                # 修改变量引用以使用新的变量名
-                w = float(self.width_q2v_entry.get())
-                h = float(self.height_q2v_entry.get())
-
-                if w <= 0 or h <= 0:
-
-                    raise ValueError()
-                v = quantity_to_velocity(Q, w, h, shape="rect")
-                
-                # 添加到历史记录
-                history_entry = f"流量: {Q}μL/min, 矩形 {w}×{h}μm → 速度: {v:.6f}m/s"
-
+                dims = {"w": self.width_q2v_entry.get(), "h": self.height_q2v_entry.get()}
             else:
-                d = float(self.diameter_q2v_entry.get())
-
-                if d <= 0:
-
-                    raise ValueError()
-                v = quantity_to_velocity(Q, None, None, d, shape="cyl")
-                
-                # 添加到历史记录
-
-                history_entry = f"流量: {Q}μL/min, 圆柱 Φ{d}μm → 速度: {v:.6f}m/s"
-            
-            self.v_var.set(f"{v:.6f}")
-
-            self.add_to_history("tab3", history_entry)
-            
+                dims = {"d": self.diameter_q2v_entry.get()}
+            res = FlowToVelocityRequest.from_text(Q=self.Q_entry.get(), shape=shape, **dims).solve()
+            self.v_var.set(res.v_text)
+            self.add_to_history("tab3", res.history)
         except ValueError:
-            self.v_var.set("输入错误")
+            self.v_var.set(INPUT_ERROR)
 
-    
     def calculate_flow_from_velocity(self):
-
         """计算速度→流量"""
-
         try:
-            v = float(self.v_entry.get())
-
             shape = self.v2q_shape_var.get()
-            
-            if v <= 0:
-
-                raise ValueError()
-                
             if shape == "rect":
-
-                w = float(self.width_v2q_entry.get())
-
-                h = float(self.height_v2q_entry.get())
-                if w <= 0 or h <= 0:
-
-                    raise ValueError()
-                Q = velocity_to_quantity(v, w, h, shape="rect")
-
-                
-                # 添加到历史记录
-
-                history_entry = f"速度: {v}m/s, 矩形 {w}×{h}μm → 流量: {Q:.4f}μL/min"
-
+                dims = {"w": self.width_v2q_entry.get(), "h": self.height_v2q_entry.get()}
             else:
-                d = float(self.diameter_v2q_entry.get())
-                if d <= 0:
-                    raise ValueError()
-
-                Q = velocity_to_quantity(v, None, None, d, shape="cyl")
-                
-                # 添加到历史记录
-
-                history_entry = f"速度: {v}m/s, 圆柱 Φ{d}μm → 流量: {Q:.4f}μL/min"
-
-            
-            self.flow_var.set(f"{Q:.4f}")
-
-            self.add_to_history("tab4", history_entry)
-            
+                dims = {"d": self.diameter_v2q_entry.get()}
+            res = VelocityToFlowRequest.from_text(v=self.v_entry.get(), shape=shape, **dims).solve()
+            self.flow_var.set(res.Q_text)
+            self.add_to_history("tab4", res.history)
         except ValueError:
-            self.flow_var.set("输入错误")
+            self.flow_var.set(INPUT_ERROR)
 
-    
     def calculate_mass(self):
         """计算质量"""
         try:
-            Q = float(self.Q_q2m_entry.get())
-            time = float(self.time_q2m_entry.get())
-
-            density = float(self.density_q2m_entry.get())
-            
-            if Q <= 0 or time <= 0 or density <= 0:
-
-                raise ValueError()
-                
-            mass = quantity_to_mass(Q, time, density)
-            
-            self.mass_var.set(f"{mass:.4f}")
-            
-            # 添加到历史记录
-            history_entry = f"流量: {Q}μL/min, 时间: {time}min → 质量: {mass:.4f}g"
-            self.add_to_history("tab2", history_entry)
-            
+            res = FlowToMassRequest.from_text(
+                Q=self.Q_q2m_entry.get(),
+                time=self.time_q2m_entry.get(),
+                density=self.density_q2m_entry.get(),
+            ).solve()
+            self.mass_var.set(res.mass_text)
+            self.add_to_history("tab2", res.history)
         except ValueError:
-            self.mass_var.set("输入错误")
+            self.mass_var.set(INPUT_ERROR)
 
-    
     def calculate_pressure(self):
-
         """计算压力"""
-
         try:
-            Q = float(self.Q_r2p_entry.get())
-            resistance_factor = float(self.resistance_entry.get())
-
-            mu = float(self.mu_r2p_entry.get())
-
-            
-            if Q <= 0 or resistance_factor <= 0 or mu <= 0:
-
-                raise ValueError()
-                
-            P = resistance_to_pressure(Q, resistance_factor, mu)
-
-            
-            self.pressure_var.set(f"{P:.6f}")
-            
-            # 添加到历史记录
-
-            history_entry = f"流量: {Q}μL/min, 几何流阻系数: {resistance_factor} → 压力: {P:.6f}MPa"
-            self.add_to_history("tab5", history_entry)
-
-            
+            res = ResistanceToPressureRequest.from_text(
+                Q=self.Q_r2p_entry.get(),
+                resistance_factor=self.resistance_entry.get(),
+                mu=self.mu_r2p_entry.get(),
+            ).solve()
+            self.pressure_var.set(res.P_text)
+            self.add_to_history("tab5", res.history)
         except ValueError:
-            self.pressure_var.set("输入错误")
-    
+            self.pressure_var.set(INPUT_ERROR)
+
     def calculate_resistance_factor(self):
         """计算几何流阻系数"""
-
         try:
-            P = float(self.pressure_p2r_entry.get())
-
-            Q = float(self.Q_p2r_entry.get())
-
-            mu = float(self.mu_p2r_entry.get())
-
-            
-            if P <= 0 or Q <= 0 or mu <= 0:
-                raise ValueError()
-                
-            resistance_factor = pressure_to_resistance(P, Q, mu)
-
-            
-            self.resistance_factor_var.set(f"{resistance_factor:.6f}")
-            
-            # 添加到历史记录
-
-            history_entry = f"压力: {P}MPa, 流量: {Q}μL/min → 几何流阻: {resistance_factor:.6f}"
-
-            self.add_to_history("tab6", history_entry)
-
-            
+            res = PressureToResistanceRequest.from_text(
+                P=self.pressure_p2r_entry.get(),
+                Q=self.Q_p2r_entry.get(),
+                mu=self.mu_p2r_entry.get(),
+            ).solve()
+            self.resistance_factor_var.set(res.resistance_factor_text)
+            self.add_to_history("tab6", res.history)
         except ValueError:
+            self.resistance_factor_var.set(INPUT_ERROR)
 
-            self.resistance_factor_var.set("输入错误")
-
-    
     def calculate_resistance_factor_geo(self):
-
         """计算几何形状的流阻系数"""
-        shape_full = self.shape_var.get()
-        shape = shape_full.split()[0] if shape_full else "CYL"
-        
+        shape = geo_shape_code(self.shape_var.get())
         try:
             if shape == 'CYL':
-                # 修改变量引用以使用新的变量名
-                d = float(self.diameter_geo_entry.get())
-                l = float(self.length_cyl_geo_entry.get())
-
-                
-                if d <= 0 or l <= 0:
-
-                    raise ValueError("参数必须为正数")
-                    
-                r = resistance_factor_cyl(d, l)
-                v = channel_v_cyl(d, l)
-                
-                # 添加到历史记录
-
-                history_entry = f"圆柱体: Φ{d}μm × {l}μm → 几何流阻: {r:.6e}"
-
-                
+                dims = {"d": self.diameter_geo_entry.get(), "l": self.length_cyl_geo_entry.get()}
             else:
-                # 修改变量引用以使用新的变量名
-
-                w = float(self.width_geo_entry.get())
-
-                h = float(self.height_geo_entry.get())
-
-                l = float(self.length_rect_geo_entry.get())
-
-                
-                if w <= 0 or h <= 0 or l <= 0:
-                    raise ValueError("参数必须为正数")
-
-                
-                v = channel_v_cub(w, h, l)
-
-                
-                if shape == 'RECT':
+                dims = {"w": self.width_geo_entry.get(), "h": self.height_geo_entry.get(),
+                        "l": self.length_rect_geo_entry.get()}
+            res = GeometricResistanceRequest.from_text(shape=shape, **dims).solve()
 
-                    r = resistance_factor_rect(w, h, l)
-
-                    history_entry = f"矩形: {w}×{h}×{l}μm → 几何流阻: {r:.6e}"
-
-                elif shape == 'SQUA':
-                    r = resistance_factor_squa(w, h, l)
-
-                    history_entry = f"方形: {w}×{h}×{l}μm → 几何流阻: {r:.6e}"
-
-                elif shape == 'RECT_MOD':
-                    r = resistance_factor_rect_mod(w, h, l)
-                    history_entry = f"改进矩形: {w}×{h}×{l}μm → 几何流阻: {r:.6e}"
-
-            
             # 显示结果
-            self.r_result_var.set(f"{r:.6e}")
-            self.volume_var.set(f"{v:.6f}")
-            
-            self.add_to_history("tab8", history_entry)
-            
+            self.r_result_var.set(res.r_text)
+            self.volume_var.set(res.volume_text)
+            self.add_to_history("tab8", res.history)
         except ValueError:
-            self.r_result_var.set("输入错误")
+            self.r_result_var.set(INPUT_ERROR)
+            self.volume_var.set(INPUT_ERROR)
 
-            self.volume_var.set("输入错误")
+# 启动时间预算 (秒)，python Microfluid_Tools.py --startup-check [秒] 用于检查
+STARTUP_BUDGET = 1.0
+
+def startup_time(root):
+    """处理完待绘制事件 (窗口显示) 后，距模块开始导入的时间 (秒)"""
+    root.update()
+    return time.perf_counter() - _START_TIME
 
 # 运行应用
 
@@ -1181,4 +872,12 @@ if __name__ == "__main__":
 
     app = MicrofluidCalculatorApp(root)
 
+    if "--startup-check" in sys.argv:
+        i = sys.argv.index("--startup-check")
+        budget = float(sys.argv[i + 1]) if len(sys.argv) > i + 1 else STARTUP_BUDGET
+        elapsed = startup_time(root)
+        root.destroy()
+        print(f"启动时间 Startup: {elapsed:.3f} s (预算 Budget: {budget:.3f} s)")
+        sys.exit(0 if elapsed <= budget else 1)
+
     root.mainloop()
@@ -1,17 +1,16 @@
 # Copyright (c) 2025 [Grant]
 # Licensed under the MIT License.
 # See LICENSE in the project root for license information.
-import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import matplotlib.patches as mpatches
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import ezdxf
-import math
 import json
 from datetime import datetime
 
+from Microfluid_Geometry import IncrementalGeometry, ParamSnapshot
+from Microfluid_Render import draw_primitives, fit_view, export_dxf
+
 class MicrochannelTool:
     def __init__(self, master):
         self.master = master
@@ -57,8 +56,11 @@ class MicrochannelTool:
         # --- Unchanged UI and Plotting Initialization ---
         self.bigFont = ('Helvetica', 12)
         self.headerFont = ('Helvetica', 12, 'bold')
-        self.fig, self.ax = plt.subplots(figsize=(8, 6))
-        self.geoPatch = {k: [] for k in self.params}
+        self.fig = Figure(figsize=(8, 6))
+        self.ax = self.fig.add_subplot()
+        self.geoArtists = None
+        self.geometry = IncrementalGeometry("Mixer")
+        self.snapshot = ParamSnapshot("Mixer")
         self.stsVar = tk.StringVar(value="就绪 / Ready")
         self.curHlt = None
         self.entries = {}
@@ -131,171 +133,44 @@ class MicrochannelTool:
             self.params[param].set(str(self.defaults[param]))
             messagebox.showerror("错误 / Error", f"无效的数值 / Invalid number: {e}")
 
-    def getParam(self, name):
-        # --- Updated for the new calculated parameter and Angle conversion ---
-        try:
-            if name == "Distance_h":
-                radius_1 = float(self.params["Radius_1"].get())
-                width_r1 = float(self.params["Width_r1"].get())
-                v = radius_1**2 - (width_r1 / 2)**2
-                if v < 0:
-                    raise ValueError("Radius_1 must be >= Width_r1 / 2")
-                return radius_1 - math.sqrt(v)
-            elif name == "Angle":
-                return math.radians(float(self.params["Angle"].get()))
-            else:
-                return float(self.params[name].get())
-        except (ValueError, tk.TclError) as e:
-            messagebox.showerror("参数错误 / Parameter Error", f"无法计算参数'{name}': {e}\n将使用默认值. / Could not calculate parameter '{name}': {e}\nUsing default value.")
-            if name in self.defaults:
-                self.params[name].set(str(self.defaults[name]))
-                return self.defaults[name]
-            else:
-                return 0.0
+    def paramValues(self):
+        """界面参数 -> 数值映射，作为几何内核的输入；无法解析的值恢复为默认值"""
+        values = {}
+        for name, var in self.params.items():
+            try:
+                values[name] = float(var.get())
+            except (ValueError, tk.TclError):
+                messagebox.showerror("参数错误 / Parameter Error", f"无法解析参数'{name}'\n将使用默认值.")
+                var.set(str(self.defaults[name]))
+                values[name] = self.defaults[name]
+        return values
 
     def highlightComponent(self, paramName):
         # --- This section remains unchanged ---
         self.curHlt = paramName
-        for patches in self.geoPatch.values():
-            for patch in patches:
-                if hasattr(patch, 'set_edgecolor'):
-                    patch.set_edgecolor('blue')
-                elif hasattr(patch, 'set_color'):
-                    patch.set_color('blue')
-        if paramName in self.geoPatch:
-            for patch in self.geoPatch[paramName]:
-                if hasattr(patch, 'set_edgecolor'):
-                    patch.set_edgecolor('red')
-                elif hasattr(patch, 'set_color'):
-                    patch.set_color('red')
-        self.canvas.draw()
+        if self.geoArtists is not None:
+            self.geoArtists.highlight(paramName)
         self.stsVar.set(f"已选择 / Selected: {paramName}")
 
     def calculateGeometry(self):
-        # ----------------- REPLACED GEOMETRY CALCULATION ------------------
-        # This method is entirely replaced with the new trapezoidal chamber logic.
-        Distance_r1 = self.getParam("Distance_r1")
-        Width_r1 = self.getParam("Width_r1")
-        Radius_1 = self.getParam("Radius_1")
-        Number = int(self.getParam("Number"))
-        Length_1 = self.getParam("Length_1")
-        Distance_r2 = self.getParam("Distance_r2")
-        Length_r1 = self.getParam("Length_r1")
-        Angle = self.getParam("Angle") # Already in radians
-        Distance_h = self.getParam("Distance_h") # Calculated
-
-        circles = []
-        segments = []
-
-        # Circle 1
-        circles.append(((0, 0), Radius_1))
-
-        # Inlet Channel (Segments 1 & 2)
-        segments.append(((Radius_1 - Distance_h, -Width_r1 / 2), (Radius_1 + Distance_r1, -Width_r1 / 2)))
-        segments.append(((Radius_1 - Distance_h,  Width_r1 / 2), (Radius_1 + Distance_r1,  Width_r1 / 2)))
-
-        # Chamber Array
-        # Calculate the width of a single chamber unit including spacing
-        chamber_unit_width = 2 * Length_1 * math.cos(Angle) + Length_r1 + Distance_r2
-        
-        for i in range(Number):
-            x_offset = i * chamber_unit_width
-            base_x = Radius_1 + Distance_r1 + x_offset
-
-            # Upper chamber part
-            p3_1 = (base_x, Width_r1 / 2)
-            p3_2 = (base_x + Length_1 * math.cos(Angle), Width_r1 / 2 + Length_1 * math.sin(Angle))
-            segments.append((p3_1, p3_2)) # Seg 3
-
-            p4_1 = p3_2
-            p4_2 = (p4_1[0] + Length_r1, p4_1[1])
-            segments.append((p4_1, p4_2)) # Seg 4
-
-            p5_1 = p4_2
-            p5_2 = (base_x + 2 * Length_1 * math.cos(Angle) + Length_r1, Width_r1 / 2)
-            segments.append((p5_1, p5_2)) # Seg 5
-
-            # Lower chamber part
-            p7_1 = (base_x, -Width_r1 / 2)
-            p7_2 = (base_x + Length_1 * math.cos(Angle), -Width_r1 / 2 - Length_1 * math.sin(Angle))
-            segments.append((p7_1, p7_2)) # Seg 7
-
-            p8_1 = p7_2
-            p8_2 = (p8_1[0] + Length_r1, p8_1[1])
-            segments.append((p8_1, p8_2)) # Seg 8
-
-            p9_1 = p8_2
-            p9_2 = (base_x + 2 * Length_1 * math.cos(Angle) + Length_r1, -Width_r1 / 2)
-            segments.append((p9_1, p9_2)) # Seg 9
-
-            # Connecting segments to the next chamber (if not the last one)
-            if i < Number - 1:
-                segments.append((p5_2, (p5_2[0] + Distance_r2, p5_2[1]))) # Seg 6
-                segments.append((p9_2, (p9_2[0] + Distance_r2, p9_2[1]))) # Seg 10
-
-        # Outlet Channel
-        total_array_width = Number * chamber_unit_width
-        outlet_start_x = Radius_1 + Distance_r1 + total_array_width - Distance_r2
-        outlet_end_x = outlet_start_x + Distance_r1 + Distance_h
-        segments.append(((outlet_start_x,  Width_r1 / 2), (outlet_end_x,  Width_r1 / 2)))
-        segments.append(((outlet_start_x, -Width_r1 / 2), (outlet_end_x, -Width_r1 / 2)))
-
-        # Circle 2
-        c2_x = outlet_end_x + Radius_1 - Distance_h
-        circles.append(((c2_x, 0), Radius_1))
-
-        return { "circles": circles, "segments": segments }
+        return self.geometry.cache.get(self.paramValues())
         # ----------------- END OF GEOMETRY REPLACEMENT ------------------
 
     def updateModel(self):
         # --- Updated to draw the new geometry and assign patches for highlighting ---
         try:
-            self.ax.clear()
-            self.geoPatch = {k: [] for k in self.params}
-            geo = self.calculateGeometry()
-
-            # Draw circles
-            for center, radius in geo["circles"]:
-                patch = mpatches.Circle(center, radius, fill=False, edgecolor='blue', lw=1.5)
-                self.ax.add_patch(patch)
-                self.geoPatch["Radius_1"].append(patch)
-
-            # Draw segments
-            for p0, p1 in geo["segments"]:
-                line = plt.Line2D([p0[0], p1[0]], [p0[1], p1[1]], color='blue', lw=1.5)
-                self.ax.add_line(line)
-                # Simple heuristic for highlighting
-                if p0[1] == p1[1]: # Horizontal lines
-                    self.geoPatch["Width_r1"].append(line)
-                    self.geoPatch["Length_r1"].append(line)
-                else: # Slanted lines
-                    self.geoPatch["Length_1"].append(line)
-                    self.geoPatch["Angle"].append(line)
-                
-                self.geoPatch["Distance_r1"].append(line)
-                self.geoPatch["Distance_r2"].append(line)
-                self.geoPatch["Number"].append(line)
-
-            # Auto-scaling and plot finalization
-            all_x, all_y = [], []
-            for patch in self.ax.patches:
-                center, r = patch.center, patch.radius
-                all_x.extend([center[0] - r, center[0] + r]); all_y.extend([center[1] - r, center[1] + r])
-            for line in self.ax.lines:
-                x_data, y_data = line.get_data()
-                all_x.extend(x_data); all_y.extend(y_data)
-            if not all_x or not all_y: all_x, all_y = [-1, 1], [-1, 1]
-
-            pad_x = (max(all_x) - min(all_x)) * 0.1
-            pad_y = (max(all_y) - min(all_y)) * 0.1
-            pad = max(pad_x, pad_y, 1)
-            self.ax.set_xlim(min(all_x) - pad, max(all_x) + pad)
-            self.ax.set_ylim(min(all_y) - pad, max(all_y) + pad)
-            self.ax.set_aspect('equal', adjustable='box')
-            self.ax.grid(True, linestyle='--', alpha=0.5)
-            self.ax.set_title("Mixer", fontsize=14)
-            self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
-            self.canvas.draw()
+            self.snapshot = ParamSnapshot("Mixer", self.paramValues())
+            geo = self.geometry.update(self.snapshot)
+            if self.geoArtists is None:
+                self.geoArtists = draw_primitives(self.ax, geo)
+                self.ax.set_aspect('equal', adjustable='box')
+                self.ax.grid(True, linestyle='--', alpha=0.5)
+                self.ax.set_title("Mixer", fontsize=14)
+                self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
+            else:
+                self.geoArtists.update(geo, self.geometry.changed)
+            fit_view(self.ax, geo)
+            self.canvas.draw_idle()
             if self.curHlt: self.highlightComponent(self.curHlt)
             self.stsVar.set("模型更新成功 / Model updated successfully")
         except Exception as e:
@@ -307,13 +182,7 @@ class MicrochannelTool:
         try:
             filename = filedialog.asksaveasfilename(defaultextension=".dxf", filetypes=[("DXF Files", "*.dxf"), ("All Files", "*.*")], title="保存DXF / Save DXF")
             if not filename: return
-            doc = ezdxf.new('R2010'); msp = doc.modelspace()
-            geo = self.calculateGeometry()
-            for center, radius in geo["circles"]:
-                msp.add_circle(center, radius)
-            for p0, p1 in geo["segments"]:
-                msp.add_line(p0, p1)
-            doc.saveas(filename)
+            export_dxf(filename, self.calculateGeometry())
             self.stsVar.set(f"已导出DXF / DXF Exported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导出到DXF / Exported to DXF:\n{filename}")
         except Exception as e:
@@ -366,7 +235,7 @@ class MicrochannelTool:
             self.updateModel()
             if "model_name" in data:
                  self.ax.set_title(data["model_name"], fontsize=14)
-                 self.canvas.draw()
+                 self.canvas.draw_idle()
 
             self.stsVar.set(f"已导入JSON / JSON Imported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导入JSON / Imported from JSON:\n{filename}")
@@ -376,7 +245,6 @@ class MicrochannelTool:
 
     def quitApplication(self):
         # --- This section remains unchanged ---
-        plt.close('all')
         self.master.quit()
         self.master.destroy()
 
@@ -1,17 +1,16 @@
 # Copyright (c) 2025 [Grant]
 # Licensed under the MIT License.
 # See LICENSE in the project root for license information.
-import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import matplotlib.patches as mpatches
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import ezdxf
-import math
 import json
 from datetime import datetime
 
+from Microfluid_Geometry import IncrementalGeometry, ParamSnapshot
+from Microfluid_Render import draw_primitives, fit_view, export_dxf
+
 class MicrochannelTool:
     def __init__(self, master):
         self.master = master
@@ -57,8 +56,11 @@ class MicrochannelTool:
         # --- Unchanged UI and Plotting Initialization ---
         self.bigFont = ('Helvetica', 12)
         self.headerFont = ('Helvetica', 12, 'bold')
-        self.fig, self.ax = plt.subplots(figsize=(8, 6))
-        self.geoPatch = {k: [] for k in self.params}
+        self.fig = Figure(figsize=(8, 6))
+        self.ax = self.fig.add_subplot()
+        self.geoArtists = None
+        self.geometry = IncrementalGeometry("PneumaticChamberArray")
+        self.snapshot = ParamSnapshot("PneumaticChamberArray")
         self.stsVar = tk.StringVar(value="就绪 / Ready")
         self.curHlt = None
         self.entries = {}
@@ -131,155 +133,44 @@ class MicrochannelTool:
             self.params[param].set(str(self.defaults[param]))
             messagebox.showerror("错误 / Error", f"无效的数值 / Invalid number: {e}")
 
-    def getParam(self, name):
-        # --- Updated for the new calculated parameter `Distance_h` ---
-        try:
-            if name == "Distance_h":
-                radius_1 = float(self.params["Radius_1"].get())
-                width_r1 = float(self.params["Width_r1"].get())
-                v = radius_1**2 - (width_r1 / 2)**2
-                if v < 0:
-                    raise ValueError("Radius_1 must be >= Width_r1 / 2")
-                return radius_1 - math.sqrt(v)
-            else:
-                return float(self.params[name].get())
-        except (ValueError, tk.TclError) as e:
-            messagebox.showerror("参数错误 / Parameter Error", f"无法计算参数'{name}': {e}\n将使用默认值. / Could not calculate parameter '{name}': {e}\nUsing default value.")
-            if name in self.defaults:
-                self.params[name].set(str(self.defaults[name]))
-                return self.defaults[name]
-            else:
-                return 0.0
+    def paramValues(self):
+        """界面参数 -> 数值映射，作为几何内核的输入；无法解析的值恢复为默认值"""
+        values = {}
+        for name, var in self.params.items():
+            try:
+                values[name] = float(var.get())
+            except (ValueError, tk.TclError):
+                messagebox.showerror("参数错误 / Parameter Error", f"无法解析参数'{name}'\n将使用默认值.")
+                var.set(str(self.defaults[name]))
+                values[name] = self.defaults[name]
+        return values
 
     def highlightComponent(self, paramName):
         # --- This section remains unchanged ---
         self.curHlt = paramName
-        for patches in self.geoPatch.values():
-            for patch in patches:
-                if hasattr(patch, 'set_edgecolor'):
-                    patch.set_edgecolor('blue')
-                elif hasattr(patch, 'set_color'):
-                    patch.set_color('blue')
-        if paramName in self.geoPatch:
-            for patch in self.geoPatch[paramName]:
-                if hasattr(patch, 'set_edgecolor'):
-                    patch.set_edgecolor('red')
-                elif hasattr(patch, 'set_color'):
-                    patch.set_color('red')
-        self.canvas.draw()
+        if self.geoArtists is not None:
+            self.geoArtists.highlight(paramName)
         self.stsVar.set(f"已选择 / Selected: {paramName}")
 
     def calculateGeometry(self):
-        # ----------------- REPLACED GEOMETRY CALCULATION ------------------
-        # This method is entirely replaced with the new geometric logic for the chamber array.
-        Distance_r1 = self.getParam("Distance_r1")
-        Width_r1 = self.getParam("Width_r1")
-        Radius_1 = self.getParam("Radius_1")
-        Number = int(self.getParam("Number"))
-        Width_1 = self.getParam("Width_1")
-        Length_1 = self.getParam("Length_1")
-        Distance_r2 = self.getParam("Distance_r2")
-        Distance_h = self.getParam("Distance_h") # Calculated
-
-        circles = []
-        segments = []
-
-        # Circle 1
-        circles.append(((0, 0), Radius_1))
-
-        # Total width of the array structure
-        array_total_width = Number * (Width_1 + Distance_r2)
-        
-        # Circle 2
-        c2_x = Radius_1 + Distance_r1 + array_total_width + Distance_r1 + Radius_1
-        circles.append(((c2_x, 0), Radius_1))
-
-        # Segments 1 & 2 (Inlet channel)
-        segments.append(((Radius_1 - Distance_h, -Width_r1 / 2), (Radius_1 + Distance_r1, -Width_r1 / 2)))
-        segments.append(((Radius_1 - Distance_h, Width_r1 / 2), (Radius_1 + Distance_r1, Width_r1 / 2)))
-
-        # Chamber Array
-        for i in range(Number):
-            x_offset = i * (Width_1 + Distance_r2)
-            x_base = Radius_1 + Distance_r1 + x_offset
-
-            # Upper chamber part
-            segments.append(((x_base, Width_r1 / 2), (x_base, Width_r1 / 2 + Length_1))) # Seg 3
-
-            segments.append(((x_base, Width_r1 / 2 + Length_1), (x_base + Width_1, Width_r1 / 2 + Length_1))) # Seg 4
-            segments.append(((x_base + Width_1, Width_r1 / 2), (x_base + Width_1, Width_r1 / 2 + Length_1))) # Seg 5
-            
-            # Lower chamber part
-            segments.append(((x_base, -Width_r1 / 2), (x_base, -Width_r1 / 2 - Length_1))) # Seg 7
-            segments.append(((x_base, -Width_r1 / 2 - Length_1), (x_base + Width_1, -Width_r1 / 2 - Length_1))) # Seg 8
-
-            segments.append(((x_base + Width_1, -Width_r1 / 2), (x_base + Width_1, -Width_r1 / 2 - Length_1))) # Seg 9
-
-            # Connecting segments between chambers (if not the last one)
-            if i < Number - 1:
-                segments.append(((x_base + Width_1, Width_r1 / 2), (x_base + Width_1 + Distance_r2, Width_r1 / 2))) # Seg 6
-                segments.append(((x_base + Width_1, -Width_r1 / 2), (x_base + Width_1 + Distance_r2, -Width_r1 / 2))) # Seg 10
-
-        # Segments 12 & 13 (Outlet channel)
-        outlet_start_x = Radius_1 + Distance_r1 + array_total_width - Distance_r2
-        outlet_end_x = c2_x - (Radius_1 - Distance_h)
-        segments.append(((outlet_start_x, Width_r1 / 2), (outlet_end_x, Width_r1 / 2)))
-        segments.append(((outlet_start_x, -Width_r1 / 2), (outlet_end_x, -Width_r1 / 2)))
-
-        return { "circles": circles, "segments": segments }
+        return self.geometry.cache.get(self.paramValues())
         # ----------------- END OF GEOMETRY REPLACEMENT ------------------
 
     def updateModel(self):
         # --- Updated to draw the new geometry and assign patches for highlighting ---
         try:
-            self.ax.clear()
-            self.geoPatch = {k: [] for k in self.params}
-            geo = self.calculateGeometry()
-
-            # Draw circles and assign to Radius_1 for highlighting
-            for center, radius in geo["circles"]:
-                patch = mpatches.Circle(center, radius, fill=False, edgecolor='blue', lw=1.5)
-                self.ax.add_patch(patch)
-                self.geoPatch["Radius_1"].append(patch)
-
-            # Draw segments and assign for highlighting
-            # Simple heuristic for assignment
-            inlet_x_limit = self.getParam("Radius_1") + self.getParam("Distance_r1")
-            outlet_x_start = inlet_x_limit + self.getParam("Number") * (self.getParam("Width_1") + self.getParam("Distance_r2"))
-
-            for p0, p1 in geo["segments"]:
-                line = plt.Line2D([p0[0], p1[0]], [p0[1], p1[1]], color='blue', lw=1.5)
-                self.ax.add_line(line)
-                # Assign lines to parameters for highlighting
-                if p1[0] <= inlet_x_limit or p0[0] >= outlet_x_start:
-                    self.geoPatch["Distance_r1"].append(line)
-                if abs(p0[1]) == self.getParam("Width_r1")/2 and abs(p1[1]) == self.getParam("Width_r1")/2:
-                     self.geoPatch["Width_r1"].append(line)
-                if inlet_x_limit < p0[0] < outlet_x_start:
-                    self.geoPatch["Number"].append(line)
-                    self.geoPatch["Width_1"].append(line)
-                    self.geoPatch["Length_1"].append(line)
-                    self.geoPatch["Distance_r2"].append(line)
-
-            # Auto-scaling and plot finalization
-            all_x, all_y = [], []
-            for patch in self.ax.patches:
-                center, r = patch.center, patch.radius
-                all_x.extend([center[0] - r, center[0] + r]); all_y.extend([center[1] - r, center[1] + r])
-            for line in self.ax.lines:
-                x_data, y_data = line.get_data()
-                all_x.extend(x_data); all_y.extend(y_data)
-            if not all_x or not all_y: all_x, all_y = [-1, 1], [-1, 1]
-            pad_x = (max(all_x) - min(all_x)) * 0.1
-            pad_y = (max(all_y) - min(all_y)) * 0.1
-            pad = max(pad_x, pad_y, 1)
-            self.ax.set_xlim(min(all_x) - pad, max(all_x) + pad)
-            self.ax.set_ylim(min(all_y) - pad, max(all_y) + pad)
-            self.ax.set_aspect('equal', adjustable='box')
-            self.ax.grid(True, linestyle='--', alpha=0.5)
-            self.ax.set_title("PneumaticChamberArray", fontsize=14)
-            self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
-            self.canvas.draw()
+            self.snapshot = ParamSnapshot("PneumaticChamberArray", self.paramValues())
+            geo = self.geometry.update(self.snapshot)
+            if self.geoArtists is None:
+                self.geoArtists = draw_primitives(self.ax, geo)
+                self.ax.set_aspect('equal', adjustable='box')
+                self.ax.grid(True, linestyle='--', alpha=0.5)
+                self.ax.set_title("PneumaticChamberArray", fontsize=14)
+                self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
+            else:
+                self.geoArtists.update(geo, self.geometry.changed)
+            fit_view(self.ax, geo)
+            self.canvas.draw_idle()
             if self.curHlt: self.highlightComponent(self.curHlt)
             self.stsVar.set("模型更新成功 / Model updated successfully")
         except Exception as e:
@@ -291,15 +182,7 @@ class MicrochannelTool:
         try:
             filename = filedialog.asksaveasfilename(defaultextension=".dxf", filetypes=[("DXF Files", "*.dxf"), ("All Files", "*.*")], title="保存DXF / Save DXF")
             if not filename: return
-            doc = ezdxf.new('R2010'); msp = doc.modelspace()
-            geo = self.calculateGeometry()
-
-            for center, radius in geo["circles"]:
-                msp.add_circle(center, radius)
-            for p0, p1 in geo["segments"]:
-                msp.add_line(p0, p1)
-
-            doc.saveas(filename)
+            export_dxf(filename, self.calculateGeometry())
             self.stsVar.set(f"已导出DXF / DXF Exported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导出到DXF / Exported to DXF:\n{filename}")
         except Exception as e:
@@ -354,7 +237,7 @@ class MicrochannelTool:
             self.updateModel()
             if "model_name" in data:
                  self.ax.set_title(data["model_name"], fontsize=14)
-                 self.canvas.draw()
+                 self.canvas.draw_idle()
 
             self.stsVar.set(f"已导入JSON / JSON Imported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导入JSON / Imported from JSON:\n{filename}")
@@ -364,7 +247,6 @@ class MicrochannelTool:
 
     def quitApplication(self):
         # --- This section remains unchanged ---
-        plt.close('all')
         self.master.quit()
         self.master.destroy()
 
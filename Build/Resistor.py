@@ -1,16 +1,16 @@
 # Copyright (c) 2025 [Grant]
 # Licensed under the MIT License.
 # See LICENSE in the project root for license information.import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import matplotlib.patches as mpatches
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import ezdxf
-import math
 import json
 from datetime import datetime
 
+from Microfluid_Geometry import IncrementalGeometry, ParamSnapshot
+from Microfluid_Render import draw_primitives, fit_view, export_dxf
+
 class MicrochannelTool:
     def __init__(self, master):
         self.master = master
@@ -51,8 +51,11 @@ class MicrochannelTool:
         # --- Unchanged UI and Plotting Initialization ---
         self.bigFont = ('Helvetica', 12)
         self.headerFont = ('Helvetica', 12, 'bold')
-        self.fig, self.ax = plt.subplots(figsize=(8, 6))
-        self.geoPatch = {k: [] for k in self.params}
+        self.fig = Figure(figsize=(8, 6))
+        self.ax = self.fig.add_subplot()
+        self.geoArtists = None
+        self.geometry = IncrementalGeometry("Resistor")
+        self.snapshot = ParamSnapshot("Resistor")
         self.stsVar = tk.StringVar(value="就绪 / Ready")
         self.curHlt = None
         self.entries = {}
@@ -130,229 +133,44 @@ class MicrochannelTool:
             self.params[param].set(str(self.defaults[param]))
             messagebox.showerror("错误 / Error", f"无效的数值 / Invalid number: {e}")
 
-    def getParam(self, name):
-        # --- Updated to get new parameters and calculate derived ones ---
-        try:
-            # --- Calculated Parameters ---
-            if name == "Distance_1":
-                Radius_1 = float(self.params["Radius_1"].get())
-                Width_Res = float(self.params["Width_Res"].get())
-                val_inside_sqrt = Radius_1**2 - (Width_Res/2)**2
-                if val_inside_sqrt < 0:
-                    raise ValueError("Radius_1 must be >= Width_Res / 2")
-                return Radius_1 - math.sqrt(val_inside_sqrt)
-            elif name == "Length_v1":
-                Length_v2 = float(self.params["Length_v2"].get())
-                Width_Res = float(self.params["Width_Res"].get())
-                return Length_v2 / 2 - Width_Res * 3 / 2
-            # --- User Input Parameters ---
-            elif name == "Number":
-                 # Ensure Number is an integer for loops and calculations
-                return int(float(self.params[name].get()))
-            else:
-                return float(self.params[name].get())
-        except (ValueError, tk.TclError) as e:
-            messagebox.showerror("参数错误 / Parameter Error", f"无法计算或获取参数'{name}': {e}\n将使用默认值.")
-            if name in self.defaults:
-                self.params[name].set(str(self.defaults[name]))
-                return self.defaults[name]
-            else: return 0.0
+    def paramValues(self):
+        """界面参数 -> 数值映射，作为几何内核的输入；无法解析的值恢复为默认值"""
+        values = {}
+        for name, var in self.params.items():
+            try:
+                values[name] = float(var.get())
+            except (ValueError, tk.TclError):
+                messagebox.showerror("参数错误 / Parameter Error", f"无法解析参数'{name}'\n将使用默认值.")
+                var.set(str(self.defaults[name]))
+                values[name] = self.defaults[name]
+        return values
 
     def highlightComponent(self, paramName):
         # --- This section remains unchanged ---
         self.curHlt = paramName
-        for patches in self.geoPatch.values():
-            for patch in patches:
-                if hasattr(patch, 'set_edgecolor'): patch.set_edgecolor('blue')
-                elif hasattr(patch, 'set_color'): patch.set_color('blue')
-        if paramName in self.geoPatch:
-            for patch in self.geoPatch[paramName]:
-                if hasattr(patch, 'set_edgecolor'): patch.set_edgecolor('red')
-                elif hasattr(patch, 'set_color'): patch.set_color('red')
-        self.canvas.draw()
+        if self.geoArtists is not None:
+            self.geoArtists.highlight(paramName)
         self.stsVar.set(f"已选择 / Selected: {paramName}")
 
     def calculateGeometry(self):
-        # ----------------- REPLACED GEOMETRY CALCULATION ------------------
-        # This method is entirely replaced with the serpentine resistor logic.
-        
-        # Get all required parameter values first
-        Radius_1 = self.getParam("Radius_1")
-        Length_r1 = self.getParam("Length_r1")
-        Width_Res = self.getParam("Width_Res")
-        Number = self.getParam("Number")
-        Length_v2 = self.getParam("Length_v2")
-        # Get calculated parameters
-        Distance_1 = self.getParam("Distance_1")
-        Length_v1 = self.getParam("Length_v1")
-
-        circles, arcs, segments = [], [], []
-
-        # --- Start of Geometry Definition (with comments as requested) ---
-
-        # 圆1 / Circle 1
-        circles.append(((0, 0), Radius_1))
-
-        # 圆2 / Circle 2
-        x_c2 = 2 * Radius_1 + Length_r1 + 3 * Width_Res + Width_Res * 4 * (Number - 1) + Length_r1
-        circles.append(((x_c2, 0), Radius_1))
-
-        # The following geometry definitions are implemented inside a loop to handle 'Number' of repetitions
-        for i in range(Number-1):
-            x_offset = i * (Width_Res * 4)
-
-            # 圆弧1 / Arc 1 (part of repeating unit)
-            # This is the bottom-left U-turn (inner arc)
-            arc1_center_x = Radius_1 + Length_r1 + 3 * Width_Res / 2 + x_offset
-            arc1_center_y = -Width_Res / 2 + Length_v1
-            arcs.append(((arc1_center_x, arc1_center_y), Width_Res / 2, 0, 180))
-
-            # 圆弧2 / Arc 2 (part of repeating unit)
-            # This is the bottom-left U-turn (outer arc)
-            arcs.append(((arc1_center_x, arc1_center_y), 3 * Width_Res / 2, 0, 180))
-
-            # 圆弧3 / Arc 3 (part of repeating unit)
-            # This is the top-right U-turn (inner arc)
-            arc3_center_x = Radius_1 + Length_r1 + 3 * Width_Res + Width_Res / 2 + x_offset
-            arc3_center_y = Width_Res / 2 - Length_v1
-            arcs.append(((arc3_center_x, arc3_center_y), Width_Res / 2, -180, 0))
-
-            # 圆弧4 / Arc 4 (part of repeating unit)
-            # This is the top-right U-turn (outer arc)
-            arcs.append(((arc3_center_x, arc3_center_y), 3 * Width_Res / 2, -180, 0))
-
-            # 线段5 / Segment 5 (part of repeating unit)
-            p1 = (Radius_1 + Length_r1 + 2 * Width_Res + x_offset, Width_Res / 2 - Length_v1)
-            p2 = (Radius_1 + Length_r1 + 2 * Width_Res + x_offset, -Width_Res / 2 + Length_v1)
-            segments.append((p1, p2))
-            
-            # 线段6 / Segment 6 (part of repeating unit)
-            p1 = (Radius_1 + Length_r1 + 3 * Width_Res + x_offset, Width_Res / 2 - Length_v1)
-            p2 = (Radius_1 + Length_r1 + 3 * Width_Res + x_offset, -Width_Res / 2 + Length_v1)
-            segments.append((p1, p2))
-
-            # 线段7 / Segment 7 (part of repeating unit)
-            p1 = (Radius_1 + Length_r1 + 3 * Width_Res + Width_Res + x_offset, Width_Res / 2 - Length_v1)
-            p2 = (Radius_1 + Length_r1 + 3 * Width_Res + Width_Res + x_offset, -Width_Res / 2 + Length_v1)
-            segments.append((p1, p2))
-
-            # 线段8 / Segment 8 (part of repeating unit)
-            p1 = (Radius_1 + Length_r1 + 3 * Width_Res + 2 * Width_Res + x_offset, Width_Res / 2 - Length_v1)
-
-            p2 = (Radius_1 + Length_r1 + 3 * Width_Res + 2 * Width_Res + x_offset, -Width_Res / 2 + Length_v1)
-            segments.append((p1, p2))
-
-        # --- Static geometry (inlets/outlets and connectors) ---
-        # 圆弧5 / Arc 5
-        arc5_center_x = Radius_1 + Length_r1 + 3 * Width_Res / 2 + Width_Res * 4 * (Number - 1)
-        arc5_center_y = -Width_Res / 2 + Length_v1
-        arcs.append(((arc5_center_x, arc5_center_y), Width_Res / 2, 0, 180))
-
-        # 圆弧6 / Arc 6
-        arc6_center_x = Radius_1 + Length_r1 + 3 * Width_Res / 2 + Width_Res * 4 * (Number - 1)
-        arc6_center_y = -Width_Res / 2 + Length_v1
-        arcs.append(((arc6_center_x, arc6_center_y), 3 * Width_Res / 2, 0, 180))
-
-        # 圆弧7 / Arc 7
-        arc7_center_x = Radius_1 + Length_r1 - Width_Res / 2
-        arc7_center_y = Width_Res / 2 + Width_Res / 2
-        arcs.append(((arc7_center_x, arc7_center_y), Width_Res / 2, -90, 0))
-
-        # 圆弧8 / Arc 8
-        arcs.append(((arc7_center_x, arc7_center_y), 3 * Width_Res / 2, -90, 0))
-
-        # 圆弧9 / Arc 9
-        arc9_center_x = Radius_1 + Length_r1 + 3 * Width_Res + Width_Res * 4 * (Number - 1) + Width_Res / 2
-        arc9_center_y = Width_Res / 2 + Width_Res / 2
-        arcs.append(((arc9_center_x, arc9_center_y), Width_Res / 2, 180, 270))
-
-        # 圆弧10 / Arc 10
-        arcs.append(((arc9_center_x, arc9_center_y), 3 * Width_Res / 2, 180, 270))
-        
-        # 线段1 / Segment 1
-        segments.append(((Radius_1, Width_Res / 2), (Radius_1 + Length_r1 - Width_Res / 2, Width_Res / 2)))
-
-        # 线段2 / Segment 2
-        segments.append(((Radius_1, -Width_Res / 2), (Radius_1 + Length_r1 - Width_Res / 2, -Width_Res / 2)))
-
-        # 线段3 / Segment 3
-        segments.append(((Radius_1 + Length_r1, Width_Res), (Radius_1 + Length_r1, -Width_Res / 2 + Length_v1)))
-
-        # 线段4 / Segment 4
-        segments.append(((Radius_1 + Length_r1 + Width_Res, -Width_Res / 2 + Width_Res * 3 / 2), (Radius_1 + Length_r1 + Width_Res, -Width_Res / 2 + Length_v1)))
-
-        # 线段9 / Segment 9
-        seg9_x = Radius_1 + Length_r1 + 2 * Width_Res + Width_Res * 4 * (Number - 1)
-        segments.append(((seg9_x, Width_Res), (seg9_x, -Width_Res / 2 + Length_v1)))
-        
-        # 线段10 / Segment 10
-        seg10_x = Radius_1 + Length_r1 + 3 * Width_Res + Width_Res * 4 * (Number - 1)
-        # Corrected a typo in your spec: --Width_Res/2 -> -Width_Res/2
-        segments.append(((seg10_x, Width_Res), (seg10_x, -Width_Res / 2 + Length_v1)))
-
-        # 线段11 / Segment 11
-        seg11_start_x = Radius_1 + Length_r1 + 3 * Width_Res + Width_Res * 4 * (Number - 1) + Width_Res / 2
-        seg11_end_x = x_c2 - Radius_1
-        segments.append(((seg11_start_x, Width_Res / 2), (seg11_end_x, Width_Res / 2)))
-        
-        # 线段12 / Segment 12
-        seg12_end_x = x_c2 - Radius_1
-        segments.append(((seg11_start_x, -Width_Res / 2), (seg12_end_x, -Width_Res / 2)))
-        
-        # Note: The original spec for Arc 5, 6 and Segments 9, 10 appears to be describing the connections
-        # for the *last* repeating unit. The loop above now handles all repeating units correctly,
-        # and the static connectors (like Seg 3,4 and 9,10) are handled outside the loop.
-        # The provided formulas for Arc 5,6 were identical to Arc 1,2 but with the (Number-1) offset,
-        # which is now implemented by the loop.
-
-        return {"circles": circles, "arcs": arcs, "segments": segments}
+        return self.geometry.cache.get(self.paramValues())
         # ----------------- END OF GEOMETRY REPLACEMENT ------------------
 
     def updateModel(self):
         # --- This section remains largely unchanged, it just draws what calculateGeometry returns ---
         try:
-            self.ax.clear()
-            self.geoPatch = {k: [] for k in self.params}
-            geo = self.calculateGeometry()
-
-            for center, radius in geo["circles"]:
-                patch = mpatches.Circle(center, radius, fill=False, edgecolor='blue', lw=1.5)
-                self.ax.add_patch(patch); self.geoPatch["Radius_1"].append(patch)
-
-            for center, radius, t1, t2 in geo["arcs"]:
-                patch = mpatches.Arc(center, 2*radius, 2*radius, angle=0, theta1=t1, theta2=t2, edgecolor='blue', lw=1.5)
-                self.ax.add_patch(patch); self.geoPatch["Width_Res"].append(patch) # Arcs are related to Width_Res
-
-            for p0, p1 in geo["segments"]:
-                line = plt.Line2D([p0[0], p1[0]], [p0[1], p1[1]], color='blue', lw=1.5)
-                self.ax.add_line(line)
-                # Simple heuristic for highlighting
-                self.geoPatch["Length_r1"].append(line)
-                self.geoPatch["Length_v2"].append(line)
-                self.geoPatch["Number"].append(line)
-
-            # Auto-scaling and plot finalization
-            all_x, all_y = [], []
-            for patch in self.ax.patches:
-                if isinstance(patch, mpatches.Circle):
-                    center, r = patch.center, patch.radius
-                    all_x.extend([center[0] - r, center[0] + r]); all_y.extend([center[1] - r, center[1] + r])
-                elif isinstance(patch, mpatches.Arc):
-                    center, w, h = patch.center, patch.width, patch.height
-                    all_x.extend([center[0] - w/2, center[0] + w/2]); all_y.extend([center[1] - h/2, center[1] + h/2])
-            for line in self.ax.lines:
-                x_data, y_data = line.get_data()
-                all_x.extend(x_data); all_y.extend(y_data)
-            if not all_x or not all_y: all_x, all_y = [-1, 1], [-1, 1]
-            pad = max((max(all_x)-min(all_x))*0.1, (max(all_y)-min(all_y))*0.1, 1)
-            self.ax.set_xlim(min(all_x) - pad, max(all_x) + pad)
-
-            self.ax.set_ylim(min(all_y) - pad, max(all_y) + pad)
-            self.ax.set_aspect('equal', adjustable='box')
-            self.ax.grid(True, linestyle='--', alpha=0.5)
-            self.ax.set_title("Resistor", fontsize=14)
-            self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
-            self.canvas.draw()
+            self.snapshot = ParamSnapshot("Resistor", self.paramValues())
+            geo = self.geometry.update(self.snapshot)
+            if self.geoArtists is None:
+                self.geoArtists = draw_primitives(self.ax, geo)
+                self.ax.set_aspect('equal', adjustable='box')
+                self.ax.grid(True, linestyle='--', alpha=0.5)
+                self.ax.set_title("Resistor", fontsize=14)
+                self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
+            else:
+                self.geoArtists.update(geo, self.geometry.changed)
+            fit_view(self.ax, geo)
+            self.canvas.draw_idle()
             if self.curHlt: self.highlightComponent(self.curHlt)
             self.stsVar.set("模型更新成功 / Model updated successfully")
         except Exception as e:
@@ -364,14 +182,7 @@ class MicrochannelTool:
         try:
             filename = filedialog.asksaveasfilename(defaultextension=".dxf", filetypes=[("DXF Files", "*.dxf"), ("All Files", "*.*")], title="保存DXF / Save DXF")
             if not filename: return
-            doc = ezdxf.new('R2010'); msp = doc.modelspace()
-            geo = self.calculateGeometry()
-
-            for center, radius in geo["circles"]: msp.add_circle(center, radius)
-            for center, radius, t1, t2 in geo["arcs"]: msp.add_arc(center, radius, t1, t2)
-            for p0, p1 in geo["segments"]: msp.add_line(p0, p1)
-
-            doc.saveas(filename)
+            export_dxf(filename, self.calculateGeometry())
             self.stsVar.set(f"已导出DXF / DXF Exported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导出到DXF / Exported to DXF:\n{filename}")
         except Exception as e:
@@ -413,7 +224,7 @@ class MicrochannelTool:
             for key, value in imported_params.items():
                 if key in self.params: self.params[key].set(str(value))
             self.updateModel()
-            if "model_name" in data: self.ax.set_title(data["model_name"], fontsize=14); self.canvas.draw()
+            if "model_name" in data: self.ax.set_title(data["model_name"], fontsize=14); self.canvas.draw_idle()
             self.stsVar.set(f"已导入JSON / JSON Imported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导入JSON / Imported from JSON:\n{filename}")
         except Exception as e:
@@ -422,7 +233,6 @@ class MicrochannelTool:
 
     def quitApplication(self):
         # --- This section remains unchanged ---
-        plt.close('all')
         self.master.quit()
         self.master.destroy()
 
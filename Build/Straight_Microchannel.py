@@ -1,11 +1,8 @@
 # Copyright (c) 2025 [Grant]
 # Licensed under the MIT License.
 # See LICENSE in the project root for license information.
-import numpy as np
 
-import matplotlib.pyplot as plt
-
-import matplotlib.patches as mpatches
+from matplotlib.figure import Figure
 
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 
@@ -17,9 +14,9 @@ from datetime import datetime
 
 import json
 
-import ezdxf
 
-import math
+from Microfluid_Geometry import IncrementalGeometry, ParamSnapshot
+from Microfluid_Render import draw_primitives, fit_view, export_dxf
 
 # ────────────────────────── 主工具类 ────────────────────────────
 
@@ -64,8 +61,11 @@ class GeometryTool:
         # ─── 4. 绘图与状态变量 ───
 
         self.bigFont = ('Helvetica', 12)
-        self.fig, self.ax = plt.subplots(figsize=(8, 6))
-        self.geoPatch = {k: [] for k in self.params}
+        self.fig = Figure(figsize=(8, 6))
+        self.ax = self.fig.add_subplot()
+        self.geoArtists = None
+        self.geometry = IncrementalGeometry("Straight_Microchannel")
+        self.snapshot = ParamSnapshot("Straight_Microchannel")
         self.stsVar   = tk.StringVar(value="就绪 / Ready")
         self.curHlt   = None
 
@@ -139,100 +139,47 @@ class GeometryTool:
             self.params[p].set(str(self.defaults[p]))
             messagebox.showerror("错误 / Error","无效数字 / Invalid number")
 
-    def getParam(self, name:str)->float:
-        if name in self.params:
-            return float(self.params[name].get())
-        # 计算 Dx = sqrt(R^2 - (W/2)^2)
-        if name == "Dx":
-            R = self.getParam("cirDia")/2
-
-            W = self.getParam("recWid")
-            return math.sqrt(max(R**2 - (W/2)**2, 0))
-        return 0.0
+    def paramValues(self):
+        """界面参数 -> 数值映射，作为几何内核的输入；无法解析的值恢复为默认值"""
+        values = {}
+        for name, var in self.params.items():
+            try:
+                values[name] = float(var.get())
+            except (ValueError, tk.TclError):
+                messagebox.showerror("参数错误 / Parameter Error", f"无法解析参数'{name}'\n将使用默认值.")
+                var.set(str(self.defaults[name]))
+                values[name] = self.defaults[name]
+        return values
 
     # ─────────────────────────── 高亮 ────────────────────────────
 
     def highlightComponent(self,key):
         self.curHlt = key
-
-        for patches in self.geoPatch.values():
-            for p in patches:
-                if hasattr(p,'set_edgecolor'): p.set_edgecolor('blue')
-                elif hasattr(p,'set_color'):  p.set_color('blue')
-        if key in self.geoPatch:
-            for p in self.geoPatch[key]:
-                if hasattr(p,'set_edgecolor'): p.set_edgecolor('red')
-                elif hasattr(p,'set_color'):  p.set_color('red')
-        self.canvas.draw()
+        if self.geoArtists is not None:
+            self.geoArtists.highlight(key)
         self.stsVar.set(f"已选择 / Selected: {key}")
 
     # ────────────────────── 几何计算（核心） ─────────────────────
 
     def calculateGeometry(self):
-        # 基本量
-
-        R   = self.getParam("cirDia")/2
-
-        W   = self.getParam("recWid")
-        L   = self.getParam("recLen")
-        Dx  = self.getParam("Dx")
-
-        # 圆心 X
-
-        xL = -L/2 - R
-
-        xR =  L/2 + R
-
-        # ─── primitives ───
-
-        circles  = [((xL,0), R), ((xR,0), R)]
-        arcs     = []                      # 本模型没有圆弧独立对象
-
-        segments = [
-            ((xL+Dx,  W/2), (xR-Dx,  W/2)),   # 上边
-
-            ((xL+Dx, -W/2), (xR-Dx, -W/2)),   # 下边
-
-        ]
-        return {"circles":circles,"arcs":arcs,"segments":segments,"rectangles":[]}
+        return self.geometry.cache.get(self.paramValues())
 
     # ─────────────────────────── 更新绘图 ───────────────────────────
 
     def updateModel(self):
         try:
-            self.ax.clear()
-            self.geoPatch = {k: [] for k in self.params}
-            geo = self.calculateGeometry()
-
-            # 画圆
-
-            for ctr,r in geo["circles"]:
-                c = mpatches.Circle(ctr,r,fill=False,edgecolor='blue',lw=1.5)
-                self.ax.add_patch(c); self.geoPatch["cirDia"].append(c)
-
-            # 画线
-
-            for p0,p1 in geo["segments"]:
-                ln = plt.Line2D([p0[0],p1[0]],[p0[1],p1[1]],color='blue',lw=1.5)
-                self.ax.add_line(ln)
-                self.geoPatch["recWid"].append(ln); self.geoPatch["recLen"].append(ln)
-
-            # autoscale
-
-            xs,ys=[],[]
-            for p in self.ax.patches:
-                cx,cy=p.center; r=p.radius; xs+=[cx-r,cx+r]; ys+=[cy-r,cy+r]
-            for l in self.ax.lines:
-                x,y=l.get_data(); xs+=list(x); ys+=list(y)
-            if not xs: xs=ys=[-1,1]
-            pad=max((max(xs)-min(xs))*0.1,(max(ys)-min(ys))*0.1,1)
-            self.ax.set_xlim(min(xs)-pad, max(xs)+pad)
-            self.ax.set_ylim(min(ys)-pad, max(ys)+pad)
-            self.ax.set_aspect('equal', adjustable='box')
-            self.ax.grid(True, linestyle='--', alpha=0.4)
-            self.ax.set_title("Straight Microchannel")
-            self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
-            self.canvas.draw()
+            self.snapshot = ParamSnapshot("Straight_Microchannel", self.paramValues())
+            geo = self.geometry.update(self.snapshot)
+            if self.geoArtists is None:
+                self.geoArtists = draw_primitives(self.ax, geo)
+                self.ax.set_aspect('equal', adjustable='box')
+                self.ax.grid(True, linestyle='--', alpha=0.4)
+                self.ax.set_title("Straight Microchannel")
+                self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
+            else:
+                self.geoArtists.update(geo, self.geometry.changed)
+            fit_view(self.ax, geo)
+            self.canvas.draw_idle()
             if self.curHlt: self.highlightComponent(self.curHlt)
             self.stsVar.set("模型更新成功 / Model updated successfully")
         except Exception as e:
@@ -247,11 +194,7 @@ class GeometryTool:
                                              filetypes=[("DXF","*.dxf")])
             if not f: return
 
-            doc = ezdxf.new('R2010'); msp = doc.modelspace()
-            g = self.calculateGeometry()
-            for ctr,r in g["circles"]: msp.add_circle(ctr,r)
-            for p0,p1 in g["segments"]: msp.add_line(p0,p1)
-            doc.saveas(f); self.stsVar.set(f"已导出DXF {f}")
+            export_dxf(f, self.calculateGeometry()); self.stsVar.set(f"已导出DXF {f}")
         except Exception as e:
             messagebox.showerror("Error", f"导出DXF失败: {e}")
 
@@ -290,13 +233,12 @@ class GeometryTool:
                 if k in self.params: self.params[k].set(str(v))
             self.updateModel()
             if "model_name" in data:
-                self.ax.set_title(data["model_name"]); self.canvas.draw()
+                self.ax.set_title(data["model_name"]); self.canvas.draw_idle()
             self.stsVar.set(f"已导入JSON {f}")
         except Exception as e:
             messagebox.showerror("Error", f"导入JSON失败: {e}")
 
     def quitApplication(self):
-        plt.close('all')
         self.master.quit(); self.master.destroy()
 
 # ────────────────────────── 入口 ──────────────────────────
@@ -0,0 +1,83 @@
+# Copyright (c) 2025 [Grant]
+# Licensed under the MIT License.
+# See LICENSE in the project root for license information.
+"""
+参数扫描自检 / Self-check of Microfluid_Sweep
+
+同一扫描 (同一 seed) 用不同的块大小写出 .npy 与 .npz，结果必须逐位相同；
+拉丁超立方采样还检查每个尺寸的每一层恰好有一个点。
+
+用法 / Usage:
+    python Sweep_Check.py
+    python Sweep_Check.py --samples 200000 --seed 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from Microfluid_Sweep import LHS_JITTER_BLOCK, ResistanceSweep, parse_grid_spec
+
+CHUNK_SIZES = (LHS_JITTER_BLOCK, 1000, 77777)
+
+def sweeps(samples, seed):
+    """(名称, 扫描) 列表"""
+    return [
+        ("grid", ResistanceSweep("RECT_MOD", {"w": parse_grid_spec("20:500:50"),
+                                              "h": parse_grid_spec("10:200:40"),
+                                              "l": parse_grid_spec("1000,5000,10000")})),
+        ("lhs", ResistanceSweep("RECT", {"w": (20, 500, False), "h": (10, 200, False), "l": (1e3, 1e5, True)},
+                                mode="lhs", samples=samples, seed=seed)),
+        ("lhs CYL", ResistanceSweep("CYL", {"d": (10, 300, True), "l": (1e3, 1e5, False)},
+                                    mode="lhs", samples=samples // 3, seed=seed)),
+    ]
+
+def check_sweep(sweep, tmpdir):
+    """返回发现的问题列表 (空表示通过)"""
+    problems = []
+    for ext in ("npy", "npz"):
+        results = []
+        for size in CHUNK_SIZES:
+            path = os.path.join(tmpdir, f"{size}.{ext}")
+            sweep.run(path, chunk_size=size)
+            if ext == "npy":
+                data = np.load(path)
+                results.append({name: data[name] for name in sweep.columns})
+            else:
+                with np.load(path) as data:
+                    results.append({name: data[name] for name in data.files})
+        for size, result in zip(CHUNK_SIZES[1:], results[1:]):
+            if result.keys() != results[0].keys() or any(
+                    not np.array_equal(result[name], results[0][name]) for name in result):
+                problems.append(f".{ext}: 块大小 {size} 与 {CHUNK_SIZES[0]} 的结果不同 / differs by chunk size")
+        if sweep.mode == "lhs":
+            for k, name in enumerate(sweep.dims):
+                lo, hi, log = sweep.bounds[k]
+                x = results[0][name]
+                u = (np.log(x / lo) / np.log(hi / lo)) if log else (x - lo) / (hi - lo)
+                strata = np.clip(np.floor(u * sweep.size), 0, sweep.size - 1).astype(np.int64)
+                if not np.array_equal(np.bincount(strata, minlength=sweep.size), np.ones(sweep.size)):
+                    problems.append(f".{ext}: {name} 的分层不是每层一个点 / not one point per stratum")
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="参数扫描自检 / Sweep self-check")
+    parser.add_argument("--samples", type=int, default=150000, help="拉丁超立方采样点数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, sweep in sweeps(args.samples, args.seed):
+            problems = check_sweep(sweep, tmpdir)
+            print(f"{name:<12}{'ok' if not problems else 'FAILED'}  ({sweep.size:,} 点 / points)")
+            for msg in problems:
+                print(f"    {msg}")
+            failed |= bool(problems)
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
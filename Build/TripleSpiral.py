@@ -1,17 +1,16 @@
 # Copyright (c) 2025 [Grant]
 # Licensed under the MIT License.
 # See LICENSE in the project root for license information.
-import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import matplotlib.patches as mpatches
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import ezdxf
-import math
 import json
 from datetime import datetime
 
+from Microfluid_Geometry import IncrementalGeometry, ParamSnapshot
+from Microfluid_Render import draw_primitives, fit_view, export_dxf
+
 class MicrochannelTool:
     def __init__(self, master):
         self.master = master
@@ -52,8 +51,11 @@ class MicrochannelTool:
 
         self.bigFont = ('Helvetica', 12)
         self.headerFont = ('Helvetica', 12, 'bold')
-        self.fig, self.ax = plt.subplots(figsize=(8, 6))
-        self.geoPatch = {k: [] for k in self.params}
+        self.fig = Figure(figsize=(8, 6))
+        self.ax = self.fig.add_subplot()
+        self.geoArtists = None
+        self.geometry = IncrementalGeometry("TripleSpiral")
+        self.snapshot = ParamSnapshot("TripleSpiral")
         self.stsVar = tk.StringVar(value="就绪 / Ready")
         self.curHlt = None
         self.entries = {}
@@ -131,188 +133,44 @@ class MicrochannelTool:
             self.params[param].set(str(self.defaults[param]))
             messagebox.showerror("错误 / Error", f"无效的数值 / Invalid number: {e}")
 
-    def getParam(self, name):
-        # --- This section remains unchanged ---
-        try:
-            if name == "Distance_1":
-                radius_1 = float(self.params["Radius_1"].get())
-                width_1 = float(self.params["Width_1"].get())
-                v = radius_1**2 - (width_1 / 2)**2
-                if v < 0:
-                    raise ValueError("Radius_1 must be >= Width_1 / 2")
-                return radius_1 - math.sqrt(v)
-            elif name == "Distance_2":
-                width_1 = float(self.params["Width_1"].get())
-                circle = int(float(self.params["Circle"].get()))
-                return width_1 * 2 * circle
-            elif name == "Angle":
-                return math.radians(float(self.params["Angle"].get()))
-            else:
-                return float(self.params[name].get())
-        except (ValueError, tk.TclError) as e:
-            messagebox.showerror("参数错误 / Parameter Error", f"无法计算参数'{name}': {e}\n将使用默认值. / Could not calculate parameter '{name}': {e}\nUsing default value.")
-            if name in self.defaults:
-                self.params[name].set(str(self.defaults[name]))
-                return self.defaults[name]
-            else:
-                return 0.0
+    def paramValues(self):
+        """界面参数 -> 数值映射，作为几何内核的输入；无法解析的值恢复为默认值"""
+        values = {}
+        for name, var in self.params.items():
+            try:
+                values[name] = float(var.get())
+            except (ValueError, tk.TclError):
+                messagebox.showerror("参数错误 / Parameter Error", f"无法解析参数'{name}'\n将使用默认值.")
+                var.set(str(self.defaults[name]))
+                values[name] = self.defaults[name]
+        return values
 
     def highlightComponent(self, paramName):
         # --- This section remains unchanged ---
         self.curHlt = paramName
-        for patches in self.geoPatch.values():
-            for patch in patches:
-                if hasattr(patch, 'set_edgecolor'):
-                    patch.set_edgecolor('blue')
-                elif hasattr(patch, 'set_color'):
-                    patch.set_color('blue')
-        if paramName in self.geoPatch:
-            for patch in self.geoPatch[paramName]:
-                if hasattr(patch, 'set_edgecolor'):
-                    patch.set_edgecolor('red')
-                elif hasattr(patch, 'set_color'):
-                    patch.set_color('red')
-        self.canvas.draw()
+        if self.geoArtists is not None:
+            self.geoArtists.highlight(paramName)
         self.stsVar.set(f"已选择 / Selected: {paramName}")
 
     def calculateGeometry(self):
-        # --- THIS METHOD IS UPDATED WITH THE MISSING LINE ---
-        Radius_1 = self.getParam("Radius_1")
-        Width_1 = self.getParam("Width_1")
-        Circle = int(self.getParam("Circle"))
-        Distance_3 = self.getParam("Distance_3")
-        Length_r1 = self.getParam("Length_r1")
-        Length_v1 = self.getParam("Length_v1")
-        Angle = self.getParam("Angle")
-        Length_Out = self.getParam("Length_Out")
-        Distance_1 = self.getParam("Distance_1")
-        Distance_2 = self.getParam("Distance_2")
-
-        c1_center = (0, -Width_1/2 - Length_v1 - Radius_1)
-        c2_x = Width_1/2 + Distance_2 + Length_v1 + (Length_Out + Radius_1) * math.cos(Angle) + Width_1 * math.sin(Angle) / 2
-        c2_y = Distance_2 + Width_1/2 + (Length_Out + Radius_1) * math.sin(Angle) - Width_1 * math.cos(Angle) / 2
-        c2_center = (c2_x, c2_y)
-        c3_x = c2_x
-        c3_y = Distance_2 - Width_1/2 - (Radius_1 + Length_Out) * math.sin(Angle) + Width_1 * math.cos(Angle) / 2
-        c3_center = (c3_x, c3_y)
-        c4_center = (Width_1/2 + Distance_2 + Length_v1 + Length_Out + Radius_1, Distance_2)
-        circles = [(c1_center, Radius_1), (c2_center, Radius_1), (c3_center, Radius_1), (c4_center, Radius_1)]
-
-        arc_center = (Length_r1/2, -Width_1/2 - Length_v1/2 - Distance_1/2 + (Length_v1 + Distance_1) / 2)
-        arc_radius = Width_1
-        arc_theta1 = 90
-        arc_theta2 = 180
-        arcs = [(arc_center, arc_radius, arc_theta1, arc_theta2)]
-
-        segments = []
-        seg1_p0 = (Length_r1/2, -Width_1/2 - Length_v1/2 - Distance_1/2 - (Length_v1 + Distance_1) / 2)
-        seg1_p1 = (Length_r1/2, -Width_1/2 - Length_v1/2 - Distance_1/2 + (Length_v1 + Distance_1) / 2)
-        segments.append((seg1_p0, seg1_p1))
-        seg2_p0 = (-Length_r1/2, seg1_p0[1])
-        seg2_p1 = (-Length_r1/2, seg1_p1[1])
-        segments.append((seg2_p0, seg2_p1))
-        seg3_p0 = (Width_1/2, Distance_2 + Width_1/2)
-        seg3_p1 = (Width_1/2 + Distance_2 + Length_v1, Distance_2 + Width_1/2)
-        segments.append((seg3_p0, seg3_p1))
-        seg4_p0 = (Width_1/2, Distance_2 - Width_1/2)
-        seg4_p1 = (Width_1/2 + Distance_2 + Length_v1, Distance_2 - Width_1/2)
-        segments.append((seg4_p0, seg4_p1))
-        seg5_p0 = (Width_1/2 + Distance_2 + Length_v1 + Width_1 / math.sin(Angle), Distance_2 - Width_1/2)
-        seg5_p1 = (Width_1/2 + Distance_2 + Length_v1 + Length_Out + Distance_1, Distance_2 - Width_1/2)
-        segments.append((seg5_p0, seg5_p1))
-        seg6_p0 = (Width_1/2 + Distance_2 + Length_v1 + (Distance_1 + Length_Out) * math.cos(Angle), Distance_2 - Width_1/2 - (Distance_1 + Length_Out) * math.sin(Angle))
-        seg6_p1 = (Width_1/2 + Distance_2 + Length_v1, Distance_2 - Width_1/2)
-        segments.append((seg6_p0, seg6_p1))
-        segments.append((seg6_p1, seg6_p0))
-        seg8_p0 = (Width_1/2 + Distance_2 + Length_v1 + Width_1 / math.sin(Angle), Distance_2 + Width_1/2)
-        seg8_p1 = (Width_1/2 + Distance_2 + Length_v1 + Length_Out + Distance_1, Distance_2 + Width_1/2)
-        segments.append((seg8_p0, seg8_p1))
-        seg9_p0 = (Width_1/2 + Distance_2 + Length_v1 + Width_1 / math.sin(Angle), Distance_2 + Width_1/2)
-        seg9_p1 = (Width_1/2 + Distance_2 + Length_v1 + (Distance_1 + Length_Out) * math.cos(Angle) + Width_1 * math.sin(Angle), Distance_2 + Width_1/2 + (Distance_1 + Length_Out) * math.sin(Angle) - Width_1 * math.cos(Angle))
-        segments.append((seg9_p0, seg9_p1))
-        seg10_p0 = (Width_1/2 + Distance_2 + Length_v1 + Width_1 / math.sin(Angle), Distance_2 - Width_1/2)
-
-        seg10_p1 = (Width_1/2 + Distance_2 + Length_v1 + (Distance_1 + Length_Out) * math.cos(Angle) + Width_1 * math.sin(Angle), Distance_2 - Width_1/2 - (Distance_1 + Length_Out) * math.sin(Angle) + Width_1 * math.cos(Angle))
-        segments.append((seg10_p0, seg10_p1))
-
-        # *** ADDED MISSING LINE AS PER YOUR REQUEST ***
-        missing_line_p0 = (Width_1/2 + Distance_2 + Length_v1, Distance_2 + Width_1/2)
-        missing_line_p1 = (Width_1/2 + Distance_2 + Length_v1 + (Distance_1 + Length_Out) * math.cos(Angle), Distance_2 + Width_1/2 + (Distance_1 + Length_Out) * math.sin(Angle))
-        segments.append((missing_line_p0, missing_line_p1))
-        
-        spiral1_pts = []
-        spiral2_pts = []
-        x_offset = Length_r1 / 2
-        y_offset = -Distance_3 - Width_1 / 2
-        num_points = max(100, Circle * 50)
-        for s in np.linspace(0, 1, num_points):
-            t = 2 * math.pi * s * Circle
-            r1 = Distance_2 * s + Distance_3 + Width_1
-            r2 = Distance_2 * s + Distance_3
-            x1 = x_offset + math.sin(t) * r1
-            y1 = y_offset + math.cos(t) * r1
-            spiral1_pts.append((x1, y1))
-            x2 = x_offset + math.sin(t) * r2
-            y2 = y_offset + math.cos(t) * r2
-            spiral2_pts.append((x2, y2))
-            
-        return {
-            "circles": circles, "arcs": arcs, "segments": segments,
-            "spirals": [spiral1_pts, spiral2_pts]
-        }
+        return self.geometry.cache.get(self.paramValues())
 
     def updateModel(self):
         # --- This section remains unchanged ---
         try:
-            self.ax.clear()
-            self.geoPatch = {k: [] for k in self.params}
-            geo = self.calculateGeometry()
-            for center, radius in geo["circles"]:
-                patch = mpatches.Circle(center, radius, fill=False, edgecolor='blue', lw=1.5)
-                self.ax.add_patch(patch)
-                self.geoPatch["Radius_1"].append(patch)
-            for center, radius, t1, t2 in geo["arcs"]:
-                patch = mpatches.Arc(center, 2*radius, 2*radius, angle=0, theta1=t1, theta2=t2, edgecolor='blue', lw=1.5)
-                self.ax.add_patch(patch)
-                self.geoPatch["Width_1"].append(patch)
-                self.geoPatch["Length_v1"].append(patch)
-            for p0, p1 in geo["segments"]:
-                line = plt.Line2D([p0[0], p1[0]], [p0[1], p1[1]], color='blue', lw=1.5)
-                self.ax.add_line(line)
-                if abs(p0[0]) <= self.getParam("Length_r1")/2 or abs(p1[0]) <= self.getParam("Length_r1")/2:
-                    self.geoPatch["Length_r1"].append(line)
-                if p0[0] > 0 and p1[0] > 0:
-                     self.geoPatch["Length_Out"].append(line)
-                     self.geoPatch["Angle"].append(line)
-                self.geoPatch["Width_1"].append(line)
-            for points in geo["spirals"]:
-                if points:
-                    x_pts, y_pts = zip(*points)
-                    line = plt.Line2D(x_pts, y_pts, color='blue', lw=1.5)
-                    self.ax.add_line(line)
-                    self.geoPatch["Circle"].append(line)
-                    self.geoPatch["Distance_3"].append(line)
-            all_x, all_y = [], []
-            for patch in self.ax.patches:
-                if isinstance(patch, mpatches.Circle):
-                    center, r = patch.center, patch.radius
-                    all_x.extend([center[0] - r, center[0] + r]); all_y.extend([center[1] - r, center[1] + r])
-                elif isinstance(patch, mpatches.Arc):
-                    center, w, h = patch.center, patch.width, patch.height
-                    all_x.extend([center[0] - w/2, center[0] + w/2]); all_y.extend([center[1] - h/2, center[1] + h/2])
-            for line in self.ax.lines:
-                x_data, y_data = line.get_data()
-                all_x.extend(x_data); all_y.extend(y_data)
-            if not all_x or not all_y: all_x, all_y = [-1, 1], [-1, 1]
-            pad = max((max(all_x)-min(all_x))*0.1, (max(all_y)-min(all_y))*0.1, 1)
-            self.ax.set_xlim(min(all_x) - pad, max(all_x) + pad)
-            self.ax.set_ylim(min(all_y) - pad, max(all_y) + pad)
-
-            self.ax.set_aspect('equal', adjustable='box')
-            self.ax.grid(True, linestyle='--', alpha=0.5)
-            self.ax.set_title("TripleSpiral", fontsize=14)
-            self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
-            self.canvas.draw()
+            self.snapshot = ParamSnapshot("TripleSpiral", self.paramValues())
+            geo = self.geometry.update(self.snapshot)
+            if self.geoArtists is None:
+                self.geoArtists = draw_primitives(self.ax, geo)
+
+                self.ax.set_aspect('equal', adjustable='box')
+                self.ax.grid(True, linestyle='--', alpha=0.5)
+                self.ax.set_title("TripleSpiral", fontsize=14)
+                self.ax.set_xlabel("X (mm)"); self.ax.set_ylabel("Y (mm)")
+            else:
+                self.geoArtists.update(geo, self.geometry.changed)
+            fit_view(self.ax, geo)
+            self.canvas.draw_idle()
             if self.curHlt: self.highlightComponent(self.curHlt)
             self.stsVar.set("模型更新成功 / Model updated successfully")
         except Exception as e:
@@ -324,18 +182,7 @@ class MicrochannelTool:
         try:
             filename = filedialog.asksaveasfilename(defaultextension=".dxf", filetypes=[("DXF Files", "*.dxf"), ("All Files", "*.*")], title="保存DXF / Save DXF")
             if not filename: return
-            doc = ezdxf.new('R2010'); msp = doc.modelspace()
-            geo = self.calculateGeometry()
-            for center, radius in geo["circles"]:
-                msp.add_circle(center, radius)
-            for center, radius, t1, t2 in geo["arcs"]:
-                msp.add_arc(center, radius, t1, t2)
-            for p0, p1 in geo["segments"]:
-                msp.add_line(p0, p1)
-            for points in geo["spirals"]:
-                if points:
-                    msp.add_lwpolyline(points)
-            doc.saveas(filename)
+            export_dxf(filename, self.calculateGeometry())
             self.stsVar.set(f"已导出DXF / DXF Exported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导出到DXF / Exported to DXF:\n{filename}")
         except Exception as e:
@@ -388,7 +235,7 @@ class MicrochannelTool:
             self.updateModel()
             if "model_name" in data:
                  self.ax.set_title(data["model_name"], fontsize=14)
-                 self.canvas.draw()
+                 self.canvas.draw_idle()
 
             self.stsVar.set(f"已导入JSON / JSON Imported: {filename}")
             messagebox.showinfo("成功 / Success", f"已导入JSON / Imported from JSON:\n{filename}")
@@ -398,7 +245,6 @@ class MicrochannelTool:
 
     def quitApplication(self):
         # --- This section remains unchanged ---
-        plt.close('all')
         self.master.quit()
         self.master.destroy()
 